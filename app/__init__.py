@@ -4,7 +4,12 @@ from config import Config
 import os
 
 
-def create_app():
+def create_app(resume_jobs=None):
+    """
+    Build the Flask app. resume_jobs (default: Config.JOB_RESUME_ON_STARTUP)
+    requeues jobs a previous worker left unfinished; a preforking server
+    passes False and resumes them in each worker after the fork instead.
+    """
     # Configure Flask to serve frontend from parent directory
     frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
     app = Flask(
@@ -14,14 +19,35 @@ def create_app():
     )
     app.config.from_object(Config)
 
+    # Report a malformed GEMINI_PRICES at startup rather than on the first call
+    from app.services.gemini_client import parse_prices
+
+    parse_prices(Config.GEMINI_PRICES)
+
+    # Likewise an unsupported NEAR_DUPLICATE_MAX_DISTANCE
+    from app.services.near_duplicates import get_near_duplicate_index
+
+    get_near_duplicate_index()
+
     # Enable CORS for frontend integration
     CORS(app)
 
     # Import and register API blueprint only
-    from app.api.routes import bp as api_bp
+    from app.api.routes import (
+        bp as api_bp,
+        resume_unfinished_jobs,
+        start_job_reclaimer,
+    )
 
     app.register_blueprint(api_bp)
 
+    # Pick up jobs a previous worker left unfinished
+    if resume_jobs is None:
+        resume_jobs = app.config.get("JOB_RESUME_ON_STARTUP")
+    if resume_jobs:
+        resume_unfinished_jobs()
+        start_job_reclaimer()
+
     # Serve frontend assets
     @app.route("/")
     def index():
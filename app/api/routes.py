@@ -1,26 +1,63 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, send_file
 from pydantic import ValidationError
+from datetime import datetime, timezone
 import time
 import uuid
 import logging
 import json
+import hmac
+import os
 import threading
 
 from app.models.data_models import (
     ArticleRequest,
     ArticleResponse,
+    BatchRequest,
+    LocationData,
 )
 from app.services.article_extractor import ArticleExtractor
-from app.services.location_extractor import LocationExtractor, RateLimitError
+from app.services.location_extractor import LocationExtractor
 from app.services.geocoding import GeocodingService
 from app.services.summarizer import EventSummarizer
 from app.services.location_processor import LocationProcessor
+from app.services.article_pipeline import ArticlePipeline, PipelineError
+from app.services.batch_processor import (
+    Batch,
+    find_batch,
+    pending_item_count,
+    start_batch,
+)
+from app.services.location_clusters import get_cluster_index
+from app.services.location_index import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    get_location_index,
+)
+from app.services.near_duplicates import get_near_duplicate_index
+from app.services.result_cache import get_result_cache
+from app.utils import metrics, profiling, tracing
+from app.utils.location_formats import (
+    MIMETYPES,
+    location_fields,
+    parse_format,
+    render_locations,
+)
 from app.utils.response_helpers import create_error_response
+from app.utils.response_encoding import (
+    compress_response,
+    json_response,
+    parse_projection,
+    project,
+)
 from app.utils.progress_tracker import (
     get_progress_tracker,
+    find_progress_tracker,
     cleanup_progress_tracker,
-    ProgressEvent,
 )
+from app.utils.job_scheduler import get_job_scheduler, QueueFullError
+from app.utils.job_store import get_job_store, JobState
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.deadline import Deadline
 from config import Config
 
 bp = Blueprint("api", __name__, url_prefix="/api")
@@ -45,70 +82,164 @@ def get_ai_services():
     return location_extractor, summarizer
 
 
+@bp.after_request
+def _compress(response):
+    """gzip or brotli for buffered responses, as the client's Accept-Encoding allows"""
+    return compress_response(response, request.headers.get("Accept-Encoding", ""))
+
+
 @bp.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "service": "waldo"})
 
 
+def _jobs_in_flight():
+    scheduler = get_job_scheduler().stats()
+    return {
+        ("sse", "queued"): scheduler["queued"],
+        ("sse", "running"): scheduler["running"],
+        ("batch", "pending"): pending_item_count(),
+    }
+
+
+metrics.REGISTRY.register(
+    metrics.Gauge(
+        "waldo_jobs_in_flight",
+        "Background jobs waiting or running, by queue",
+        ["queue", "state"],
+        callback=_jobs_in_flight,
+    )
+)
+
+
+@bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Metrics for this worker process in Prometheus text format"""
+    if not Config.METRICS_ENABLED:
+        return create_error_response(
+            "METRICS_DISABLED", "Metrics are disabled", status_code=404
+        )
+    return Response(metrics.REGISTRY.render(), content_type="text/plain; version=0.0.4")
+
+
+def _parse_last_event_id(value: str) -> int:
+    """Parse a Last-Event-ID value, treating anything invalid as a fresh stream"""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _stored_job_status(session_id: str) -> dict:
+    """
+    Status of a session without a live progress tracker in this worker: the
+    stored outcome, or queued/processing for a job another worker holds or
+    will reclaim
+    """
+    job_store = get_job_store()
+    job = job_store.get_job(session_id) if job_store else None
+
+    if job and job.state == JobState.COMPLETE:
+        return {
+            "status": "complete",
+            "message": "Complete! Results are ready",
+            "progress_percent": 100.0,
+            "total_items": len(job.result.get("locations", [])),
+        }
+    if job and job.state == JobState.FAILED:
+        return {"status": "error", "message": f"Error: {job.error}"}
+    if job and job.state == JobState.CANCELLED:
+        return {"status": "cancelled", "message": f"Cancelled: {job.error}"}
+    if job and job.state == JobState.QUEUED:
+        return {"status": "queued", "message": "Waiting in queue"}
+    if job and job.state == JobState.RUNNING:
+        return {"status": "processing", "message": "Processing article"}
+    return {"status": "error", "message": "Error: Unknown or expired session"}
+
+
 @bp.route("/progress/<session_id>", methods=["GET"])
 def progress_stream(session_id: str):
     """Server-Sent Events endpoint for real-time progress updates"""
+    # EventSource sends Last-Event-ID on reconnect; the query param covers
+    # clients that reconnect by hand
+    last_event_id = _parse_last_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+    progress_tracker = find_progress_tracker(session_id)
 
-    def event_stream():
-        progress_tracker = get_progress_tracker(session_id)
-        event_queue = []
-
-        def sse_callback(event: ProgressEvent):
-            event_queue.append(event)
+    # Nothing left to replay for a finished session - 204 tells EventSource
+    # to stop reconnecting
+    if (
+        progress_tracker
+        and progress_tracker.is_finished
+        and last_event_id >= progress_tracker.last_event_id
+    ):
+        return Response(status=204)
 
-        # Register callback to receive events
-        progress_tracker.add_callback(sse_callback)
+    def event_stream():
+        # Send initial connection confirmation
+        yield (
+            "data: "
+            + json.dumps(
+                {
+                    "status": "connected",
+                    "session_id": session_id,
+                    "timestamp": time.time(),
+                }
+            )
+            + "\n\n"
+        )
 
-        try:
-            # Send initial connection confirmation
+        if progress_tracker is None:
+            # No live tracker - report the stored outcome if the job finished
+            # before a restart, otherwise don't stream heartbeats forever. A
+            # job still alive elsewhere gets a retry hint, and EventSource
+            # reconnects until this or another worker reports it finished
+            status = _stored_job_status(session_id)
+            retry = ""
+            if status["status"] in ("queued", "processing"):
+                retry = f"retry: {int(Config.SSE_RETRY_SECONDS * 1000)}\n"
             yield (
-                "data: "
+                retry
+                + "data: "
                 + json.dumps(
-                    {
-                        "status": "connected",
-                        "session_id": session_id,
-                        "timestamp": time.time(),
-                    }
+                    {**status, "session_id": session_id, "timestamp": time.time()}
                 )
                 + "\n\n"
             )
+            return
 
-            # Stream events as they come in
+        # Replay missed events, then stream new ones as they come in
+        progress_tracker.subscribe()
+        last_sent_id = last_event_id
+        try:
             while True:
-                if event_queue:
-                    event = event_queue.pop(0)
-                    yield progress_tracker.get_sse_data(event)
-
-                    # If complete or error, break the stream after a delay
-                    if event.status.value in ["complete", "error"]:
-                        # Give frontend time to fetch results before breaking
-                        time.sleep(1)
-                        break
-                else:
+                events = progress_tracker.wait_for_events(
+                    last_sent_id, timeout=Config.SSE_HEARTBEAT_SECONDS
+                )
+                if not events:
                     # Keep connection alive with heartbeat
                     yield (
                         "data: "
                         + json.dumps({"heartbeat": True, "timestamp": time.time()})
                         + "\n\n"
                     )
-                    time.sleep(0.5)
-
-        finally:
-            # Delay cleanup to allow results retrieval
-            def delayed_cleanup():
-                time.sleep(10)  # Wait 10 seconds before cleanup
-                cleanup_progress_tracker(session_id)
+                    continue
 
-            import threading
+                for event in events:
+                    yield progress_tracker.get_sse_data(event)
+                    last_sent_id = event.event_id
 
-            cleanup_thread = threading.Thread(target=delayed_cleanup, daemon=True)
-            cleanup_thread.start()
+                # If complete, error or cancelled, break the stream after a delay
+                if events[-1].status.value in ["complete", "error", "cancelled"]:
+                    # Give frontend time to fetch results before breaking
+                    time.sleep(1)
+                    break
+        finally:
+            # Client went away mid-job - cancel unless it reconnects in time
+            if progress_tracker.unsubscribe() == 0 and not progress_tracker.is_finished:
+                _schedule_abandoned_job_cancel(session_id)
 
     return Response(
         event_stream(),
@@ -117,110 +248,330 @@ def progress_stream(session_id: str):
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Cache-Control",
+            "Access-Control-Allow-Headers": "Cache-Control, Last-Event-ID",
         },
     )
 
 
-def _process_locations_async(request_id: str, article_request: ArticleRequest):
+def _build_pipeline() -> ArticlePipeline:
+    """Assemble the pipeline from this module's services"""
+    return ArticlePipeline(
+        article_extractor,
+        location_processor,
+        get_ai_services,
+        get_result_cache(),
+        get_near_duplicate_index(),
+        get_location_index(),
+    )
+
+
+def _process_locations_async(
+    request_id: str,
+    article_request: ArticleRequest,
+    cancel_token: CancelToken = None,
+    deadline: Deadline = None,
+    profile: bool = False,
+):
     """Process locations in background thread"""
-    start_time = time.time()
     progress_tracker = get_progress_tracker(request_id)
+    job_store = get_job_store()
 
     try:
         progress_tracker.start_processing()
+        if job_store:
+            job_store.mark_running(request_id)
+
+        response = _build_pipeline().run(
+            request_id,
+            article_request,
+            progress_tracker,
+            job_store,
+            cancel_token,
+            deadline,
+            profile,
+            record_as="sse",
+        )
+
+        # Store final results before announcing completion so clients
+        # that fetch results on the complete event always find them
+        if job_store:
+            job_store.complete_job(request_id, response.model_dump())
+        progress_tracker.final_response = response
+        progress_tracker.complete(len(response.locations), response.processing_time)
+
+    except JobCancelledError as e:
+        reason = str(e) or "Job cancelled"
+        logger.info(f"Request {request_id}: Stopped after cancellation ({reason})")
+        if job_store:
+            job_store.cancel_job(request_id, reason)
+        progress_tracker.cancelled(reason)
+    except PipelineError as e:
+        if job_store:
+            job_store.fail_job(request_id, e.message)
+        progress_tracker.error(e.message)
+    except Exception as e:
+        logger.error(f"Request {request_id}: Processing failed: {str(e)}")
+        if job_store:
+            job_store.fail_job(request_id, f"Processing failed: {str(e)}")
+        progress_tracker.error(f"Processing failed: {str(e)}")
+
 
-        # Create response object with tracking
-        response = ArticleResponse(
-            article_title="",
-            article_text="",
-            locations=[],
-            processing_time=0.0,
-            request_id=request_id,
+def _submit_job(
+    request_id: str,
+    article_request: ArticleRequest,
+    progress_tracker,
+    deadline: Deadline = None,
+    profile: bool = False,
+) -> int:
+    """Queue a job on the shared scheduler, returning its queue position"""
+    cancel_token = CancelToken()
+    # Started here so the request's trace stays open until the job has run
+    job_span = tracing.start_span("process_job")
+
+    def end_cancelled_span(reason: str):
+        # A job cancelled while queued never runs, so never ends its own span
+        if job_span is not None:
+            job_span.record_error(JobCancelledError(reason))
+            job_span.end()
+
+    try:
+        return get_job_scheduler().submit(
+            request_id,
+            tracing.bind(job_span, _process_locations_async),
+            args=(request_id, article_request, cancel_token, deadline, profile),
+            on_position=progress_tracker.queued,
+            cancel_token=cancel_token,
+            on_cancel=end_cancelled_span,
         )
+    except Exception as e:
+        if job_span is not None:
+            job_span.record_error(e)
+            job_span.end()
+        raise
+
+
+def _cancel_job(job_id: str, reason: str):
+    """
+    Cancel a queued or running job.
+    Returns the scheduler outcome ("queued"/"running") or None if not active.
+    """
+    outcome = get_job_scheduler().cancel(job_id, reason)
+
+    # Queued jobs never start, so record the cancellation here; running
+    # jobs record it themselves when they reach their next checkpoint
+    if outcome == "queued":
+        job_store = get_job_store()
+        if job_store:
+            job_store.cancel_job(job_id, reason)
+        progress_tracker = find_progress_tracker(job_id)
+        if progress_tracker:
+            progress_tracker.cancelled(reason)
+
+    if outcome:
+        logger.info(f"Request {job_id}: Cancelled while {outcome} ({reason})")
+    return outcome
+
+
+def _schedule_abandoned_job_cancel(session_id: str):
+    """Cancel a job if no SSE client reconnects within the grace period"""
+
+    def cancel_if_abandoned():
+        progress_tracker = find_progress_tracker(session_id)
+        if (
+            progress_tracker
+            and progress_tracker.subscribers == 0
+            and not progress_tracker.is_finished
+        ):
+            _cancel_job(session_id, "Client disconnected")
+
+    timer = threading.Timer(Config.SSE_DISCONNECT_GRACE_SECONDS, cancel_if_abandoned)
+    timer.daemon = True
+    timer.start()
+
+
+def resume_unfinished_jobs() -> int:
+    """Requeue jobs left unfinished by a worker that died or was recycled"""
+    job_store = get_job_store()
+    if not job_store or not job_store.exists():
+        return 0
+
+    try:
+        job_store.purge_expired(Config.JOB_STORE_RETENTION_SECONDS)
+        jobs = job_store.claim_resumable_jobs()
+    except Exception as e:
+        logger.error(f"Failed to load unfinished jobs: {str(e)}")
+        return 0
 
-        # Handle URL or text input
-        progress_tracker.start_article_extraction(article_request.input)
+    resumed = 0
+    for index, job in enumerate(jobs):
+        try:
+            article_request = ArticleRequest(input=job.input)
+            _submit_job(job.job_id, article_request, get_progress_tracker(job.job_id))
+            resumed += 1
+        except QueueFullError:
+            # Released for the next reclaim sweep of any worker to pick up
+            logger.warning(f"Job queue full, deferring resume of {job.job_id}")
+            cleanup_progress_tracker(job.job_id)
+            for deferred in jobs[index:]:
+                job_store.release_job(deferred.job_id)
+            break
+        except Exception as e:
+            logger.error(f"Failed to resume job {job.job_id}: {str(e)}")
+            job_store.fail_job(job.job_id, f"Processing failed: {str(e)}")
+
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished job(s)")
+    return resumed
+
+
+# pid of the process whose reclaim sweep is running, if any
+_reclaimer_pid = None
+_reclaimer_lock = threading.Lock()
+
+
+def _purge_expired_results() -> int:
+    """Drop expired entries from the result cache and the near-duplicate index"""
+    purged = 0
+    for store in (get_result_cache(), get_near_duplicate_index()):
+        if not store or not store.exists():
+            continue
+        try:
+            purged += store.purge_expired()
+        except Exception as e:
+            logger.warning(f"Failed to purge {store.path}: {str(e)}")
+    return purged
+
+
+def _reclaim_sweep():
+    """
+    Keep this worker's jobs alive, resume jobs of workers that died, and drop
+    expired cached results
+    """
+    job_store = get_job_store()
+    if job_store and job_store.exists():
+        try:
+            job_store.heartbeat()
+        except Exception as e:
+            logger.warning(f"Failed to heartbeat jobs: {str(e)}")
+    resume_unfinished_jobs()
+    _purge_expired_results()
+
+
+def start_job_reclaimer():
+    """
+    Run _reclaim_sweep every JOB_RECLAIM_INTERVAL_SECONDS in a daemon thread,
+    once per process, so jobs of a worker that dies later are still resumed
+    """
+    global _reclaimer_pid
+    interval = Config.JOB_RECLAIM_INTERVAL_SECONDS
+    if interval <= 0:
+        return
+    with _reclaimer_lock:
+        if _reclaimer_pid == os.getpid():
+            return
+        _reclaimer_pid = os.getpid()
 
-        if article_request.is_url():
+    def run():
+        while True:
+            time.sleep(interval)
             try:
-                logger.info(f"Request {request_id}: Extracting content from URL")
-                title, article_text = article_extractor.extract_from_url(
-                    article_request.get_url()
-                )
+                _reclaim_sweep()
             except Exception as e:
-                logger.error(f"Request {request_id}: URL extraction failed: {str(e)}")
-                progress_tracker.error(f"Failed to extract content from URL: {str(e)}")
-                return
+                logger.error(f"Job reclaim sweep failed: {str(e)}")
 
-            if not article_text or not article_text.strip():
-                logger.warning(f"Request {request_id}: No content found at URL")
-                progress_tracker.error("No readable content found at the provided URL")
-                return
-        else:
-            # Use provided text directly
-            title = "Article Text"  # Default title for text input
-            article_text = article_request.get_text()
-            logger.info(f"Request {request_id}: Processing provided text")
-
-        # Check for text length after extraction
-        if len(article_text) > 50000:  # 50KB processing limit
-            logger.warning(f"Request {request_id}: Text too long for processing")
-            response.add_warning(
-                "TEXT_TRUNCATED", "Article text was truncated to 50KB for processing"
-            )
-            article_text = article_text[:50000]
+    threading.Thread(target=run, name="job-reclaimer", daemon=True).start()
 
-        response.article_title = title
-        response.article_text = article_text
 
-        # Initialize AI services
-        location_extractor, summarizer = get_ai_services()
+def _wants_debug_timings() -> bool:
+    """Whether ?debug=timings or an X-Debug-Timings header asks for stage timings"""
+    if request.args.get("debug", "").lower() == "timings":
+        return True
+    return request.headers.get("X-Debug-Timings", "").lower() in ("1", "true")
 
-        # Extract locations using AI
-        progress_tracker.start_location_extraction(len(article_text))
 
-        try:
-            extracted_locations = location_extractor.extract_locations(article_text)
-            progress_tracker.locations_found(len(extracted_locations))
-            logger.info(
-                f"Request {request_id}: Extracted {len(extracted_locations)} locations"
-            )
-        except RateLimitError:
-            logger.warning(f"Request {request_id}: Rate limit exceeded")
-            progress_tracker.error(
-                "API rate limit exceeded. Please try again in a few moments."
-            )
-            return
+def _requested_projection():
+    """The response fields ?view= (compact or full) or ?fields= asks for"""
+    return parse_projection(request.args.get("view"), request.args.get("fields"))
 
-        if not extracted_locations:
-            processing_time = time.time() - start_time
-            progress_tracker.complete(0, processing_time)
-            return
 
-        # Process locations through geocoding and summarization pipeline
-        progress_tracker.start_processing_locations(len(extracted_locations))
-        locations, geo_data_list = location_processor.process_locations_pipeline(
-            extracted_locations, article_text, summarizer, response, request_id
-        )
+def _requested_format() -> str:
+    """The result format ?format= asks for: json, geojson or columnar"""
+    return parse_format(request.args.get("format"))
+
+
+def _response_data(response: ArticleResponse, result_format: str) -> dict:
+    """A response's fields, minus the locations when the format reads the models"""
+    if result_format == "json":
+        return response.model_dump()
+    return response.model_dump(exclude={"locations"})
 
-        # Apply spatial hierarchical filtering
-        progress_tracker.start_filtering()
-        locations = location_processor.apply_spatial_filtering(
-            locations, geo_data_list, response, request_id
+
+def _result_response(data: dict, projection, result_format: str, locations=None):
+    """
+    A result in the requested format and projection. data holds the response
+    fields; geojson and columnar are built from `locations` (or, for stored
+    results, data's own locations) with the other fields as their metadata
+    """
+    if result_format == "json":
+        return json_response(project(data, projection))
+    if locations is None:
+        locations = [LocationData(**location) for location in data.get("locations", [])]
+    metadata = project(
+        {field: value for field, value in data.items() if field != "locations"},
+        projection,
+    )
+    body = render_locations(
+        result_format, locations, location_fields(projection), metadata
+    )
+    return json_response(body, mimetype=MIMETYPES[result_format])
+
+
+def _is_admin() -> bool:
+    """Whether the request carries the admin bearer token"""
+    if not Config.ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get("Authorization", "")
+    return hmac.compare_digest(
+        supplied.encode(), f"Bearer {Config.ADMIN_TOKEN}".encode()
+    )
+
+
+def _admin_error():
+    """Error response unless admin endpoints are enabled and authorized, else None"""
+    if not Config.ADMIN_TOKEN:
+        return create_error_response(
+            "ADMIN_DISABLED", "Admin endpoints are disabled", status_code=404
+        )
+    if not _is_admin():
+        return create_error_response(
+            "UNAUTHORIZED", "Admin token required", status_code=401
         )
+    return None
 
-        processing_time = time.time() - start_time
-        progress_tracker.complete(len(locations), processing_time)
 
-        # Store final results in progress tracker for retrieval
-        response.locations = locations
-        response.processing_time = processing_time
-        progress_tracker.final_response = response
+def _wants_profile() -> bool:
+    """Whether an X-Profile header asks for this request to be profiled"""
+    return request.headers.get("X-Profile", "").lower() in ("1", "true")
 
-    except Exception as e:
-        logger.error(f"Request {request_id}: Processing failed: {str(e)}")
-        progress_tracker.error(f"Processing failed: {str(e)}")
+
+def _time_budget(article_request: ArticleRequest, use_sse: bool) -> float:
+    """
+    Resolve the request's time budget in seconds: JSON field, then the
+    X-Time-Budget header, then the default for direct requests (0 = none).
+    Raises ValueError for an unparseable or non-positive header.
+    """
+    if article_request.time_budget is not None:
+        budget = article_request.time_budget
+    elif request.headers.get("X-Time-Budget"):
+        budget = float(request.headers["X-Time-Budget"])
+        if budget <= 0:
+            raise ValueError("X-Time-Budget must be a positive number of seconds")
+    elif use_sse:
+        return 0
+    else:
+        budget = Config.DEFAULT_TIME_BUDGET_SECONDS
+
+    return min(budget, Config.MAX_TIME_BUDGET_SECONDS)
 
 
 @bp.route("/extract", methods=["POST"])
@@ -228,160 +579,351 @@ def extract_locations():
     """Extract locations - supports both direct response and SSE modes"""
     request_id = str(uuid.uuid4())
     logger.info(f"Starting request {request_id}")
+    received_at = time.monotonic()
 
-    try:
-        # Validate request data
-        data = request.get_json()
-        if not data:
-            logger.warning(f"Request {request_id}: No JSON data provided")
-            return create_error_response(
-                "MISSING_DATA", "No data provided in request body"
-            )
+    root_span = tracing.start_trace("POST /api/extract", request_id)
+    with tracing.use_span(root_span):
+        try:
+            # Validate request data
+            data = request.get_json()
+            if not data:
+                logger.warning(f"Request {request_id}: No JSON data provided")
+                return create_error_response(
+                    "MISSING_DATA", "No data provided in request body"
+                )
 
-        # Check for required fields
-        if "input" not in data:
-            logger.warning(f"Request {request_id}: Missing 'input' field")
-            return create_error_response(
-                "MISSING_INPUT", "Required field 'input' is missing"
+            # Check for required fields
+            if "input" not in data:
+                logger.warning(f"Request {request_id}: Missing 'input' field")
+                return create_error_response(
+                    "MISSING_INPUT", "Required field 'input' is missing"
+                )
+
+            article_request = ArticleRequest(**data)
+            if _wants_debug_timings():
+                article_request.debug_timings = True
+            profile = _wants_profile()
+            if profile:
+                admin_error = _admin_error()
+                if admin_error:
+                    return admin_error
+            logger.info(
+                f"Request {request_id}: Input type={'URL' if article_request.is_url() else 'text'}, length={len(article_request.input)}"
             )
+            try:
+                projection = _requested_projection()
+            except ValueError as e:
+                return create_error_response("INVALID_FIELDS", str(e))
+            try:
+                result_format = _requested_format()
+            except ValueError as e:
+                return create_error_response("INVALID_FORMAT", str(e))
+
+            # Check if client wants direct response (for backwards compatibility)
+            use_sse = request.args.get("sse", "false").lower() == "true"
+            tracing.set_attribute("waldo.mode", "sse" if use_sse else "direct")
+            tracing.set_attribute(
+                "waldo.input_type", "url" if article_request.is_url() else "text"
+            )
+
+            # The budget covers the whole request, including time spent queued
+            try:
+                budget = _time_budget(article_request, use_sse)
+            except ValueError as e:
+                return create_error_response("INVALID_TIME_BUDGET", str(e))
+            deadline = None
+            if budget:
+                deadline = Deadline(budget - (time.monotonic() - received_at))
+
+            if use_sse:
+                # Initialize progress tracker for SSE mode
+                progress_tracker = get_progress_tracker(request_id)
+                job_store = get_job_store()
+                if job_store:
+                    job_store.create_job(request_id, article_request.input)
+
+                # Queue processing on the shared worker pool
+                try:
+                    queue_position = _submit_job(
+                        request_id, article_request, progress_tracker, deadline, profile
+                    )
+                except QueueFullError as e:
+                    logger.warning(f"Request {request_id}: Job queue full, rejecting")
+                    cleanup_progress_tracker(request_id)
+                    if job_store:
+                        job_store.delete_job(request_id)
+                    return create_error_response(
+                        "QUEUE_FULL",
+                        "Server is busy processing other articles. Please try again shortly.",
+                        details=str(e),
+                        status_code=429,
+                        retry_after=e.retry_after,
+                    )
+
+                # Return session ID immediately for SSE connection
+                return jsonify(
+                    {
+                        "session_id": request_id,
+                        "status": "queued" if queue_position else "processing",
+                        "queue_position": queue_position,
+                        "message": "Processing started. Connect to SSE for progress updates.",
+                    }
+                )
+            else:
+                # Direct processing mode - process synchronously and return results
+                return _process_locations_direct(
+                    request_id,
+                    article_request,
+                    deadline,
+                    profile,
+                    projection,
+                    result_format,
+                )
 
-        article_request = ArticleRequest(**data)
-        logger.info(
-            f"Request {request_id}: Input type={'URL' if article_request.is_url() else 'text'}, length={len(article_request.input)}"
+        except ValidationError as e:
+            return jsonify({"error": "Invalid request data", "details": str(e)}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 500
+        except Exception as e:
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
+def _process_locations_direct(
+    request_id: str,
+    article_request: ArticleRequest,
+    deadline: Deadline = None,
+    profile: bool = False,
+    projection=None,
+    result_format: str = "json",
+):
+    """Process locations directly and return results immediately"""
+    try:
+        response = _build_pipeline().run(
+            request_id,
+            article_request,
+            deadline=deadline,
+            profile=profile,
+            record_as="direct",
         )
+        result = _result_response(
+            _response_data(response, result_format),
+            projection or parse_projection(None, None),
+            result_format,
+            response.locations,
+        )
+        if profile:
+            result.headers["X-Profile-Id"] = request_id
+        return result
+
+    except PipelineError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        logger.error(f"Request {request_id}: Processing failed: {str(e)}")
+        return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
-        # Check if client wants direct response (for backwards compatibility)
-        use_sse = request.args.get("sse", "false").lower() == "true"
 
-        if use_sse:
-            # Initialize progress tracker for SSE mode
-            get_progress_tracker(request_id)
+@bp.route("/extract/batch", methods=["POST"])
+def extract_batch():
+    """Queue many articles at once; results stream per item from /batches/<id>/stream"""
+    batch_id = str(uuid.uuid4())
 
-            # Start processing in background thread
-            thread = threading.Thread(
-                target=_process_locations_async,
-                args=(request_id, article_request),
-                daemon=True,
+    try:
+        data = request.get_json(silent=True)
+        if not data or "items" not in data:
+            return create_error_response(
+                "MISSING_ITEMS", "Required field 'items' is missing"
             )
-            thread.start()
 
-            # Return session ID immediately for SSE connection
-            return jsonify(
-                {
-                    "session_id": request_id,
-                    "status": "processing",
-                    "message": "Processing started. Connect to SSE for progress updates.",
-                }
+        batch_request = BatchRequest(**data)
+        if len(batch_request.items) > Config.BATCH_MAX_ITEMS:
+            return create_error_response(
+                "TOO_MANY_ITEMS",
+                f"A batch can hold at most {Config.BATCH_MAX_ITEMS} articles",
             )
-        else:
-            # Direct processing mode - process synchronously and return results
-            return _process_locations_direct(request_id, article_request)
+
+        batch = Batch(batch_id, batch_request.items)
+        try:
+            start_batch(
+                batch,
+                article_extractor,
+                geocoding_service,
+                get_ai_services,
+                get_result_cache(),
+                get_near_duplicate_index(),
+                get_location_index(),
+            )
+        except QueueFullError as e:
+            logger.warning(f"Batch {batch_id}: Batch queue full, rejecting")
+            return create_error_response(
+                "QUEUE_FULL",
+                "Server is busy processing other batches. Please try again shortly.",
+                details=str(e),
+                status_code=429,
+                retry_after=e.retry_after,
+            )
+
+        return jsonify(
+            {
+                **batch.summary(),
+                "message": "Batch queued. Stream per-article results from stream_url.",
+                "stream_url": f"/api/batches/{batch_id}/stream",
+            }
+        ), 202
 
     except ValidationError as e:
         return jsonify({"error": "Invalid request data", "details": str(e)}), 400
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 500
     except Exception as e:
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 
-def _process_locations_direct(request_id: str, article_request: ArticleRequest):
-    """Process locations directly and return results immediately"""
-    start_time = time.time()
+def _batch_not_found():
+    return create_error_response(
+        "BATCH_NOT_FOUND", "Unknown or expired batch id", status_code=404
+    )
 
-    try:
-        # Create response object
-        response = ArticleResponse(
-            article_title="",
-            article_text="",
-            locations=[],
-            processing_time=0.0,
-            request_id=request_id,
-        )
 
-        # Handle URL or text input
-        if article_request.is_url():
-            try:
-                logger.info(f"Request {request_id}: Extracting content from URL")
-                title, article_text = article_extractor.extract_from_url(
-                    article_request.get_url()
-                )
-            except Exception as e:
-                logger.error(f"Request {request_id}: URL extraction failed: {str(e)}")
-                return jsonify(
-                    {"error": f"Failed to extract content from URL: {str(e)}"}
-                ), 400
+@bp.route("/batches/<batch_id>", methods=["GET"])
+def get_batch(batch_id: str):
+    """Batch status, with each item's result once it has finished"""
+    batch = find_batch(batch_id)
+    if batch is None:
+        return _batch_not_found()
 
-            if not article_text or not article_text.strip():
-                logger.warning(f"Request {request_id}: No content found at URL")
-                return jsonify(
-                    {"error": "No readable content found at the provided URL"}
-                ), 400
-        else:
-            # Use provided text directly
-            title = "Article Text"  # Default title for text input
-            article_text = article_request.get_text()
-            logger.info(f"Request {request_id}: Processing provided text")
-
-        # Check for text length after extraction
-        if len(article_text) > 50000:  # 50KB processing limit
-            logger.warning(f"Request {request_id}: Text too long for processing")
-            response.add_warning(
-                "TEXT_TRUNCATED", "Article text was truncated to 50KB for processing"
-            )
-            article_text = article_text[:50000]
+    include_results = request.args.get("results", "true").lower() == "true"
+    return jsonify(
+        {
+            **batch.summary(),
+            "items": [item.to_dict(include_results) for item in batch.items],
+        }
+    )
 
-        response.article_title = title
-        response.article_text = article_text
 
-        # Initialize AI services
-        location_extractor, summarizer = get_ai_services()
+@bp.route("/batches/<batch_id>/stream", methods=["GET"])
+def batch_stream(batch_id: str):
+    """
+    Stream each item as it finishes, then a final batch summary.
+    Server-Sent Events by default; NDJSON with ?format=ndjson or an
+    Accept: application/x-ndjson header.
+    """
+    batch = find_batch(batch_id)
+    if batch is None:
+        return _batch_not_found()
+
+    use_ndjson = request.args.get(
+        "format"
+    ) == "ndjson" or "application/x-ndjson" in request.headers.get("Accept", "")
+    last_event_id = _parse_last_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
 
-        # Extract locations using AI
-        try:
-            extracted_locations = location_extractor.extract_locations(article_text)
-            logger.info(
-                f"Request {request_id}: Extracted {len(extracted_locations)} locations"
+    def format_message(data: dict, event_id: int = None) -> str:
+        if use_ndjson:
+            return json.dumps(data) + "\n"
+        sse_id = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{sse_id}data: {json.dumps(data)}\n\n"
+
+    def item_stream():
+        last_sent_id = last_event_id
+        while True:
+            items = batch.wait_for_items(
+                last_sent_id, timeout=Config.SSE_HEARTBEAT_SECONDS
             )
-        except RateLimitError:
-            logger.warning(f"Request {request_id}: Rate limit exceeded")
-            return jsonify(
-                {"error": "API rate limit exceeded. Please try again in a few moments."}
-            ), 429
+            for item in items:
+                last_sent_id += 1
+                yield format_message(
+                    {"type": "item", "batch_id": batch_id, **item.to_dict()},
+                    last_sent_id,
+                )
 
-        if not extracted_locations:
-            processing_time = time.time() - start_time
-            response.processing_time = processing_time
-            return jsonify(response.model_dump())
+            if batch.is_finished and last_sent_id >= len(batch.items):
+                yield format_message({"type": "batch", **batch.summary()})
+                return
+            if not items:
+                yield format_message({"heartbeat": True, "timestamp": time.time()})
 
-        # Process locations through geocoding and summarization pipeline
-        locations, geo_data_list = location_processor.process_locations_pipeline(
-            extracted_locations, article_text, summarizer, response, request_id
-        )
+    return Response(
+        item_stream(),
+        mimetype="application/x-ndjson" if use_ndjson else "text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "Cache-Control, Last-Event-ID",
+        },
+    )
 
-        # Apply spatial hierarchical filtering
-        locations = location_processor.apply_spatial_filtering(
-            locations, geo_data_list, response, request_id
-        )
 
-        processing_time = time.time() - start_time
-        response.locations = locations
-        response.processing_time = processing_time
+@bp.route("/batches/<batch_id>", methods=["DELETE"])
+def cancel_batch(batch_id: str):
+    """Cancel a batch; queued items are skipped and running ones stop early"""
+    batch = find_batch(batch_id)
+    if batch is None:
+        return _batch_not_found()
+    if batch.is_finished:
+        return create_error_response(
+            "JOB_FINISHED",
+            "Batch has already finished and cannot be cancelled",
+            status_code=409,
+        )
 
-        return jsonify(response.model_dump())
+    batch.cancel_token.cancel("Cancelled by client")
+    logger.info(f"Batch {batch_id}: Cancelled by client")
+    return jsonify({"batch_id": batch_id, "status": "cancelling"}), 202
+
+
+@bp.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id: str):
+    """Cancel a queued or running SSE job"""
+    outcome = _cancel_job(job_id, "Cancelled by client")
+
+    if outcome == "queued":
+        return jsonify({"job_id": job_id, "status": "cancelled"})
+    if outcome == "running":
+        # Work stops at the next upstream call; the SSE stream reports it
+        return jsonify({"job_id": job_id, "status": "cancelling"}), 202
+
+    progress_tracker = find_progress_tracker(job_id)
+    job_store = get_job_store()
+    job = job_store.get_job(job_id) if job_store else None
+    if (progress_tracker and progress_tracker.is_finished) or job:
+        return create_error_response(
+            "JOB_FINISHED",
+            "Job has already finished and cannot be cancelled",
+            status_code=409,
+        )
 
-    except Exception as e:
-        logger.error(f"Request {request_id}: Processing failed: {str(e)}")
-        return jsonify({"error": f"Processing failed: {str(e)}"}), 500
+    return create_error_response("JOB_NOT_FOUND", "Unknown job id", status_code=404)
 
 
 @bp.route("/results/<session_id>", methods=["GET"])
 def get_results(session_id: str):
     """Get final results for a completed session"""
     try:
-        progress_tracker = get_progress_tracker(session_id)
+        projection = _requested_projection()
+    except ValueError as e:
+        return create_error_response("INVALID_FIELDS", str(e))
+    try:
+        result_format = _requested_format()
+    except ValueError as e:
+        return create_error_response("INVALID_FORMAT", str(e))
+
+    try:
+        progress_tracker = find_progress_tracker(session_id)
+
+        if progress_tracker is None or not hasattr(
+            progress_tracker, "final_response"
+        ):
+            # Tracker may be gone after a restart - fall back to the job store
+            job_store = get_job_store()
+            job = job_store.get_job(session_id) if job_store else None
+            if job and job.state == JobState.COMPLETE:
+                response_data = job.result
+                response_data["session_id"] = session_id
+                return _result_response(response_data, projection, result_format)
+            if job and job.state in (JobState.FAILED, JobState.CANCELLED):
+                return jsonify(
+                    {"error": "Processing failed or incomplete", "session_id": session_id}
+                ), 404
 
-        if not hasattr(progress_tracker, "final_response"):
             return jsonify(
                 {"error": "Results not available yet", "session_id": session_id}
             ), 404
@@ -391,10 +933,174 @@ def get_results(session_id: str):
                 {"error": "Processing failed or incomplete", "session_id": session_id}
             ), 404
 
-        response_data = progress_tracker.final_response.model_dump()
+        final_response = progress_tracker.final_response
+        response_data = _response_data(final_response, result_format)
         response_data["session_id"] = session_id
-        return jsonify(response_data)
+        return _result_response(
+            response_data, projection, result_format, final_response.locations
+        )
 
     except Exception as e:
         logger.error(f"Error retrieving results for session {session_id}: {str(e)}")
         return jsonify({"error": "Failed to retrieve results", "details": str(e)}), 500
+
+
+def _parse_since(value: str) -> float:
+    """Unix timestamp, or an ISO 8601 date/datetime (UTC unless it says otherwise)"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_bbox(value: str):
+    """west,south,east,north (GeoJSON order) to (south, north, west, east)"""
+    west, south, east, north = (float(part) for part in value.split(","))
+    if not (
+        -90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180
+    ):
+        raise ValueError("bbox is out of range")
+    return south, north, west, east
+
+
+@bp.route("/locations/search", methods=["GET"])
+def search_locations():
+    """
+    Previously processed locations inside ?bbox=west,south,east,north, or
+    within ?radius= km of ?lat=&lon=, optionally only those processed
+    ?since= a timestamp or ISO date
+    """
+    location_index = get_location_index()
+    if location_index is None:
+        return create_error_response(
+            "LOCATION_INDEX_DISABLED",
+            "Location search is disabled on this server",
+            status_code=503,
+        )
+
+    args = request.args
+    try:
+        since = _parse_since(args["since"]) if args.get("since") else None
+        limit = min(int(args.get("limit", DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        if args.get("bbox"):
+            results = location_index.search_bbox(
+                _parse_bbox(args["bbox"]), since=since, limit=limit
+            )
+        elif args.get("lat") and args.get("lon") and args.get("radius"):
+            lat, lon, radius = (float(args[name]) for name in ("lat", "lon", "radius"))
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and radius > 0):
+                raise ValueError("lat, lon or radius is out of range")
+            results = location_index.search_radius(
+                lat, lon, radius, since=since, limit=limit
+            )
+        else:
+            return create_error_response(
+                "MISSING_QUERY",
+                "Provide bbox=west,south,east,north or lat, lon and radius (km)",
+            )
+    except ValueError as e:
+        return create_error_response("INVALID_QUERY", str(e))
+
+    return jsonify({"count": len(results), "locations": results})
+
+
+@bp.route("/locations/clusters", methods=["GET"])
+def location_clusters():
+    """
+    Marker clusters of previously processed locations for a map view: the
+    clusters and lone locations of every tile ?bbox=west,south,east,north
+    touches at ?zoom=, as GeoJSON
+    """
+    cluster_index = get_cluster_index()
+    if cluster_index is None:
+        return create_error_response(
+            "LOCATION_INDEX_DISABLED",
+            "Location search is disabled on this server",
+            status_code=503,
+        )
+
+    args = request.args
+    if not args.get("bbox") or not args.get("zoom"):
+        return create_error_response(
+            "MISSING_QUERY", "Provide bbox=west,south,east,north and zoom"
+        )
+    try:
+        zoom = int(args["zoom"])
+        if not 0 <= zoom <= 24:
+            raise ValueError("zoom must be between 0 and 24")
+        collection = cluster_index.clusters(_parse_bbox(args["bbox"]), zoom)
+    except ValueError as e:
+        return create_error_response("INVALID_QUERY", str(e))
+
+    return json_response(collection, mimetype=MIMETYPES["geojson"])
+
+
+def _profile_store_or_error():
+    store = profiling.get_profile_store()
+    if store is None:
+        return None, create_error_response(
+            "PROFILES_DISABLED", "Request profiling is disabled", status_code=404
+        )
+    return store, None
+
+
+@bp.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Stored request profiles, newest first"""
+    error = _admin_error()
+    if error:
+        return error
+    store, error = _profile_store_or_error()
+    if error:
+        return error
+    return jsonify({"profiles": store.list()})
+
+
+@bp.route("/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id: str):
+    """A stored profile's summary: slowest functions and largest allocations"""
+    error = _admin_error()
+    if error:
+        return error
+    store, error = _profile_store_or_error()
+    if error:
+        return error
+    summary = store.get(profile_id)
+    if summary is None:
+        return create_error_response(
+            "PROFILE_NOT_FOUND", "Profile not found", status_code=404
+        )
+    return jsonify(summary)
+
+
+@bp.route("/admin/profiles/<profile_id>/<kind>", methods=["GET"])
+def download_profile(profile_id: str, kind: str):
+    """
+    Download a stored profile: stacks are collapsed stack samples (for
+    flamegraph.pl or speedscope), memory a tracemalloc snapshot
+    (tracemalloc.Snapshot.load)
+    """
+    error = _admin_error()
+    if error:
+        return error
+    store, error = _profile_store_or_error()
+    if error:
+        return error
+    path = store.artifact_path(profile_id, kind)
+    if path is None:
+        return create_error_response(
+            "PROFILE_NOT_FOUND", "Profile not found", status_code=404
+        )
+    return send_file(
+        path,
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=os.path.basename(path),
+    )
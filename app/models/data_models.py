@@ -1,9 +1,34 @@
 from pydantic import BaseModel, field_validator
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import re
 import uuid
 from datetime import datetime
 
+# Compiled once per process rather than on every validation
+URL_PATTERN = re.compile(
+    r"^https?://"  # http:// or https://
+    r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|"  # domain...
+    r"localhost|"  # localhost...
+    r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"  # ...or ip
+    r"(?::\d+)?"  # optional port
+    r"(?:/?|[/?]\S+)$",
+    re.IGNORECASE,
+)
+SUSPICIOUS_URL_PATTERN = re.compile(
+    "|".join(
+        [
+            r"localhost",
+            r"127\.0\.0\.1",
+            r"192\.168\.",
+            r"10\.",
+            r"172\.(1[6-9]|2[0-9]|3[0-1])\.",
+            r"file://",
+            r"ftp://",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
 
 class LocationData(BaseModel):
     name: str
@@ -26,6 +51,15 @@ class ExtractedLocation(BaseModel):
 
 class ArticleRequest(BaseModel):
     input: str
+    time_budget: Optional[float] = None  # seconds for the whole request
+    debug_timings: bool = False  # include per-stage timings in the response
+
+    @field_validator("time_budget")
+    @classmethod
+    def validate_time_budget(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("time_budget must be a positive number of seconds")
+        return v
 
     @field_validator("input")
     @classmethod
@@ -46,18 +80,8 @@ class ArticleRequest(BaseModel):
     def validate_safe_url(cls, v):
         if cls._is_url_like(v):
             # Check for suspicious URLs
-            suspicious_patterns = [
-                r"localhost",
-                r"127\.0\.0\.1",
-                r"192\.168\.",
-                r"10\.",
-                r"172\.(1[6-9]|2[0-9]|3[0-1])\.",
-                r"file://",
-                r"ftp://",
-            ]
-            for pattern in suspicious_patterns:
-                if re.search(pattern, v, re.IGNORECASE):
-                    raise ValueError("URL not allowed for security reasons")
+            if SUSPICIOUS_URL_PATTERN.search(v):
+                raise ValueError("URL not allowed for security reasons")
         return v
 
     @classmethod
@@ -67,16 +91,7 @@ class ArticleRequest(BaseModel):
 
     def is_url(self) -> bool:
         """Check if input is a URL using regex pattern"""
-        url_pattern = re.compile(
-            r"^https?://"  # http:// or https://
-            r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|"  # domain...
-            r"localhost|"  # localhost...
-            r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"  # ...or ip
-            r"(?::\d+)?"  # optional port
-            r"(?:/?|[/?]\S+)$",
-            re.IGNORECASE,
-        )
-        return bool(url_pattern.match(self.input))
+        return bool(URL_PATTERN.match(self.input))
 
     def get_text(self) -> str:
         """Return the text content (input if not URL)"""
@@ -91,6 +106,25 @@ class ArticleRequest(BaseModel):
         return self.input
 
 
+class BatchRequest(BaseModel):
+    # Each item is an ArticleRequest, or just its input string
+    items: List[ArticleRequest]
+
+    @field_validator("items", mode="before")
+    @classmethod
+    def wrap_plain_inputs(cls, v):
+        if isinstance(v, list):
+            return [{"input": item} if isinstance(item, str) else item for item in v]
+        return v
+
+    @field_validator("items")
+    @classmethod
+    def validate_items_not_empty(cls, v):
+        if not v:
+            raise ValueError("Batch must contain at least one item")
+        return v
+
+
 class ErrorResponse(BaseModel):
     error_code: str
     message: str
@@ -129,6 +163,9 @@ class ArticleResponse(BaseModel):
     processing_time: float
     warnings: List[ProcessingWarning] = []
     request_id: str = ""
+    cached: bool = False  # served from the result cache
+    near_duplicate: bool = False  # locations reused from a near-identical article
+    timings: Optional[Dict[str, Any]] = None  # per-stage wall time, when requested
 
     def add_warning(self, code: str, message: str):
         """Add a warning to the response"""
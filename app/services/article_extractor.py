@@ -1,63 +1,351 @@
+import codecs
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+
 import requests
-from bs4 import BeautifulSoup
-from typing import Tuple, Optional
 
+from app.services.extraction_profiles import (
+    ExtractionProfileStore,
+    get_extraction_profile_store,
+    profile_domain,
+)
+from app.services.html_parsing import get_html_parser
+from app.services.parse_pool import get_parse_pool
+from app.utils import metrics, tracing
+from app.utils.cancellation import CancelToken, JobCancelledError, check_cancelled
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.http_session import get_http_session
+from app.utils.stage_timing import timed
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 10  # seconds, when the caller has no deadline
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Visible page text includes navigation, footers and so on, so keep reading
+# until there is comfortably more of it than the caller's text budget
+TEXT_BUDGET_SLACK = 2
+
+ALLOWED_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+
+CHARSET_PATTERN = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+def _charset_from_content_type(content_type: str) -> Optional[str]:
+    """
+    Charset declared in a Content-Type header, if it names a known codec.
+    Unlike requests, no ISO-8859-1 default is assumed for text/* types.
+    """
+    match = CHARSET_PATTERN.search(content_type or "")
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return None
+
+
+class _VisibleTextCounter(HTMLParser):
+    """Incrementally counts visible text characters in streamed HTML"""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template"}
 
-class ArticleExtractor:
     def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.visible_chars = 0
+        self._skip_depth = 0
+
+    def feed(self, chunk: bytes):
+        # Only used as a size estimate, so decoding errors don't matter
+        super().feed(chunk.decode("utf-8", errors="ignore"))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.visible_chars += len(data.strip())
+
+
+@dataclass
+class CachedArticle:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    title: Optional[str]
+    text: str
+
+
+class ArticleCache:
+    """
+    Thread-safe LRU of extracted articles keyed by URL, kept only for responses
+    with validators so they can be revalidated with a conditional GET
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CachedArticle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedArticle]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, entry: CachedArticle):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def record(self, hit: bool):
+        metrics.record_cache("article", hit)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class ArticleExtractor:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ArticleCache] = None,
+        parser=None,
+        profile_store: Optional[ExtractionProfileStore] = None,
+    ):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
+        self._session = session
+        self.cache = cache if cache is not None else ArticleCache(
+            Config.ARTICLE_CACHE_SIZE
+        )
+        self.parser = parser or get_html_parser(Config.HTML_PARSER)
+        self._profile_store = profile_store
+
+    @property
+    def session(self) -> requests.Session:
+        # Resolved per call so a forked worker picks up its own session
+        return self._session or get_http_session()
 
-    def extract_from_url(self, url: str) -> Tuple[Optional[str], str]:
+    @property
+    def profile_store(self) -> Optional[ExtractionProfileStore]:
+        if self._profile_store is not None:
+            return self._profile_store
+        return get_extraction_profile_store()
+
+    @tracing.traced("extract_from_url")
+    def extract_from_url(
+        self,
+        url: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+        text_budget: Optional[int] = None,
+    ) -> Tuple[Optional[str], str]:
         """
         Extract article title and text from URL.
         Returns: (title, text)
+        Raises JobCancelledError if the job is cancelled during the download,
+        and DeadlineExceededError if the deadline passes before it finishes.
+
+        The body is streamed and capped at Config.MAX_DOWNLOAD_BYTES; with a
+        text_budget (characters) the download also stops once the page holds
+        comfortably more visible text than the caller will use.
+
+        A previously seen URL is revalidated with If-None-Match/If-Modified-Since;
+        a 304 reuses the cached title and text without re-parsing.
         """
+        tracing.set_attribute("url.full", url)
+        check_cancelled(cancel_token)
+        timeout = deadline.timeout(REQUEST_TIMEOUT) if deadline else REQUEST_TIMEOUT
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Extract title
-            title = None
-            title_tag = soup.find("title")
-            if title_tag:
-                title = title_tag.get_text().strip()
-
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-
-            # Extract text from common article containers
-            article_selectors = [
-                "article",
-                ".article-body",
-                ".story-body",
-                ".entry-content",
-                ".post-content",
-                ".content",
-            ]
-
-            text = ""
-            for selector in article_selectors:
-                article_element = soup.select_one(selector)
-                if article_element:
-                    text = article_element.get_text()
-                    break
+            cached = self.cache.get(url)
+            headers = dict(self.headers)
+            if cached:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
 
-            # Fallback to body if no article container found
-            if not text:
-                body = soup.find("body")
-                if body:
-                    text = body.get_text()
+            with timed("fetch", upstream="article_host"):
+                response = self.session.get(
+                    url, headers=headers, timeout=timeout, stream=True
+                )
+                try:
+                    if cached and response.status_code == 304:
+                        self.cache.record(hit=True)
+                        return cached.title, cached.text
+                    response.raise_for_status()
+                    self.cache.record(hit=False)
 
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            text = "\n".join(line for line in lines if line)
+                    content_type = response.headers.get("Content-Type", "")
+                    self._check_response_headers(response, content_type)
+                    content = self._read_body(
+                        response,
+                        text_budget,
+                        cancel_token,
+                        deadline,
+                    )
+                finally:
+                    response.close()
+
+            title, text = self._parse(
+                url, content, _charset_from_content_type(content_type), deadline
+            )
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.cache.put(url, CachedArticle(etag, last_modified, title, text))
 
             return title, text
 
+        except (JobCancelledError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to extract article: {str(e)}")
+
+    def extract_from_html(
+        self, url: str, content: bytes, charset: Optional[str] = None
+    ) -> Tuple[Optional[str], str]:
+        """
+        Extract title and text from HTML fetched elsewhere (e.g. a web archive),
+        using the same parser and per-domain profiles as extract_from_url
+        """
+        return self._parse(url, content, charset, None)
+
+    def _parse(
+        self,
+        url: str,
+        content: bytes,
+        charset: Optional[str],
+        deadline: Optional[Deadline],
+    ) -> Tuple[Optional[str], str]:
+        """
+        Parse in the process pool when one is configured, else in this thread.
+        The domain's extraction profile is tried first; domains without one
+        are scored to learn which container holds the article.
+        """
+        domain = profile_domain(url)
+        profile_store = self.profile_store
+        profile = None
+        if profile_store is not None:
+            try:
+                profile = profile_store.get(domain)
+            except Exception as e:
+                logger.warning(f"Extraction profile lookup failed for {domain}: {e}")
+                profile_store = None
+
+        selector = profile.selector if profile else None
+        learn = profile_store is not None and profile is None
+
+        parse_pool = get_parse_pool()
+        with timed("parse"):
+            if parse_pool is None:
+                result = self.parser.extract(content, charset, selector, learn)
+            else:
+                default_timeout = Config.PARSE_POOL_TIMEOUT_SECONDS
+                timeout = (
+                    deadline.timeout(default_timeout) if deadline else default_timeout
+                )
+                result = parse_pool.extract(
+                    self.parser, content, charset, timeout, selector, learn
+                )
+
+        if profile_store is not None:
+            self._update_profile(profile_store, domain, profile, result)
+        return result.title, result.text
+
+    @staticmethod
+    def _update_profile(profile_store, domain, profile, result):
+        try:
+            if profile is not None:
+                if result.selector == profile.selector:
+                    profile_store.record_hit(domain)
+                else:
+                    profile_store.record_miss(domain)
+            elif result.learned_selector:
+                profile_store.learn(
+                    domain, result.learned_selector, result.learned_score
+                )
+        except Exception as e:
+            # Profiles only speed things up; never fail an extraction over them
+            logger.warning(f"Failed to update extraction profile for {domain}: {e}")
+
+    @staticmethod
+    def _check_response_headers(response: requests.Response, content_type: str):
+        """Reject non-HTML and oversized responses before reading the body"""
+        mime_type = content_type.split(";", 1)[0].strip().lower()
+        if mime_type and mime_type not in ALLOWED_CONTENT_TYPES:
+            raise ValueError(f"Unsupported content type: {mime_type}")
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > Config.MAX_DOWNLOAD_BYTES:
+                raise ValueError(
+                    f"Article is too large ({int(content_length)} bytes, "
+                    f"limit {Config.MAX_DOWNLOAD_BYTES})"
+                )
+
+    @staticmethod
+    def _read_body(
+        response: requests.Response,
+        text_budget: Optional[int],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> bytes:
+        """
+        Stream the response body, stopping at the byte cap or once the visible
+        text seen so far covers the text budget. Without a deadline only the
+        per-read timeout applies, however long the whole download takes.
+        """
+        counter = _VisibleTextCounter() if text_budget else None
+        chunks = []
+        received = 0
+        truncated = False
+
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            check_cancelled(cancel_token)
+            if deadline:
+                deadline.check("the article download finished")
+
+            remaining = Config.MAX_DOWNLOAD_BYTES - received
+            if len(chunk) >= remaining:
+                chunks.append(chunk[:remaining])
+                truncated = True
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+
+            if counter is not None:
+                counter.feed(chunk)
+                if counter.visible_chars >= text_budget * TEXT_BUDGET_SLACK:
+                    truncated = True
+                    break
+
+        content = b"".join(chunks)
+        if truncated:
+            # Cut back to the end of a tag so no multibyte character is split
+            tag_end = content.rfind(b">")
+            if tag_end != -1:
+                content = content[: tag_end + 1]
+        return content
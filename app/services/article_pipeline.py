@@ -0,0 +1,846 @@
+import logging
+import os
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.data_models import (
+    ArticleRequest,
+    ArticleResponse,
+    ExtractedLocation,
+    LocationData,
+    ProcessingWarning,
+)
+from app.services.article_extractor import ArticleExtractor
+from app.services.geocoding import GeographicData
+from app.services.location_extractor import LocationExtractionError, RateLimitError
+from app.services.location_processor import LocationProcessor
+from app.services.location_index import LocationIndex, article_id
+from app.services.near_duplicates import (
+    ArticleFingerprint,
+    NearDuplicate,
+    NearDuplicateIndex,
+    article_paragraphs,
+)
+from app.services.result_cache import ResultCache, is_cacheable, result_cache_key
+from app.utils import metrics, profiling
+from app.utils.cancellation import CancelToken, JobCancelledError, check_cancelled
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.job_store import JobStore
+from app.utils.progress_tracker import ProgressTracker
+from app.utils.stage_timing import StageTimings, collect_timings, timed
+from app.utils.traffic_recorder import (
+    get_traffic_recorder,
+    input_hash,
+    sanitize_stages,
+)
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint stage names, in pipeline order
+STAGE_ARTICLE = "article"
+STAGE_EXTRACTION = "extraction"
+STAGE_PROCESSING = "processing"
+
+MAX_ARTICLE_CHARS = 50000  # 50KB processing limit
+
+# Share of a request's time budget each stage may use. Unused time rolls
+# over, and geocoding/summarization gets whatever is left at the end.
+STAGE_BUDGET_SHARES = {STAGE_ARTICLE: 0.25, STAGE_EXTRACTION: 0.4}
+
+# Warnings tied to stored locations, carried over when a near-duplicate reuses them
+REUSABLE_WARNINGS = {"GEOCODING_FAILED"}
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails in a way the client should see"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ArticlePipeline:
+    """
+    Runs an article through fetch, location extraction, geocoding/summarization
+    and spatial filtering. Used by both direct and SSE request modes.
+
+    When a job store is given, each stage's output is checkpointed so a
+    restarted worker can resume from the last completed stage.
+
+    When a result cache is given, an article whose text (after the fetch)
+    was already processed under the same prompts and models is answered
+    from the cache without any LLM or geocoder calls. With a near-duplicate
+    index, lightly edited copies of an article (syndicated wire stories)
+    reuse its locations and geocodes. With a location index, every complete
+    result's locations are recorded for spatial search.
+    """
+
+    def __init__(
+        self,
+        article_extractor: ArticleExtractor,
+        location_processor: LocationProcessor,
+        ai_services_factory: Callable,
+        result_cache: Optional[ResultCache] = None,
+        near_duplicate_index: Optional[NearDuplicateIndex] = None,
+        location_index: Optional[LocationIndex] = None,
+    ):
+        self.article_extractor = article_extractor
+        self.location_processor = location_processor
+        self.ai_services_factory = ai_services_factory
+        self.result_cache = result_cache
+        self.near_duplicate_index = near_duplicate_index
+        self.location_index = location_index
+
+    def run(
+        self,
+        request_id: str,
+        article_request: ArticleRequest,
+        progress_tracker: Optional[ProgressTracker] = None,
+        job_store: Optional[JobStore] = None,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+        profile: bool = False,
+        record_as: Optional[str] = None,
+    ) -> ArticleResponse:
+        """
+        Process an article request end to end.
+        Raises PipelineError for failures that should be reported to the client,
+        and JobCancelledError if cancel_token is cancelled mid-run.
+
+        With a deadline, each stage gets a share of the time budget; once it
+        runs out the response holds whatever locations were finished, with
+        DEADLINE_EXCEEDED warnings for the rest.
+
+        Every stage is timed into the process-wide metrics; the per-stage
+        breakdown is attached to the response when the request asks for it.
+        With profile, the run's stack samples and memory are stored for download
+        (see app.utils.profiling; a share of runs may be profiled regardless).
+        record_as names the API mode ("direct", "sse") the run is written to
+        the traffic trace under, when TRAFFIC_RECORD_PATH is set.
+        """
+        started = time.perf_counter()
+        started_at = time.time()
+        outcome = "error"
+        status = 500
+        response = None
+        timings = None
+        metrics.PIPELINES_IN_FLIGHT.inc()
+        try:
+            with (
+                collect_timings() as timings,
+                profiling.profile_request(request_id, forced=profile),
+            ):
+                response = self._run(
+                    request_id,
+                    article_request,
+                    progress_tracker,
+                    job_store,
+                    cancel_token,
+                    deadline,
+                )
+            if response.cached:
+                outcome = "cached"
+            elif response.near_duplicate:
+                outcome = "near_duplicate"
+            else:
+                outcome = "ok"
+            status = 200
+        except JobCancelledError:
+            outcome = "cancelled"
+            status = None
+            raise
+        except PipelineError as e:
+            status = e.status_code
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.PIPELINES_IN_FLIGHT.dec()
+            metrics.REQUEST_SECONDS.observe(seconds, outcome=outcome)
+            if record_as is not None:
+                self._record_traffic(
+                    record_as,
+                    article_request,
+                    progress_tracker,
+                    started_at,
+                    seconds,
+                    outcome,
+                    status,
+                    response,
+                    timings,
+                )
+
+        if article_request.debug_timings and Config.DEBUG_TIMINGS_ENABLED:
+            response.timings = timings.to_dict()
+        return response
+
+    def _record_traffic(
+        self,
+        mode: str,
+        article_request: ArticleRequest,
+        progress_tracker: Optional[ProgressTracker],
+        started_at: float,
+        seconds: float,
+        outcome: str,
+        status: Optional[int],
+        response: Optional[ArticleResponse],
+        timings: Optional[StageTimings],
+    ):
+        """Append the run's sanitized shape to the traffic trace, if recording"""
+        recorder = get_traffic_recorder()
+        if recorder is None:
+            return
+        # An SSE request was accepted when its tracker was made, then queued
+        arrived_at = progress_tracker.created_at if progress_tracker else started_at
+        usage = timings.token_usage() if timings else None
+        recorder.record(
+            {
+                "ts": round(arrived_at, 3),
+                "mode": mode,
+                "input_type": "url" if article_request.is_url() else "text",
+                "input_hash": input_hash(article_request.input),
+                "article_chars": len(response.article_text) if response else None,
+                "locations": len(response.locations) if response else None,
+                "outcome": outcome,
+                "status": status,
+                "queued_seconds": round(max(0.0, started_at - arrived_at), 3),
+                "seconds": round(seconds, 3),
+                "stages": sanitize_stages(timings.to_dict()["events"])
+                if timings
+                else [],
+                "tokens": {
+                    key: usage[key]
+                    for key in ("prompt_tokens", "output_tokens", "cost_usd")
+                }
+                if usage
+                else None,
+                "pid": os.getpid(),
+            }
+        )
+
+    def _run(
+        self,
+        request_id: str,
+        article_request: ArticleRequest,
+        progress_tracker: Optional[ProgressTracker],
+        job_store: Optional[JobStore],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> ArticleResponse:
+        start_time = time.time()
+        checkpoints = job_store.load_checkpoints(request_id) if job_store else {}
+        if checkpoints:
+            logger.info(
+                f"Request {request_id}: Resuming from checkpoints {sorted(checkpoints)}"
+            )
+
+        # Create response object with tracking
+        response = ArticleResponse(
+            article_title="",
+            article_text="",
+            locations=[],
+            processing_time=0.0,
+            request_id=request_id,
+        )
+
+        title, article_text = self._article_stage(
+            request_id,
+            article_request,
+            response,
+            progress_tracker,
+            checkpoints,
+            cancel_token,
+            deadline.stage(STAGE_BUDGET_SHARES[STAGE_ARTICLE]) if deadline else None,
+        )
+        response.article_title = title
+        response.article_text = article_text
+        self._checkpoint(
+            job_store,
+            checkpoints,
+            request_id,
+            STAGE_ARTICLE,
+            response,
+            {"title": title, "text": article_text},
+        )
+
+        source = article_request.input if article_request.is_url() else None
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = result_cache_key(article_text)
+            cached_response = self._cached_response(cache_key, response, start_time)
+            if cached_response is not None:
+                logger.info(f"Request {request_id}: Served from result cache")
+                return cached_response
+
+        fingerprint = None
+        if (
+            self.near_duplicate_index is not None
+            and STAGE_EXTRACTION not in checkpoints
+        ):
+            fingerprint = ArticleFingerprint.of(article_text)
+            near_duplicate = self._find_near_duplicate(fingerprint)
+            if near_duplicate is not None:
+                locations, geo_data_list = self._reuse_near_duplicate(
+                    request_id,
+                    near_duplicate,
+                    article_text,
+                    response,
+                    progress_tracker,
+                    cancel_token,
+                    deadline,
+                )
+                return self._finish(
+                    request_id,
+                    locations,
+                    geo_data_list,
+                    response,
+                    progress_tracker,
+                    cancel_token,
+                    deadline,
+                    start_time,
+                    cache_key,
+                    fingerprint,
+                    source,
+                )
+
+        # Initialize AI services
+        check_cancelled(cancel_token)
+        location_extractor, summarizer = self.ai_services_factory()
+
+        try:
+            extracted_locations = self._extraction_stage(
+                request_id,
+                article_text,
+                location_extractor,
+                response,
+                progress_tracker,
+                checkpoints,
+                cancel_token,
+                deadline.stage(STAGE_BUDGET_SHARES[STAGE_EXTRACTION])
+                if deadline
+                else None,
+            )
+        except DeadlineExceededError:
+            logger.warning(f"Request {request_id}: Deadline hit during extraction")
+            response.add_warning(
+                "DEADLINE_EXCEEDED",
+                "Time budget ran out before locations could be extracted",
+            )
+            response.processing_time = time.time() - start_time
+            return response
+        except LocationExtractionError as e:
+            # Neither checkpointed nor remembered, so the next attempt asks again
+            logger.warning(f"Request {request_id}: Location extraction failed: {e}")
+            response.add_warning(
+                "EXTRACTION_FAILED",
+                "Locations could not be extracted from the article",
+            )
+            response.processing_time = time.time() - start_time
+            return response
+
+        self._checkpoint(
+            job_store,
+            checkpoints,
+            request_id,
+            STAGE_EXTRACTION,
+            response,
+            {"locations": [loc.model_dump() for loc in extracted_locations]},
+        )
+
+        if not extracted_locations:
+            response.processing_time = time.time() - start_time
+            self._remember(cache_key, fingerprint, response, [], [], deadline, source)
+            return response
+
+        # Process locations through geocoding and summarization pipeline
+        locations, geo_data_list = self._processing_stage(
+            request_id,
+            extracted_locations,
+            article_text,
+            summarizer,
+            response,
+            progress_tracker,
+            checkpoints,
+            cancel_token,
+            deadline,
+        )
+        # A deadline-truncated stage is partial, so it must not be resumed from
+        if not (deadline and deadline.expired):
+            self._checkpoint(
+                job_store,
+                checkpoints,
+                request_id,
+                STAGE_PROCESSING,
+                response,
+                {
+                    "locations": [loc.model_dump() for loc in locations],
+                    "geo_data": [asdict(geo) for geo in geo_data_list],
+                },
+            )
+
+        return self._finish(
+            request_id,
+            locations,
+            geo_data_list,
+            response,
+            progress_tracker,
+            cancel_token,
+            deadline,
+            start_time,
+            cache_key,
+            fingerprint,
+            source,
+        )
+
+    def _finish(
+        self,
+        request_id: str,
+        locations: List[LocationData],
+        geo_data_list: List[GeographicData],
+        response: ArticleResponse,
+        progress_tracker: Optional[ProgressTracker],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+        start_time: float,
+        cache_key: Optional[str],
+        fingerprint: Optional[ArticleFingerprint],
+        source: Optional[str] = None,
+    ) -> ArticleResponse:
+        """Apply spatial filtering, then remember the result for later requests"""
+        check_cancelled(cancel_token)
+        if progress_tracker:
+            progress_tracker.start_filtering()
+        with timed("filter"):
+            filtered = self.location_processor.apply_spatial_filtering(
+                locations, geo_data_list, response, request_id
+            )
+
+        response.locations = filtered
+        response.processing_time = time.time() - start_time
+        self._remember(
+            cache_key, fingerprint, response, locations, geo_data_list, deadline, source
+        )
+        return response
+
+    def _article_stage(
+        self,
+        request_id: str,
+        article_request: ArticleRequest,
+        response: ArticleResponse,
+        progress_tracker: Optional[ProgressTracker],
+        checkpoints: Dict[str, Dict],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> Tuple[Optional[str], str]:
+        if STAGE_ARTICLE in checkpoints:
+            checkpoint = checkpoints[STAGE_ARTICLE]
+            self._restore_warnings(response, checkpoint)
+            return checkpoint["title"], checkpoint["text"]
+
+        # Handle URL or text input
+        if progress_tracker:
+            progress_tracker.start_article_extraction(article_request.input)
+
+        if article_request.is_url():
+            try:
+                logger.info(f"Request {request_id}: Extracting content from URL")
+                title, article_text = self.article_extractor.extract_from_url(
+                    article_request.get_url(),
+                    cancel_token=cancel_token,
+                    deadline=deadline,
+                    text_budget=MAX_ARTICLE_CHARS,
+                )
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Request {request_id}: URL extraction failed: {str(e)}")
+                if isinstance(e, DeadlineExceededError) or (
+                    deadline and deadline.expired
+                ):
+                    raise PipelineError(
+                        "Time budget ran out while fetching the article",
+                        status_code=504,
+                    )
+                raise PipelineError(
+                    f"Failed to extract content from URL: {str(e)}", status_code=400
+                )
+
+            if not article_text or not article_text.strip():
+                logger.warning(f"Request {request_id}: No content found at URL")
+                raise PipelineError(
+                    "No readable content found at the provided URL", status_code=400
+                )
+        else:
+            # Use provided text directly
+            title = "Article Text"  # Default title for text input
+            article_text = article_request.get_text()
+            logger.info(f"Request {request_id}: Processing provided text")
+
+        # Check for text length after extraction
+        if len(article_text) > MAX_ARTICLE_CHARS:
+            logger.warning(f"Request {request_id}: Text too long for processing")
+            response.add_warning(
+                "TEXT_TRUNCATED", "Article text was truncated to 50KB for processing"
+            )
+            article_text = article_text[:MAX_ARTICLE_CHARS]
+
+        return title, article_text
+
+    def _extraction_stage(
+        self,
+        request_id: str,
+        article_text: str,
+        location_extractor,
+        response: ArticleResponse,
+        progress_tracker: Optional[ProgressTracker],
+        checkpoints: Dict[str, Dict],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> List[ExtractedLocation]:
+        if STAGE_EXTRACTION in checkpoints:
+            checkpoint = checkpoints[STAGE_EXTRACTION]
+            self._restore_warnings(response, checkpoint)
+            return [ExtractedLocation(**loc) for loc in checkpoint["locations"]]
+
+        # Extract locations using AI
+        if progress_tracker:
+            progress_tracker.start_location_extraction(len(article_text))
+
+        extracted_locations = self._extract_locations(
+            request_id, article_text, location_extractor, cancel_token, deadline
+        )
+
+        if progress_tracker:
+            progress_tracker.locations_found(len(extracted_locations))
+        logger.info(
+            f"Request {request_id}: Extracted {len(extracted_locations)} locations"
+        )
+        return extracted_locations
+
+    @staticmethod
+    def _extract_locations(
+        request_id: str,
+        text: str,
+        location_extractor,
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> List[ExtractedLocation]:
+        try:
+            return location_extractor.extract_locations(
+                text, cancel_token=cancel_token, deadline=deadline
+            )
+        except RateLimitError:
+            logger.warning(f"Request {request_id}: Rate limit exceeded")
+            raise PipelineError(
+                "API rate limit exceeded. Please try again in a few moments.",
+                status_code=429,
+            )
+
+    def _processing_stage(
+        self,
+        request_id: str,
+        extracted_locations: List[ExtractedLocation],
+        article_text: str,
+        summarizer,
+        response: ArticleResponse,
+        progress_tracker: Optional[ProgressTracker],
+        checkpoints: Dict[str, Dict],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> Tuple[List[LocationData], List[GeographicData]]:
+        if STAGE_PROCESSING in checkpoints:
+            checkpoint = checkpoints[STAGE_PROCESSING]
+            self._restore_warnings(response, checkpoint)
+            return (
+                [LocationData(**loc) for loc in checkpoint["locations"]],
+                [_geo_data_from_dict(geo) for geo in checkpoint["geo_data"]],
+            )
+
+        if progress_tracker:
+            progress_tracker.start_processing_locations(len(extracted_locations))
+        return self.location_processor.process_locations_pipeline(
+            extracted_locations,
+            article_text,
+            summarizer,
+            response,
+            request_id,
+            cancel_token=cancel_token,
+            deadline=deadline,
+        )
+
+    def _cached_response(
+        self, cache_key: str, response: ArticleResponse, start_time: float
+    ) -> Optional[ArticleResponse]:
+        try:
+            cached = self.result_cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+        metrics.record_cache("result", cached is not None)
+        if cached is None:
+            return None
+
+        # Locations and warnings come from the cache; the title, text and
+        # request identity belong to this request
+        return ArticleResponse(
+            **{
+                **cached,
+                "article_title": response.article_title,
+                "article_text": response.article_text,
+                "request_id": response.request_id,
+                "processing_time": time.time() - start_time,
+                "cached": True,
+            }
+        )
+
+    def _remember(
+        self,
+        cache_key: Optional[str],
+        fingerprint: Optional[ArticleFingerprint],
+        response: ArticleResponse,
+        locations: List[LocationData],
+        geo_data_list: List[GeographicData],
+        deadline: Optional[Deadline],
+        source: Optional[str] = None,
+    ):
+        """
+        Store a complete result in the result cache and the location index,
+        and its unfiltered locations in the near-duplicate index
+        """
+        if deadline and deadline.expired:
+            return
+        response_data = response.model_dump()
+        if not is_cacheable(response_data):
+            return
+
+        if cache_key is not None:
+            try:
+                self.result_cache.put(cache_key, response_data)
+            except Exception as e:
+                logger.warning(f"Failed to cache result: {e}")
+
+        if fingerprint is not None:
+            payload = {
+                "locations": [loc.model_dump() for loc in locations],
+                "geo_data": [asdict(geo) for geo in geo_data_list],
+                "warnings": [
+                    warning.model_dump()
+                    for warning in response.warnings
+                    if warning.code in REUSABLE_WARNINGS
+                ],
+            }
+            try:
+                self.near_duplicate_index.add(fingerprint, payload)
+            except Exception as e:
+                logger.warning(f"Failed to index article for near-duplicates: {e}")
+
+        if self.location_index is not None:
+            bounding_boxes = {
+                location.name: geo.bounding_box
+                for location, geo in zip(locations, geo_data_list)
+            }
+            try:
+                self.location_index.add_article(
+                    article_id(response.article_text),
+                    [(loc, bounding_boxes.get(loc.name)) for loc in response.locations],
+                    request_id=response.request_id,
+                    title=response.article_title,
+                    source=source,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to add article to location index: {e}")
+
+    def _find_near_duplicate(
+        self, fingerprint: ArticleFingerprint
+    ) -> Optional[NearDuplicate]:
+        try:
+            near_duplicate = self.near_duplicate_index.find(fingerprint)
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed: {e}")
+            return None
+        # Too much rewritten to be worth patching up; process it from scratch
+        if (
+            near_duplicate is not None
+            and near_duplicate.changed_ratio > Config.NEAR_DUPLICATE_MAX_CHANGED_RATIO
+        ):
+            near_duplicate = None
+        metrics.record_cache("near_duplicate", near_duplicate is not None)
+        return near_duplicate
+
+    def _reuse_near_duplicate(
+        self,
+        request_id: str,
+        near_duplicate: NearDuplicate,
+        article_text: str,
+        response: ArticleResponse,
+        progress_tracker: Optional[ProgressTracker],
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> Tuple[List[LocationData], List[GeographicData]]:
+        """
+        Take locations and geocodes from a near-identical article, dropping
+        those the new text no longer mentions. Unless so little changed that
+        the earlier result is kept as it is, paragraphs that changed are
+        searched for new places, and locations they mention are re-summarized.
+        """
+        payload = near_duplicate.payload
+        paragraphs = article_paragraphs(article_text)
+        text = "\n".join(paragraphs).lower()
+        reused = [
+            (LocationData(**loc), _geo_data_from_dict(geo))
+            for loc, geo in zip(payload["locations"], payload["geo_data"])
+        ]
+        reused = [(loc, geo) for loc, geo in reused if _mentioned_in(loc, text)]
+        locations = [loc for loc, _ in reused]
+        geo_data_list = [geo for _, geo in reused]
+        response.warnings.extend(
+            ProcessingWarning(**warning) for warning in payload.get("warnings", [])
+        )
+        response.near_duplicate = True
+        logger.info(
+            f"Request {request_id}: Reusing near-duplicate article "
+            f"({near_duplicate.distance} bits apart, "
+            f"{near_duplicate.changed_ratio:.0%} of paragraphs changed)"
+        )
+        if progress_tracker:
+            progress_tracker.locations_found(len(locations))
+
+        if near_duplicate.changed_ratio <= Config.NEAR_DUPLICATE_SKIP_LLM_RATIO:
+            return locations, geo_data_list
+
+        changed_text = "\n".join(
+            paragraphs[index] for index in near_duplicate.changed_paragraphs
+        )
+        stale = [
+            index
+            for index, location in enumerate(locations)
+            if _mentioned_in(location, changed_text.lower())
+        ]
+
+        check_cancelled(cancel_token)
+        location_extractor, summarizer = self.ai_services_factory()
+        new_places = self._new_places(
+            request_id,
+            changed_text,
+            location_extractor,
+            locations,
+            response,
+            cancel_token,
+            deadline,
+        )
+
+        if stale:
+            if progress_tracker:
+                progress_tracker.start_processing_locations(len(stale))
+            refreshed = self.location_processor.refresh_summaries(
+                [locations[index] for index in stale],
+                article_text,
+                summarizer,
+                response,
+                request_id,
+                cancel_token=cancel_token,
+                deadline=deadline,
+            )
+            for index, location in zip(stale, refreshed):
+                locations[index] = location
+
+        if new_places:
+            if progress_tracker:
+                progress_tracker.start_processing_locations(len(new_places))
+            new_locations, new_geo_data = (
+                self.location_processor.process_locations_pipeline(
+                    new_places,
+                    article_text,
+                    summarizer,
+                    response,
+                    request_id,
+                    cancel_token=cancel_token,
+                    deadline=deadline,
+                )
+            )
+            locations.extend(new_locations)
+            geo_data_list.extend(new_geo_data)
+        return locations, geo_data_list
+
+    def _new_places(
+        self,
+        request_id: str,
+        changed_text: str,
+        location_extractor,
+        locations: List[LocationData],
+        response: ArticleResponse,
+        cancel_token: Optional[CancelToken],
+        deadline: Optional[Deadline],
+    ) -> List[ExtractedLocation]:
+        """Places named in changed paragraphs that the reused locations don't cover"""
+        try:
+            extracted = self._extract_locations(
+                request_id,
+                changed_text,
+                location_extractor,
+                cancel_token,
+                deadline.stage(STAGE_BUDGET_SHARES[STAGE_EXTRACTION])
+                if deadline
+                else None,
+            )
+        except DeadlineExceededError:
+            response.add_warning(
+                "DEADLINE_EXCEEDED",
+                "Time budget ran out before changed paragraphs could be searched",
+            )
+            return []
+        except LocationExtractionError as e:
+            logger.warning(f"Request {request_id}: Location extraction failed: {e}")
+            response.add_warning(
+                "EXTRACTION_FAILED",
+                "Locations could not be extracted from changed paragraphs",
+            )
+            return []
+
+        known = {location.name.lower() for location in locations}
+        new_places = []
+        for place in extracted:
+            if place.standardized_name.lower() not in known:
+                known.add(place.standardized_name.lower())
+                new_places.append(place)
+        return new_places
+
+    @staticmethod
+    def _checkpoint(
+        job_store: Optional[JobStore],
+        checkpoints: Dict[str, Dict],
+        request_id: str,
+        stage: str,
+        response: ArticleResponse,
+        payload: Dict,
+    ):
+        if not job_store or stage in checkpoints:
+            return
+        # Warnings are cumulative, so the latest checkpoint carries all of them
+        payload["warnings"] = [warning.model_dump() for warning in response.warnings]
+        try:
+            job_store.save_checkpoint(request_id, stage, payload)
+        except Exception as e:
+            # A failed checkpoint only costs us resumability, not the request
+            logger.warning(f"Request {request_id}: Failed to checkpoint {stage}: {e}")
+
+    @staticmethod
+    def _restore_warnings(response: ArticleResponse, checkpoint: Dict):
+        response.warnings = [
+            ProcessingWarning(**warning) for warning in checkpoint.get("warnings", [])
+        ]
+
+
+def _mentioned_in(location: LocationData, text: str) -> bool:
+    """Whether a location (by name, its first part, or original text) appears in text"""
+    names = {location.name, location.name.split(",")[0], location.original_text or ""}
+    return any(name.strip() and name.strip().lower() in text for name in names)
+
+
+def _geo_data_from_dict(data: Dict) -> GeographicData:
+    """Rebuild GeographicData from its JSON form (tuples come back as lists)"""
+    if data.get("bounding_box"):
+        data = {**data, "bounding_box": tuple(data["bounding_box"])}
+    return GeographicData(**data)
@@ -0,0 +1,419 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from app.models.data_models import ArticleRequest
+from app.services.article_pipeline import ArticlePipeline, PipelineError
+from app.services.location_processor import LocationProcessor
+from app.services.result_cache import normalize_article_text
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.job_scheduler import QueueFullError
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ITEM_QUEUED = "queued"
+ITEM_RUNNING = "running"
+ITEM_COMPLETE = "complete"
+ITEM_ERROR = "error"
+ITEM_CANCELLED = "cancelled"
+
+ITEM_FINISHED_STATUSES = (ITEM_COMPLETE, ITEM_ERROR, ITEM_CANCELLED)
+
+
+class SingleFlight:
+    """
+    Memoizes calls by key for the lifetime of a batch. Concurrent callers
+    with the same key wait for the one call in flight instead of repeating
+    it; failed calls are forgotten so a later caller can try again. A call
+    that stopped because its caller's job was cancelled or out of time says
+    nothing about the upstream, so waiters make the call themselves instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def call(self, key: Hashable, fn: Callable[[], Any], deadline: Deadline = None):
+        while True:
+            with self._lock:
+                future = self._futures.get(key)
+                owner = future is None
+                if owner:
+                    future = self._futures[key] = Future()
+                    self.misses += 1
+                else:
+                    self.hits += 1
+
+            if owner:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    with self._lock:
+                        self._futures.pop(key, None)
+                    future.set_exception(e)
+                    raise
+                future.set_result(result)
+                return result
+
+            try:
+                return future.result(timeout=deadline.remaining() if deadline else None)
+            except FutureTimeoutError:
+                raise DeadlineExceededError(
+                    "Time budget exhausted waiting for shared call"
+                )
+            except (JobCancelledError, DeadlineExceededError):
+                if deadline and deadline.expired:
+                    raise
+                logger.debug(f"Shared call for {key!r} was abandoned, retrying")
+
+
+class BatchGeocoder:
+    """Geocoding service wrapper that looks each place name up once per batch"""
+
+    def __init__(self, geocoding_service):
+        self.geocoding_service = geocoding_service
+        self.memo = SingleFlight()
+
+    def geocode_with_boundaries(
+        self,
+        location_name: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ):
+        return self.memo.call(
+            location_name,
+            lambda: self.geocoding_service.geocode_with_boundaries(
+                location_name, cancel_token=cancel_token, deadline=deadline
+            ),
+            deadline,
+        )
+
+    def __getattr__(self, name):
+        # Containment checks and anything else go straight to the real service
+        return getattr(self.geocoding_service, name)
+
+
+class BatchSummarizer:
+    """Summarizer wrapper that summarizes each (article, place) pair once per batch"""
+
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self.memo = SingleFlight()
+
+    def summarize_events_at_location(
+        self,
+        article_text: str,
+        location_name: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        article_key = hashlib.blake2b(
+            normalize_article_text(article_text).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return self.memo.call(
+            (article_key, location_name),
+            lambda: self.summarizer.summarize_events_at_location(
+                article_text,
+                location_name,
+                cancel_token=cancel_token,
+                deadline=deadline,
+            ),
+            deadline,
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.summarizer, name)
+
+
+class BatchServices:
+    """
+    Services shared by every item of one batch: a deduplicating geocoder and
+    summarizer, and AI clients that are created once rather than per article
+    """
+
+    def __init__(self, geocoding_service, ai_services_factory: Callable):
+        self.geocoder = BatchGeocoder(geocoding_service)
+        self.location_processor = LocationProcessor(self.geocoder)
+        self._ai_services_factory = ai_services_factory
+        self._ai_services = None
+        self._lock = threading.Lock()
+
+    def ai_services(self):
+        with self._lock:
+            if self._ai_services is None:
+                location_extractor, summarizer = self._ai_services_factory()
+                self._ai_services = (location_extractor, BatchSummarizer(summarizer))
+            return self._ai_services
+
+    def stats(self) -> Dict[str, int]:
+        summarizer = self._ai_services[1] if self._ai_services else None
+        return {
+            "geocoding_calls": self.geocoder.memo.misses,
+            "geocoding_reused": self.geocoder.memo.hits,
+            "summary_calls": summarizer.memo.misses if summarizer else 0,
+            "summaries_reused": summarizer.memo.hits if summarizer else 0,
+        }
+
+
+@dataclass
+class BatchItem:
+    index: int
+    request: ArticleRequest
+    status: str = ITEM_QUEUED
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    # Index of the identical item whose run this one shares, if any
+    duplicate_of: Optional[int] = None
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {"index": self.index, "input": self.request.input, "status": self.status}
+        if self.duplicate_of is not None:
+            data["duplicate_of"] = self.duplicate_of
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+def _item_key(article_request: ArticleRequest) -> str:
+    """Items with the same key produce the same result and run only once"""
+    if article_request.is_url():
+        return f"url:{article_request.input}"
+    return f"text:{normalize_article_text(article_request.input)}"
+
+
+class Batch:
+    """A group of articles processed together, reporting each item as it finishes"""
+
+    def __init__(self, batch_id: str, requests: List[ArticleRequest]):
+        self.batch_id = batch_id
+        self.items = [
+            BatchItem(index, request) for index, request in enumerate(requests)
+        ]
+        self.cancel_token = CancelToken()
+        self.services: Optional[BatchServices] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Item indices in the order they finished; stream event ids index into it
+        self.finished_order: List[int] = []
+        self._condition = threading.Condition()
+
+        first_by_key: Dict[str, int] = {}
+        for item in self.items:
+            key = _item_key(item.request)
+            if key in first_by_key:
+                item.duplicate_of = first_by_key[key]
+            else:
+                first_by_key[key] = item.index
+
+    @property
+    def unique_items(self) -> List[BatchItem]:
+        return [item for item in self.items if item.duplicate_of is None]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def status(self) -> str:
+        if not self.is_finished:
+            if any(item.status != ITEM_QUEUED for item in self.items):
+                return ITEM_RUNNING
+            return ITEM_QUEUED
+        if self.cancel_token.cancelled:
+            return ITEM_CANCELLED
+        return ITEM_COMPLETE
+
+    def mark_running(self, index: int):
+        with self._condition:
+            for item in self._with_duplicates(index):
+                item.status = ITEM_RUNNING
+
+    def finish_item(
+        self, index: int, status: str, result: dict = None, error: str = None
+    ):
+        """Record an item's outcome for it and every duplicate of it"""
+        with self._condition:
+            for item in self._with_duplicates(index):
+                item.status, item.result, item.error = status, result, error
+                self.finished_order.append(item.index)
+            if len(self.finished_order) == len(self.items):
+                self.finished_at = time.time()
+            self._condition.notify_all()
+
+    def finished_since(self, last_event_id: int = 0) -> List[BatchItem]:
+        """Items finished after the given stream position (1-based event ids)"""
+        with self._condition:
+            return [self.items[index] for index in self.finished_order[last_event_id:]]
+
+    def wait_for_items(
+        self, last_event_id: int = 0, timeout: float = None
+    ) -> List[BatchItem]:
+        """Block until items past last_event_id finish or timeout expires"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self.finished_order) > last_event_id, timeout=timeout
+            )
+            return [self.items[index] for index in self.finished_order[last_event_id:]]
+
+    def counts(self) -> Dict[str, int]:
+        with self._condition:
+            counts = {status: 0 for status in (ITEM_QUEUED, ITEM_RUNNING)}
+            counts.update({status: 0 for status in ITEM_FINISHED_STATUSES})
+            for item in self.items:
+                counts[item.status] += 1
+            return counts
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "total_items": len(self.items),
+            "unique_items": len(self.unique_items),
+            "counts": self.counts(),
+        }
+        if self.services is not None:
+            summary["shared_calls"] = self.services.stats()
+        return summary
+
+    def _with_duplicates(self, index: int) -> List[BatchItem]:
+        return [
+            item
+            for item in self.items
+            if item.index == index or item.duplicate_of == index
+        ]
+
+
+def _run_item(batch: Batch, pipeline: ArticlePipeline, index: int):
+    """Pool task: process one unique item and record the outcome"""
+    global _pending_items
+    try:
+        if batch.cancel_token.cancelled:
+            batch.finish_item(index, ITEM_CANCELLED, error=batch.cancel_token.reason)
+            return
+
+        batch.mark_running(index)
+        article_request = batch.items[index].request
+        # A batch item's budget starts when it leaves the queue
+        deadline = (
+            Deadline(min(article_request.time_budget, Config.MAX_TIME_BUDGET_SECONDS))
+            if article_request.time_budget
+            else None
+        )
+        request_id = f"{batch.batch_id}:{index}"
+        try:
+            response = pipeline.run(
+                request_id,
+                article_request,
+                cancel_token=batch.cancel_token,
+                deadline=deadline,
+            )
+            batch.finish_item(index, ITEM_COMPLETE, result=response.model_dump())
+        except JobCancelledError as e:
+            batch.finish_item(index, ITEM_CANCELLED, error=str(e) or "Batch cancelled")
+        except PipelineError as e:
+            batch.finish_item(index, ITEM_ERROR, error=e.message)
+        except Exception as e:
+            logger.error(f"Request {request_id}: Processing failed: {str(e)}")
+            batch.finish_item(index, ITEM_ERROR, error=f"Processing failed: {str(e)}")
+    finally:
+        with _batches_lock:
+            _pending_items -= 1
+
+
+def start_batch(
+    batch: Batch,
+    article_extractor,
+    geocoding_service,
+    ai_services_factory: Callable,
+    result_cache=None,
+    near_duplicate_index=None,
+    location_index=None,
+) -> None:
+    """
+    Queue a batch's unique items on the shared batch pool.
+    Raises QueueFullError if the pool already has too much work waiting.
+    """
+    global _pending_items
+    unique_items = batch.unique_items
+    with _batches_lock:
+        if _pending_items + len(unique_items) > Config.BATCH_MAX_PENDING_ITEMS:
+            raise QueueFullError(
+                f"Batch queue is full ({_pending_items} pending items)",
+                retry_after=Config.JOB_RETRY_AFTER_SECONDS,
+            )
+        _pending_items += len(unique_items)
+        _sweep_finished_batches(time.time())
+        _batches[batch.batch_id] = batch
+
+    batch.services = BatchServices(geocoding_service, ai_services_factory)
+    pipeline = ArticlePipeline(
+        article_extractor,
+        batch.services.location_processor,
+        batch.services.ai_services,
+        result_cache,
+        near_duplicate_index,
+        location_index,
+    )
+    executor = _get_batch_executor()
+    for item in unique_items:
+        executor.submit(_run_item, batch, pipeline, item.index)
+    logger.info(
+        f"Batch {batch.batch_id}: Queued {len(unique_items)} unique of "
+        f"{len(batch.items)} items"
+    )
+
+
+# Global batch registry and the worker pool shared by all batches
+_batches: Dict[str, Batch] = {}
+_batches_lock = threading.Lock()
+_pending_items = 0
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_pid: Optional[int] = None
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Create the pool on first use in each process, so nothing runs before a fork"""
+    global _batch_executor, _batch_executor_pid
+    with _batches_lock:
+        if _batch_executor is None or _batch_executor_pid != os.getpid():
+            _batch_executor = ThreadPoolExecutor(
+                max_workers=Config.BATCH_WORKERS, thread_name_prefix="batch-worker"
+            )
+            _batch_executor_pid = os.getpid()
+        return _batch_executor
+
+
+def _sweep_finished_batches(now: float):
+    """Drop batches that finished longer ago than the retention window (caller holds the lock)"""
+    retention = Config.PROGRESS_TRACKER_RETENTION_SECONDS
+    expired = [
+        batch_id
+        for batch_id, batch in _batches.items()
+        if batch.is_finished and now - batch.finished_at > retention
+    ]
+    for batch_id in expired:
+        del _batches[batch_id]
+
+
+def pending_item_count() -> int:
+    """Batch items queued or running across all batches"""
+    with _batches_lock:
+        return _pending_items
+
+
+def find_batch(batch_id: str) -> Optional[Batch]:
+    """Get a live or recently finished batch"""
+    with _batches_lock:
+        return _batches.get(batch_id)
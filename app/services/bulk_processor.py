@@ -0,0 +1,618 @@
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.models.data_models import ArticleRequest, ExtractedLocation
+from app.services.article_extractor import ArticleExtractor
+from app.services.article_pipeline import (
+    MAX_ARTICLE_CHARS,
+    ArticlePipeline,
+    PipelineError,
+)
+from app.services.geocoding import GeocodingService, GeographicData
+from app.services.location_extractor import LocationExtractor
+from app.services.location_processor import LocationProcessor
+from app.services.location_index import get_location_index
+from app.services.near_duplicates import get_near_duplicate_index
+from app.services.result_cache import get_result_cache, result_cache_key
+from app.services.summarizer import EventSummarizer
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+# Records handed to the pool but not yet written, per worker - enough to keep
+# every worker busy without reading the whole archive into memory
+IN_FLIGHT_PER_WORKER = 4
+
+
+@dataclass
+class BulkRecord:
+    """One article from an archive: a URL or text to run, or HTML already fetched"""
+
+    record_id: str
+    input: Optional[str] = None
+    url: Optional[str] = None
+    html: Optional[bytes] = None
+    charset: Optional[str] = None
+
+
+def read_jsonl(path: str) -> Iterator[BulkRecord]:
+    """
+    Records from a JSONL file (optionally gzipped). Each line holds "url",
+    "text" or "input", and optionally an "id" (defaults to the line number).
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logger.warning(f"{path}:{line_number}: Skipping invalid JSON")
+                continue
+            article_input = data.get("url") or data.get("text") or data.get("input")
+            if not article_input:
+                logger.warning(f"{path}:{line_number}: Skipping record without input")
+                continue
+            yield BulkRecord(
+                record_id=str(data.get("id", line_number)),
+                input=article_input,
+                url=data.get("url"),
+            )
+
+
+def _parse_http_response(block: bytes) -> Tuple[Dict[str, str], bytes, int]:
+    """Split an archived HTTP response into lowercased headers, body and status"""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        status = 0
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encoding = headers.get("content-encoding", "").lower()
+    try:
+        if encoding in ("gzip", "x-gzip"):
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+    except (OSError, zlib.error):
+        logger.warning("Could not decode compressed archived response")
+    return headers, body, status
+
+
+def _dechunk(body: bytes) -> bytes:
+    chunks = []
+    position = 0
+    while position < len(body):
+        line_end = body.find(b"\r\n", position)
+        if line_end < 0:
+            break
+        try:
+            size = int(body[position:line_end].split(b";")[0], 16)
+        except ValueError:
+            break
+        if size == 0:
+            break
+        chunks.append(body[line_end + 2 : line_end + 2 + size])
+        position = line_end + 2 + size + 2
+    return b"".join(chunks)
+
+
+def read_warc(path: str) -> Iterator[BulkRecord]:
+    """
+    HTML responses from a WARC file (plain or .warc.gz). Only successful
+    text/html "response" records are yielded; requests, metadata and other
+    media are skipped.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as handle:
+        while True:
+            line = handle.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ValueError(f"{path}: Expected a WARC record, got {line[:40]!r}")
+
+            headers = {}
+            for line in iter(handle.readline, b""):
+                if not line.strip():
+                    break
+                name, _, value = line.decode("utf-8", "replace").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            block = handle.read(int(headers.get("content-length", "0")))
+
+            if headers.get("warc-type") != "response":
+                continue
+            http_headers, body, status = _parse_http_response(block)
+            content_type = http_headers.get("content-type", "")
+            if status != 200 or "html" not in content_type.lower():
+                continue
+
+            charset = None
+            if "charset=" in content_type:
+                charset = content_type.split("charset=")[-1].split(";")[0].strip("\"' ")
+            url = headers.get("warc-target-uri", "")
+            yield BulkRecord(
+                record_id=headers.get("warc-record-id", url),
+                url=url,
+                html=body,
+                charset=charset or None,
+            )
+
+
+def read_records(path: str, input_format: str = "auto") -> Iterator[BulkRecord]:
+    if input_format == "auto":
+        name = path[:-3] if path.endswith(".gz") else path
+        input_format = "warc" if name.endswith((".warc", ".arc")) else "jsonl"
+    if input_format == "warc":
+        return read_warc(path)
+    if input_format == "jsonl":
+        return read_jsonl(path)
+    raise ValueError(f"Unknown input format '{input_format}' (expected jsonl or warc)")
+
+
+class SharedCallCache(SQLiteStore):
+    """
+    Geocoding and LLM results shared by every worker process of a bulk run
+    (and by later runs). LLM entries are keyed by pipeline version, so
+    changing a prompt or model doesn't reuse stale output.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS calls (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID;
+    """
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Any]:
+        """(found, value), so a stored empty result still counts as a hit"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM calls WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return False, None
+        return True, json.loads(row["value"])
+
+    def put(self, namespace: str, key: str, value: Any):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO calls (namespace, key, value, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), time.time()),
+        )
+
+
+class SharedGeocoder:
+    """Geocoding service that asks Nominatim about each place name only once"""
+
+    def __init__(self, geocoding_service, cache: SharedCallCache):
+        self.geocoding_service = geocoding_service
+        self.cache = cache
+
+    def geocode_with_boundaries(
+        self, location_name: str, cancel_token=None, deadline=None
+    ):
+        found, value = self.cache.get("geocode", location_name)
+        if found:
+            return _geographic_data(value)
+
+        geo_data = self.geocoding_service.geocode_with_boundaries(
+            location_name, cancel_token=cancel_token, deadline=deadline
+        )
+        # Service errors raise; misses aren't kept either, in case the place is added
+        if geo_data is not None:
+            self.cache.put("geocode", location_name, asdict(geo_data))
+        return geo_data
+
+    def __getattr__(self, name):
+        return getattr(self.geocoding_service, name)
+
+
+def _geographic_data(data: Dict) -> GeographicData:
+    if data.get("bounding_box"):
+        data = {**data, "bounding_box": tuple(data["bounding_box"])}
+    return GeographicData(**data)
+
+
+class SharedLocationExtractor:
+    """Location extractor that runs the LLM once per distinct article text"""
+
+    def __init__(self, location_extractor, cache: SharedCallCache):
+        self.location_extractor = location_extractor
+        self.cache = cache
+
+    def extract_locations(
+        self, article_text: str, cancel_token=None, deadline=None
+    ) -> List[ExtractedLocation]:
+        key = result_cache_key(article_text)
+        found, value = self.cache.get("locations", key)
+        if found:
+            return [ExtractedLocation(**location) for location in value]
+
+        locations = self.location_extractor.extract_locations(
+            article_text, cancel_token=cancel_token, deadline=deadline
+        )
+        # Failed calls and unparseable answers raise, so only parsed answers are kept
+        self.cache.put("locations", key, [loc.model_dump() for loc in locations])
+        return locations
+
+    def __getattr__(self, name):
+        return getattr(self.location_extractor, name)
+
+
+class SharedSummarizer:
+    """Summarizer that runs the LLM once per (article text, place) pair"""
+
+    def __init__(self, summarizer, cache: SharedCallCache):
+        self.summarizer = summarizer
+        self.cache = cache
+
+    def summarize_events_at_location(
+        self, article_text: str, location_name: str, cancel_token=None, deadline=None
+    ) -> str:
+        key = hashlib.sha256(
+            f"{result_cache_key(article_text)}\n{location_name}".encode("utf-8")
+        ).hexdigest()
+        found, value = self.cache.get("summary", key)
+        if found:
+            return value
+
+        summary = self.summarizer.summarize_events_at_location(
+            article_text, location_name, cancel_token=cancel_token, deadline=deadline
+        )
+        # Rate-limit placeholders fail the article; never keep them
+        lowered = summary.lower()
+        if "rate limit" not in lowered and "temporarily unavailable" not in lowered:
+            self.cache.put("summary", key, summary)
+        return summary
+
+    def __getattr__(self, name):
+        return getattr(self.summarizer, name)
+
+
+def build_bulk_pipeline(
+    cache: SharedCallCache,
+) -> Tuple[ArticlePipeline, ArticleExtractor]:
+    """The API's pipeline, with geocoding and LLM calls going through the shared cache"""
+    article_extractor = ArticleExtractor()
+    location_processor = LocationProcessor(SharedGeocoder(GeocodingService(), cache))
+    ai_services = []
+
+    def ai_services_factory():
+        # Created once per worker rather than once per article
+        if not ai_services:
+            if not Config.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY not configured")
+            ai_services.extend(
+                (
+                    SharedLocationExtractor(
+                        LocationExtractor(Config.GEMINI_API_KEY), cache
+                    ),
+                    SharedSummarizer(EventSummarizer(Config.GEMINI_API_KEY), cache),
+                )
+            )
+        return tuple(ai_services)
+
+    pipeline = ArticlePipeline(
+        article_extractor,
+        location_processor,
+        ai_services_factory,
+        get_result_cache(),
+        get_near_duplicate_index(),
+        get_location_index(),
+    )
+    return pipeline, article_extractor
+
+
+def process_record(
+    pipeline: ArticlePipeline, article_extractor: ArticleExtractor, record: BulkRecord
+) -> Dict[str, Any]:
+    """Run one record through the pipeline, returning its output row"""
+    row = {"id": record.record_id, "url": record.url, "title": None}
+    try:
+        title = None
+        article_input = record.input
+        if record.html is not None:
+            title, text = article_extractor.extract_from_html(
+                record.url, record.html, record.charset
+            )
+            if not text.strip():
+                raise PipelineError("No article text found in archived page")
+            # One character over the limit keeps the pipeline's truncation warning
+            article_input = text[: MAX_ARTICLE_CHARS + 1]
+
+        response = pipeline.run(record.record_id, ArticleRequest(input=article_input))
+        # Error rows are picked up again by --retry-errors
+        for warning in response.warnings:
+            if warning.code == "EXTRACTION_FAILED":
+                raise PipelineError(warning.message)
+        row.update(
+            status=STATUS_OK,
+            title=title or response.article_title,
+            locations=[location.model_dump() for location in response.locations],
+            warnings=[warning.code for warning in response.warnings],
+            processing_time=response.processing_time,
+            cached=response.cached,
+            error=None,
+        )
+    except PipelineError as e:
+        row.update(status=STATUS_ERROR, error=e.message)
+    except Exception as e:
+        row.update(status=STATUS_ERROR, error=str(e))
+    return row
+
+
+# Per-process pipeline, built by the pool initializer
+_worker_state: Optional[Tuple[ArticlePipeline, ArticleExtractor]] = None
+
+
+def _init_worker(cache_path: str):
+    global _worker_state
+    logging.basicConfig(level=logging.WARNING)
+    _worker_state = build_bulk_pipeline(SharedCallCache(cache_path))
+
+
+def _process_in_worker(record: BulkRecord) -> Dict[str, Any]:
+    return process_record(*_worker_state, record)
+
+
+class JsonlSink:
+    """Appends one JSON object per result, flushed in batches"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = open(path, "a", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            self._handle.write(json.dumps(row) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def close(self):
+        self._handle.close()
+
+    @staticmethod
+    def completed(path: str) -> Dict[str, str]:
+        """Status by record id of rows already written; a torn last line is dropped"""
+        if not os.path.exists(path):
+            return {}
+        statuses = {}
+        good_length = 0
+        with open(path, "rb") as handle:
+            for line in handle:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                statuses[row["id"]] = row["status"]
+                good_length += len(line)
+        if good_length != os.path.getsize(path):
+            with open(path, "r+b") as handle:
+                handle.truncate(good_length)
+        return statuses
+
+
+class ParquetSink:
+    """
+    Writes each flushed batch as its own part file in a directory, so an
+    interrupted run keeps every finished part. Needs the optional pyarrow.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._next_part = len(self._part_files(path))
+        location = pa.struct(
+            [
+                ("name", pa.string()),
+                ("latitude", pa.float64()),
+                ("longitude", pa.float64()),
+                ("events_summary", pa.string()),
+                ("confidence", pa.float64()),
+                ("resolution_method", pa.string()),
+                ("original_text", pa.string()),
+            ]
+        )
+        self.schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("url", pa.string()),
+                ("status", pa.string()),
+                ("title", pa.string()),
+                ("error", pa.string()),
+                ("processing_time", pa.float64()),
+                ("cached", pa.bool_()),
+                ("warnings", pa.list_(pa.string())),
+                ("locations", pa.list_(location)),
+            ]
+        )
+
+    def write(self, rows: List[Dict[str, Any]]):
+        table = self._pa.Table.from_pylist(
+            [{name: row.get(name) for name in self.schema.names} for row in rows],
+            schema=self.schema,
+        )
+        final_path = os.path.join(self.path, f"part-{self._next_part:05d}.parquet")
+        # Written under a temporary name so a crash never leaves a torn part
+        self._pq.write_table(table, final_path + ".tmp")
+        os.replace(final_path + ".tmp", final_path)
+        self._next_part += 1
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _part_files(path: str) -> List[str]:
+        return sorted(
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.startswith("part-") and name.endswith(".parquet")
+        )
+
+    @classmethod
+    def completed(cls, path: str) -> Dict[str, str]:
+        if not os.path.isdir(path):
+            return {}
+        import pyarrow.parquet as pq
+
+        statuses = {}
+        for part in cls._part_files(path):
+            table = pq.read_table(part, columns=["id", "status"])
+            statuses.update(zip(table["id"].to_pylist(), table["status"].to_pylist()))
+        return statuses
+
+
+SINKS = {"jsonl": JsonlSink, "parquet": ParquetSink}
+
+
+def _output_format(path: str, output_format: str) -> str:
+    if output_format == "auto":
+        return "parquet" if path.endswith((".parquet", "/")) else "jsonl"
+    if output_format not in SINKS:
+        raise ValueError(
+            f"Unknown output format '{output_format}' (expected {', '.join(SINKS)})"
+        )
+    return output_format
+
+
+def run_bulk(
+    input_path: str,
+    output_path: str,
+    workers: int = 4,
+    cache_path: Optional[str] = None,
+    input_format: str = "auto",
+    output_format: str = "auto",
+    resume: bool = True,
+    retry_errors: bool = False,
+    flush_every: int = 50,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Process every record of an archive, appending results as they finish.
+
+    The output doubles as the checkpoint: with resume, records already in it
+    are skipped (failed ones are retried with retry_errors); without it, an
+    existing output is an error rather than being overwritten. workers=0
+    runs everything in this process, which is handy for debugging.
+    """
+    sink_class = SINKS[_output_format(output_path, output_format)]
+    cache_path = cache_path or Config.BULK_CACHE_PATH
+    done: Set[str] = set()
+    if resume:
+        done = {
+            record_id
+            for record_id, status in sink_class.completed(output_path).items()
+            if status == STATUS_OK or not retry_errors
+        }
+        if done:
+            logger.info(f"Resuming: skipping {len(done)} already processed records")
+    elif os.path.exists(output_path):
+        raise FileExistsError(f"{output_path} already exists; remove it or resume")
+
+    def pending_records() -> Iterator[BulkRecord]:
+        count = 0
+        for record in read_records(input_path, input_format):
+            if record.record_id in done:
+                continue
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield record
+
+    stats = {"processed": 0, "errors": 0, "skipped": len(done)}
+    started_at = time.time()
+    buffer: List[Dict[str, Any]] = []
+    sink = sink_class(output_path)
+
+    def collect(row: Dict[str, Any]):
+        buffer.append(row)
+        stats["processed"] += 1
+        if row["status"] != STATUS_OK:
+            stats["errors"] += 1
+        if len(buffer) >= flush_every:
+            sink.write(buffer)
+            buffer.clear()
+            rate = stats["processed"] / max(time.time() - started_at, 1e-6)
+            logger.info(
+                f"Processed {stats['processed']} records "
+                f"({stats['errors']} errors, {rate:.1f}/s)"
+            )
+
+    try:
+        if workers <= 0:
+            _init_worker(cache_path)
+            for record in pending_records():
+                collect(_process_in_worker(record))
+        else:
+            _run_pool(pending_records(), workers, cache_path, collect)
+    finally:
+        if buffer:
+            sink.write(buffer)
+        sink.close()
+
+    stats["seconds"] = round(time.time() - started_at, 1)
+    return stats
+
+
+def _run_pool(records: Iterator[BulkRecord], workers: int, cache_path: str, collect):
+    """Feed records to worker processes, keeping a bounded number in flight"""
+    # Same start method as the parse pool: never fork a threaded parent
+    method = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+        initargs=(cache_path,),
+    ) as executor:
+        in_flight = set()
+        for record in records:
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future.result())
+            in_flight.add(executor.submit(_process_in_worker, record))
+        for future in wait(in_flight).done:
+            collect(future.result())
@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# A learned profile that misses this many pages in a row is dropped and relearned
+MAX_PROFILE_MISSES = 3
+
+
+@dataclass
+class ExtractionProfile:
+    domain: str
+    selector: str
+    score: float
+    manual: bool
+    misses: int
+    updated_at: float
+
+
+def profile_domain(url: str) -> str:
+    """Key profiles on the host, ignoring port and a leading www."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class ExtractionProfileStore(SQLiteStore):
+    """
+    Per-domain article container selectors, learned from paragraph density
+    or set manually. Profiles are cached in memory after the first lookup.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS extraction_profiles (
+        domain TEXT PRIMARY KEY,
+        selector TEXT NOT NULL,
+        score REAL NOT NULL DEFAULT 0,
+        manual INTEGER NOT NULL DEFAULT 0,
+        misses INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._cache: Dict[str, Optional[ExtractionProfile]] = {}
+        self._cache_lock = threading.Lock()
+
+    def get(self, domain: str) -> Optional[ExtractionProfile]:
+        with self._cache_lock:
+            if domain in self._cache:
+                return self._cache[domain]
+
+        row = (
+            self._connect()
+            .execute("SELECT * FROM extraction_profiles WHERE domain = ?", (domain,))
+            .fetchone()
+        )
+        profile = self._to_profile(row) if row else None
+        with self._cache_lock:
+            self._cache[domain] = profile
+        return profile
+
+    def learn(self, domain: str, selector: str, score: float):
+        """Record the best container seen for a domain (manual profiles win)"""
+        existing = self.get(domain)
+        if existing and (existing.manual or existing.selector == selector):
+            return
+        self._save(ExtractionProfile(domain, selector, score, False, 0, time.time()))
+        logger.info(f"Learned extraction profile for {domain}: {selector}")
+
+    def set_override(self, domain: str, selector: str):
+        """Pin a domain to a selector; it is never relearned or dropped"""
+        self._save(ExtractionProfile(domain, selector, 0.0, True, 0, time.time()))
+
+    def record_hit(self, domain: str):
+        profile = self.get(domain)
+        if profile and profile.misses:
+            profile.misses = 0
+            self._save(profile)
+
+    def record_miss(self, domain: str):
+        """
+        Note that the profile selector didn't produce usable text. Learned
+        profiles are dropped after repeated misses (site redesigns).
+        """
+        profile = self.get(domain)
+        if not profile or profile.manual:
+            return
+
+        profile.misses += 1
+        if profile.misses >= MAX_PROFILE_MISSES:
+            logger.info(f"Dropping stale extraction profile for {domain}")
+            self.delete(domain)
+        else:
+            self._save(profile)
+
+    def delete(self, domain: str):
+        self._connect().execute(
+            "DELETE FROM extraction_profiles WHERE domain = ?", (domain,)
+        )
+        with self._cache_lock:
+            self._cache[domain] = None
+
+    def load_overrides(self, path: str) -> int:
+        """Apply manual overrides from a JSON file of {domain: selector}"""
+        with open(path) as handle:
+            overrides = json.load(handle)
+        for domain, selector in overrides.items():
+            self.set_override(domain.lower(), selector)
+        return len(overrides)
+
+    def _save(self, profile: ExtractionProfile):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO extraction_profiles "
+            "(domain, selector, score, manual, misses, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                profile.domain,
+                profile.selector,
+                profile.score,
+                int(profile.manual),
+                profile.misses,
+                profile.updated_at,
+            ),
+        )
+        with self._cache_lock:
+            self._cache[profile.domain] = profile
+
+    @staticmethod
+    def _to_profile(row) -> ExtractionProfile:
+        return ExtractionProfile(
+            domain=row["domain"],
+            selector=row["selector"],
+            score=row["score"],
+            manual=bool(row["manual"]),
+            misses=row["misses"],
+            updated_at=row["updated_at"],
+        )
+
+
+# Global profile store, opened lazily from Config.EXTRACTION_PROFILE_PATH
+_profile_store: Optional[ExtractionProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_extraction_profile_store() -> Optional[ExtractionProfileStore]:
+    """Get the process-wide profile store, or None if profiles are disabled"""
+    global _profile_store
+    if not Config.EXTRACTION_PROFILE_PATH:
+        return None
+
+    with _profile_store_lock:
+        if (
+            _profile_store is None
+            or _profile_store.path != Config.EXTRACTION_PROFILE_PATH
+        ):
+            _profile_store = ExtractionProfileStore(Config.EXTRACTION_PROFILE_PATH)
+            if Config.EXTRACTION_PROFILE_OVERRIDES:
+                try:
+                    count = _profile_store.load_overrides(
+                        Config.EXTRACTION_PROFILE_OVERRIDES
+                    )
+                    logger.info(f"Loaded {count} extraction profile overrides")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load extraction profile overrides: {e}")
+        return _profile_store
@@ -0,0 +1,209 @@
+import functools
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.utils import tracing
+from app.utils.lazy_import import lazy_import
+from app.utils.stage_timing import record_tokens
+from config import Config
+
+# Imported on first use: it pulls in gRPC and the generated API types
+genai = lazy_import("google.generativeai")
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "prompts"
+)
+
+# Characters per token until a model's own usage reports have been seen
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# List prices in USD per million (prompt, output) tokens; thinking tokens are
+# billed as output. Overridden per model by GEMINI_PRICES
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+
+def configure_gemini(api_key: str):
+    """
+    Configure the Gemini client, sending requests to Config.GEMINI_API_ENDPOINT
+    over REST when one is set (e.g. a local stand-in for benchmarks)
+    """
+    if Config.GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=api_key,
+            transport="rest",
+            client_options={"api_endpoint": Config.GEMINI_API_ENDPOINT},
+        )
+    else:
+        genai.configure(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(filename: str) -> str:
+    """A prompt template from prompts/, read once per process"""
+    with open(os.path.join(PROMPTS_DIR, filename), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def preload_prompts() -> int:
+    """Read every prompt template now (e.g. before forking workers)"""
+    filenames = sorted(f for f in os.listdir(PROMPTS_DIR) if f.endswith(".txt"))
+    for filename in filenames:
+        load_prompt(filename)
+    return len(filenames)
+
+
+def _token_count(usage, field: str) -> int:
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else 0
+
+
+def usage_from_response(response) -> Optional[Tuple[int, int]]:
+    """(prompt, output) tokens Gemini reported for a response, if it did"""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = _token_count(usage, "prompt_token_count")
+    if not prompt_tokens:
+        return None
+    output_tokens = _token_count(usage, "candidates_token_count") + _token_count(
+        usage, "thoughts_token_count"
+    )
+    return prompt_tokens, output_tokens
+
+
+@functools.lru_cache(maxsize=4)
+def parse_prices(raw: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Per-model price overrides from a GEMINI_PRICES value, parsed once per
+    value. Malformed JSON or entries are logged and ignored.
+    """
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+    except ValueError:
+        logger.warning("GEMINI_PRICES is not valid JSON, using list prices")
+        return {}
+    if not isinstance(overrides, dict):
+        logger.warning("GEMINI_PRICES is not a JSON object, using list prices")
+        return {}
+
+    prices = {}
+    for model, entry in overrides.items():
+        if (
+            isinstance(entry, list)
+            and len(entry) == 2
+            and all(
+                isinstance(price, (int, float))
+                and not isinstance(price, bool)
+                and math.isfinite(price)
+                and price >= 0
+                for price in entry
+            )
+        ):
+            prices[model] = (float(entry[0]), float(entry[1]))
+        else:
+            logger.warning(
+                f"Ignoring GEMINI_PRICES entry for {model!r}: expected "
+                f"[prompt_price, output_price], got {entry!r}"
+            )
+    return prices
+
+
+def model_prices(model: str) -> Optional[Tuple[float, float]]:
+    """USD per million (prompt, output) tokens of a model, if known"""
+    overrides = parse_prices(Config.GEMINI_PRICES)
+    if model in overrides:
+        return overrides[model]
+    return DEFAULT_PRICES.get(model)
+
+
+def token_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    """USD cost of one call, or 0 for a model without a known price"""
+    prices = model_prices(model)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+class _CharsPerToken:
+    """Characters per prompt token of each model, measured from usage reports"""
+
+    # Weight of the newest measurement in the running average
+    SMOOTHING = 0.2
+
+    def __init__(self):
+        self._ratios: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, chars: int, tokens: int):
+        if chars <= 0 or tokens <= 0:
+            return
+        ratio = chars / tokens
+        with self._lock:
+            previous = self._ratios.get(model)
+            self._ratios[model] = (
+                ratio
+                if previous is None
+                else previous + self.SMOOTHING * (ratio - previous)
+            )
+
+    def get(self, model: str) -> float:
+        with self._lock:
+            return self._ratios.get(model, DEFAULT_CHARS_PER_TOKEN)
+
+    def clear(self):
+        with self._lock:
+            self._ratios.clear()
+
+
+chars_per_token = _CharsPerToken()
+
+
+def estimate_tokens(text: str, model: str) -> int:
+    """Tokens text will take, from the model's measured characters per token"""
+    return math.ceil(len(text) / chars_per_token.get(model))
+
+
+def record_usage(response, model: str, stage: str, prompt: str):
+    """
+    Account for the tokens a generate_content call used: into the current
+    run's timings, the process-wide token and cost counters, the current
+    trace span, and the model's measured characters per token. Never raises:
+    a bookkeeping bug must not fail the call it accounts for.
+    """
+    try:
+        _record_usage(response, model, stage, prompt)
+    except Exception as e:
+        logger.warning(f"Failed to record {stage} token usage for {model}: {e}")
+
+
+def _record_usage(response, model: str, stage: str, prompt: str):
+    usage = usage_from_response(response)
+    if usage is None:
+        return
+    prompt_tokens, output_tokens = usage
+    record_tokens(
+        stage,
+        model,
+        prompt_tokens,
+        output_tokens,
+        token_cost(model, prompt_tokens, output_tokens),
+    )
+    span = tracing.current_span()
+    if span is not None:
+        # Summed, as one span can cover an extraction and its self-correction
+        span.set_attribute("gen_ai.request.model", model)
+        for key, tokens in (
+            ("gen_ai.usage.input_tokens", prompt_tokens),
+            ("gen_ai.usage.output_tokens", output_tokens),
+        ):
+            span.set_attribute(key, span.attributes.get(key, 0) + tokens)
+    chars_per_token.observe(model, len(prompt), prompt_tokens)
@@ -1,12 +1,29 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from typing import Tuple, Optional, Dict
+import os
 import time
 import logging
 from dataclasses import dataclass
+from app.utils import tracing
+from app.utils.lazy_import import lazy_import
+from app.utils.cancellation import CancelToken
+from app.utils.deadline import Deadline
+from app.utils.stage_timing import timed
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Imported on first use: geopy loads every geocoder it ships
+geopy_geocoders = lazy_import("geopy.geocoders")
+geopy_exc = lazy_import("geopy.exc")
+
+GEOCODE_TIMEOUT = 30  # seconds, when the caller has no deadline
+
+
+class GeocodingError(Exception):
+    """Raised when the geocoding service fails, as opposed to a place not being found"""
+
+    pass
+
 
 @dataclass
 class GeographicData:
@@ -27,25 +44,61 @@ class GeographicData:
 
 class GeocodingService:
     def __init__(self):
-        self.geocoder = Nominatim(user_agent="waldo")
+        self._geocoder = None
+        self._geocoder_pid: Optional[int] = None
 
-    def geocode_with_boundaries(self, location_name: str) -> Optional[GeographicData]:
+    @property
+    def geocoder(self):
+        """
+        The Nominatim client, created on first use in each process so a
+        forked worker never shares its parent's HTTP connections
+        """
+        if self._geocoder is None or self._geocoder_pid != os.getpid():
+            self._geocoder = geopy_geocoders.Nominatim(
+                user_agent="waldo",
+                domain=Config.NOMINATIM_DOMAIN,
+                scheme=Config.NOMINATIM_SCHEME,
+            )
+            self._geocoder_pid = os.getpid()
+        return self._geocoder
+
+    @geocoder.setter
+    def geocoder(self, geocoder):
+        self._geocoder = geocoder
+        self._geocoder_pid = os.getpid()
+
+    @tracing.traced("geocode_with_boundaries")
+    def geocode_with_boundaries(
+        self,
+        location_name: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[GeographicData]:
         """
         Convert location name to detailed geographic data including boundaries.
         Returns: GeographicData object or None if not found
+        Raises JobCancelledError if the job is cancelled before the request is sent,
+        DeadlineExceededError if the deadline has already passed, and
+        GeocodingError if the service times out or fails.
         """
-        try:
-            # Add small delay to be respectful to the service
+        tracing.set_attribute("location.name", location_name)
+        # Add small delay to be respectful to the service
+        if cancel_token:
+            cancel_token.sleep(0.1)
+        else:
             time.sleep(0.1)
+        timeout = deadline.timeout(GEOCODE_TIMEOUT) if deadline else GEOCODE_TIMEOUT
 
+        try:
             # Request detailed data from Nominatim
-            location = self.geocoder.geocode(
-                location_name,
-                timeout=30,
-                exactly_one=True,
-                addressdetails=True,
-                extratags=True,
-            )
+            with timed("geocode", detail=location_name, upstream="nominatim"):
+                location = self.geocoder.geocode(
+                    location_name,
+                    timeout=timeout,
+                    exactly_one=True,
+                    addressdetails=True,
+                    extratags=True,
+                )
 
             if not location:
                 return None
@@ -105,12 +158,14 @@ class GeocodingService:
                 containing_areas=containing_areas,
             )
 
-        except (GeocoderTimedOut, GeocoderServiceError) as e:
+        except (geopy_exc.GeocoderTimedOut, geopy_exc.GeocoderServiceError) as e:
             logger.error(f"Geocoding error for '{location_name}': {e}")
-            return None
+            raise GeocodingError(f"Geocoding error for '{location_name}': {e}") from e
         except Exception as e:
             logger.error(f"Unexpected error geocoding '{location_name}': {e}")
-            return None
+            raise GeocodingError(
+                f"Unexpected error geocoding '{location_name}': {e}"
+            ) from e
 
     def is_contained_within(
         self, location1: GeographicData, location2: GeographicData
@@ -0,0 +1,401 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+logger = logging.getLogger(__name__)
+
+# Common article containers, most specific first
+ARTICLE_SELECTORS = [
+    "article",
+    ".article-body",
+    ".story-body",
+    ".entry-content",
+    ".post-content",
+    ".content",
+]
+
+# The same selectors split into tag and class lookups for single-pass matching
+_SELECTOR_RANKS_BY_TAG = {
+    selector: rank
+    for rank, selector in enumerate(ARTICLE_SELECTORS)
+    if not selector.startswith(".")
+}
+_SELECTOR_RANKS_BY_CLASS = {
+    selector[1:]: rank
+    for rank, selector in enumerate(ARTICLE_SELECTORS)
+    if selector.startswith(".")
+}
+
+NON_CONTENT_TAGS = ["script", "style"]
+
+# Selector the text came from when no container matched
+BODY_SELECTOR = "body"
+
+# A profile selector must yield at least this much text to be trusted
+MIN_PROFILE_TEXT_CHARS = 200
+
+# Paragraphs shorter than this (after removing link text) don't count
+# towards a container's score - they are usually captions or bylines
+MIN_PARAGRAPH_CHARS = 25
+
+# "tag", ".class", "#id" or "tag.class" - what learned profiles produce
+SIMPLE_SELECTOR_PATTERN = re.compile(
+    r"^(?P<tag>[a-z][a-z0-9]*)?(?:#(?P<id>[\w-]+))?(?:\.(?P<cls>[\w-]+))?$"
+)
+
+
+@dataclass
+class ExtractionResult:
+    title: Optional[str]
+    text: str
+    # Selector that produced the text ("body" for the fallback)
+    selector: Optional[str] = None
+    # Best container found by paragraph density, when learning
+    learned_selector: Optional[str] = None
+    learned_score: float = 0.0
+
+
+def clean_text(text: str) -> str:
+    """Strip each line and drop blank ones"""
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def candidate_selector(
+    tag: str, element_id: Optional[str], classes: List[str]
+) -> Optional[str]:
+    """
+    Build a selector for a container that should match the same container on
+    other pages of the site. Ids and classes containing digits usually vary
+    per article, so they are skipped.
+    """
+    if tag in ("html", "body"):
+        return None
+    if element_id and not any(char.isdigit() for char in element_id):
+        return f"#{element_id}"
+    for class_name in classes:
+        if not any(char.isdigit() for char in class_name):
+            return f"{tag}.{class_name}"
+    return None
+
+
+def _best_candidate(scored: List[list]) -> Tuple[Optional[str], float, object]:
+    """Pick the highest-scoring [selector, score, element] (first wins ties)"""
+    best = None
+    for candidate in scored:
+        if candidate[0] and (best is None or candidate[1] > best[1]):
+            best = candidate
+    if best is None:
+        return None, 0.0, None
+    return best[0], best[1], best[2]
+
+
+class BeautifulSoupParser:
+    """Pure-Python parser: BeautifulSoup with the stdlib html.parser"""
+
+    name = "html.parser"
+
+    def parse(
+        self, content: bytes, charset: Optional[str] = None
+    ) -> Tuple[Optional[str], str]:
+        """Pull the title and cleaned article text out of an HTML document"""
+        result = self.extract(content, charset)
+        return result.title, result.text
+
+    def extract(
+        self,
+        content: bytes,
+        charset: Optional[str] = None,
+        selector: Optional[str] = None,
+        learn: bool = False,
+    ) -> ExtractionResult:
+        """
+        Extract the title and article text, trying `selector` (a learned or
+        manual per-site profile) before the generic article containers.
+        With learn=True, also score containers by paragraph text to find the
+        site's real content container.
+
+        A charset from the Content-Type header wins; otherwise BeautifulSoup
+        sniffs the BOM and <meta charset> declarations.
+        """
+        soup = BeautifulSoup(content, "html.parser", from_encoding=charset)
+
+        # Extract title
+        title = None
+        title_tag = soup.find("title")
+        if title_tag:
+            title = title_tag.get_text().strip()
+
+        # Remove script and style elements
+        for script in soup(NON_CONTENT_TAGS):
+            script.decompose()
+
+        text = ""
+        used_selector = None
+
+        # Try the site's profile first
+        if selector:
+            try:
+                profile_element = soup.select_one(selector)
+            except Exception:
+                logger.warning(f"Ignoring invalid profile selector '{selector}'")
+                profile_element = None
+            if profile_element:
+                profile_text = profile_element.get_text()
+                if len(clean_text(profile_text)) >= MIN_PROFILE_TEXT_CHARS:
+                    text, used_selector = profile_text, selector
+
+        # Extract text from common article containers
+        if not text:
+            for article_selector in ARTICLE_SELECTORS:
+                article_element = soup.select_one(article_selector)
+                if article_element:
+                    text = article_element.get_text()
+                    used_selector = article_selector if text else None
+                    break
+
+        learned_selector, learned_score, learned_element = None, 0.0, None
+        if learn:
+            learned_selector, learned_score, learned_element = _best_candidate(
+                self._score_containers(soup)
+            )
+            if not text and learned_element is not None:
+                text, used_selector = learned_element.get_text(), learned_selector
+
+        # Fallback to body if no article container found
+        if not text:
+            body = soup.find("body")
+            if body:
+                text = body.get_text()
+                used_selector = BODY_SELECTOR
+
+        return ExtractionResult(
+            title, clean_text(text), used_selector, learned_selector, learned_score
+        )
+
+    @staticmethod
+    def _score_containers(soup) -> List[list]:
+        """Credit each paragraph's text to its parent, and half to its grandparent"""
+        scores: Dict[int, list] = {}
+        for paragraph in soup.find_all("p"):
+            link_chars = sum(len(a.get_text().strip()) for a in paragraph.find_all("a"))
+            score = len(paragraph.get_text().strip()) - link_chars
+            if score < MIN_PARAGRAPH_CHARS:
+                continue
+
+            parent = paragraph.parent
+            for element, weight in (
+                (parent, 1.0),
+                (getattr(parent, "parent", None), 0.5),
+            ):
+                if element is None or element.name == "[document]":
+                    continue
+                if id(element) not in scores:
+                    scores[id(element)] = [
+                        candidate_selector(
+                            element.name, element.get("id"), element.get("class") or []
+                        ),
+                        0.0,
+                        element,
+                    ]
+                scores[id(element)][1] += score * weight
+        return list(scores.values())
+
+
+class LxmlParser:
+    """
+    Compiled libxml2 parser. Walks the tree once, recording the title, the
+    first element matching each article selector (and the profile selector),
+    and paragraph scores, then picks the container the selector loop would.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        # Imported here so lxml stays an optional dependency
+        import lxml.etree
+        import lxml.html
+
+        self._etree = lxml.etree
+        self._html = lxml.html
+
+    def parse(
+        self, content: bytes, charset: Optional[str] = None
+    ) -> Tuple[Optional[str], str]:
+        """Pull the title and cleaned article text out of an HTML document"""
+        result = self.extract(content, charset)
+        return result.title, result.text
+
+    def extract(
+        self,
+        content: bytes,
+        charset: Optional[str] = None,
+        selector: Optional[str] = None,
+        learn: bool = False,
+    ) -> ExtractionResult:
+        """Same contract as BeautifulSoupParser.extract"""
+        root = self._build_tree(content, charset)
+        if root is None:
+            return ExtractionResult(None, "")
+
+        # Drop script/style subtrees in C, keeping the text that follows them
+        self._etree.strip_elements(root, *NON_CONTENT_TAGS, with_tail=False)
+
+        simple_selector = SIMPLE_SELECTOR_PATTERN.match(selector) if selector else None
+        profile_element = None
+        if selector and not simple_selector:
+            profile_element = self._css_select_one(root, selector)
+
+        title = None
+        body = None
+        best_rank = len(ARTICLE_SELECTORS)
+        best_element = None
+        scores: Dict[object, list] = {}
+
+        for element in root.iter():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue  # comments and processing instructions
+
+            if tag == "title":
+                if title is None:
+                    title = element.text_content().strip()
+            elif tag == "body" and body is None:
+                body = element
+            elif tag == "p" and learn:
+                self._score_paragraph(element, scores)
+
+            classes = element.get("class")
+            class_names = classes.split() if classes else ()
+
+            if simple_selector and profile_element is None:
+                if self._matches(element, tag, class_names, simple_selector):
+                    profile_element = element
+
+            rank = _SELECTOR_RANKS_BY_TAG.get(tag, best_rank)
+            for class_name in class_names:
+                rank = min(rank, _SELECTOR_RANKS_BY_CLASS.get(class_name, rank))
+            if rank < best_rank:
+                best_rank = rank
+                best_element = element
+
+        text = ""
+        used_selector = None
+        if profile_element is not None:
+            profile_text = profile_element.text_content()
+            if len(clean_text(profile_text)) >= MIN_PROFILE_TEXT_CHARS:
+                text, used_selector = profile_text, selector
+
+        if not text and best_element is not None:
+            text = best_element.text_content()
+            used_selector = ARTICLE_SELECTORS[best_rank] if text else None
+
+        learned_selector, learned_score, learned_element = None, 0.0, None
+        if learn:
+            learned_selector, learned_score, learned_element = _best_candidate(
+                list(scores.values())
+            )
+            if not text and learned_element is not None:
+                text, used_selector = learned_element.text_content(), learned_selector
+
+        if not text and body is not None:
+            text = body.text_content()
+            used_selector = BODY_SELECTOR
+
+        return ExtractionResult(
+            title, clean_text(text), used_selector, learned_selector, learned_score
+        )
+
+    @staticmethod
+    def _matches(element, tag: str, class_names, selector_match) -> bool:
+        wanted_tag, wanted_id, wanted_class = selector_match.group("tag", "id", "cls")
+        if wanted_tag and tag != wanted_tag:
+            return False
+        if wanted_id and element.get("id") != wanted_id:
+            return False
+        if wanted_class and wanted_class not in class_names:
+            return False
+        return True
+
+    @staticmethod
+    def _css_select_one(root, selector: str):
+        """Full CSS selectors (manual overrides) need the optional cssselect package"""
+        try:
+            matches = root.cssselect(selector)
+        except ImportError:
+            logger.warning(f"cssselect not installed, ignoring selector '{selector}'")
+            return None
+        except Exception:
+            logger.warning(f"Ignoring invalid profile selector '{selector}'")
+            return None
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _score_paragraph(paragraph, scores: Dict[object, list]):
+        link_chars = sum(len(a.text_content().strip()) for a in paragraph.iter("a"))
+        score = len(paragraph.text_content().strip()) - link_chars
+        if score < MIN_PARAGRAPH_CHARS:
+            return
+
+        parent = paragraph.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for element, weight in ((parent, 1.0), (grandparent, 0.5)):
+            if element is None:
+                continue
+            if element not in scores:
+                scores[element] = [
+                    candidate_selector(
+                        element.tag,
+                        element.get("id"),
+                        (element.get("class") or "").split(),
+                    ),
+                    0.0,
+                    element,
+                ]
+            scores[element][1] += score * weight
+
+    def _build_tree(self, content: bytes, charset: Optional[str]):
+        if not content or not content.strip():
+            return None
+
+        # Decode the way BeautifulSoup does (header charset, BOM, <meta>,
+        # then UTF-8) so both backends see the same characters
+        dammit = UnicodeDammit(content, [charset] if charset else [], is_html=True)
+        try:
+            if dammit.unicode_markup is not None:
+                return self._html.document_fromstring(dammit.unicode_markup)
+            return self._html.document_fromstring(content)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            parser = self._html.HTMLParser(encoding=dammit.original_encoding)
+            return self._html.document_fromstring(content, parser=parser)
+        except self._etree.ParserError:
+            return None
+
+
+PARSERS = {
+    BeautifulSoupParser.name: BeautifulSoupParser,
+    LxmlParser.name: LxmlParser,
+}
+
+
+def get_html_parser(name: str = "auto"):
+    """
+    Create the named parsing backend.
+    "auto" prefers lxml and falls back to html.parser when it isn't installed.
+    """
+    if name == "auto":
+        try:
+            return LxmlParser()
+        except ImportError:
+            logger.info("lxml not installed, using html.parser for articles")
+            return BeautifulSoupParser()
+
+    if name not in PARSERS:
+        raise ValueError(
+            f"Unknown HTML parser '{name}' (expected auto, {', '.join(PARSERS)})"
+        )
+    return PARSERS[name]()
@@ -0,0 +1,434 @@
+import logging
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.location_index import BoundingBox, LocationIndex, get_location_index
+from app.utils import metrics
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE_PX = 256
+# Locations are clustered on a grid of square cells this many pixels wide at
+# the zoom they are shown at, so each map tile is a 4 x 4 block of cells
+CELL_SIZE_PX = 64
+CELL_BITS = (TILE_SIZE_PX // CELL_SIZE_PX).bit_length() - 1
+
+# Web Mercator (what Leaflet's tiles use) stops short of the poles
+MAX_LATITUDE = 85.05112878
+
+# Tiles one request may cover; a 4K screen shows about 15 x 9
+MAX_TILES_PER_REQUEST = 400
+
+Cell = Tuple[int, int]
+
+# Bits 0-7 spread out to the even bits 0-14, for interleaving
+_SPREAD = [
+    sum(((byte >> bit) & 1) << (2 * bit) for bit in range(8)) for byte in range(256)
+]
+
+
+def interleave(x: int, y: int) -> int:
+    """
+    The Morton (Z-order) key of a grid cell: x and y's bits interleaved, so a
+    cell's parent one zoom out is key >> 2 and the cells inside any square
+    aligned to the grid (such as a map tile) have consecutive keys
+    """
+    key = 0
+    for shift in (0, 8, 16, 24):
+        key |= (_SPREAD[(x >> shift) & 0xFF] | _SPREAD[(y >> shift) & 0xFF] << 1) << (
+            2 * shift
+        )
+    return key
+
+
+def deinterleave(key: int) -> Cell:
+    """The grid cell of a Morton key"""
+    x = y = 0
+    bit = 0
+    while key:
+        x |= (key & 1) << bit
+        y |= ((key >> 1) & 1) << bit
+        key >>= 2
+        bit += 1
+    return x, y
+
+
+def mercator(lat: float, lon: float) -> Tuple[float, float]:
+    """A point's x and y on the Web Mercator square, from 0 to 1 (y grows southwards)"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin_lat = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def _latitude(y: float) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def _grid(fraction: float, size: int) -> int:
+    return min(size - 1, max(0, int(fraction * size)))
+
+
+def cell_of(lat: float, lon: float, zoom: int) -> Cell:
+    """The grid cell a point falls in at a zoom"""
+    size = 1 << (zoom + CELL_BITS)
+    x, y = mercator(lat, lon)
+    return _grid(x, size), _grid(y, size)
+
+
+def cell_bounds(zoom: int, cell: Cell) -> BoundingBox:
+    """A grid cell's (south, north, west, east)"""
+    size = 1 << (zoom + CELL_BITS)
+    cx, cy = cell
+    return (
+        _latitude((cy + 1) / size),
+        _latitude(cy / size),
+        cx / size * 360.0 - 180.0,
+        (cx + 1) / size * 360.0 - 180.0,
+    )
+
+
+def tiles_covering(bbox: BoundingBox, zoom: int) -> List[Tuple[int, int]]:
+    """
+    The map tiles a (south, north, west, east) box touches at a zoom.
+    Raises ValueError if there are more than MAX_TILES_PER_REQUEST.
+    """
+    south, north, west, east = bbox
+    size = 1 << zoom
+    west_x, north_y = (_grid(v, size) for v in mercator(north, west))
+    east_x, south_y = (_grid(v, size) for v in mercator(south, east))
+    if west <= east:
+        xs = list(range(west_x, east_x + 1))
+    elif west_x > east_x:
+        # Across the antimeridian
+        xs = list(range(west_x, size)) + list(range(0, east_x + 1))
+    else:
+        # Wraps into its own starting column, so covers the whole row
+        xs = list(range(size))
+    ys = range(north_y, south_y + 1)
+    if len(xs) * len(ys) > MAX_TILES_PER_REQUEST:
+        raise ValueError(
+            f"bbox covers {len(xs) * len(ys)} tiles at zoom {zoom}; "
+            f"zoom in or use a smaller bbox (at most {MAX_TILES_PER_REQUEST} tiles)"
+        )
+    return [(x, y) for x in xs for y in ys]
+
+
+class Level:
+    """
+    The non-empty grid cells at one zoom, sorted by Morton key, in parallel
+    arrays: each cell's location count, the sums of their latitudes and
+    longitudes (for the centroid) and the id of its first location
+    """
+
+    __slots__ = ("keys", "counts", "lat_sums", "lon_sums", "location_ids")
+
+    def __init__(self):
+        self.keys = array("q")
+        self.counts = array("q")
+        self.lat_sums = array("d")
+        self.lon_sums = array("d")
+        self.location_ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def span(self, first_key: int, end_key: int) -> range:
+        """Positions of the cells with keys from first_key up to end_key"""
+        return range(bisect_left(self.keys, first_key), bisect_left(self.keys, end_key))
+
+    def merged(self) -> "Level":
+        """The level one zoom out, each cell merging the (up to) four it covers"""
+        parent = Level()
+        parent.extend(
+            zip(
+                (key >> 2 for key in self.keys),
+                self.counts,
+                self.lat_sums,
+                self.lon_sums,
+                self.location_ids,
+            )
+        )
+        return parent
+
+    def extend(self, cells: Iterable[Tuple[int, int, float, float, int]]):
+        """
+        Add (key, count, lat_sum, lon_sum, location_id) cells in key order,
+        merging runs of the same key into one cell
+        """
+        keys, counts = self.keys, self.counts
+        lat_sums, lon_sums = self.lat_sums, self.lon_sums
+        last = keys[-1] if keys else -1
+        for key, count, lat_sum, lon_sum, location_id in cells:
+            if key == last:
+                counts[-1] += count
+                lat_sums[-1] += lat_sum
+                lon_sums[-1] += lon_sum
+            else:
+                keys.append(key)
+                counts.append(count)
+                lat_sums.append(lat_sum)
+                lon_sums.append(lon_sum)
+                self.location_ids.append(location_id)
+                last = key
+
+
+def build_levels(
+    points: Iterable[Tuple[int, float, float]], max_zoom: int
+) -> List[Level]:
+    """
+    Grid clusters of (location_id, latitude, longitude) points at every zoom
+    from 0 to max_zoom. The deepest level is built from the points sorted by
+    cell and each level above it from the one below in a single pass, since
+    with Morton keys the four cells of a parent are consecutive.
+    """
+    size = 1 << (max_zoom + CELL_BITS)
+    keyed = []
+    for location_id, lat, lon in points:
+        x, y = mercator(lat, lon)
+        key = interleave(_grid(x, size), _grid(y, size))
+        keyed.append((key, 1, lat, lon, location_id))
+    keyed.sort()
+
+    deepest = Level()
+    deepest.extend(keyed)
+    del keyed
+    levels = [deepest]
+    for _ in range(max_zoom):
+        levels.append(levels[-1].merged())
+    levels.reverse()
+    return levels
+
+
+def expansion_zoom(levels: List[Level], zoom: int, key: int) -> Optional[int]:
+    """
+    The zoom at which a cluster first splits, or None if its locations are
+    too close together to ever be told apart
+    """
+    for child_zoom in range(zoom + 1, len(levels)):
+        children = levels[child_zoom].span(key << 2, (key + 1) << 2)
+        if len(children) > 1:
+            return child_zoom
+        key = levels[child_zoom].keys[children.start]
+    return None
+
+
+def cluster_feature(levels: List[Level], zoom: int, position: int) -> Dict[str, Any]:
+    """A GeoJSON Point at a cluster's centroid, with its cell as the bbox"""
+    level = levels[zoom]
+    key, count = level.keys[position], level.counts[position]
+    cell = deinterleave(key)
+    south, north, west, east = cell_bounds(zoom, cell)
+    return {
+        "type": "Feature",
+        "bbox": [west, south, east, north],
+        "geometry": {
+            "type": "Point",
+            "coordinates": [
+                level.lon_sums[position] / count,
+                level.lat_sums[position] / count,
+            ],
+        },
+        "properties": {
+            "cluster": True,
+            "cluster_id": f"{zoom}/{cell[0]}/{cell[1]}",
+            "point_count": count,
+            "expansion_zoom": expansion_zoom(levels, zoom, key),
+        },
+    }
+
+
+def point_feature(location: Dict[str, Any]) -> Dict[str, Any]:
+    """A GeoJSON Point for a location on its own"""
+    properties = {
+        key: value
+        for key, value in location.items()
+        if key not in ("latitude", "longitude")
+    }
+    properties["cluster"] = False
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [location["longitude"], location["latitude"]],
+        },
+        "properties": properties,
+    }
+
+
+class TileCache:
+    """Thread-safe LRU of rendered tiles"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, features: List[Dict[str, Any]]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = features
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ClusterIndex:
+    """
+    Marker clusters of every location in a LocationIndex, precomputed per
+    zoom in memory and rebuilt when the index changes (checked at most every
+    refresh_seconds). Requests read whole map tiles, so recently requested
+    tiles are cached as rendered GeoJSON features.
+    """
+
+    def __init__(
+        self,
+        location_index: LocationIndex,
+        max_zoom: int,
+        cache_size: int,
+        refresh_seconds: float,
+    ):
+        self.location_index = location_index
+        self.max_zoom = max_zoom
+        self.refresh_seconds = refresh_seconds
+        self.tiles = TileCache(cache_size)
+        # (generation, levels), replaced as a whole so readers never see a
+        # half-built index
+        self._snapshot: Optional[Tuple[int, List[Level]]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def clusters(self, bbox: BoundingBox, zoom: int) -> Dict[str, Any]:
+        """
+        A GeoJSON FeatureCollection of the clusters and lone locations in
+        every tile a (south, north, west, east) box touches at a zoom. Zooms
+        beyond max_zoom are served from the max_zoom grid.
+        Raises ValueError if the box covers too many tiles.
+        """
+        cluster_zoom = min(max(zoom, 0), self.max_zoom)
+        tiles = tiles_covering(bbox, cluster_zoom)
+        generation, levels = self._current()
+
+        features = []
+        for tile in tiles:
+            features.extend(self._tile(generation, levels, cluster_zoom, tile))
+        points = sum(
+            feature["properties"]["point_count"]
+            if feature["properties"]["cluster"]
+            else 1
+            for feature in features
+        )
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "metadata": {
+                "zoom": zoom,
+                "cluster_zoom": cluster_zoom,
+                "tiles": len(tiles),
+                "count": len(features),
+                "points": points,
+            },
+        }
+
+    def _current(self) -> Tuple[int, List[Level]]:
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self.refresh_seconds:
+            return snapshot
+
+        with self._lock:
+            if (
+                self._snapshot is not None
+                and now - self._checked_at < self.refresh_seconds
+            ):
+                return self._snapshot
+            self._checked_at = now
+            generation = self.location_index.generation()
+            if self._snapshot is None or self._snapshot[0] != generation:
+                started = time.perf_counter()
+                levels = build_levels(self.location_index.points(), self.max_zoom)
+                self._snapshot = (generation, levels)
+                logger.info(
+                    f"Built marker clusters of {sum(levels[0].counts)} "
+                    f"locations for zooms 0-{self.max_zoom} in "
+                    f"{time.perf_counter() - started:.2f}s"
+                )
+            return self._snapshot
+
+    def _tile(
+        self,
+        generation: int,
+        levels: List[Level],
+        zoom: int,
+        tile: Tuple[int, int],
+    ) -> List[Dict[str, Any]]:
+        key = (generation, zoom, tile)
+        features = self.tiles.get(key)
+        metrics.record_cache("cluster_tile", features is not None)
+        if features is not None:
+            return features
+
+        # A tile's cells have consecutive keys
+        level = levels[zoom]
+        tile_key = interleave(*tile)
+        cells = level.span(tile_key << 2 * CELL_BITS, (tile_key + 1) << 2 * CELL_BITS)
+        # Lone locations are sent as themselves, so the client can show their
+        # popup without another request
+        locations = self.location_index.get_locations(
+            level.location_ids[position]
+            for position in cells
+            if level.counts[position] == 1
+        )
+        features = []
+        for position in cells:
+            if level.counts[position] > 1:
+                features.append(cluster_feature(levels, zoom, position))
+            elif level.location_ids[position] in locations:
+                # Otherwise it has been replaced since the index was built
+                features.append(point_feature(locations[level.location_ids[position]]))
+        self.tiles.put(key, features)
+        return features
+
+
+# Global cluster index over the location index
+_cluster_index: Optional[ClusterIndex] = None
+_cluster_index_lock = threading.Lock()
+
+
+def get_cluster_index() -> Optional[ClusterIndex]:
+    """Get the process-wide cluster index, or None if the location index is disabled"""
+    global _cluster_index
+    location_index = get_location_index()
+    if location_index is None:
+        return None
+
+    with _cluster_index_lock:
+        if (
+            _cluster_index is None
+            or _cluster_index.location_index is not location_index
+        ):
+            _cluster_index = ClusterIndex(
+                location_index,
+                max_zoom=Config.CLUSTER_MAX_ZOOM,
+                cache_size=Config.CLUSTER_TILE_CACHE_SIZE,
+                refresh_seconds=Config.CLUSTER_REFRESH_SECONDS,
+            )
+        return _cluster_index
@@ -1,13 +1,30 @@
-import google.generativeai as genai
-from typing import List
+from typing import Dict, List, Optional
 import json
 import re
-import os
 import logging
+import threading
 from app.models.data_models import ExtractedLocation
+from app.services.gemini_client import (
+    configure_gemini,
+    estimate_tokens,
+    genai,
+    load_prompt,
+    record_usage,
+)
+from app.utils import tracing
+from app.utils.cancellation import CancelToken, JobCancelledError, check_cancelled
+from app.utils.deadline import Deadline, DeadlineExceededError, call_with_timeout
+from app.utils.stage_timing import record_upstream_error, timed
 
 logger = logging.getLogger(__name__)
 
+# The JSON array in a model response, which may be wrapped in prose or fences
+JSON_ARRAY_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
+# Input token limit of each model, looked up once per process
+_model_max_tokens: Dict[str, int] = {}
+_model_max_tokens_lock = threading.Lock()
+
 
 class RateLimitError(Exception):
     """Raised when API rate limits are exceeded"""
@@ -15,10 +32,18 @@ class RateLimitError(Exception):
     pass
 
 
+class LocationExtractionError(Exception):
+    """Raised when the LLM call fails or its answer can't be parsed"""
+
+    pass
+
+
 class LocationExtractor:
+    MODEL_NAME = "gemini-2.0-flash"
+
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model_name = "gemini-2.0-flash"
+        configure_gemini(api_key)
+        self.model_name = self.MODEL_NAME
         self.model = genai.GenerativeModel(self.model_name)
         self.prompt_template = self._load_prompt_template()
         self.correction_template = self._load_correction_template()
@@ -26,29 +51,31 @@ class LocationExtractor:
 
     def _load_prompt_template(self) -> str:
         """Load the location extraction prompt from file."""
-        prompt_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "prompts",
-            "location_extraction.txt",
-        )
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read()
+        return load_prompt("location_extraction.txt")
 
     def _load_correction_template(self) -> str:
         """Load the location correction prompt from file."""
-        prompt_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "prompts",
-            "location_correction.txt",
-        )
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read()
+        return load_prompt("location_correction.txt")
 
     def _get_model_max_tokens(self) -> int:
         """
-        Get the maximum token limit for the current model from Gemini API.
-        Returns a safe default if the API call fails.
+        Get the maximum token limit for the current model, asking the Gemini
+        API once per process. Returns a safe default if the API call fails.
         """
+        with _model_max_tokens_lock:
+            if self.model_name in _model_max_tokens:
+                return _model_max_tokens[self.model_name]
+        max_tokens = self._fetch_model_max_tokens()
+        if max_tokens is not None:
+            with _model_max_tokens_lock:
+                _model_max_tokens[self.model_name] = max_tokens
+            return max_tokens
+
+        # Safe default for Gemini 2.0 Flash (as of 2024)
+        return 100000  # 1M tokens
+
+    def _fetch_model_max_tokens(self) -> Optional[int]:
+        """The model's input token limit from the Gemini API, or None"""
         try:
             # List all available models
             models = genai.list_models()
@@ -76,10 +103,10 @@ class LocationExtractor:
             )
 
         except Exception as e:
+            record_upstream_error("gemini", e)
             logger.error(f"Error getting model info: {e}")
 
-        # Safe default for Gemini 2.0 Flash (as of 2024)
-        return 100000  # 1M tokens
+        return None
 
     def _calculate_safe_text_limit(self, prompt_size: int) -> int:
         """
@@ -105,13 +132,25 @@ class LocationExtractor:
         )
         return safe_limit
 
-    def extract_locations(self, article_text: str) -> List[ExtractedLocation]:
+    @tracing.traced("extract_locations")
+    def extract_locations(
+        self,
+        article_text: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> List[ExtractedLocation]:
         """
         Extract locations with context from article text using Gemini.
         Returns list of ExtractedLocation objects with rich metadata.
+        Raises JobCancelledError if the job is cancelled between LLM calls,
+        DeadlineExceededError if the deadline passes before an answer, and
+        LocationExtractionError if no usable answer comes back.
         """
+        check_cancelled(cancel_token)
+
         # Calculate dynamic text limit based on model capabilities
-        prompt_size = len(self.prompt_template) // 4  # Rough token estimate
+        # Measured from earlier calls' usage reports once there are any
+        prompt_size = estimate_tokens(self.prompt_template, self.model_name)
         safe_text_limit = self._calculate_safe_text_limit(prompt_size)
 
         # Truncate text if necessary
@@ -126,13 +165,19 @@ class LocationExtractor:
         prompt = self.prompt_template.format(article_text=truncated_text)
 
         try:
-            response = self.model.generate_content(prompt)
+            with timed("extraction", upstream="gemini"):
+                response = call_with_timeout(
+                    self.model.generate_content,
+                    deadline.timeout() if deadline else None,
+                    prompt,
+                )
+            record_usage(response, self.model_name, "extraction", prompt)
             response_text = response.text.strip()
 
             logger.info(f"LLM response: {response_text[:200]}...")
 
             # Extract JSON array from response
-            json_match = re.search(r"\[.*\]", response_text, re.DOTALL)
+            json_match = JSON_ARRAY_PATTERN.search(response_text)
             if json_match:
                 locations_json = json_match.group()
                 locations_data = json.loads(locations_json)
@@ -156,13 +201,21 @@ class LocationExtractor:
                     logger.info(f"Extracted {len(extracted_locations)} locations")
                     return extracted_locations
 
+                # An empty array is a real answer: the article names no places
+                if not locations_data:
+                    logger.info("No locations in article")
+                    return []
+
                 # If no valid locations but we had JSON, try self-correction
                 logger.warning("No valid locations parsed, attempting self-correction")
-                return self._attempt_self_correction(response_text)
+                check_cancelled(cancel_token)
+                return self._attempt_self_correction(response_text, deadline)
             else:
                 logger.warning("No JSON array found in LLM response")
-                return []
+                raise LocationExtractionError("No JSON array found in LLM response")
 
+        except (JobCancelledError, DeadlineExceededError, LocationExtractionError):
+            raise
         except Exception as e:
             error_str = str(e).lower()
             if "429" in error_str or "rate limit" in error_str or "quota" in error_str:
@@ -172,26 +225,35 @@ class LocationExtractor:
                 )
             else:
                 logger.error(f"Error extracting locations: {e}")
-                return []
+                raise LocationExtractionError(f"Error extracting locations: {e}") from e
 
     def _attempt_self_correction(
-        self, original_response: str
+        self, original_response: str, deadline: Optional[Deadline] = None
     ) -> List[ExtractedLocation]:
         """
         Attempt to fix malformed LLM responses by asking the model to correct itself.
+        Raises LocationExtractionError if the corrected answer is still unusable.
         """
         correction_prompt = self.correction_template.format(
             original_response=original_response
         )
 
         try:
-            response = self.model.generate_content(correction_prompt)
+            with timed("extraction_correction", upstream="gemini"):
+                response = call_with_timeout(
+                    self.model.generate_content,
+                    deadline.timeout() if deadline else None,
+                    correction_prompt,
+                )
+            record_usage(
+                response, self.model_name, "extraction_correction", correction_prompt
+            )
             corrected_response = response.text.strip()
 
             logger.info(f"Self-correction attempt: {corrected_response[:200]}...")
 
             # Try to parse the corrected response
-            json_match = re.search(r"\[.*\]", corrected_response, re.DOTALL)
+            json_match = JSON_ARRAY_PATTERN.search(corrected_response)
             if json_match:
                 locations_json = json_match.group()
                 locations_data = json.loads(locations_json)
@@ -207,15 +269,19 @@ class LocationExtractor:
                         )
                         continue
 
-                if extracted_locations:
+                if extracted_locations or not locations_data:
                     logger.info(
                         f"Self-correction successful: {len(extracted_locations)} locations"
                     )
                     return extracted_locations
 
             logger.warning("Self-correction failed to produce valid JSON")
-            return []
+            raise LocationExtractionError(
+                "Self-correction failed to produce valid JSON"
+            )
 
+        except (DeadlineExceededError, LocationExtractionError):
+            raise
         except Exception as e:
             logger.error(f"Self-correction attempt failed: {e}")
-            return []
+            raise LocationExtractionError(f"Self-correction attempt failed: {e}") from e
@@ -0,0 +1,292 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models.data_models import LocationData
+from app.services.result_cache import normalize_article_text
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_LIMIT = 500
+MAX_SEARCH_LIMIT = 5000
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.32
+
+# (south, north, west, east), the order GeographicData uses
+BoundingBox = Tuple[float, float, float, float]
+
+
+def article_id(article_text: str) -> str:
+    """Stable id for an article's content, so reprocessing replaces rather than duplicates"""
+    normalized = normalize_article_text(article_text)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:24]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bounding_box(lat: float, lon: float, radius_km: float) -> BoundingBox:
+    """Smallest lat/lon box containing a circle (whole longitude range near the poles)"""
+    d_lat = radius_km / KM_PER_DEGREE_LATITUDE
+    south, north = max(-90.0, lat - d_lat), min(90.0, lat + d_lat)
+    if south <= -90.0 or north >= 90.0:
+        return south, north, -180.0, 180.0
+
+    d_lon = radius_km / (KM_PER_DEGREE_LATITUDE * math.cos(math.radians(lat)))
+    if d_lon >= 180.0:
+        return south, north, -180.0, 180.0
+    west, east = lon - d_lon, lon + d_lon
+    # Boxes crossing the antimeridian wrap round, so west > east
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, north, west, east
+
+
+class LocationIndex(SQLiteStore):
+    """
+    Every processed article's final locations, with an R*Tree over their
+    coordinates for bounding-box and radius queries
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS articles (
+        article_id TEXT PRIMARY KEY,
+        request_id TEXT,
+        title TEXT,
+        source TEXT,
+        processed_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS locations (
+        location_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL,
+        south REAL,
+        north REAL,
+        west REAL,
+        east REAL,
+        events_summary TEXT,
+        confidence REAL,
+        processed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_locations_article ON locations(article_id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS location_points USING rtree(
+        location_id, min_lat, max_lat, min_lon, max_lon
+    );
+    CREATE TABLE IF NOT EXISTS index_state (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        generation INTEGER NOT NULL
+    );
+    """
+
+    def add_article(
+        self,
+        article_id: str,
+        locations: List[Tuple[LocationData, Optional[BoundingBox]]],
+        request_id: str = None,
+        title: str = None,
+        source: str = None,
+    ):
+        """Record an article's locations, replacing any earlier run of the same article"""
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN")
+        try:
+            self._delete_locations(connection, article_id)
+            connection.execute(
+                "INSERT OR REPLACE INTO articles "
+                "(article_id, request_id, title, source, processed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (article_id, request_id, title, source, now),
+            )
+            for location, bbox in locations:
+                south, north, west, east = bbox or (None, None, None, None)
+                cursor = connection.execute(
+                    "INSERT INTO locations (article_id, name, latitude, longitude, "
+                    "south, north, west, east, events_summary, confidence, "
+                    "processed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        article_id,
+                        location.name,
+                        location.latitude,
+                        location.longitude,
+                        south,
+                        north,
+                        west,
+                        east,
+                        location.events_summary,
+                        location.confidence,
+                        now,
+                    ),
+                )
+                connection.execute(
+                    "INSERT INTO location_points VALUES (?, ?, ?, ?, ?)",
+                    (
+                        cursor.lastrowid,
+                        location.latitude,
+                        location.latitude,
+                        location.longitude,
+                        location.longitude,
+                    ),
+                )
+            connection.execute(
+                "INSERT INTO index_state (id, generation) VALUES (0, 1) "
+                "ON CONFLICT(id) DO UPDATE SET generation = generation + 1"
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def search_bbox(
+        self,
+        bbox: BoundingBox,
+        since: Optional[float] = None,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        """Locations inside a (south, north, west, east) box, newest first"""
+        rows = self._query(bbox, since, limit)
+        return [self._row_to_dict(row) for row in rows]
+
+    def search_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        since: Optional[float] = None,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        """Locations within radius_km of a point, nearest first"""
+        results = []
+        for row in self._query(radius_bounding_box(lat, lon, radius_km), since, None):
+            distance = haversine_km(lat, lon, row["latitude"], row["longitude"])
+            if distance <= radius_km:
+                result = self._row_to_dict(row)
+                result["distance_km"] = round(distance, 3)
+                results.append(result)
+        results.sort(key=lambda result: result["distance_km"])
+        return results[:limit]
+
+    def generation(self) -> int:
+        """Bumped by every change, so in-memory views of the index know to refresh"""
+        row = (
+            self._connect()
+            .execute("SELECT generation FROM index_state WHERE id = 0")
+            .fetchone()
+        )
+        return row["generation"] if row else 0
+
+    def points(self) -> Iterator[Tuple[int, float, float]]:
+        """(location_id, latitude, longitude) of every location"""
+        return self._connect().execute(
+            "SELECT location_id, latitude, longitude FROM locations"
+        )
+
+    def get_locations(self, location_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Locations by id; ids that no longer exist are left out"""
+        location_ids = list(location_ids)
+        if not location_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in location_ids)
+        rows = self._connect().execute(
+            "SELECT l.*, a.title, a.source, a.request_id FROM locations l "
+            "JOIN articles a ON a.article_id = l.article_id "
+            f"WHERE l.location_id IN ({placeholders})",
+            location_ids,
+        )
+        return {row["location_id"]: self._row_to_dict(row) for row in rows}
+
+    def _query(self, bbox: BoundingBox, since: Optional[float], limit: Optional[int]):
+        south, north, west, east = bbox
+        # A box crossing the antimeridian is two longitude ranges
+        ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        # R*Tree coordinates are 32-bit floats rounded outwards, so the tree
+        # narrows candidates and the exact columns decide
+        conditions = " OR ".join(
+            "(p.max_lon >= ? AND p.min_lon <= ? AND l.longitude BETWEEN ? AND ?)"
+            for _ in ranges
+        )
+        params: List[Any] = [south, north, south, north]
+        for range_west, range_east in ranges:
+            params.extend((range_west, range_east, range_west, range_east))
+
+        sql = (
+            "SELECT l.*, a.title, a.source, a.request_id FROM location_points p "
+            "JOIN locations l ON l.location_id = p.location_id "
+            "JOIN articles a ON a.article_id = l.article_id "
+            "WHERE p.max_lat >= ? AND p.min_lat <= ? "
+            f"AND l.latitude BETWEEN ? AND ? AND ({conditions})"
+        )
+        if since is not None:
+            sql += " AND l.processed_at >= ?"
+            params.append(since)
+        sql += " ORDER BY l.processed_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._connect().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        bbox = None
+        if row["south"] is not None:
+            bbox = [row["south"], row["north"], row["west"], row["east"]]
+        return {
+            "article_id": row["article_id"],
+            "article_title": row["title"],
+            "source": row["source"],
+            "request_id": row["request_id"],
+            "name": row["name"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "bounding_box": bbox,
+            "events_summary": row["events_summary"],
+            "confidence": row["confidence"],
+            "processed_at": row["processed_at"],
+        }
+
+    @staticmethod
+    def _delete_locations(connection, article_id: str):
+        connection.execute(
+            "DELETE FROM location_points WHERE location_id IN "
+            "(SELECT location_id FROM locations WHERE article_id = ?)",
+            (article_id,),
+        )
+        connection.execute("DELETE FROM locations WHERE article_id = ?", (article_id,))
+
+
+# Global location index, opened lazily from Config.LOCATION_INDEX_PATH
+_location_index: Optional[LocationIndex] = None
+_location_index_lock = threading.Lock()
+
+
+def get_location_index() -> Optional[LocationIndex]:
+    """Get the process-wide location index, or None if disabled"""
+    global _location_index
+    if not Config.LOCATION_INDEX_PATH:
+        return None
+
+    with _location_index_lock:
+        if (
+            _location_index is None
+            or _location_index.path != Config.LOCATION_INDEX_PATH
+        ):
+            _location_index = LocationIndex(Config.LOCATION_INDEX_PATH)
+        return _location_index
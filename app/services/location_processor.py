@@ -1,9 +1,13 @@
 import concurrent.futures
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from app.models.data_models import ArticleResponse, LocationData, ExtractedLocation
-from app.services.geocoding import GeocodingService, GeographicData
-from app.services.summarizer import EventSummarizer
+from app.services.geocoding import GeocodingError, GeocodingService, GeographicData
+from app.services.summarizer import EventSummarizer, SummaryError
+from app.utils import tracing
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.stage_timing import submit_in_context
 
 logger = logging.getLogger(__name__)
 
@@ -56,10 +60,18 @@ class LocationProcessor:
         summarizer: EventSummarizer,
         response: ArticleResponse,
         request_id: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[List[LocationData], List[GeographicData]]:
         """
         Process extracted locations through geocoding and summarization pipeline.
 
+        If cancel_token is cancelled, queued locations are dropped without
+        calling any upstream service and JobCancelledError is raised.
+
+        If deadline passes, the locations finished so far are returned and a
+        DEADLINE_EXCEEDED warning is added for each one left unprocessed.
+
         Returns:
             Tuple of (location_data_list, geo_data_list)
         """
@@ -67,7 +79,9 @@ class LocationProcessor:
         def process_location(extracted_loc) -> Tuple[LocationData, GeographicData]:
             # Geocode location with boundary data
             geo_data = self.geocoding_service.geocode_with_boundaries(
-                extracted_loc.standardized_name
+                extracted_loc.standardized_name,
+                cancel_token=cancel_token,
+                deadline=deadline,
             )
             if not geo_data:
                 logger.warning(
@@ -75,10 +89,27 @@ class LocationProcessor:
                 )
                 return None, None
 
-            # Generate summary for this location
-            summary = summarizer.summarize_events_at_location(
-                article_text, extracted_loc.standardized_name
-            )
+            # Generate summary for this location - a location we already have
+            # coordinates for is worth keeping even if its summary runs out of time
+            try:
+                summary = summarizer.summarize_events_at_location(
+                    article_text,
+                    extracted_loc.standardized_name,
+                    cancel_token=cancel_token,
+                    deadline=deadline,
+                )
+            except DeadlineExceededError:
+                response.add_warning(
+                    "SUMMARY_SKIPPED",
+                    f"Time budget ran out before summarizing '{extracted_loc.standardized_name}'",
+                )
+                summary = "Mentioned in article."
+            except SummaryError:
+                response.add_warning(
+                    "SUMMARY_FAILED",
+                    f"Could not summarize events at '{extracted_loc.standardized_name}'",
+                )
+                summary = "Mentioned in article."
 
             # Check if summarizer is hitting rate limits
             if (
@@ -111,14 +142,34 @@ class LocationProcessor:
         # Use ThreadPoolExecutor for parallel processing
         locations = []
         geo_data_list = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        unfinished = []
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        try:
             future_to_location = {
-                executor.submit(process_location, loc): loc.standardized_name
+                submit_in_context(
+                    executor, process_location, loc
+                ): loc.standardized_name
                 for loc in extracted_locations
             }
+            pending = set(future_to_location)
+
+            for future in self._as_completed_until(pending, deadline):
+                pending.discard(future)
+                if cancel_token and cancel_token.cancelled:
+                    raise JobCancelledError(cancel_token.reason)
+
+                try:
+                    location_data, geo_data = future.result()
+                except DeadlineExceededError:
+                    unfinished.append(future_to_location[future])
+                    continue
+                except GeocodingError:
+                    response.add_warning(
+                        "GEOCODING_UNAVAILABLE",
+                        f"Geocoding service failed for '{future_to_location[future]}'",
+                    )
+                    continue
 
-            for future in concurrent.futures.as_completed(future_to_location):
-                location_data, geo_data = future.result()
                 if (
                     location_data and geo_data
                 ):  # Only add successfully geocoded locations
@@ -135,8 +186,91 @@ class LocationProcessor:
                         f"Could not find coordinates for '{failed_name}'",
                     )
 
+            # Anything still pending when the deadline hit is abandoned
+            unfinished.extend(future_to_location[future] for future in pending)
+        finally:
+            # Drop anything still queued (on cancellation or failure) rather
+            # than spending quota on results nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for name in unfinished:
+            response.add_warning(
+                "DEADLINE_EXCEEDED",
+                f"Time budget ran out before '{name}' could be processed",
+            )
+        if unfinished:
+            logger.warning(
+                f"Request {request_id}: Deadline hit with {len(unfinished)} location(s) unprocessed"
+            )
+
         return locations, geo_data_list
 
+    def refresh_summaries(
+        self,
+        locations: List[LocationData],
+        article_text: str,
+        summarizer: EventSummarizer,
+        response: ArticleResponse,
+        request_id: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> List[LocationData]:
+        """
+        Re-summarize already geocoded locations against new article text.
+        A location whose new summary can't be produced keeps its old one;
+        a failed call also adds a SUMMARY_FAILED warning.
+        """
+
+        def refresh(location: LocationData) -> LocationData:
+            try:
+                summary = summarizer.summarize_events_at_location(
+                    article_text,
+                    location.name,
+                    cancel_token=cancel_token,
+                    deadline=deadline,
+                )
+            except DeadlineExceededError:
+                response.add_warning(
+                    "SUMMARY_SKIPPED",
+                    f"Time budget ran out before summarizing '{location.name}'",
+                )
+                return location
+            except SummaryError:
+                response.add_warning(
+                    "SUMMARY_FAILED",
+                    f"Could not summarize events at '{location.name}'",
+                )
+                return location
+
+            if "rate limit" in summary.lower() or "temporarily unavailable" in (
+                summary.lower()
+            ):
+                logger.warning(
+                    f"Request {request_id}: Keeping previous summary for {location.name}"
+                )
+                return location
+            return location.model_copy(update={"events_summary": summary})
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = [
+                submit_in_context(executor, refresh, location) for location in locations
+            ]
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _as_completed_until(futures, deadline: Optional[Deadline]):
+        """Yield futures as they complete, stopping quietly when the deadline passes"""
+        try:
+            yield from concurrent.futures.as_completed(
+                futures, timeout=deadline.remaining() if deadline else None
+            )
+        except concurrent.futures.TimeoutError:
+            return
+
+    @tracing.traced("apply_spatial_filtering")
     def apply_spatial_filtering(
         self,
         locations: List[LocationData],
@@ -0,0 +1,288 @@
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.result_cache import normalize_article_text, pipeline_version
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+SHINGLE_WORDS = 3
+
+# The fingerprint is split into BLOCKS blocks, and each band key is
+# BLOCKS_PER_BAND of them joined (about 32 bits). Two fingerprints within
+# MAX_DISTANCE differing bits differ in at most that many blocks, so they agree
+# exactly on at least one band; and with 32-bit keys a band bucket holds about
+# N / 2**32 unrelated articles, so lookups stay a handful of rows at any size.
+BLOCKS = 6
+BLOCKS_PER_BAND = 3
+MAX_DISTANCE = BLOCKS - BLOCKS_PER_BAND
+BLOCK_BOUNDS = [round(i * SIMHASH_BITS / BLOCKS) for i in range(BLOCKS + 1)]
+BANDS = list(itertools.combinations(range(BLOCKS), BLOCKS_PER_BAND))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over overlapping word shingles of the normalized text"""
+    words = normalize_article_text(text).lower().split()
+    if len(words) < SHINGLE_WORDS:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [
+            " ".join(words[i : i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        ]
+
+    counts = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += 1 if (value >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def article_paragraphs(text: str) -> List[str]:
+    """Normalized non-empty paragraphs (lines) of an article"""
+    paragraphs = (normalize_article_text(line) for line in text.splitlines())
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+
+def paragraph_hashes(text: str) -> List[str]:
+    """Hash of each paragraph, for finding what changed between versions"""
+    return [
+        hashlib.blake2b(paragraph.encode("utf-8"), digest_size=8).hexdigest()
+        for paragraph in article_paragraphs(text)
+    ]
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+@dataclass
+class ArticleFingerprint:
+    simhash: int
+    paragraphs: List[str]
+
+    @classmethod
+    def of(cls, text: str) -> "ArticleFingerprint":
+        return cls(simhash(text), paragraph_hashes(text))
+
+
+@dataclass
+class NearDuplicate:
+    distance: int
+    payload: Dict[str, Any]
+    # Paragraphs of the new article that don't appear in the indexed one
+    changed_paragraphs: List[int]
+    changed_ratio: float
+
+
+class NearDuplicateIndex(SQLiteStore):
+    """
+    SimHash index of processed articles with LSH banding, holding each
+    article's geocoded locations so near-identical syndicated copies can
+    reuse them
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS articles (
+        article_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        simhash INTEGER NOT NULL,
+        version TEXT NOT NULL,
+        paragraphs TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_articles_created ON articles(created_at);
+    DROP TABLE IF EXISTS simhash_bands;
+    CREATE TABLE IF NOT EXISTS band_keys (
+        band INTEGER NOT NULL,
+        value INTEGER NOT NULL,
+        article_id INTEGER NOT NULL,
+        PRIMARY KEY (band, value, article_id)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, max_distance: int, ttl_seconds: float):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(
+                f"Near-duplicate max distance must be between 0 and {MAX_DISTANCE} "
+                f"bits, got {max_distance}"
+            )
+        super().__init__(path)
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+
+    def add(self, fingerprint: ArticleFingerprint, payload: Dict[str, Any]):
+        connection = self._connect()
+        connection.execute("BEGIN")
+        try:
+            cursor = connection.execute(
+                "INSERT INTO articles (simhash, version, paragraphs, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    _to_signed(fingerprint.simhash),
+                    pipeline_version(),
+                    json.dumps(fingerprint.paragraphs),
+                    json.dumps(payload),
+                    time.time(),
+                ),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO band_keys (band, value, article_id) "
+                "VALUES (?, ?, ?)",
+                [
+                    (band, value, cursor.lastrowid)
+                    for band, value in enumerate(self._bands(fingerprint.simhash))
+                ],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def find(self, fingerprint: ArticleFingerprint) -> Optional[NearDuplicate]:
+        """Closest indexed article within max_distance bits, if any"""
+        matches = [
+            (hamming_distance(fingerprint.simhash, candidate), article_id)
+            for article_id, candidate in self._candidates(fingerprint.simhash)
+        ]
+        matches = [match for match in matches if match[0] <= self.max_distance]
+        if not matches:
+            return None
+
+        # The newest of the closest articles
+        distance, article_id = min(matches, key=lambda match: (match[0], -match[1]))
+        row = (
+            self._connect()
+            .execute(
+                "SELECT paragraphs, payload FROM articles WHERE article_id = ?",
+                (article_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            # Purged since the candidate lookup
+            return None
+
+        known = set(json.loads(row["paragraphs"]))
+        changed = [
+            index
+            for index, paragraph in enumerate(fingerprint.paragraphs)
+            if paragraph not in known
+        ]
+        return NearDuplicate(
+            distance=distance,
+            payload=json.loads(row["payload"]),
+            changed_paragraphs=changed,
+            changed_ratio=len(changed) / max(1, len(fingerprint.paragraphs)),
+        )
+
+    def purge_expired(self) -> int:
+        connection = self._connect()
+        cutoff = time.time() - self.ttl_seconds
+        expired = connection.execute(
+            "SELECT article_id, simhash FROM articles WHERE created_at < ?", (cutoff,)
+        ).fetchall()
+        if not expired:
+            return 0
+
+        connection.execute("BEGIN")
+        try:
+            # Band keys are found by their primary key, recomputed from the SimHash
+            connection.executemany(
+                "DELETE FROM band_keys WHERE band = ? AND value = ? AND article_id = ?",
+                [
+                    (band, value, article_id)
+                    for article_id, signed in expired
+                    for band, value in enumerate(self._bands(signed & ((1 << 64) - 1)))
+                ],
+            )
+            connection.executemany(
+                "DELETE FROM articles WHERE article_id = ?",
+                [(article_id,) for article_id, _ in expired],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return len(expired)
+
+    def _candidates(self, fingerprint: int) -> List[Tuple[int, int]]:
+        """(article_id, simhash) of live articles sharing a band key"""
+        bands = self._bands(fingerprint)
+        conditions = " OR ".join("(b.band = ? AND b.value = ?)" for _ in bands)
+        params = [item for pair in enumerate(bands) for item in pair]
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT DISTINCT a.article_id, a.simhash FROM band_keys b "
+                "JOIN articles a ON a.article_id = b.article_id "
+                f"WHERE ({conditions}) AND a.version = ? AND a.created_at >= ?",
+                (*params, pipeline_version(), time.time() - self.ttl_seconds),
+            )
+            .fetchall()
+        )
+        return [(row[0], row[1] & ((1 << 64) - 1)) for row in rows]
+
+    @staticmethod
+    def _bands(fingerprint: int) -> List[int]:
+        blocks = [
+            (fingerprint >> start) & ((1 << (end - start)) - 1)
+            for start, end in zip(BLOCK_BOUNDS, BLOCK_BOUNDS[1:])
+        ]
+        keys = []
+        for band in BANDS:
+            key = 0
+            for block in band:
+                width = BLOCK_BOUNDS[block + 1] - BLOCK_BOUNDS[block]
+                key = (key << width) | blocks[block]
+            keys.append(key)
+        return keys
+
+
+# Global near-duplicate index, opened lazily from Config.NEAR_DUPLICATE_INDEX_PATH
+_near_duplicate_index: Optional[NearDuplicateIndex] = None
+_near_duplicate_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    """Get the process-wide near-duplicate index, or None if disabled"""
+    global _near_duplicate_index
+    if not Config.NEAR_DUPLICATE_INDEX_PATH:
+        return None
+
+    with _near_duplicate_index_lock:
+        if (
+            _near_duplicate_index is None
+            or _near_duplicate_index.path != Config.NEAR_DUPLICATE_INDEX_PATH
+        ):
+            _near_duplicate_index = NearDuplicateIndex(
+                Config.NEAR_DUPLICATE_INDEX_PATH,
+                max_distance=Config.NEAR_DUPLICATE_MAX_DISTANCE,
+                ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+            )
+        return _near_duplicate_index
@@ -0,0 +1,200 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional
+
+from app.services.html_parsing import ExtractionResult, get_html_parser
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ParseTimeoutError(Exception):
+    """Raised when an HTML parse in the process pool takes too long"""
+
+    pass
+
+
+# Parsers already created inside a worker process, by backend name
+_worker_parsers: Dict[str, object] = {}
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Open the parent's block without taking ownership of it - otherwise the
+    resource tracker would unlink it (or warn about a leak) when this worker exits
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag
+        block = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _extract_in_worker(
+    parser_name: str,
+    content: Optional[bytes],
+    shm_name: Optional[str],
+    size: int,
+    charset: Optional[str],
+    selector: Optional[str],
+    learn: bool,
+) -> ExtractionResult:
+    """Worker-process entry point: turn raw bytes into an ExtractionResult"""
+    if shm_name is not None:
+        block = _attach_shared_memory(shm_name)
+        try:
+            content = bytes(block.buf[:size])
+        finally:
+            block.close()
+
+    parser = _worker_parsers.get(parser_name)
+    if parser is None:
+        parser = _worker_parsers[parser_name] = get_html_parser(parser_name)
+    return parser.extract(content, charset, selector, learn)
+
+
+class ParsePool:
+    """
+    Runs HTML parsing in worker processes so CPU-heavy pages don't hold the
+    GIL away from request threads and SSE streams.
+
+    Only the raw bytes and the extracted title/text cross the process
+    boundary; payloads above the shared-memory threshold are handed over
+    through a shared memory block instead of being pickled down the pipe.
+    At most max_workers + max_queue_size parses are in flight - callers
+    beyond that parse in their own thread rather than queue without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, shm_threshold: int):
+        self.max_workers = max_workers
+        self.shm_threshold = shm_threshold
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue_size)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def extract(
+        self,
+        parser,
+        content: bytes,
+        charset: Optional[str] = None,
+        timeout: Optional[float] = None,
+        selector: Optional[str] = None,
+        learn: bool = False,
+    ) -> ExtractionResult:
+        """
+        Run parser.extract (by backend name) in a worker process.
+        Raises ParseTimeoutError if the result isn't back within timeout seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Parse pool is saturated, parsing in-process")
+            return parser.extract(content, charset, selector, learn)
+
+        block = None
+        try:
+            if len(content) >= self.shm_threshold:
+                block = shared_memory.SharedMemory(create=True, size=len(content))
+                block.buf[: len(content)] = content
+                args = (parser.name, None, block.name, len(content))
+            else:
+                args = (parser.name, content, None, len(content))
+
+            expires = None if timeout is None else time.monotonic() + timeout
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(
+                        _extract_in_worker, *args, charset, selector, learn
+                    )
+                    return future.result(
+                        timeout=None
+                        if expires is None
+                        else max(0.0, expires - time.monotonic())
+                    )
+                except FutureTimeoutError:
+                    future.cancel()
+                    self._reset_executor(executor)
+                    raise ParseTimeoutError(
+                        f"HTML parsing took longer than {timeout:.1f}s"
+                    )
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM-killed), or the pool was torn down
+                    # after another caller's parse timed out; retry once on a
+                    # fresh pool so this caller doesn't fail for someone else
+                    self._reset_executor(executor)
+                    if attempt or (expires is not None and time.monotonic() >= expires):
+                        raise
+                    logger.warning("Parse pool broke, retrying on a fresh pool")
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Never fork a process that has request threads running;
+                # forkserver children start from a clean single-threaded parent
+                method = (
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                )
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(method),
+                )
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor):
+        """
+        Throw away the pool after a timeout. A runaway parse can't be
+        interrupted, so its worker is terminated rather than left holding a slot.
+        A pool another caller has already replaced is left alone.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+
+# Global parse pool, created on first use in each process
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_pid: Optional[int] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """Get the process-wide parse pool, or None if PARSE_POOL_WORKERS is 0"""
+    global _parse_pool, _parse_pool_pid
+    if Config.PARSE_POOL_WORKERS <= 0:
+        return None
+
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_pid != os.getpid():
+            _parse_pool = ParsePool(
+                max_workers=Config.PARSE_POOL_WORKERS,
+                max_queue_size=Config.PARSE_POOL_QUEUE_SIZE,
+                shm_threshold=Config.PARSE_POOL_SHM_THRESHOLD_BYTES,
+            )
+            _parse_pool_pid = os.getpid()
+        return _parse_pool
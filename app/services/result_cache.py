@@ -0,0 +1,142 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.services.location_extractor import LocationExtractor
+from app.services.summarizer import EventSummarizer
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bump when pipeline post-processing (filtering, response shape) changes in a
+# way that makes previously cached responses wrong
+RESULT_CACHE_SCHEMA_VERSION = 1
+
+PROMPTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "prompts"
+)
+
+# Responses carrying these warnings are incomplete for transient reasons
+UNCACHEABLE_WARNINGS = {
+    "DEADLINE_EXCEEDED",
+    "SUMMARY_SKIPPED",
+    "EXTRACTION_FAILED",
+    "SUMMARY_FAILED",
+    "GEOCODING_UNAVAILABLE",
+}
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1)
+def pipeline_version() -> str:
+    """
+    Fingerprint of everything besides the article that shapes a result:
+    the model names and every prompt template. Changing any of them
+    invalidates the cache.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"schema={RESULT_CACHE_SCHEMA_VERSION}\n".encode())
+    digest.update(f"extractor={LocationExtractor.MODEL_NAME}\n".encode())
+    digest.update(f"summarizer={EventSummarizer.MODEL_NAME}\n".encode())
+    for filename in sorted(os.listdir(PROMPTS_DIR)):
+        with open(os.path.join(PROMPTS_DIR, filename), "rb") as handle:
+            digest.update(filename.encode() + b"\n" + handle.read())
+    return digest.hexdigest()[:16]
+
+
+def normalize_article_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so cosmetic differences still hit"""
+    text = unicodedata.normalize("NFKC", text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def result_cache_key(article_text: str) -> str:
+    normalized = normalize_article_text(article_text)
+    digest = hashlib.sha256(f"{pipeline_version()}\n{normalized}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_cacheable(response_data: Dict[str, Any]) -> bool:
+    """Only complete results are cached; partial ones would stick around"""
+    return not any(
+        warning["code"] in UNCACHEABLE_WARNINGS
+        for warning in response_data.get("warnings", [])
+    )
+
+
+class ResultCache(SQLiteStore):
+    """Final pipeline responses keyed by article content and pipeline version"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        cache_key TEXT PRIMARY KEY,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at);
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored response dict, or None if missing or expired"""
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT response, created_at FROM results WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row["created_at"] > self.ttl_seconds:
+            connection.execute("DELETE FROM results WHERE cache_key = ?", (cache_key,))
+            return None
+
+        connection.execute(
+            "UPDATE results SET hits = hits + 1 WHERE cache_key = ?", (cache_key,)
+        )
+        return json.loads(row["response"])
+
+    def put(self, cache_key: str, response_data: Dict[str, Any]):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (cache_key, response, created_at) "
+            "VALUES (?, ?, ?)",
+            (cache_key, json.dumps(response_data), time.time()),
+        )
+
+    def purge_expired(self) -> int:
+        cursor = self._connect().execute(
+            "DELETE FROM results WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+        return cursor.rowcount
+
+
+# Global result cache, opened lazily from Config.RESULT_CACHE_PATH
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get the process-wide result cache, or None if caching is disabled"""
+    global _result_cache
+    if not Config.RESULT_CACHE_PATH:
+        return None
+
+    with _result_cache_lock:
+        if _result_cache is None or _result_cache.path != Config.RESULT_CACHE_PATH:
+            _result_cache = ResultCache(
+                Config.RESULT_CACHE_PATH, Config.RESULT_CACHE_TTL_SECONDS
+            )
+        return _result_cache
@@ -1,32 +1,55 @@
-import google.generativeai as genai
-import os
 import logging
+from typing import Optional
+from app.services.gemini_client import (
+    configure_gemini,
+    genai,
+    load_prompt,
+    record_usage,
+)
+from app.utils import tracing
+from app.utils.cancellation import CancelToken, check_cancelled
+from app.utils.deadline import Deadline, DeadlineExceededError, call_with_timeout
+from app.utils.stage_timing import timed
+
+
+class SummaryError(Exception):
+    """Raised when the LLM call for a summary fails"""
+
+    pass
 
 
 class EventSummarizer:
+    MODEL_NAME = "gemini-2.5-flash"
+
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+        configure_gemini(api_key)
+        self.model = genai.GenerativeModel(self.MODEL_NAME)
         self.prompt_template = self._load_prompt_template()
         self.logger = logging.getLogger(__name__)
 
     def _load_prompt_template(self) -> str:
         """Load the event summarization prompt from file."""
-        prompt_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-            "prompts",
-            "event_summarization.txt",
-        )
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read()
+        return load_prompt("event_summarization.txt")
 
+    @tracing.traced("summarize_events_at_location")
     def summarize_events_at_location(
-        self, article_text: str, location_name: str
+        self,
+        article_text: str,
+        location_name: str,
+        cancel_token: Optional[CancelToken] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """
         Generate a brief summary of events that happened at a specific location.
         Returns: 1-2 sentence summary
+        Raises JobCancelledError if the job is cancelled before the LLM call,
+        DeadlineExceededError if the deadline passes before it answers, and
+        SummaryError if the call fails for any reason other than rate limits.
         """
+        tracing.set_attribute("location.name", location_name)
+        check_cancelled(cancel_token)
+        timeout = deadline.timeout() if deadline else None
+
         # Limit text to avoid token limits
         truncated_text = article_text[:3000]
         prompt = self.prompt_template.format(
@@ -34,7 +57,11 @@ class EventSummarizer:
         )
 
         try:
-            response = self.model.generate_content(prompt)
+            with timed("summary", detail=location_name, upstream="gemini"):
+                response = call_with_timeout(
+                    self.model.generate_content, timeout, prompt
+                )
+            record_usage(response, self.MODEL_NAME, "summary", prompt)
             summary = response.text.strip()
 
             # Ensure summary is concise
@@ -43,6 +70,8 @@ class EventSummarizer:
 
             return summary if summary else "Mentioned in article."
 
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             error_str = str(e).lower()
             if "429" in error_str or "rate limit" in error_str or "quota" in error_str:
@@ -51,5 +80,9 @@ class EventSummarizer:
                 )
                 return "Summary temporarily unavailable due to rate limits"
             else:
-                self.logger.debug(f"Error generating summary for {location_name}: {e}")
-                return "Mentioned in article."
+                self.logger.warning(
+                    f"Error generating summary for {location_name}: {e}"
+                )
+                raise SummaryError(
+                    f"Error generating summary for {location_name}: {e}"
+                ) from e
@@ -0,0 +1,41 @@
+import threading
+from typing import Optional
+
+
+class JobCancelledError(Exception):
+    """Raised when work is abandoned because its job was cancelled"""
+
+    pass
+
+
+class CancelToken:
+    """Cooperative cancellation flag checked between upstream calls"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Job cancelled"):
+        """Request cancellation; work stops at its next checkpoint"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelledError(self.reason)
+
+    def sleep(self, seconds: float):
+        """Sleep that wakes early and raises if the job is cancelled"""
+        if self._event.wait(seconds):
+            raise JobCancelledError(self.reason)
+
+
+def check_cancelled(cancel_token: Optional[CancelToken]):
+    """Raise JobCancelledError if an optional token has been cancelled"""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
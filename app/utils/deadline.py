@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Never hand an upstream call a timeout shorter than this - a near-zero
+# socket timeout just turns into a guaranteed failure
+MIN_CALL_TIMEOUT = 0.5
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's time budget runs out before work can start"""
+
+    pass
+
+
+class Deadline:
+    """Absolute end time for a request, measured on the monotonic clock"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what: str = "work"):
+        """Raise DeadlineExceededError if the budget is already spent"""
+        if self.expired:
+            raise DeadlineExceededError(f"Time budget exhausted before {what}")
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """
+        Timeout for one upstream call: the usual default, capped by the time left.
+        Raises DeadlineExceededError if no time is left at all.
+        """
+        self.check("upstream call")
+        remaining = self.remaining()
+        if default is not None:
+            remaining = min(default, remaining)
+        return max(MIN_CALL_TIMEOUT, remaining)
+
+    def stage(self, share: float) -> "Deadline":
+        """
+        Sub-deadline for one pipeline stage: `share` of the total budget from
+        now, never past the overall deadline. Time an earlier stage didn't
+        use is automatically available to later ones.
+        """
+        stage_deadline = Deadline.__new__(Deadline)
+        stage_deadline.budget = self.budget * share
+        stage_deadline.started_at = time.monotonic()
+        stage_deadline.expires_at = min(
+            self.expires_at, stage_deadline.started_at + stage_deadline.budget
+        )
+        return stage_deadline
+
+
+def call_with_timeout(fn: Callable[..., Any], timeout: Optional[float], *args, **kwargs):
+    """
+    Run fn, giving up after timeout seconds.
+
+    For clients without per-call timeouts (the Gemini SDK): the call runs on a
+    daemon thread and is abandoned, not interrupted, when time runs out.
+    Raises DeadlineExceededError on timeout; exceptions from fn propagate.
+    """
+    if timeout is None:
+        return fn(*args, **kwargs)
+
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+
+    if worker.is_alive():
+        raise DeadlineExceededError(f"Upstream call exceeded {timeout:.1f}s timeout")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
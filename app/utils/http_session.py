@@ -0,0 +1,42 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+# Global session shared by all threads in this process
+_http_session: Optional[requests.Session] = None
+_http_session_pid: Optional[int] = None
+_http_session_lock = threading.Lock()
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # One pool per host, so repeat fetches from the same news site reuse
+    # warm keep-alive connections instead of redoing DNS/TCP/TLS setup
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_HOSTS,
+        pool_maxsize=Config.HTTP_POOL_SIZE,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Never carry cookies from one user's fetch into another's
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide pooled HTTP session.
+    A forked worker gets a fresh session rather than sharing its parent's sockets.
+    """
+    global _http_session, _http_session_pid
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            _http_session = _create_session()
+            _http_session_pid = os.getpid()
+        return _http_session
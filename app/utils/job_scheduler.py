@@ -0,0 +1,214 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.utils.cancellation import CancelToken
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class ScheduledJob:
+    job_id: str
+    fn: Callable
+    args: Tuple[Any, ...] = ()
+    on_position: Optional[Callable[[int], None]] = None
+    cancel_token: Optional[CancelToken] = None
+    on_cancel: Optional[Callable[[str], None]] = None
+    submitted_at: float = field(default_factory=time.time)
+
+
+class JobScheduler:
+    """Runs jobs on a fixed-size worker pool fed by a bounded FIFO queue"""
+
+    def __init__(self, max_workers: int, max_queue_size: int):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._pending: Deque[ScheduledJob] = deque()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._running: Dict[str, ScheduledJob] = {}
+        # Moving average of job duration, used to estimate Retry-After
+        self._avg_duration: Optional[float] = None
+
+    def submit(
+        self,
+        job_id: str,
+        fn: Callable,
+        args: Tuple[Any, ...] = (),
+        on_position: Callable[[int], None] = None,
+        cancel_token: CancelToken = None,
+        on_cancel: Callable[[str], None] = None,
+    ) -> int:
+        """
+        Queue a job for execution. on_cancel is called with the reason if the
+        job is cancelled before it starts, since fn will then never run.
+        Returns the job's queue position (0 if a worker will pick it up immediately).
+        Raises QueueFullError when the queue is at capacity.
+        """
+        job = ScheduledJob(
+            job_id=job_id,
+            fn=fn,
+            args=args,
+            on_position=on_position,
+            cancel_token=cancel_token,
+            on_cancel=on_cancel,
+        )
+
+        with self._condition:
+            if len(self._pending) >= self.max_queue_size:
+                raise QueueFullError(
+                    f"Job queue is full ({self.max_queue_size} pending jobs)",
+                    retry_after=self._estimate_retry_after(),
+                )
+
+            self._ensure_workers()
+            self._pending.append(job)
+            idle_workers = self.max_workers - len(self._running)
+            position = max(0, len(self._pending) - idle_workers)
+            self._condition.notify()
+
+        if position and on_position:
+            self._notify_position(job, position)
+        return position
+
+    def cancel(self, job_id: str, reason: str = "Job cancelled") -> Optional[str]:
+        """
+        Cancel a job.
+        Returns "queued" if it was removed before starting, "running" if its
+        cancel token was signalled, or None if the scheduler doesn't know it.
+        """
+        with self._condition:
+            for job in self._pending:
+                if job.job_id == job_id:
+                    self._pending.remove(job)
+                    if job.cancel_token:
+                        job.cancel_token.cancel(reason)
+                    cancelled = job
+                    waiting = list(self._pending)
+                    break
+            else:
+                running_job = self._running.get(job_id)
+                if running_job is None:
+                    return None
+                if running_job.cancel_token:
+                    running_job.cancel_token.cancel(reason)
+                return "running"
+
+        if cancelled.on_cancel:
+            try:
+                cancelled.on_cancel(reason)
+            except Exception as e:
+                logger.warning(f"Cancel callback failed for {job_id}: {e}")
+        for index, waiting_job in enumerate(waiting):
+            self._notify_position(waiting_job, index + 1)
+        return "queued"
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Return the 1-based position of a pending job, or None if not queued"""
+        with self._condition:
+            for index, job in enumerate(self._pending):
+                if job.job_id == job_id:
+                    return index + 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of scheduler load"""
+        with self._condition:
+            return {
+                "queued": len(self._pending),
+                "running": len(self._running),
+                "workers": self.max_workers,
+                "queue_capacity": self.max_queue_size,
+            }
+
+    def _estimate_retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up (caller holds the lock)"""
+        if self._avg_duration is None:
+            return Config.JOB_RETRY_AFTER_SECONDS
+
+        waves = (len(self._pending) + 1) / self.max_workers
+        return max(1, math.ceil(self._avg_duration * waves))
+
+    def _ensure_workers(self):
+        """Start worker threads lazily so nothing runs before a fork"""
+        if self._workers:
+            return
+
+        for index in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f"job-worker-{index}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                job = self._pending.popleft()
+                self._running[job.job_id] = job
+                waiting = list(self._pending)
+
+            # Everyone still waiting moved up one place
+            for index, waiting_job in enumerate(waiting):
+                self._notify_position(waiting_job, index + 1)
+
+            start_time = time.time()
+            try:
+                job.fn(*job.args)
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {str(e)}")
+            finally:
+                duration = time.time() - start_time
+                with self._condition:
+                    self._running.pop(job.job_id, None)
+                    if self._avg_duration is None:
+                        self._avg_duration = duration
+                    else:
+                        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    def _notify_position(self, job: ScheduledJob, position: int):
+        if not job.on_position:
+            return
+        try:
+            job.on_position(position)
+        except Exception as e:
+            logger.warning(f"Queue position callback failed for {job.job_id}: {e}")
+
+
+# Global scheduler shared by all requests in this process
+_job_scheduler: Optional[JobScheduler] = None
+_job_scheduler_pid: Optional[int] = None
+_job_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """
+    Get or create the process-wide job scheduler.
+    A forked worker gets its own: its parent's threads don't survive the fork.
+    """
+    global _job_scheduler, _job_scheduler_pid
+    with _job_scheduler_lock:
+        if _job_scheduler is None or _job_scheduler_pid != os.getpid():
+            _job_scheduler = JobScheduler(
+                max_workers=Config.JOB_WORKERS,
+                max_queue_size=Config.JOB_QUEUE_SIZE,
+            )
+            _job_scheduler_pid = os.getpid()
+        return _job_scheduler
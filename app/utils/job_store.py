@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.sqlite_store import SQLiteStore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class JobState(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+UNFINISHED_STATES = (JobState.QUEUED.value, JobState.RUNNING.value)
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    input: str
+    state: JobState
+    owner: Optional[str]
+    error: Optional[str]
+    result: Optional[Dict[str, Any]]
+    created_at: float
+    updated_at: float
+
+
+# (pid, owner id) of this process; a forked child gets a new one
+_owner: Optional[Tuple[int, str]] = None
+
+
+def _process_owner() -> str:
+    """
+    Identify this worker process as host:pid:nonce. The nonce is new for each
+    process start, so a restarted worker that happens to get the same pid
+    doesn't mistake its predecessor's jobs for its own.
+    """
+    global _owner
+    pid = os.getpid()
+    if _owner is None or _owner[0] != pid:
+        _owner = (pid, f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}")
+    return _owner[1]
+
+
+def _owner_is_dead(owner: Optional[str], updated_at: float, now: float) -> bool:
+    """Decide whether a job's owning process has gone away"""
+    if not owner:
+        return True
+
+    # Live owners heartbeat their unfinished jobs, so a job that has gone quiet
+    # belongs to a dead or hung process, or to a pid that has since been reused
+    if now - updated_at > Config.JOB_STALE_AFTER_SECONDS:
+        return True
+
+    host, _, pid = owner.rpartition(":")[0].rpartition(":")
+    if host == socket.gethostname():
+        try:
+            os.kill(int(pid), 0)
+        except (ValueError, ProcessLookupError):
+            return True
+        except PermissionError:
+            return False
+    return False
+
+
+class JobStore(SQLiteStore):
+    """Durable record of SSE jobs, their stage checkpoints and final results"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        input TEXT NOT NULL,
+        state TEXT NOT NULL,
+        owner TEXT,
+        error TEXT,
+        result TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state);
+    CREATE TABLE IF NOT EXISTS job_checkpoints (
+        job_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (job_id, stage)
+    );
+    """
+
+    def create_job(self, job_id: str, request_input: str):
+        """Record a newly submitted job"""
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, input, state, owner, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, request_input, JobState.QUEUED.value, _process_owner(), now, now),
+        )
+
+    def delete_job(self, job_id: str):
+        """Remove a job and its checkpoints"""
+        connection = self._connect()
+        connection.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+        connection.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def mark_running(self, job_id: str):
+        self._set_state(job_id, JobState.RUNNING)
+
+    def complete_job(self, job_id: str, result: Dict[str, Any]):
+        """Store the final result and drop checkpoints that are no longer needed"""
+        connection = self._connect()
+        connection.execute(
+            "UPDATE jobs SET state = ?, result = ?, updated_at = ? WHERE job_id = ?",
+            (JobState.COMPLETE.value, json.dumps(result), time.time(), job_id),
+        )
+        connection.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+
+    def fail_job(self, job_id: str, error: str):
+        self._set_state(job_id, JobState.FAILED, error=error)
+
+    def cancel_job(self, job_id: str, reason: str):
+        """Mark a job cancelled and drop its checkpoints so it is never resumed"""
+        self._set_state(job_id, JobState.CANCELLED, error=reason)
+        self._connect().execute(
+            "DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,)
+        )
+
+    def save_checkpoint(self, job_id: str, stage: str, payload: Dict[str, Any]):
+        """Persist the output of a completed pipeline stage"""
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO job_checkpoints (job_id, stage, payload, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (job_id, stage, json.dumps(payload), time.time()),
+        )
+        connection.execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id)
+        )
+
+    def load_checkpoints(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return {stage: payload} for every completed stage of a job"""
+        rows = self._connect().execute(
+            "SELECT stage, payload FROM job_checkpoints WHERE job_id = ?", (job_id,)
+        )
+        return {row["stage"]: json.loads(row["payload"]) for row in rows}
+
+    def get_job(self, job_id: str) -> Optional[JobRecord]:
+        row = (
+            self._connect()
+            .execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            .fetchone()
+        )
+        return self._to_record(row) if row else None
+
+    def claim_resumable_jobs(self) -> List[JobRecord]:
+        """
+        Take ownership of unfinished jobs whose worker process has died.
+        Ownership is swapped with a compare-and-set so two workers starting
+        at the same time never resume the same job.
+        """
+        connection = self._connect()
+        now = time.time()
+        me = _process_owner()
+        rows = connection.execute(
+            "SELECT * FROM jobs WHERE state IN (?, ?) ORDER BY created_at",
+            UNFINISHED_STATES,
+        ).fetchall()
+
+        claimed = []
+        for row in rows:
+            if row["owner"] == me or not _owner_is_dead(
+                row["owner"], row["updated_at"], now
+            ):
+                continue
+
+            cursor = connection.execute(
+                "UPDATE jobs SET owner = ?, state = ?, updated_at = ? "
+                "WHERE job_id = ? AND owner IS ?",
+                (me, JobState.QUEUED.value, now, row["job_id"], row["owner"]),
+            )
+            if cursor.rowcount:
+                claimed.append(self.get_job(row["job_id"]))
+
+        return claimed
+
+    def release_job(self, job_id: str):
+        """Give up ownership of an unfinished job so any worker may claim it"""
+        self._connect().execute(
+            "UPDATE jobs SET owner = NULL WHERE job_id = ? AND owner = ?",
+            (job_id, _process_owner()),
+        )
+
+    def heartbeat(self) -> int:
+        """Mark this process's unfinished jobs as alive; returns how many there are"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET updated_at = ? WHERE owner = ? AND state IN (?, ?)",
+            (time.time(), _process_owner(), *UNFINISHED_STATES),
+        )
+        return cursor.rowcount
+
+    def purge_expired(self, max_age_seconds: float) -> int:
+        """Delete finished jobs older than max_age_seconds"""
+        connection = self._connect()
+        cutoff = time.time() - max_age_seconds
+        cursor = connection.execute(
+            "DELETE FROM jobs WHERE state NOT IN (?, ?) AND updated_at < ?",
+            (*UNFINISHED_STATES, cutoff),
+        )
+        connection.execute(
+            "DELETE FROM job_checkpoints WHERE job_id NOT IN (SELECT job_id FROM jobs)"
+        )
+        return cursor.rowcount
+
+    def _set_state(self, job_id: str, state: JobState, error: str = None):
+        self._connect().execute(
+            "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE job_id = ?",
+            (state.value, error, time.time(), job_id),
+        )
+
+    @staticmethod
+    def _to_record(row) -> JobRecord:
+        return JobRecord(
+            job_id=row["job_id"],
+            input=row["input"],
+            state=JobState(row["state"]),
+            owner=row["owner"],
+            error=row["error"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+
+# Global job store, opened lazily from Config.JOB_STORE_PATH
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> Optional[JobStore]:
+    """Get the process-wide job store, or None if persistence is disabled"""
+    global _job_store
+    if not Config.JOB_STORE_PATH:
+        return None
+
+    with _job_store_lock:
+        if _job_store is None or _job_store.path != Config.JOB_STORE_PATH:
+            _job_store = JobStore(Config.JOB_STORE_PATH)
+        return _job_store
@@ -0,0 +1,63 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+
+class LazyModule:
+    """
+    Stands in for a heavy module until one of its attributes is first used,
+    so importing the app (and starting a worker) doesn't pay for clients a
+    request may never need. Attributes set on it (e.g. by mock.patch) shadow
+    the module's own.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str) -> Any:
+        # Only reached for attributes not set on the proxy itself
+        if attribute.startswith("_"):
+            raise AttributeError(attribute)
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+# Every lazy module by name, so a preforking server can load them all before
+# forking, and so modules importing the same name share one stand-in (as they
+# would share the module itself)
+_lazy_modules: Dict[str, LazyModule] = {}
+_lazy_modules_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> LazyModule:
+    """A module that is imported on first attribute access"""
+    with _lazy_modules_lock:
+        if name not in _lazy_modules:
+            _lazy_modules[name] = LazyModule(name)
+        return _lazy_modules[name]
+
+
+def preload_lazy_modules() -> List[str]:
+    """
+    Import every lazy module now. Called in the gunicorn master before it
+    forks, so workers share the modules copy-on-write instead of each
+    importing them on its first request. Returns the modules' names.
+    """
+    with _lazy_modules_lock:
+        modules = list(_lazy_modules.values())
+    for module in modules:
+        module.load()
+    return [module._name for module in modules]
@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.models.data_models import LocationData
+
+# ?format= values for location results
+FORMATS = ("json", "geojson", "columnar")
+DEFAULT_FORMAT = "json"
+
+MIMETYPES = {
+    "json": "application/json",
+    "geojson": "application/geo+json",
+    "columnar": "application/json",
+}
+
+# In declaration order, so columns and properties come out in a stable order
+LOCATION_FIELD_ORDER = list(LocationData.model_fields)
+COORDINATE_FIELDS = ("latitude", "longitude")
+
+
+def parse_format(value: Optional[str]) -> str:
+    """A ?format= value, defaulting to json. Raises ValueError if unknown"""
+    value = (value or DEFAULT_FORMAT).lower()
+    if value not in FORMATS:
+        raise ValueError(f"Unknown format '{value}' (expected {', '.join(FORMATS)})")
+    return value
+
+
+def location_fields(projection: Dict[str, Optional[set]]) -> List[str]:
+    """
+    The location fields a projection keeps: its locations.<field> names, or
+    every field when it keeps whole locations or doesn't mention them
+    """
+    subfields = projection.get("locations")
+    if subfields is None:
+        return list(LOCATION_FIELD_ORDER)
+    return [field for field in LOCATION_FIELD_ORDER if field in subfields]
+
+
+def to_geojson(
+    locations: Sequence[LocationData],
+    fields: Sequence[str],
+    metadata: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    A GeoJSON FeatureCollection with one Point per location (Leaflet's
+    L.geoJSON takes it as is); the other response fields go in "metadata"
+    """
+    properties = [field for field in fields if field not in COORDINATE_FIELDS]
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                # GeoJSON positions are longitude first
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [location.longitude, location.latitude],
+                },
+                "properties": {field: getattr(location, field) for field in properties},
+            }
+            for location in locations
+        ],
+        "metadata": metadata,
+    }
+
+
+class _StringTable:
+    """Distinct strings in first-seen order, referenced by index"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._indexes: Dict[str, int] = {}
+
+    def index(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        index = self._indexes.get(value)
+        if index is None:
+            index = self._indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def to_columnar(
+    locations: Sequence[LocationData],
+    fields: Sequence[str],
+    metadata: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Locations as parallel arrays, one per field. Numeric columns hold the
+    values; text columns hold indexes into one shared "strings" table, so a
+    place name or summary repeated across many results is sent once.
+    """
+    strings = _StringTable()
+    columns: Dict[str, List[Any]] = {}
+    for field in fields:
+        annotation = LocationData.model_fields[field].annotation
+        values = [getattr(location, field) for location in locations]
+        if annotation in (float, Optional[float]):
+            columns[field] = values
+        else:
+            columns[field] = [strings.index(value) for value in values]
+    return {
+        "format": "columnar",
+        "count": len(locations),
+        "columns": columns,
+        "strings": strings.strings,
+        "metadata": metadata,
+    }
+
+
+def render_locations(
+    result_format: str,
+    locations: Sequence[LocationData],
+    fields: Sequence[str],
+    metadata: Dict[str, Any],
+) -> Dict[str, Any]:
+    """A geojson or columnar body for the locations and response metadata"""
+    if result_format == "geojson":
+        return to_geojson(locations, fields, metadata)
+    return to_columnar(locations, fields, metadata)
@@ -0,0 +1,279 @@
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans a cache hit through a slow Gemini call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def items(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from a callback at scrape time"""
+
+    TYPE = "gauge"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        labelnames=(),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        if self._callback is not None:
+            values = sorted(self._callback().items())
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [count per bucket (not cumulative)..., sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """The metrics one process exposes, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering (e.g. a module reloaded in tests) keeps the first
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "waldo_stage_seconds",
+        "Wall time of each pipeline stage (fetch, parse, extraction, geocode, "
+        "summary, filter)",
+        ["stage"],
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "waldo_request_seconds",
+        "Wall time of whole pipeline runs by outcome",
+        ["outcome"],
+    )
+)
+UPSTREAM_SECONDS = REGISTRY.register(
+    Histogram(
+        "waldo_upstream_request_seconds",
+        "Wall time of calls to upstream services (gemini, nominatim, article_host)",
+        ["upstream"],
+    )
+)
+UPSTREAM_ERRORS = REGISTRY.register(
+    Counter(
+        "waldo_upstream_errors_total",
+        "Failed upstream calls by kind (timeout, rate_limit, error)",
+        ["upstream", "kind"],
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "waldo_cache_requests_total",
+        "Cache lookups by cache and result (hit or miss)",
+        ["cache", "result"],
+    )
+)
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), count in CACHE_REQUESTS.items().items():
+        hits_and_lookups = totals.setdefault(cache, [0, 0])
+        if result == "hit":
+            hits_and_lookups[0] += count
+        hits_and_lookups[1] += count
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items()}
+
+
+CACHE_HIT_RATIO = REGISTRY.register(
+    Gauge(
+        "waldo_cache_hit_ratio",
+        "Share of cache lookups that hit since the process started",
+        ["cache"],
+        callback=_cache_hit_ratios,
+    )
+)
+LLM_CALLS = REGISTRY.register(
+    Counter(
+        "waldo_llm_calls_total",
+        "Gemini calls that reported token usage, by model and stage",
+        ["model", "stage"],
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "waldo_llm_tokens_total",
+        "Gemini tokens by model, stage and kind (prompt, or output including thinking)",
+        ["model", "stage", "kind"],
+    )
+)
+LLM_COST = REGISTRY.register(
+    Counter(
+        "waldo_llm_cost_usd_total",
+        "Estimated Gemini spend in USD at GEMINI_PRICES, by model and stage",
+        ["model", "stage"],
+    )
+)
+PIPELINES_IN_FLIGHT = REGISTRY.register(
+    Gauge("waldo_pipelines_in_flight", "Pipeline runs currently executing")
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
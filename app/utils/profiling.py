@@ -0,0 +1,393 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+RECENT_DURATIONS = 500  # requests the slowest-percent threshold is taken over
+MIN_DURATIONS = 20  # before that many, sampled profiles aren't kept
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+TRACEMALLOC_FRAMES = 5
+SUMMARY_ENTRIES = 30
+
+# What each downloadable artifact is called on disk
+ARTIFACTS = {"stacks": ".folded", "memory": ".tracemalloc"}
+
+# The profile the code on this thread (or copied context) is part of, if any
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = (
+    contextvars.ContextVar("request_profile", default=None)
+)
+
+
+class _RecentDurations:
+    """Wall times of the latest pipeline runs, to tell which ones are slow"""
+
+    def __init__(self, size: int = RECENT_DURATIONS):
+        self._durations: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._durations.append(seconds)
+
+    def threshold(self, slowest_percent: float) -> Optional[float]:
+        """Duration the slowest slowest_percent of recent runs take at least"""
+        with self._lock:
+            durations = sorted(self._durations)
+        if len(durations) < MIN_DURATIONS:
+            return None
+        index = int(len(durations) * (1 - slowest_percent / 100))
+        return durations[min(max(index, 0), len(durations) - 1)]
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+
+
+recent_durations = _RecentDurations()
+
+
+# tracemalloc is process-wide, so overlapping profiles share one session
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc() -> tracemalloc.Snapshot:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+    return snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+    )
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _short_path(filename: str) -> str:
+    """A source path relative to the sys.path entry it was imported from"""
+    best = ""
+    for entry in sys.path:
+        if entry and filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best) :].lstrip(os.sep) if best else filename
+
+
+class RequestProfile:
+    """
+    Where one pipeline run spends its wall time - its own thread plus the
+    pool workers it hands geocoding and summaries to - sampled from a
+    background thread, and the memory it left allocated. The tracemalloc
+    snapshot covers every thread, so requests running at the same time show
+    up in it too.
+    """
+
+    def __init__(self, request_id: str, trigger: str):
+        self.request_id = request_id
+        self.trigger = trigger
+        self.stacks: Counter = Counter()  # root-to-leaf frame labels -> samples
+        self._threads: Counter = Counter()  # thread id -> active registrations
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, name="request-profiler", daemon=True
+        )
+
+    def start(self):
+        _start_tracemalloc()
+        self.add_thread()
+        self._sampler.start()
+
+    def stop(self) -> tracemalloc.Snapshot:
+        """Stop sampling; returns the tracemalloc snapshot"""
+        self._stopped.set()
+        self._sampler.join()
+        return _stop_tracemalloc()
+
+    def add_thread(self):
+        """Sample the calling thread until remove_thread"""
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def remove_thread(self):
+        with self._lock:
+            thread_id = threading.get_ident()
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def _sample(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = list(self._threads)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+
+    def folded_stacks(self) -> str:
+        """Samples as collapsed stacks, for flamegraph.pl or speedscope"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+def run_profiled(fn, *args, **kwargs):
+    """Call fn, sampling its thread into the current request's profile if any"""
+    profile = _current_profile.get()
+    if profile is None:
+        return fn(*args, **kwargs)
+    profile.add_thread()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profile.remove_thread()
+
+
+def _sampled() -> bool:
+    return (
+        Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE
+    )
+
+
+@contextmanager
+def profile_request(request_id: str, forced: bool = False):
+    """
+    Time a pipeline run and, when forced or sampled, profile it. A forced
+    profile is always stored; a sampled one only if the run was among the
+    slowest PROFILE_SLOWEST_PERCENT of recent runs. Yields the profile, or
+    None when this run isn't profiled.
+    """
+    trigger = "request" if forced else "sampled" if _sampled() else None
+    profile = RequestProfile(request_id, trigger) if trigger else None
+    token = None
+    if profile is not None:
+        profile.start()
+        token = _current_profile.set(profile)
+
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield profile
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        recent_durations.record(duration)
+        if profile is not None:
+            _current_profile.reset(token)
+            _finish(profile, duration, outcome)
+
+
+def _finish(profile: RequestProfile, duration: float, outcome: str):
+    snapshot = profile.stop()
+    if profile.trigger == "sampled":
+        threshold = recent_durations.threshold(Config.PROFILE_SLOWEST_PERCENT)
+        if threshold is None or duration < threshold:
+            return
+    store = get_profile_store()
+    if store is None:
+        return
+    try:
+        store.save(profile, snapshot, duration, outcome)
+        logger.info(
+            f"Request {profile.request_id}: Stored {profile.trigger} profile "
+            f"({duration:.2f}s)"
+        )
+    except OSError as e:
+        logger.warning(f"Request {profile.request_id}: Failed to store profile: {e}")
+
+
+def summarize_stacks(stacks: Counter, limit: int = SUMMARY_ENTRIES) -> List[dict]:
+    """
+    Hot spots: functions by the samples they were the innermost frame for
+    (own time), then by the samples they were anywhere on the stack for -
+    outer frames like the request handler are on every sample
+    """
+    total: Counter = Counter()
+    own: Counter = Counter()
+    for stack, count in stacks.items():
+        for label in set(stack):
+            total[label] += count
+        own[stack[-1]] += count
+    ranked = sorted(total, key=lambda label: (own[label], total[label]), reverse=True)
+    return [
+        {
+            "function": label,
+            "own_samples": own[label],
+            "samples": total[label],
+            "seconds": round(total[label] * SAMPLE_INTERVAL, 3),
+        }
+        for label in ranked[:limit]
+    ]
+
+
+def summarize_snapshot(
+    snapshot: tracemalloc.Snapshot, limit: int = SUMMARY_ENTRIES
+) -> List[dict]:
+    """Source lines holding the most memory still allocated, largest first"""
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+class ProfileStore:
+    """
+    Stored profiles, one set of files per request in a directory: collapsed
+    stacks (stacks), a tracemalloc snapshot (memory) and a JSON summary. Only
+    the newest max_stored are kept.
+    """
+
+    def __init__(self, directory: str, max_stored: int):
+        self.directory = directory
+        self.max_stored = max_stored
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _valid_id(profile_id: str) -> bool:
+        try:
+            return str(uuid.UUID(profile_id)) == profile_id
+        except ValueError:
+            return False
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def save(
+        self,
+        profile: RequestProfile,
+        snapshot: tracemalloc.Snapshot,
+        duration: float,
+        outcome: str,
+    ):
+        profile_id = profile.request_id
+        if not self._valid_id(profile_id):
+            raise OSError(f"Invalid profile id: {profile_id!r}")
+        summary = {
+            "profile_id": profile_id,
+            "trigger": profile.trigger,
+            "outcome": outcome,
+            "duration_seconds": round(duration, 6),
+            "created_at": time.time(),
+            "sample_interval_seconds": SAMPLE_INTERVAL,
+            "samples": sum(profile.stacks.values()),
+            "top_functions": summarize_stacks(profile.stacks),
+            "top_allocations": summarize_snapshot(snapshot),
+        }
+        with self._lock:
+            with open(
+                self._path(profile_id, ARTIFACTS["stacks"]), "w", encoding="utf-8"
+            ) as f:
+                f.write(profile.folded_stacks())
+            snapshot.dump(self._path(profile_id, ARTIFACTS["memory"]))
+            # Summary last: a profile is listed once all its files exist
+            with open(self._path(profile_id, ".json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f)
+            self._prune()
+
+    def _prune(self):
+        summaries = sorted(
+            (name for name in os.listdir(self.directory) if name.endswith(".json")),
+            key=lambda name: os.path.getmtime(os.path.join(self.directory, name)),
+            reverse=True,
+        )
+        for name in summaries[self.max_stored :]:
+            profile_id = name[: -len(".json")]
+            for suffix in [".json", *ARTIFACTS.values()]:
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not self._valid_id(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles without their top-N tables, newest first"""
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                summary = self.get(name[: -len(".json")])
+                if summary:
+                    profiles.append(
+                        {
+                            key: value
+                            for key, value in summary.items()
+                            if not key.startswith("top_")
+                        }
+                    )
+        return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+    def artifact_path(self, profile_id: str, kind: str) -> Optional[str]:
+        """Path of a stored profile's stacks or memory dump, if it exists"""
+        if kind not in ARTIFACTS or not self._valid_id(profile_id):
+            return None
+        path = self._path(profile_id, ARTIFACTS[kind])
+        return path if os.path.exists(path) else None
+
+
+# Global store, re-created if REQUEST_PROFILE_DIR changes
+_profile_store: Optional[ProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """Get the profile store, or None if REQUEST_PROFILE_DIR is empty"""
+    global _profile_store
+    directory = Config.REQUEST_PROFILE_DIR
+    if not directory:
+        return None
+    with _profile_store_lock:
+        if _profile_store is None or _profile_store.directory != directory:
+            _profile_store = ProfileStore(directory, Config.PROFILE_MAX_STORED)
+        _profile_store.max_stored = Config.PROFILE_MAX_STORED
+        return _profile_store
@@ -1,11 +1,16 @@
 import json
+import threading
 import time
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from config import Config
+
 
 class ProgressStatus(Enum):
+    QUEUED = "queued"
     STARTING = "starting"
     EXTRACTING_ARTICLE = "extracting_article"
     EXTRACTING_LOCATIONS = "extracting_locations"
@@ -13,6 +18,7 @@ class ProgressStatus(Enum):
     FILTERING = "filtering"
     COMPLETE = "complete"
     ERROR = "error"
+    CANCELLED = "cancelled"
 
 
 @dataclass
@@ -24,6 +30,7 @@ class ProgressEvent:
     total_items: Optional[int] = None
     current_index: Optional[int] = None
     timestamp: float = None
+    event_id: Optional[int] = None
 
     def __post_init__(self):
         if self.timestamp is None:
@@ -33,10 +40,42 @@ class ProgressEvent:
 class ProgressTracker:
     """Tracks progress of article processing and emits SSE events"""
 
-    def __init__(self, session_id: str):
+    TERMINAL_STATUSES = (
+        ProgressStatus.COMPLETE,
+        ProgressStatus.ERROR,
+        ProgressStatus.CANCELLED,
+    )
+
+    def __init__(self, session_id: str, buffer_size: int = None):
         self.session_id = session_id
+        self.created_at = time.time()  # when the request was accepted
         self.events: Dict[str, ProgressEvent] = {}
         self.callbacks = []
+        # Bounded replay buffer so reconnecting clients only get what they missed
+        self.history: Deque[ProgressEvent] = deque(
+            maxlen=buffer_size or Config.SSE_EVENT_BUFFER_SIZE
+        )
+        self.last_event_id = 0
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self._condition = threading.Condition()
+
+    @property
+    def is_finished(self) -> bool:
+        """True once a complete or error event has been emitted"""
+        return self.finished_at is not None
+
+    def subscribe(self) -> int:
+        """Register an open SSE stream, returning the new subscriber count"""
+        with self._condition:
+            self.subscribers += 1
+            return self.subscribers
+
+    def unsubscribe(self) -> int:
+        """Unregister an SSE stream, returning the remaining subscriber count"""
+        with self._condition:
+            self.subscribers = max(0, self.subscribers - 1)
+            return self.subscribers
 
     def add_callback(self, callback):
         """Add a callback function to receive progress events"""
@@ -44,8 +83,16 @@ class ProgressTracker:
 
     def emit_event(self, status: ProgressStatus, message: str, **kwargs):
         """Emit a progress event"""
-        event = ProgressEvent(status=status, message=message, **kwargs)
-        self.events[status.value] = event
+        with self._condition:
+            self.last_event_id += 1
+            event = ProgressEvent(
+                status=status, message=message, event_id=self.last_event_id, **kwargs
+            )
+            self.events[status.value] = event
+            self.history.append(event)
+            if status in self.TERMINAL_STATUSES:
+                self.finished_at = event.timestamp
+            self._condition.notify_all()
 
         # Call all registered callbacks
         for callback in self.callbacks:
@@ -55,13 +102,38 @@ class ProgressTracker:
                 # Log error but don't stop processing
                 print(f"Progress callback error: {e}")
 
+    def events_since(self, last_event_id: int = 0) -> List[ProgressEvent]:
+        """Return buffered events with an id greater than last_event_id"""
+        with self._condition:
+            return [e for e in self.history if e.event_id > last_event_id]
+
+    def wait_for_events(
+        self, last_event_id: int = 0, timeout: float = None
+    ) -> List[ProgressEvent]:
+        """Block until events newer than last_event_id exist or timeout expires"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.last_event_id > last_event_id, timeout=timeout
+            )
+            return [e for e in self.history if e.event_id > last_event_id]
+
     def get_sse_data(self, event: ProgressEvent) -> str:
         """Format event data for Server-Sent Events"""
         event_data = asdict(event)
         event_data["status"] = event.status.value
         event_data["session_id"] = self.session_id
 
-        return f"data: {json.dumps(event_data)}\n\n"
+        sse_id = f"id: {event.event_id}\n" if event.event_id is not None else ""
+        return f"{sse_id}data: {json.dumps(event_data)}\n\n"
+
+    def queued(self, position: int):
+        """Report the job's position in the processing queue"""
+        self.emit_event(
+            ProgressStatus.QUEUED,
+            f"Waiting in queue (position {position})...",
+            progress_percent=0.0,
+            current_index=position,
+        )
 
     def start_processing(self):
         """Mark the start of processing"""
@@ -140,19 +212,46 @@ class ProgressTracker:
             ProgressStatus.ERROR, f"Error: {error_message}", progress_percent=0.0
         )
 
+    def cancelled(self, reason: str):
+        """Mark processing as cancelled"""
+        self.emit_event(
+            ProgressStatus.CANCELLED, f"Cancelled: {reason}", progress_percent=0.0
+        )
+
 
 # Global progress tracker storage
 _progress_trackers: Dict[str, ProgressTracker] = {}
+_progress_trackers_lock = threading.Lock()
+
+
+def _sweep_finished_trackers(now: float):
+    """Drop trackers that finished longer ago than the retention window"""
+    retention = Config.PROGRESS_TRACKER_RETENTION_SECONDS
+    expired = [
+        session_id
+        for session_id, tracker in _progress_trackers.items()
+        if tracker.is_finished and now - tracker.finished_at > retention
+    ]
+    for session_id in expired:
+        del _progress_trackers[session_id]
 
 
 def get_progress_tracker(session_id: str) -> ProgressTracker:
     """Get or create a progress tracker for a session"""
-    if session_id not in _progress_trackers:
-        _progress_trackers[session_id] = ProgressTracker(session_id)
-    return _progress_trackers[session_id]
+    with _progress_trackers_lock:
+        if session_id not in _progress_trackers:
+            _sweep_finished_trackers(time.time())
+            _progress_trackers[session_id] = ProgressTracker(session_id)
+        return _progress_trackers[session_id]
+
+
+def find_progress_tracker(session_id: str) -> Optional[ProgressTracker]:
+    """Get an existing progress tracker without creating one"""
+    with _progress_trackers_lock:
+        return _progress_trackers.get(session_id)
 
 
 def cleanup_progress_tracker(session_id: str):
     """Clean up a progress tracker"""
-    if session_id in _progress_trackers:
-        del _progress_trackers[session_id]
+    with _progress_trackers_lock:
+        _progress_trackers.pop(session_id, None)
@@ -0,0 +1,163 @@
+import gzip
+import json
+from typing import Any, Dict, Optional, Set
+
+from flask import Response
+
+from app.models.data_models import ArticleResponse, LocationData
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Response views: the fields each one leaves out. compact is what the map
+# needs; the article text (up to 50 KB) is only sent when asked for
+VIEWS: Dict[str, Set[str]] = {
+    "compact": {"article_text"},
+    "full": set(),
+}
+DEFAULT_VIEW = "compact"
+
+RESPONSE_FIELDS = set(ArticleResponse.model_fields) | {"session_id"}
+LOCATION_FIELDS = set(LocationData.model_fields)
+
+# {field: None for the whole value, or the location fields to keep}
+Projection = Dict[str, Optional[Set[str]]]
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # close to gzip -6 in speed, noticeably smaller
+
+
+def parse_projection(view: Optional[str], fields: Optional[str]) -> Projection:
+    """
+    The fields a ?view= or ?fields= parameter asks for. fields is a comma
+    separated list of response fields, where locations.<field> keeps only
+    that field of each location; it takes precedence over view.
+    Raises ValueError naming anything unknown.
+    """
+    if fields:
+        projection: Projection = {}
+        for name in (part.strip() for part in fields.split(",")):
+            if not name:
+                continue
+            field, _, subfield = name.partition(".")
+            if field not in RESPONSE_FIELDS:
+                raise ValueError(f"Unknown field '{field}'")
+            if not subfield:
+                projection[field] = None
+                continue
+            if field != "locations" or subfield not in LOCATION_FIELDS:
+                raise ValueError(f"Unknown field '{name}'")
+            if field not in projection or projection[field] is not None:
+                projection.setdefault(field, set()).add(subfield)
+        if not projection:
+            raise ValueError("No fields given")
+        return projection
+
+    view = view or DEFAULT_VIEW
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view '{view}' (expected {', '.join(VIEWS)})")
+    return {field: None for field in RESPONSE_FIELDS - VIEWS[view]}
+
+
+def project(data: Dict[str, Any], projection: Projection) -> Dict[str, Any]:
+    """The projected fields of a serialized response, in their original order"""
+    result = {}
+    for field, value in data.items():
+        if field not in projection:
+            continue
+        subfields = projection[field]
+        if subfields is not None and isinstance(value, list):
+            value = [
+                {key: item[key] for key in item if key in subfields} for item in value
+            ]
+        result[field] = value
+    return result
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    Serialize a response body with orjson when it is installed, unless
+    RESPONSE_JSON_ENCODER is json; otherwise with the stdlib encoder
+    """
+    if orjson is not None and Config.RESPONSE_JSON_ENCODER != "json":
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def json_response(
+    data: Any, status: int = 200, mimetype: str = "application/json"
+) -> Response:
+    """Like jsonify, through the faster encoder when there is one"""
+    return Response(encode_json(data), status=status, mimetype=mimetype)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br or gzip, whichever the client accepts and we can produce, br first"""
+    accepted = _accepted_encodings(accept_encoding or "")
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = None
+    for coding in candidates:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (coding, quality)
+    return best[0] if best else None
+
+
+def compress_response(response: Response, accept_encoding: str) -> Response:
+    """
+    Compress a buffered response body with the client's preferred coding.
+    Streams (SSE), files and bodies under RESPONSE_COMPRESSION_MIN_BYTES
+    are left alone.
+    """
+    if (
+        not Config.RESPONSE_COMPRESSION_ENABLED
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base class for small SQLite-backed stores.
+
+    Each thread gets its own connection, reopened after a fork, and the schema
+    is created on first use so nothing touches disk until a store is needed.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def exists(self) -> bool:
+        """True if the database file has been created"""
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self._schema_lock:
+            if not self._schema_ready:
+                connection.executescript(self.SCHEMA)
+                self._schema_ready = True
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
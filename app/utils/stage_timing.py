@@ -0,0 +1,179 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils import metrics, profiling
+from app.utils.cancellation import JobCancelledError
+from app.utils.deadline import DeadlineExceededError
+
+# The timings of the pipeline run this code is part of, if any
+_current_timings: contextvars.ContextVar[Optional["StageTimings"]] = (
+    contextvars.ContextVar("stage_timings", default=None)
+)
+
+
+class StageTimings:
+    """
+    Wall time of every stage of one pipeline run, in the order they finished,
+    and the LLM tokens each stage used
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._events: List[Dict[str, Any]] = []
+        self._tokens: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        detail: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        event = {"stage": stage, "seconds": round(seconds, 6)}
+        if detail is not None:
+            event["detail"] = detail
+        if error is not None:
+            event["error"] = error
+        with self._lock:
+            self._events.append(event)
+
+    def record_tokens(
+        self,
+        stage: str,
+        model: str,
+        prompt_tokens: int,
+        output_tokens: int,
+        cost_usd: float = 0.0,
+    ):
+        with self._lock:
+            usage = self._tokens.setdefault(
+                (stage, model),
+                {
+                    "stage": stage,
+                    "model": model,
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "output_tokens": 0,
+                    "cost_usd": 0.0,
+                },
+            )
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["output_tokens"] += output_tokens
+            usage["cost_usd"] += cost_usd
+
+    def token_usage(self) -> Dict[str, Any]:
+        """Tokens and cost of the run, in total and by stage and model"""
+        with self._lock:
+            by_stage = [dict(usage) for usage in self._tokens.values()]
+        for usage in by_stage:
+            usage["cost_usd"] = round(usage["cost_usd"], 8)
+        return {
+            "prompt_tokens": sum(usage["prompt_tokens"] for usage in by_stage),
+            "output_tokens": sum(usage["output_tokens"] for usage in by_stage),
+            "cost_usd": round(sum(usage["cost_usd"] for usage in by_stage), 8),
+            "by_stage": by_stage,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self._events)
+        totals: Dict[str, Dict[str, float]] = {}
+        for event in events:
+            total = totals.setdefault(event["stage"], {"count": 0, "seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] = round(total["seconds"] + event["seconds"], 6)
+        return {
+            "total_seconds": round(time.perf_counter() - self.started_at, 6),
+            "stages": totals,
+            "events": events,
+            "tokens": self.token_usage(),
+        }
+
+
+@contextmanager
+def collect_timings():
+    """Collect the stage timings of everything run inside the block"""
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def _error_kind(error: BaseException) -> str:
+    if (
+        isinstance(error, DeadlineExceededError)
+        or "timeout" in type(error).__name__.lower()
+        or "timed out" in str(error).lower()
+    ):
+        return "timeout"
+    message = str(error).lower()
+    if "429" in message or "rate limit" in message or "quota" in message:
+        return "rate_limit"
+    return "error"
+
+
+@contextmanager
+def timed(stage: str, detail: Optional[str] = None, upstream: Optional[str] = None):
+    """
+    Time a block as one stage: into the current run's timings and the
+    process-wide histograms. An exception escaping the block counts as an
+    upstream error (cancellation does not); it is re-raised unchanged.
+    """
+    error = None
+    started = time.perf_counter()
+    try:
+        yield
+    except JobCancelledError:
+        raise
+    except BaseException as e:
+        error = _error_kind(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.STAGE_SECONDS.observe(elapsed, stage=stage)
+        if upstream is not None:
+            metrics.UPSTREAM_SECONDS.observe(elapsed, upstream=upstream)
+            if error is not None:
+                metrics.UPSTREAM_ERRORS.inc(upstream=upstream, kind=error)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.record(stage, elapsed, detail, error)
+
+
+def record_upstream_error(upstream: str, error: BaseException):
+    """Count an upstream failure a service handled without raising"""
+    metrics.UPSTREAM_ERRORS.inc(upstream=upstream, kind=_error_kind(error))
+
+
+def record_tokens(
+    stage: str,
+    model: str,
+    prompt_tokens: int,
+    output_tokens: int,
+    cost_usd: float = 0.0,
+):
+    """Count the tokens an LLM call used, into the current run if any"""
+    metrics.LLM_TOKENS.inc(prompt_tokens, model=model, stage=stage, kind="prompt")
+    metrics.LLM_TOKENS.inc(output_tokens, model=model, stage=stage, kind="output")
+    metrics.LLM_CALLS.inc(model=model, stage=stage)
+    if cost_usd:
+        metrics.LLM_COST.inc(cost_usd, model=model, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.record_tokens(stage, model, prompt_tokens, output_tokens, cost_usd)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    executor.submit, with fn running in a copy of the caller's context (and
+    profiled along with the request, if the caller's run is being profiled)
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, profiling.run_profiled, fn, *args, **kwargs)
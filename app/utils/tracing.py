@@ -0,0 +1,329 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "waldo"
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_TIMEOUT = 5  # seconds per collector request
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# The span work on this thread (or copied context) belongs to; None when the
+# request isn't sampled, which keeps every traced call a single lookup
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _random_id(n_bytes: int) -> str:
+    return random.getrandbits(n_bytes * 8).to_bytes(n_bytes, "big").hex()
+
+
+class Trace:
+    """The spans of one request; exported once every span has ended"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _opened(self):
+        with self._lock:
+            self._open += 1
+
+    def _closed(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+            self._open -= 1
+            finished = self._open == 0
+        if finished:
+            get_exporter().export(self)
+
+
+class Span:
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = _random_id(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status_code = STATUS_OK
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        trace._opened()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace._closed(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def to_otlp_json(traces: List[Trace]) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for finished traces"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        _otlp_attribute("service.name", SERVICE_NAME),
+                        _otlp_attribute("process.pid", os.getpid()),
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            span.to_otlp() for trace in traces for span in trace.spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def tracing_enabled() -> bool:
+    return Config.TRACE_SAMPLE_RATE > 0 and bool(
+        Config.TRACE_EXPORT_PATH or Config.TRACE_EXPORT_URL
+    )
+
+
+def start_trace(
+    name: str, request_id: Optional[str] = None, **attributes
+) -> Optional[Span]:
+    """
+    Start a sampled request's root span, or return None if the request isn't
+    sampled. A uuid request id doubles as the trace id, so a trace can be
+    found from the request id in logs and responses.
+    """
+    if not tracing_enabled() or random.random() >= Config.TRACE_SAMPLE_RATE:
+        return None
+    trace_id = (request_id or "").replace("-", "")
+    if len(trace_id) != 32:
+        trace_id = _random_id(16)
+    if request_id:
+        attributes["request.id"] = request_id
+    return Span(Trace(trace_id), name, attributes=attributes, kind=SPAN_KIND_SERVER)
+
+
+def start_span(name: str, **attributes) -> Optional[Span]:
+    """Start a child of the current span without making it current"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any):
+    """Set an attribute on the current span, if this request is traced"""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+@contextmanager
+def use_span(span: Optional[Span], end_on_exit: bool = True):
+    """Make span current for the block, recording an escaping exception on it"""
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        if end_on_exit:
+            span.end()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Run the block in a child span of the current one (no-op when untraced)"""
+    with use_span(start_span(name, **attributes)) as child:
+        yield child
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running a function in a child span of the current one"""
+
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def bind(span: Optional[Span], fn: Callable) -> Callable:
+    """
+    Wrap fn to run with span current and end it afterwards, for work handed
+    to another thread after the span was started on this one
+    """
+    if span is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with use_span(span):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class TraceExporter:
+    """
+    Writes finished traces as OTLP/JSON on a background thread: one JSON
+    document per line to a file, and/or POSTed to an OTLP/HTTP collector
+    (e.g. http://localhost:4318/v1/traces). Traces are dropped, not queued
+    without bound, if the exporter falls behind.
+    """
+
+    def __init__(self, path: Optional[str] = None, url: Optional[str] = None):
+        self.path = path
+        self.url = url
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(
+            target=self._run, name="trace-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued trace has been written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def _run(self):
+        while True:
+            traces = [self._queue.get()]
+            # Batch whatever else is already waiting into one write
+            while len(traces) < 100:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(traces)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(traces)} trace(s): {e}")
+            finally:
+                for _ in traces:
+                    self._queue.task_done()
+
+    def _write(self, traces: List[Trace]):
+        payload = to_otlp_json(traces)
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(payload) + "\n")
+        if self.url:
+            requests.post(self.url, json=payload, timeout=EXPORT_TIMEOUT)
+
+
+# Global exporter, started on first export in each process
+_exporter: Optional[TraceExporter] = None
+_exporter_pid: Optional[int] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> TraceExporter:
+    """Get the process-wide exporter for the configured file and collector"""
+    global _exporter, _exporter_pid
+    with _exporter_lock:
+        if (
+            _exporter is None
+            or _exporter_pid != os.getpid()
+            or _exporter.path != Config.TRACE_EXPORT_PATH
+            or _exporter.url != Config.TRACE_EXPORT_URL
+        ):
+            _exporter = TraceExporter(Config.TRACE_EXPORT_PATH, Config.TRACE_EXPORT_URL)
+            _exporter_pid = os.getpid()
+        return _exporter
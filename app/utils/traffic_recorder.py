@@ -0,0 +1,81 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def input_hash(text: str) -> Optional[str]:
+    """
+    Id for a request's input (URL or article text) that stays the same across
+    requests, so replays can tell repeats apart. It is keyed with
+    TRAFFIC_HASH_KEY: a plain hash of a URL can be confirmed by hashing a
+    guess, so without the key there is no id at all (None).
+    """
+    if not Config.TRAFFIC_HASH_KEY:
+        return None
+    return hmac.new(
+        Config.TRAFFIC_HASH_KEY.encode("utf-8"), text.encode("utf-8"), hashlib.sha256
+    ).hexdigest()[:16]
+
+
+def sanitize_stages(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stage timings without their details (location names, URLs)"""
+    return [
+        {key: event[key] for key in ("stage", "seconds", "error") if key in event}
+        for event in events
+    ]
+
+
+class TrafficRecorder:
+    """
+    Appends one JSON line per pipeline run to a file: when the request
+    arrived, its shape (input hash, article length, location count) and how
+    it went (outcome, queue wait, per-stage and upstream latencies). No
+    article text, URLs or location names are written, so the trace can be
+    shared for capacity planning and replayed with benchmarks/replay.py.
+    Each line is a single append, so worker processes can share the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+        except OSError as e:
+            logger.warning(f"Failed to record traffic to {self.path}: {e}")
+
+
+# Global recorder, re-created if TRAFFIC_RECORD_PATH changes
+_traffic_recorder: Optional[TrafficRecorder] = None
+_traffic_recorder_lock = threading.Lock()
+
+
+def get_traffic_recorder() -> Optional[TrafficRecorder]:
+    """Get the traffic recorder, or None if TRAFFIC_RECORD_PATH is empty"""
+    global _traffic_recorder
+    path = Config.TRAFFIC_RECORD_PATH
+    if not path:
+        return None
+    with _traffic_recorder_lock:
+        if _traffic_recorder is None or _traffic_recorder.path != path:
+            if not Config.TRAFFIC_HASH_KEY:
+                logger.warning(
+                    "TRAFFIC_HASH_KEY is not set, so traffic is recorded without "
+                    "input hashes and replays can't tell repeated inputs apart"
+                )
+            _traffic_recorder = TrafficRecorder(path)
+        return _traffic_recorder
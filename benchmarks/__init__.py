@@ -0,0 +1 @@
+# Offline benchmarks, run as python -m benchmarks.<name>
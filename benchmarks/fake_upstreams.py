@@ -0,0 +1,352 @@
+"""
+Local stand-ins for the Gemini REST API and Nominatim search, answering from
+a fixture corpus so the whole pipeline can be benchmarked without quota.
+
+Gemini extraction answers list every gazetteer place named in the article;
+summaries are canned sentences. Nominatim answers from the same gazetteer.
+Both servers add latency drawn from a configurable distribution and can
+fail a share of calls with 429s or 500s.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_ARTICLES = os.path.join(FIXTURES, "articles.jsonl")
+DEFAULT_GAZETTEER = os.path.join(FIXTURES, "gazetteer.json")
+
+EXTRACTION_MARKER = "Article text:\n"
+SUMMARY_LOCATION = re.compile(r"\nLocation: (.+)\n\s*Summary:", re.S)
+CORRECTION_MARKER = "previous response was malformed"
+
+
+class LatencyModel:
+    """
+    Per-call delay in seconds, from a spec like "fixed:0.2", "uniform:0.1,0.5",
+    "normal:0.8,0.2" (mean, sd), "lognormal:0.8,0.5" (median, sigma) or
+    "empirical:0.4,0.9,1.3,..." (drawn from observed delays)
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "empirical")
+
+    def __init__(self, spec: str, seed: Optional[int] = None):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {spec!r}")
+        try:
+            self.params = [float(value) for value in params.split(",") if value]
+        except ValueError:
+            raise ValueError(f"Invalid latency parameters: {spec!r}")
+        if kind == "empirical":
+            if not self.params:
+                raise ValueError(f"empirical latency needs observed delays: {spec!r}")
+        else:
+            expected = 1 if kind == "fixed" else 2
+            if len(self.params) != expected:
+                raise ValueError(
+                    f"{kind} latency takes {expected} parameter(s): {spec!r}"
+                )
+        self.spec = spec
+        self.kind = kind
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                value = self.params[0]
+            elif self.kind == "uniform":
+                value = self._random.uniform(*self.params)
+            elif self.kind == "normal":
+                value = self._random.gauss(*self.params)
+            elif self.kind == "empirical":
+                value = self._random.choice(self.params)
+            else:
+                median, sigma = self.params
+                value = self._random.lognormvariate(math.log(median), sigma)
+        return max(0.0, value)
+
+
+@dataclass
+class UpstreamProfile:
+    """How a stand-in behaves: latency, and the share of calls that fail"""
+
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+
+
+@dataclass
+class Place:
+    name: str
+    lat: float
+    lon: float
+    bbox: List[float]
+    type: str
+    admin_level: int
+    address: Dict[str, str]
+
+
+def load_articles(path: str = DEFAULT_ARTICLES) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def load_gazetteer(path: str = DEFAULT_GAZETTEER) -> Dict[str, Place]:
+    with open(path, encoding="utf-8") as handle:
+        return {entry["name"].lower(): Place(**entry) for entry in json.load(handle)}
+
+
+class _FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, profile: UpstreamProfile, seed: Optional[int]):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.profile = profile
+        self.latency = LatencyModel(profile.latency, seed)
+        self.calls: Counter = Counter()
+        self._faults = random.Random(None if seed is None else seed + 1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, key: str):
+        with self._lock:
+            self.calls[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.calls)
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+
+    def draw_fault(self) -> Optional[int]:
+        """HTTP status to fail this call with, if any"""
+        with self._lock:
+            roll = self._faults.random()
+        if roll < self.profile.rate_limit_rate:
+            return 429
+        if roll < self.profile.rate_limit_rate + self.profile.error_rate:
+            return 500
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay_and_maybe_fail(self, kind: str) -> bool:
+        """Sleep for the call's latency; True if a fault response was sent"""
+        self.server.count(kind)
+        time.sleep(self.server.latency.sample())
+        status = self.server.draw_fault()
+        if status is None:
+            return False
+        self.server.count(f"injected_{status}")
+        self._send_fault(status)
+        return True
+
+    def _send_fault(self, status: int):
+        raise NotImplementedError
+
+
+class _GeminiHandler(_Handler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.rstrip("/").endswith("/models"):
+            self.server.count("list_models")
+            self._send_json(200, {"models": self.server.models()})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not urlparse(self.path).path.endswith(":generateContent"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        prompt = "".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        kind, text = self.server.answer(prompt)
+        if self._delay_and_maybe_fail(kind):
+            return
+        self._send_json(
+            200,
+            {
+                "candidates": [
+                    {
+                        "content": {"parts": [{"text": text}], "role": "model"},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }
+                ],
+                "usageMetadata": {
+                    "promptTokenCount": len(prompt) // 4,
+                    "candidatesTokenCount": len(text) // 4,
+                    "totalTokenCount": (len(prompt) + len(text)) // 4,
+                },
+            },
+        )
+
+    def _send_fault(self, status: int):
+        if status == 429:
+            error = {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+            }
+        else:
+            error = {
+                "code": 500,
+                "message": "An internal error has occurred.",
+                "status": "INTERNAL",
+            }
+        self._send_json(status, {"error": error})
+
+
+class FakeGemini(_FakeServer):
+    """generateContent and models.list over REST, as google-generativeai calls them"""
+
+    MODELS = ("gemini-2.0-flash", "gemini-2.5-flash")
+
+    def __init__(
+        self,
+        gazetteer: Dict[str, Place],
+        profile: UpstreamProfile = UpstreamProfile(),
+        seed: Optional[int] = None,
+    ):
+        super().__init__(_GeminiHandler, profile, seed)
+        self.gazetteer = gazetteer
+        self._patterns = [
+            (place, re.compile(rf"\b{re.escape(place.name)}\b"))
+            for place in gazetteer.values()
+        ]
+
+    def models(self) -> List[Dict]:
+        return [
+            {
+                "name": f"models/{name}",
+                "displayName": name,
+                "inputTokenLimit": 1048576,
+                "outputTokenLimit": 8192,
+                "supportedGenerationMethods": ["generateContent"],
+            }
+            for name in self.MODELS
+        ]
+
+    def answer(self, prompt: str) -> Tuple[str, str]:
+        """(call kind, response text) for a prompt"""
+        summary = SUMMARY_LOCATION.search(prompt)
+        if summary:
+            name = summary.group(1).strip()
+            return "summary", f"Events were reported in {name}."
+        if CORRECTION_MARKER in prompt:
+            return "correction", "[]"
+
+        article = prompt.rsplit(EXTRACTION_MARKER, 1)[-1]
+        locations = [
+            {
+                "original_text": place.name,
+                "standardized_name": place.name,
+                "context": f"{place.name} is mentioned in the article",
+                "confidence": "high",
+                "location_type": "country" if place.admin_level == 2 else "city",
+                "disambiguation_hints": list(place.address.values()),
+            }
+            for place, pattern in self._patterns
+            if pattern.search(article)
+        ]
+        return "extraction", json.dumps(locations)
+
+
+class _NominatimHandler(_Handler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/search":
+            self._send_json(404, [])
+            return
+        query = parse_qs(url.query).get("q", [""])[0]
+        if self._delay_and_maybe_fail("search"):
+            return
+        place = self.server.gazetteer.get(query.strip().lower())
+        if place is None:
+            self.server.count("not_found")
+            self._send_json(200, [])
+            return
+        self._send_json(
+            200,
+            [
+                {
+                    "place_id": abs(hash(place.name)) % 10**8,
+                    "lat": str(place.lat),
+                    "lon": str(place.lon),
+                    "display_name": ", ".join(
+                        dict.fromkeys([place.name, *place.address.values()])
+                    ),
+                    "boundingbox": [str(value) for value in place.bbox],
+                    "class": "boundary" if place.admin_level <= 4 else "place",
+                    "type": place.type,
+                    "address": place.address,
+                    "extratags": {"admin_level": str(place.admin_level)},
+                }
+            ],
+        )
+
+    def _send_fault(self, status: int):
+        self._send_json(status, {"error": "Service unavailable"})
+
+
+class FakeNominatim(_FakeServer):
+    """Nominatim /search answering from the gazetteer"""
+
+    def __init__(
+        self,
+        gazetteer: Dict[str, Place],
+        profile: UpstreamProfile = UpstreamProfile(),
+        seed: Optional[int] = None,
+    ):
+        super().__init__(_NominatimHandler, profile, seed)
+        self.gazetteer = gazetteer
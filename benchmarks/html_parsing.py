@@ -0,0 +1,156 @@
+"""
+Compare article HTML parsing backends over a corpus of saved pages.
+
+For every page it times each backend and checks that the extracted title and
+text match the html.parser baseline. Real-world pages can be saved into any
+directory and passed with --corpus.
+
+Usage:
+    python -m benchmarks.html_parsing
+    python -m benchmarks.html_parsing --corpus saved_pages/ --repeat 20 --inflate 50
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from app.services.html_parsing import PARSERS, get_html_parser
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests",
+    "fixtures",
+    "html",
+)
+BASELINE = "html.parser"
+
+
+def load_corpus(directory: str, inflate: int) -> Dict[str, bytes]:
+    """
+    Read every .html file in a directory. With inflate > 1, each page's
+    paragraphs are repeated to approximate a large news page.
+    """
+    pages = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith((".html", ".htm")):
+            continue
+        with open(os.path.join(directory, filename), "rb") as handle:
+            content = handle.read()
+        if inflate > 1:
+            content = re.sub(
+                rb"(<p[ >].*?</p>)", lambda m: m.group(1) * inflate, content, flags=re.S
+            )
+        pages[filename] = content
+    return pages
+
+
+def time_parser(parser, content: bytes, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse(content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(corpus: str, repeat: int, inflate: int) -> Dict:
+    pages = load_corpus(corpus, inflate)
+    if not pages:
+        raise SystemExit(f"No .html files found in {corpus}")
+
+    parsers = {}
+    for name in PARSERS:
+        try:
+            parsers[name] = get_html_parser(name)
+        except ImportError:
+            print(f"Skipping {name}: not installed", file=sys.stderr)
+
+    results = {"corpus": corpus, "repeat": repeat, "inflate": inflate, "pages": []}
+    totals = {name: 0.0 for name in parsers}
+
+    for filename, content in pages.items():
+        baseline = parsers[BASELINE].parse(content)
+        page = {"page": filename, "bytes": len(content), "parsers": {}}
+        for name, parser in parsers.items():
+            timings = time_parser(parser, content, repeat)
+            median = statistics.median(timings)
+            totals[name] += median
+            page["parsers"][name] = {
+                "median_ms": round(median, 3),
+                "matches_baseline": parser.parse(content) == baseline,
+            }
+        results["pages"].append(page)
+
+    results["total_median_ms"] = {name: round(t, 3) for name, t in totals.items()}
+    return results
+
+
+def print_report(results: Dict):
+    names = list(results["total_median_ms"])
+    header = f"{'page':<40} {'KB':>7} " + " ".join(f"{name:>14}" for name in names)
+    print(header)
+    print("-" * len(header))
+    for page in results["pages"]:
+        cells = []
+        for name in names:
+            stats = page["parsers"][name]
+            mark = "" if stats["matches_baseline"] else " !"
+            cells.append(f"{stats['median_ms']:>12.2f}ms{mark}")
+        print(f"{page['page']:<40} {page['bytes'] / 1024:>7.1f} " + " ".join(cells))
+    print("-" * len(header))
+    totals = results["total_median_ms"]
+    print(
+        f"{'total (median per page)':<48} "
+        + " ".join(f"{totals[name]:>12.2f}ms" for name in names)
+    )
+    for name in names:
+        if name != BASELINE and totals[name]:
+            print(
+                f"{name}: {totals[BASELINE] / totals[name]:.1f}x faster than {BASELINE}"
+            )
+
+    mismatches = [
+        (page["page"], name)
+        for page in results["pages"]
+        for name, stats in page["parsers"].items()
+        if not stats["matches_baseline"]
+    ]
+    if mismatches:
+        print("\nOutput differs from html.parser (marked !):")
+        for page, name in mismatches:
+            print(f"  {page}: {name}")
+    else:
+        print("\nAll backends match html.parser output on every page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--corpus", default=DEFAULT_CORPUS, help="directory of .html files"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="parses per page and backend"
+    )
+    parser.add_argument(
+        "--inflate",
+        type=int,
+        default=20,
+        help="repeat each <p> N times to simulate big pages",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.repeat, args.inflate)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
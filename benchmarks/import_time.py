@@ -0,0 +1,203 @@
+"""
+Measure how long it takes to import the app, as a worker does on boot.
+
+Each run imports the target in a fresh interpreter under `python -X importtime`
+and reports the wall time, the slowest modules by cumulative import time, and
+any module that should only be loaded on first use (or preloaded by the
+gunicorn master) but was imported eagerly.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --target app.api.routes --repeat 10 --top 25
+    python -m benchmarks.import_time --output before.json
+    python -m benchmarks.import_time --compare before.json --fail-on-regression 20
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGET = "run"
+
+# Loaded lazily by the app (see app/utils/lazy_import.py); importing any of
+# them at startup is a regression
+LAZY_MODULES = ("google.generativeai", "grpc", "geopy")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """The modules in `-X importtime` output, in import order"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append(
+                {
+                    "module": name,
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                    "depth": (len(indent) - 1) // 2,
+                }
+            )
+    return modules
+
+
+def import_once(target: str) -> Dict:
+    """Import target in a fresh interpreter; wall time and importtime output"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {target}; "
+        "print(time.perf_counter() - started)"
+    )
+    env = {
+        **os.environ,
+        # Don't touch the job store or start job threads while measuring
+        "JOB_RESUME_ON_STARTUP": "False",
+        "PYTHONWARNINGS": "ignore",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Importing {target} failed:\n{completed.stderr}")
+    return {
+        "wall_ms": float(completed.stdout.strip().splitlines()[-1]) * 1000,
+        "modules": parse_importtime(completed.stderr),
+    }
+
+
+def eager_lazy_modules(modules: List[Dict]) -> List[str]:
+    """Modules from LAZY_MODULES (or their submodules) that were imported"""
+    names = {module["module"] for module in modules}
+    return sorted(
+        lazy
+        for lazy in LAZY_MODULES
+        if any(name == lazy or name.startswith(lazy + ".") for name in names)
+    )
+
+
+def run(target: str, repeat: int, top: int) -> Dict:
+    runs = [import_once(target) for _ in range(repeat)]
+    wall_ms = [r["wall_ms"] for r in runs]
+
+    # Median cumulative time of each module across runs
+    by_module: Dict[str, List[float]] = {}
+    for r in runs:
+        for module in r["modules"]:
+            by_module.setdefault(module["module"], []).append(module["cumulative_ms"])
+    slowest = sorted(
+        (
+            {"module": name, "cumulative_ms": round(statistics.median(times), 2)}
+            for name, times in by_module.items()
+            if name != target
+        ),
+        key=lambda m: m["cumulative_ms"],
+        reverse=True,
+    )[:top]
+
+    return {
+        "target": target,
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "wall_ms": {
+            "median": round(statistics.median(wall_ms), 2),
+            "min": round(min(wall_ms), 2),
+            "max": round(max(wall_ms), 2),
+        },
+        "modules_imported": len(runs[-1]["modules"]),
+        "slowest": slowest,
+        "eager_lazy_modules": eager_lazy_modules(runs[-1]["modules"]),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold_percent: float) -> List[str]:
+    """
+    Print the change in median import time against a baseline run; return it
+    as a regression if it got slower by more than threshold_percent
+    """
+    before = baseline["wall_ms"]["median"]
+    after = results["wall_ms"]["median"]
+    change = (after - before) / before * 100
+    print(f"\nmedian import {before:.1f}ms -> {after:.1f}ms ({change:+.1f}%)")
+    if change > threshold_percent:
+        return [f"import {results['target']} {change:+.1f}%"]
+    return []
+
+
+def print_report(results: Dict):
+    wall = results["wall_ms"]
+    print(
+        f"import {results['target']}: median {wall['median']:.1f}ms "
+        f"(min {wall['min']:.1f}, max {wall['max']:.1f}) over {results['repeat']} "
+        f"runs, {results['modules_imported']} modules, Python {results['python']}"
+    )
+    print(f"\n{'module':<60} {'cumulative':>12}")
+    print("-" * 73)
+    for module in results["slowest"]:
+        print(f"{module['module']:<60} {module['cumulative_ms']:>10.1f}ms")
+    if results["eager_lazy_modules"]:
+        print(
+            "\nImported at startup but meant to load lazily: "
+            + ", ".join(results["eager_lazy_modules"])
+        )
+    else:
+        print("\nNo lazily loaded module was imported at startup")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--target", default=DEFAULT_TARGET, help="module to import (default: run)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="fresh imports to time")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", help="also write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument(
+        "--fail-on-regression",
+        type=float,
+        metavar="PERCENT",
+        help="exit 1 if a lazily loaded module is imported at startup or, with "
+        "--compare, if the median import slows by more than this",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.target, args.repeat, args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    regressions = list(results["eager_lazy_modules"])
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions += compare(
+            results, baseline, args.fail_on_regression or float("inf")
+        )
+    if regressions and args.fail_on_regression is not None:
+        print(f"\nRegressed: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
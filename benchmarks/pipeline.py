@@ -0,0 +1,433 @@
+"""
+Benchmark /api/extract end to end against local Gemini and Nominatim stand-ins.
+
+The app runs in a real threaded HTTP server with the result cache and
+near-duplicate index off, so every request goes through extraction,
+geocoding and summarization. Each mode (direct, SSE) is driven at each
+concurrency level, reporting throughput, latency percentiles, response
+statuses and upstream call counts. Save results with --output and compare
+a later run against them with --compare.
+
+Usage:
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --concurrency 1,8,32 --requests 200 \\
+        --gemini-latency lognormal:0.8,0.5 --gemini-429-rate 0.02
+    python -m benchmarks.pipeline --output before.json
+    python -m benchmarks.pipeline --compare before.json --fail-on-regression 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+import requests
+
+from benchmarks.fake_upstreams import (
+    DEFAULT_ARTICLES,
+    DEFAULT_GAZETTEER,
+    FakeGemini,
+    FakeNominatim,
+    UpstreamProfile,
+    load_articles,
+    load_gazetteer,
+)
+from config import Config
+
+MODES = ("direct", "sse")
+TERMINAL_STATUSES = ("complete", "error", "cancelled")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (q in 0..100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+@contextmanager
+def configured_app(
+    gemini: FakeGemini,
+    nominatim: FakeNominatim,
+    workdir: str,
+    config: Optional[Dict] = None,
+    wrap: Optional[Callable] = None,
+):
+    """
+    Serve the app on a local port with its upstreams pointed at the stand-ins;
+    Config and the route services are restored afterwards. config overrides
+    further Config attributes; wrap, if given, wraps the WSGI app.
+    """
+    overrides = {
+        "GEMINI_API_KEY": "benchmark",
+        "GEMINI_API_ENDPOINT": gemini.url,
+        "NOMINATIM_DOMAIN": nominatim.address,
+        "NOMINATIM_SCHEME": "http",
+        "RESULT_CACHE_PATH": "",
+        "NEAR_DUPLICATE_INDEX_PATH": "",
+        "LOCATION_INDEX_PATH": os.path.join(workdir, "locations.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "EXTRACTION_PROFILE_PATH": os.path.join(workdir, "profiles.sqlite3"),
+        "JOB_RESUME_ON_STARTUP": False,
+        **(config or {}),
+    }
+    saved = {name: getattr(Config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.api import routes
+    from app.services.geocoding import GeocodingService
+    from app.services.location_processor import LocationProcessor
+
+    # The route services were built at import, against the real Nominatim
+    saved_services = (routes.geocoding_service, routes.location_processor)
+    routes.geocoding_service = GeocodingService()
+    routes.location_processor = LocationProcessor(routes.geocoding_service)
+
+    app = create_app()
+    server = make_server("127.0.0.1", 0, wrap(app) if wrap else app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        routes.geocoding_service, routes.location_processor = saved_services
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+
+def _extract_direct(session: requests.Session, base_url: str, text: str) -> Dict:
+    response = session.post(f"{base_url}/api/extract", json={"input": text})
+    return {"status": response.status_code}
+
+
+def _extract_sse(session: requests.Session, base_url: str, text: str) -> Dict:
+    response = session.post(f"{base_url}/api/extract?sse=true", json={"input": text})
+    if response.status_code != 200:
+        return {"status": response.status_code}
+    session_id = response.json()["session_id"]
+
+    status = None
+    with session.get(f"{base_url}/api/progress/{session_id}", stream=True) as stream:
+        for line in stream.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            status = json.loads(line[len("data: ") :]).get("status")
+            if status in TERMINAL_STATUSES:
+                # The server holds the stream open a moment after the last event
+                break
+    if status != "complete":
+        return {"status": f"sse_{status or 'closed'}"}
+
+    results = session.get(f"{base_url}/api/results/{session_id}")
+    return {"status": results.status_code}
+
+
+def run_level(
+    base_url: str,
+    mode: str,
+    concurrency: int,
+    total_requests: int,
+    articles: List[Dict[str, str]],
+) -> Dict:
+    """Send total_requests through concurrency clients and summarize them"""
+    extract = _extract_direct if mode == "direct" else _extract_sse
+    local = threading.local()
+
+    def one(index: int) -> Dict:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        text = articles[index % len(articles)]["text"]
+        started = time.perf_counter()
+        try:
+            outcome = extract(local.session, base_url, text)
+        except requests.RequestException as e:
+            outcome = {"status": f"client_error:{type(e).__name__}"}
+        outcome["seconds"] = time.perf_counter() - started
+        return outcome
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[str(outcome["status"])] = statuses.get(str(outcome["status"]), 0) + 1
+    ok = [outcome["seconds"] for outcome in outcomes if outcome["status"] == 200]
+    latencies = [outcome["seconds"] for outcome in outcomes]
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / total_requests, 4),
+        "rate_limited": statuses.get("429", 0),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(ok, 50)),
+            "p95": ms(percentile(ok, 95)),
+            "p99": ms(percentile(ok, 99)),
+            "mean": ms(sum(ok) / len(ok)) if ok else None,
+            "max": ms(max(ok)) if ok else None,
+        },
+        "all_latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+        },
+    }
+
+
+def run(
+    modes: Sequence[str],
+    concurrency_levels: Sequence[int],
+    total_requests: int,
+    gemini_profile: UpstreamProfile,
+    nominatim_profile: UpstreamProfile,
+    articles_path: str = DEFAULT_ARTICLES,
+    gazetteer_path: str = DEFAULT_GAZETTEER,
+    seed: Optional[int] = 1,
+) -> Dict:
+    articles = load_articles(articles_path)
+    gazetteer = load_gazetteer(gazetteer_path)
+    gemini = FakeGemini(gazetteer, gemini_profile, seed).start()
+    nominatim = FakeNominatim(gazetteer, nominatim_profile, seed).start()
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "articles": len(articles),
+            "requests_per_level": total_requests,
+            "job_workers": Config.JOB_WORKERS,
+            "gemini": vars(gemini_profile),
+            "nominatim": vars(nominatim_profile),
+        },
+        "runs": [],
+    }
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            with configured_app(gemini, nominatim, workdir) as base_url:
+                for mode in modes:
+                    for concurrency in concurrency_levels:
+                        gemini.reset_stats()
+                        nominatim.reset_stats()
+                        level = run_level(
+                            base_url, mode, concurrency, total_requests, articles
+                        )
+                        level["upstream"] = {
+                            "gemini": gemini.stats(),
+                            "nominatim": nominatim.stats(),
+                        }
+                        results["runs"].append(level)
+                        print(_summary_line(level), file=sys.stderr)
+    finally:
+        gemini.stop()
+        nominatim.stop()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary_line(level: Dict) -> str:
+    latency = level["latency_ms"]
+    return (
+        f"{level['mode']:<7} c={level['concurrency']:<4} "
+        f"{level['throughput_rps'] or 0:>8.2f} req/s  "
+        f"p50 {latency['p50'] or 0:>9.1f}ms  p95 {latency['p95'] or 0:>9.1f}ms  "
+        f"p99 {latency['p99'] or 0:>9.1f}ms  errors {level['error_rate']:.1%}"
+    )
+
+
+def print_report(results: Dict):
+    meta = results["meta"]
+    print(
+        f"commit {meta['commit']}  {meta['requests_per_level']} requests per level  "
+        f"gemini {meta['gemini']['latency']}  nominatim {meta['nominatim']['latency']}"
+    )
+    header = (
+        f"{'mode':<7} {'conc':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'errors':>7} {'429s':>5} {'gemini':>7} {'nominatim':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for level in results["runs"]:
+        latency = level["latency_ms"]
+        gemini_calls = sum(
+            count
+            for kind, count in level["upstream"]["gemini"].items()
+            if kind in ("extraction", "summary", "correction")
+        )
+        print(
+            f"{level['mode']:<7} {level['concurrency']:>4} "
+            f"{level['throughput_rps'] or 0:>8.2f} {latency['p50'] or 0:>9.1f} "
+            f"{latency['p95'] or 0:>9.1f} {latency['p99'] or 0:>9.1f} "
+            f"{level['error_rate']:>7.1%} {level['rate_limited']:>5} "
+            f"{gemini_calls:>7} {level['upstream']['nominatim'].get('search', 0):>9}"
+        )
+
+
+def compare(results: Dict, baseline: Dict, threshold_percent: float) -> List[str]:
+    """
+    Print each level's change against a baseline run; return the levels whose
+    p95 latency or throughput got worse by more than threshold_percent
+    """
+    previous = {
+        (level["mode"], level["concurrency"]): level for level in baseline["runs"]
+    }
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for level in results["runs"]:
+        key = (level["mode"], level["concurrency"])
+        before = previous.get(key)
+        if before is None:
+            continue
+        p95_change = _change(before["latency_ms"]["p95"], level["latency_ms"]["p95"])
+        rps_change = _change(before["throughput_rps"], level["throughput_rps"])
+        print(
+            f"{key[0]:<7} c={key[1]:<4} p95 {_format_change(p95_change)}  "
+            f"throughput {_format_change(rps_change)}"
+        )
+        if (p95_change is not None and p95_change > threshold_percent) or (
+            rps_change is not None and rps_change < -threshold_percent
+        ):
+            regressions.append(f"{key[0]} c={key[1]}")
+    return regressions
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def _format_change(change: Optional[float]) -> str:
+    return "n/a" if change is None else f"{change:+.1f}%"
+
+
+def _profile(args, name: str) -> UpstreamProfile:
+    return UpstreamProfile(
+        latency=getattr(args, f"{name}_latency"),
+        error_rate=getattr(args, f"{name}_error_rate"),
+        rate_limit_rate=getattr(args, f"{name}_429_rate"),
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--modes", default="direct,sse", help="comma-separated: direct, sse"
+    )
+    parser.add_argument(
+        "--concurrency", default="1,4,16", help="comma-separated client counts"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=40, help="requests per mode and level"
+    )
+    for name, latency in (
+        ("gemini", "lognormal:0.6,0.4"),
+        ("nominatim", "uniform:0.05,0.25"),
+    ):
+        parser.add_argument(
+            f"--{name}-latency",
+            default=latency,
+            help="fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA",
+        )
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+        parser.add_argument(f"--{name}-429-rate", type=float, default=0.0)
+    parser.add_argument("--articles", default=DEFAULT_ARTICLES, help="JSONL corpus")
+    parser.add_argument(
+        "--gazetteer", default=DEFAULT_GAZETTEER, help="places the stand-ins know"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show app logs")
+    parser.add_argument("--output", help="also write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument(
+        "--fail-on-regression",
+        type=float,
+        metavar="PERCENT",
+        help="with --compare, exit 1 if p95 or throughput worsens by more than this",
+    )
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    # Request logs and the app's per-request errors would drown out the report
+    level = logging.WARNING if args.verbose else logging.CRITICAL
+    logging.basicConfig(level=level)
+    logging.getLogger("werkzeug").setLevel(level)
+
+    results = run(
+        modes,
+        levels,
+        args.requests,
+        _profile(args, "gemini"),
+        _profile(args, "nominatim"),
+        args.articles,
+        args.gazetteer,
+        args.seed,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(
+            results, baseline, args.fail_on_regression or float("inf")
+        )
+        if regressions and args.fail_on_regression is not None:
+            print(f"\nRegressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,645 @@
+"""
+Replay a recorded traffic trace (TRAFFIC_RECORD_PATH) against a local
+instance backed by the Gemini and Nominatim stand-ins, at 1x, 5x or 10x
+the recorded pace, to size gunicorn workers and the job pool from real
+traffic.
+
+Each recorded request is sent at its recorded arrival time (scaled by the
+speed) in its recorded mode, with a synthetic article of the recorded length
+naming as many gazetteer places as it had locations; repeated inputs get
+the same article, so the result cache sees the recorded reuse. The stand-ins
+answer with latencies and error rates drawn from the trace's own upstream
+timings. The app serves at most --capacity requests at once, as gunicorn
+would with workers x threads (a streaming SSE response holds its slot).
+
+While replaying, request slots, the SSE job queue and process memory are
+sampled, and the report says when requests started queueing, when all
+workers were first busy and when memory started growing, with the offered
+load at that point.
+
+Usage:
+    python -m benchmarks.replay traffic.jsonl
+    python -m benchmarks.replay traffic.jsonl --speed 1,5,10 --capacity 4
+    python -m benchmarks.replay traffic.jsonl --duration 600 --job-workers 8 \\
+        --output replay.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from werkzeug.wsgi import ClosingIterator
+
+from benchmarks.fake_upstreams import (
+    DEFAULT_GAZETTEER,
+    FakeGemini,
+    FakeNominatim,
+    UpstreamProfile,
+    load_gazetteer,
+)
+from benchmarks.pipeline import (
+    _extract_direct,
+    _extract_sse,
+    _git_commit,
+    configured_app,
+    percentile,
+)
+from config import Config
+
+# Stages whose recorded wall time is a call to each upstream
+UPSTREAM_STAGES = {
+    "gemini": ("extraction", "extraction_correction", "summary"),
+    "nominatim": ("geocode",),
+}
+FALLBACK_LATENCY = {"gemini": "lognormal:0.6,0.4", "nominatim": "uniform:0.05,0.25"}
+MAX_INPUT_CHARS = 100000  # ArticleRequest's limit
+REUSED_OUTCOMES = ("cached", "near_duplicate")
+OFFERED_LOAD_WINDOW = 10.0  # seconds of trace time offered load is averaged over
+FILLER = (
+    "Officials said the response would continue over the coming days. ",
+    "Residents were advised to follow local guidance. ",
+    "The figures could not be independently verified. ",
+    "Further updates are expected later this week. ",
+)
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Recorded requests in arrival order"""
+    entries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                entry = json.loads(line)
+                if "ts" in entry and entry.get("mode") in ("direct", "sse"):
+                    entries.append(entry)
+    return sorted(entries, key=lambda entry: entry["ts"])
+
+
+def window(entries: List[Dict], start: float = 0, duration: float = None) -> List[Dict]:
+    """The entries from start seconds into the trace, for duration seconds"""
+    if not entries:
+        return []
+    first = entries[0]["ts"] + start
+    last = first + duration if duration else float("inf")
+    return [entry for entry in entries if first <= entry["ts"] < last]
+
+
+def upstream_profile(entries: List[Dict], upstream: str) -> UpstreamProfile:
+    """Latency distribution and fault rates of an upstream, as recorded"""
+    stages = UPSTREAM_STAGES[upstream]
+    calls = [
+        stage
+        for entry in entries
+        for stage in entry.get("stages", [])
+        if stage["stage"] in stages
+    ]
+    latencies = [round(c["seconds"], 3) for c in calls if "error" not in c]
+    if not calls or not latencies:
+        return UpstreamProfile(latency=FALLBACK_LATENCY[upstream])
+    rate_limited = sum(1 for c in calls if c.get("error") == "rate_limit")
+    failed = sum(1 for c in calls if c.get("error") not in (None, "rate_limit"))
+    return UpstreamProfile(
+        latency="empirical:" + ",".join(str(value) for value in latencies),
+        error_rate=failed / len(calls),
+        rate_limit_rate=rate_limited / len(calls),
+    )
+
+
+def synthetic_article(
+    entry: Dict, place_names: Sequence[str], default_chars: int, seed: str
+) -> str:
+    """
+    Article text of the entry's recorded length naming as many gazetteer
+    places as it had locations; the same seed gives the same text
+    """
+    rng = random.Random(seed)
+    count = min(entry.get("locations") or 0, len(place_names))
+    places = rng.sample(list(place_names), count)
+    target = min(entry.get("article_chars") or default_chars, MAX_INPUT_CHARS)
+
+    parts = [f"Reports came in from {name}. " for name in places]
+    length = sum(len(part) for part in parts)
+    while True:
+        sentence = rng.choice(FILLER)
+        if parts and length + len(sentence) > target:
+            return "".join(parts)
+        parts.insert(rng.randint(0, len(parts)), sentence)
+        length += len(sentence)
+
+
+def replay_articles(entries: List[Dict], place_names: Sequence[str]):
+    """
+    Article text for each entry, and the texts to process before replaying
+    so that recorded cache hits hit. The first request for an input and any
+    the trace served from the result cache or near-duplicate index share
+    that input's article; other repeats (the cached result had expired) get
+    one of their own.
+    """
+    lengths = sorted(e["article_chars"] for e in entries if e.get("article_chars"))
+    default_chars = int(percentile(lengths, 50)) if lengths else 3000
+    texts, warm_up, seen = [], [], set()
+    for index, entry in enumerate(entries):
+        key = entry.get("input_hash") or str(index)
+        reused = entry.get("outcome") in REUSED_OUTCOMES
+        seed = key if reused or key not in seen else f"{key}:{index}"
+        text = synthetic_article(entry, place_names, default_chars, seed)
+        if reused and key not in seen:
+            warm_up.append(text)
+        seen.add(key)
+        texts.append(text)
+    return texts, warm_up
+
+
+class WorkerSlots:
+    """
+    WSGI middleware serving at most `slots` requests at once, like gunicorn's
+    workers x threads: the rest wait, and a streamed response (SSE) holds its
+    slot until the stream is closed
+    """
+
+    def __init__(self, app, slots: int):
+        self.app = app
+        self.slots = slots
+        self.waiting = 0
+        self.active = 0
+        self.waits: List[float] = []
+        self._semaphore = threading.Semaphore(slots)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.waiting += 1
+        started = time.perf_counter()
+        self._semaphore.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.waits.append(time.perf_counter() - started)
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                with self._lock:
+                    self.active -= 1
+                self._semaphore.release()
+
+        try:
+            return ClosingIterator(self.app(environ, start_response), release)
+        except BaseException:
+            release()
+            raise
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident memory of this process (Linux only)"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Sampler:
+    """Samples request slots, the SSE job queue and memory in the background"""
+
+    def __init__(self, slots: WorkerSlots, interval: float):
+        from app.utils import metrics
+        from app.utils.job_scheduler import get_job_scheduler
+
+        self._metrics = metrics
+        self._scheduler = get_job_scheduler()
+        self.job_workers = self._scheduler.max_workers
+        self.slots = slots
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self._started = time.perf_counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            scheduler = self._scheduler.stats()
+            self.samples.append(
+                {
+                    "t": round(time.perf_counter() - self._started, 3),
+                    "slots_waiting": self.slots.waiting,
+                    "slots_active": self.slots.active,
+                    "jobs_queued": scheduler["queued"],
+                    "jobs_running": scheduler["running"],
+                    "pipelines": int(self._metrics.PIPELINES_IN_FLIGHT.value()),
+                    "rss_bytes": _rss_bytes(),
+                }
+            )
+            if self._stopped.wait(self.interval):
+                return
+
+
+def onsets(
+    samples: List[Dict],
+    capacity: int,
+    job_workers: int,
+    memory_growth_percent: float,
+) -> Dict[str, Optional[float]]:
+    """Replay time (s) at which queueing, saturation and memory growth began"""
+
+    def first(condition) -> Optional[float]:
+        return next((sample["t"] for sample in samples if condition(sample)), None)
+
+    baseline = next((s["rss_bytes"] for s in samples if s["rss_bytes"]), None)
+    limit = baseline * (1 + memory_growth_percent / 100) if baseline else None
+    return {
+        "queueing": first(lambda s: s["slots_waiting"] > 0 or s["jobs_queued"] > 0),
+        "saturation": first(
+            lambda s: s["slots_active"] >= capacity or s["jobs_running"] >= job_workers
+        ),
+        "memory_growth": first(lambda s: limit and (s["rss_bytes"] or 0) > limit),
+    }
+
+
+def offered_load(offsets: List[float], at: float, speed: float) -> float:
+    """Requests/s sent over the OFFERED_LOAD_WINDOW of trace time before `at`"""
+    span = OFFERED_LOAD_WINDOW / speed
+    sent = sum(1 for offset in offsets if at - span < offset <= at)
+    return round(sent / span, 3)
+
+
+def warm_up(base_url: str, texts: List[str]):
+    """Process articles the trace had cached before its first request for them"""
+    with requests.Session() as session:
+        for text in texts:
+            try:
+                _extract_direct(session, base_url, text)
+            except requests.RequestException:
+                pass
+
+
+def replay(
+    base_url: str,
+    entries: List[Dict],
+    texts: List[str],
+    speed: float,
+    max_clients: int,
+) -> Dict:
+    """Send every entry at its scaled arrival time; returns per-request outcomes"""
+    first = entries[0]["ts"]
+    offsets = [(entry["ts"] - first) / speed for entry in entries]
+    local = threading.local()
+    outcomes: List[Dict] = []
+    outcomes_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def one(entry: Dict, text: str, due: float):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        extract = _extract_sse if entry["mode"] == "sse" else _extract_direct
+        sent = time.perf_counter()
+        try:
+            outcome = extract(local.session, base_url, text)
+        except requests.RequestException as e:
+            outcome = {"status": f"client_error:{type(e).__name__}"}
+        outcome["seconds"] = time.perf_counter() - sent
+        outcome["lag"] = sent - started - due
+        outcome["mode"] = entry["mode"]
+        with outcomes_lock:
+            outcomes.append(outcome)
+
+    with ThreadPoolExecutor(max_workers=max_clients) as executor:
+        for entry, text, due in zip(entries, texts, offsets):
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(one, entry, text, due)
+    return {
+        "outcomes": outcomes,
+        "offsets": offsets,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def _summarize(
+    speed: float,
+    replayed: Dict,
+    slots: WorkerSlots,
+    samples: List[Dict],
+    capacity: int,
+    job_workers: int,
+    memory_growth_percent: float,
+) -> Dict:
+    outcomes = replayed["outcomes"]
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[str(outcome["status"])] = statuses.get(str(outcome["status"]), 0) + 1
+    ok = [o["seconds"] for o in outcomes if o["status"] == 200]
+    rss = [s["rss_bytes"] for s in samples if s["rss_bytes"]]
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    def mb(value):
+        return None if value is None else round(value / 2**20, 1)
+
+    began = {}
+    for name, at in onsets(
+        samples, capacity, job_workers, memory_growth_percent
+    ).items():
+        began[name] = (
+            None
+            if at is None
+            else {
+                "replay_seconds": at,
+                "trace_seconds": round(at * speed, 3),
+                "offered_rps": offered_load(replayed["offsets"], at, speed),
+            }
+        )
+    return {
+        "speed": speed,
+        "requests": len(outcomes),
+        "succeeded": len(ok),
+        "statuses": statuses,
+        "elapsed_seconds": round(replayed["elapsed"], 3),
+        "latency_ms": {
+            "p50": ms(percentile(ok, 50)),
+            "p95": ms(percentile(ok, 95)),
+            "p99": ms(percentile(ok, 99)),
+        },
+        "slot_wait_ms": {
+            "p95": ms(percentile(slots.waits, 95)),
+            "max": ms(max(slots.waits)) if slots.waits else None,
+        },
+        "peak": {
+            "slots_waiting": max((s["slots_waiting"] for s in samples), default=0),
+            "slots_active": max((s["slots_active"] for s in samples), default=0),
+            "jobs_queued": max((s["jobs_queued"] for s in samples), default=0),
+            "jobs_running": max((s["jobs_running"] for s in samples), default=0),
+            "pipelines": max((s["pipelines"] for s in samples), default=0),
+        },
+        "rss_mb": {
+            "start": mb(rss[0]) if rss else None,
+            "peak": mb(max(rss)) if rss else None,
+            "end": mb(rss[-1]) if rss else None,
+        },
+        "max_dispatch_lag_ms": ms(max((o["lag"] for o in outcomes), default=0)),
+        "began": began,
+    }
+
+
+def run(
+    entries: List[Dict],
+    speeds: Sequence[float],
+    capacity: int,
+    job_workers: int,
+    gemini_profile: UpstreamProfile,
+    nominatim_profile: UpstreamProfile,
+    gazetteer_path: str = DEFAULT_GAZETTEER,
+    sample_interval: float = 0.25,
+    memory_growth_percent: float = 20,
+    max_clients: int = 256,
+    seed: Optional[int] = 1,
+) -> Dict:
+    if not entries:
+        raise ValueError("The trace has no direct or SSE requests to replay")
+    gazetteer = load_gazetteer(gazetteer_path)
+    place_names = sorted(place.name for place in gazetteer.values())
+    texts, warm_up_texts = replay_articles(entries, place_names)
+    gemini = FakeGemini(gazetteer, gemini_profile, seed).start()
+    nominatim = FakeNominatim(gazetteer, nominatim_profile, seed).start()
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "requests": len(entries),
+            "trace_seconds": round(entries[-1]["ts"] - entries[0]["ts"], 3),
+            "modes": {
+                mode: sum(1 for e in entries if e["mode"] == mode)
+                for mode in ("direct", "sse")
+            },
+            "urls_replayed_as_text": sum(
+                1 for e in entries if e.get("input_type") == "url"
+            ),
+            "capacity": capacity,
+            "job_workers": job_workers,
+            "gemini": vars(gemini_profile) | {"latency": _short(gemini_profile)},
+            "nominatim": vars(nominatim_profile)
+            | {"latency": _short(nominatim_profile)},
+        },
+        "runs": [],
+    }
+    try:
+        for speed in speeds:
+            gemini.reset_stats()
+            nominatim.reset_stats()
+            slots = None
+
+            def wrap(app):
+                nonlocal slots
+                slots = WorkerSlots(app, capacity)
+                return slots
+
+            with tempfile.TemporaryDirectory() as workdir:
+                config = {
+                    "JOB_WORKERS": job_workers,
+                    "RESULT_CACHE_PATH": os.path.join(workdir, "results.sqlite3"),
+                    "NEAR_DUPLICATE_INDEX_PATH": os.path.join(
+                        workdir, "near_duplicates.sqlite3"
+                    ),
+                }
+                with configured_app(gemini, nominatim, workdir, config, wrap) as url:
+                    warm_up(url, warm_up_texts)
+                    slots.waits.clear()
+                    sampler = Sampler(slots, sample_interval).start()
+                    try:
+                        replayed = replay(url, entries, texts, speed, max_clients)
+                    finally:
+                        sampler.stop()
+            level = _summarize(
+                speed,
+                replayed,
+                slots,
+                sampler.samples,
+                capacity,
+                sampler.job_workers,
+                memory_growth_percent,
+            )
+            level["upstream"] = {
+                "gemini": gemini.stats(),
+                "nominatim": nominatim.stats(),
+            }
+            results["runs"].append(level)
+            print(_summary_line(level), file=sys.stderr)
+    finally:
+        gemini.stop()
+        nominatim.stop()
+    return results
+
+
+def _short(profile: UpstreamProfile) -> str:
+    """The latency spec, without an empirical spec's observed delays"""
+    if profile.latency.startswith("empirical:"):
+        count = profile.latency.count(",") + 1
+        return f"empirical ({count} recorded calls)"
+    return profile.latency
+
+
+def _summary_line(level: Dict) -> str:
+    latency = level["latency_ms"]
+    return (
+        f"{level['speed']:g}x  {level['succeeded']}/{level['requests']} ok  "
+        f"p50 {latency['p50'] or 0:.1f}ms  p95 {latency['p95'] or 0:.1f}ms  "
+        f"peak waiting {level['peak']['slots_waiting']}"
+    )
+
+
+def _format_onset(onset: Optional[Dict]) -> str:
+    if onset is None:
+        return "never"
+    return (
+        f"at {onset['trace_seconds']:.0f}s of trace "
+        f"({onset['replay_seconds']:.1f}s replayed, "
+        f"{onset['offered_rps']:.2f} req/s offered)"
+    )
+
+
+def print_report(results: Dict):
+    meta = results["meta"]
+    print(
+        f"commit {meta['commit']}  {meta['requests']} requests over "
+        f"{meta['trace_seconds']:.0f}s ({meta['modes']['direct']} direct, "
+        f"{meta['modes']['sse']} SSE)  capacity {meta['capacity']}  "
+        f"job workers {meta['job_workers']}"
+    )
+    print(
+        f"gemini {meta['gemini']['latency']}  nominatim {meta['nominatim']['latency']}"
+    )
+    if meta["urls_replayed_as_text"]:
+        print(
+            f"{meta['urls_replayed_as_text']} URL requests replayed as text "
+            "(article fetches are not simulated)"
+        )
+    for level in results["runs"]:
+        latency, peak, rss = level["latency_ms"], level["peak"], level["rss_mb"]
+        print(f"\n{level['speed']:g}x: {level['succeeded']}/{level['requests']} ok")
+        print(
+            f"  latency p50 {latency['p50'] or 0:.1f}ms  p95 {latency['p95'] or 0:.1f}ms"
+            f"  p99 {latency['p99'] or 0:.1f}ms  statuses {level['statuses']}"
+        )
+        print(
+            f"  peak: {peak['slots_active']}/{meta['capacity']} slots busy, "
+            f"{peak['slots_waiting']} waiting (p95 wait "
+            f"{level['slot_wait_ms']['p95'] or 0:.1f}ms), "
+            f"{peak['jobs_running']}/{meta['job_workers']} job workers busy, "
+            f"{peak['jobs_queued']} jobs queued, {peak['pipelines']} pipelines"
+        )
+        if rss["start"] is not None:
+            print(
+                f"  memory: {rss['start']} MB -> peak {rss['peak']} MB, "
+                f"end {rss['end']} MB"
+            )
+        for name in ("queueing", "saturation", "memory_growth"):
+            label = name.replace("_", " ")
+            print(f"  {label} began {_format_onset(level['began'][name])}")
+        if (level["max_dispatch_lag_ms"] or 0) > 1000:
+            print(
+                f"  warning: requests were sent up to "
+                f"{level['max_dispatch_lag_ms'] / 1000:.1f}s late; raise --max-clients"
+            )
+
+
+def _profile(args, entries: List[Dict], name: str) -> UpstreamProfile:
+    latency = getattr(args, f"{name}_latency")
+    if latency == "trace":
+        return upstream_profile(entries, name)
+    return UpstreamProfile(latency=latency)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace", help="JSONL written with TRAFFIC_RECORD_PATH")
+    parser.add_argument("--speed", default="1,5,10", help="comma-separated speedups")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=2,
+        help="requests served at once (gunicorn workers x threads)",
+    )
+    parser.add_argument(
+        "--job-workers", type=int, default=Config.JOB_WORKERS, help="SSE job pool"
+    )
+    parser.add_argument(
+        "--start", type=float, default=0, help="skip this many seconds of the trace"
+    )
+    parser.add_argument("--duration", type=float, help="seconds of trace to replay")
+    for name in ("gemini", "nominatim"):
+        parser.add_argument(
+            f"--{name}-latency",
+            default="trace",
+            help="'trace' (recorded delays and error rates) or a latency spec",
+        )
+    parser.add_argument("--gazetteer", default=DEFAULT_GAZETTEER)
+    parser.add_argument("--sample-interval", type=float, default=0.25)
+    parser.add_argument(
+        "--memory-growth-percent",
+        type=float,
+        default=20,
+        help="memory growth is reported once RSS is this much above the start",
+    )
+    parser.add_argument(
+        "--max-clients", type=int, default=256, help="concurrent client connections"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show app logs")
+    parser.add_argument("--output", help="also write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    speeds = [float(speed) for speed in args.speed.split(",") if speed.strip()]
+    entries = window(load_trace(args.trace), args.start, args.duration)
+    if not entries:
+        parser.error("no direct or SSE requests in the selected part of the trace")
+
+    level = logging.WARNING if args.verbose else logging.CRITICAL
+    logging.basicConfig(level=level)
+    logging.getLogger("werkzeug").setLevel(level)
+
+    results = run(
+        entries,
+        speeds,
+        args.capacity,
+        args.job_workers,
+        _profile(args, entries, "gemini"),
+        _profile(args, entries, "nominatim"),
+        args.gazetteer,
+        args.sample_interval,
+        args.memory_growth_percent,
+        args.max_clients,
+        args.seed,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
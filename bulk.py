@@ -0,0 +1,79 @@
+"""
+Offline bulk processing: run the extraction pipeline over an archive of
+articles without going through the API.
+
+Input is JSONL (one {"url": ...} or {"text": ...} object per line, with an
+optional "id") or a WARC file of fetched pages; either may be gzipped.
+Results are appended to JSONL, or to a directory of Parquet parts (needs
+pyarrow). Re-running the same command resumes where it stopped.
+
+Usage:
+    python bulk.py archive.jsonl results.jsonl
+    python bulk.py crawl.warc.gz results.parquet --workers 8
+    python bulk.py archive.jsonl results.jsonl --retry-errors
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from app.services.bulk_processor import run_bulk
+from config import Config
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL or WARC file (.gz allowed)")
+    parser.add_argument("output", help="JSONL file, or .parquet directory")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="worker processes (0 = in-process)"
+    )
+    parser.add_argument(
+        "--cache",
+        default=Config.BULK_CACHE_PATH,
+        help="SQLite geocoding/LLM cache shared by workers and runs",
+    )
+    parser.add_argument(
+        "--input-format", choices=["auto", "jsonl", "warc"], default="auto"
+    )
+    parser.add_argument(
+        "--output-format", choices=["auto", "jsonl", "parquet"], default="auto"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="fail instead of resuming when the output already exists",
+    )
+    parser.add_argument(
+        "--retry-errors",
+        action="store_true",
+        help="when resuming, reprocess records that failed last time",
+    )
+    parser.add_argument(
+        "--flush-every", type=int, default=50, help="results per output write"
+    )
+    parser.add_argument("--limit", type=int, help="process at most this many records")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    stats = run_bulk(
+        args.input,
+        args.output,
+        workers=args.workers,
+        cache_path=args.cache,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        resume=not args.no_resume,
+        retry_errors=args.retry_errors,
+        flush_every=args.flush_every,
+        limit=args.limit,
+    )
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,5 +7,196 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "dev-secret-key-change-in-production"
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    # Upstream endpoints; overridden to point at local stand-ins when benchmarking
+    GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT", "")
+    # USD per million (prompt, output) tokens by model for cost accounting, as
+    # JSON such as {"gemini-2.5-flash": [0.3, 2.5]}; unset models use list prices
+    GEMINI_PRICES = os.environ.get("GEMINI_PRICES", "")
+    NOMINATIM_DOMAIN = os.environ.get("NOMINATIM_DOMAIN", "nominatim.openstreetmap.org")
+    NOMINATIM_SCHEME = os.environ.get("NOMINATIM_SCHEME", "https")
     FLASK_ENV = os.environ.get("FLASK_ENV", "development")
     FLASK_DEBUG = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
+
+    # Server-Sent Events
+    SSE_EVENT_BUFFER_SIZE = int(os.environ.get("SSE_EVENT_BUFFER_SIZE", "100"))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "0.5"))
+    SSE_DISCONNECT_GRACE_SECONDS = float(
+        os.environ.get("SSE_DISCONNECT_GRACE_SECONDS", "15")
+    )
+    # How soon a client streaming a job that runs in another worker reconnects
+    SSE_RETRY_SECONDS = float(os.environ.get("SSE_RETRY_SECONDS", "2"))
+    PROGRESS_TRACKER_RETENTION_SECONDS = int(
+        os.environ.get("PROGRESS_TRACKER_RETENTION_SECONDS", "600")
+    )
+
+    # Request time budgets (seconds). Direct requests without an explicit
+    # budget get the default so they finish inside the gunicorn timeout.
+    DEFAULT_TIME_BUDGET_SECONDS = float(
+        os.environ.get("DEFAULT_TIME_BUDGET_SECONDS", "100")
+    )
+    MAX_TIME_BUDGET_SECONDS = float(os.environ.get("MAX_TIME_BUDGET_SECONDS", "300"))
+
+    # Outbound article fetching: keep-alive pools and the conditional GET cache
+    HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "16"))
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "8"))
+    ARTICLE_CACHE_SIZE = int(os.environ.get("ARTICLE_CACHE_SIZE", "256"))
+    # Article HTML parser: auto (lxml when installed), lxml or html.parser
+    HTML_PARSER = os.environ.get("HTML_PARSER", "auto")
+    # Parse article HTML in worker processes (0 parses on the request thread)
+    PARSE_POOL_WORKERS = int(os.environ.get("PARSE_POOL_WORKERS", "0"))
+    PARSE_POOL_QUEUE_SIZE = int(os.environ.get("PARSE_POOL_QUEUE_SIZE", "8"))
+    PARSE_POOL_TIMEOUT_SECONDS = float(
+        os.environ.get("PARSE_POOL_TIMEOUT_SECONDS", "10")
+    )
+    PARSE_POOL_SHM_THRESHOLD_BYTES = int(
+        os.environ.get("PARSE_POOL_SHM_THRESHOLD_BYTES", str(256 * 1024))
+    )
+    # Learned per-domain article containers (set EXTRACTION_PROFILE_PATH to
+    # empty to disable) and an optional JSON file of {domain: selector} overrides
+    EXTRACTION_PROFILE_PATH = os.environ.get(
+        "EXTRACTION_PROFILE_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "profiles.sqlite3"
+        ),
+    )
+    EXTRACTION_PROFILE_OVERRIDES = os.environ.get("EXTRACTION_PROFILE_OVERRIDES", "")
+    MAX_DOWNLOAD_BYTES = int(os.environ.get("MAX_DOWNLOAD_BYTES", str(5 * 1024 * 1024)))
+
+    # Whole-pipeline result cache (set RESULT_CACHE_PATH to empty to disable)
+    RESULT_CACHE_PATH = os.environ.get(
+        "RESULT_CACHE_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "results.sqlite3"
+        ),
+    )
+    RESULT_CACHE_TTL_SECONDS = int(
+        os.environ.get("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+    )
+
+    # Near-duplicate article reuse (set NEAR_DUPLICATE_INDEX_PATH to empty to
+    # disable). MAX_DISTANCE is in SimHash bits out of 64, at most 3 (about 95%
+    # similar); larger values are rejected at startup. Copies with at most
+    # SKIP_LLM_RATIO of their paragraphs changed keep the earlier summaries
+    # without any LLM call; above it, changed paragraphs are searched for new
+    # places and the places they mention are re-summarized. Copies with more
+    # than MAX_CHANGED_RATIO of their paragraphs changed are processed from
+    # scratch.
+    NEAR_DUPLICATE_INDEX_PATH = os.environ.get(
+        "NEAR_DUPLICATE_INDEX_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data",
+            "near_duplicates.sqlite3",
+        ),
+    )
+    NEAR_DUPLICATE_MAX_DISTANCE = int(
+        os.environ.get("NEAR_DUPLICATE_MAX_DISTANCE", "3")
+    )
+    NEAR_DUPLICATE_SKIP_LLM_RATIO = float(
+        os.environ.get("NEAR_DUPLICATE_SKIP_LLM_RATIO", "0.1")
+    )
+    NEAR_DUPLICATE_MAX_CHANGED_RATIO = float(
+        os.environ.get("NEAR_DUPLICATE_MAX_CHANGED_RATIO", "0.5")
+    )
+
+    # Spatial index of every processed article's locations, for
+    # /api/locations/search (set LOCATION_INDEX_PATH to empty to disable)
+    LOCATION_INDEX_PATH = os.environ.get(
+        "LOCATION_INDEX_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "locations.sqlite3"
+        ),
+    )
+
+    # Marker clusters for /api/locations/clusters: grid clusters of the location
+    # index precomputed in memory for zooms 0 to CLUSTER_MAX_ZOOM (each level
+    # costs memory in proportion to the distinct places on it), rebuilt at most
+    # every CLUSTER_REFRESH_SECONDS after the index changes, with the
+    # CLUSTER_TILE_CACHE_SIZE most recently requested tiles cached per worker
+    CLUSTER_MAX_ZOOM = int(os.environ.get("CLUSTER_MAX_ZOOM", "16"))
+    CLUSTER_REFRESH_SECONDS = float(os.environ.get("CLUSTER_REFRESH_SECONDS", "30"))
+    CLUSTER_TILE_CACHE_SIZE = int(os.environ.get("CLUSTER_TILE_CACHE_SIZE", "2048"))
+
+    # Geocoding/LLM cache shared by the worker processes of bulk.py runs
+    BULK_CACHE_PATH = os.environ.get(
+        "BULK_CACHE_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "bulk_cache.sqlite3"
+        ),
+    )
+
+    # Per-stage timings in /api/extract responses on request (?debug=timings
+    # or X-Debug-Timings), and the Prometheus endpoint at /api/metrics
+    DEBUG_TIMINGS_ENABLED = (
+        os.environ.get("DEBUG_TIMINGS_ENABLED", "True").lower() == "true"
+    )
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+
+    # Response bodies: JSON encoder for extraction results (auto uses orjson
+    # when installed, json the stdlib) and gzip/brotli for bodies of at least
+    # RESPONSE_COMPRESSION_MIN_BYTES when the client accepts them
+    RESPONSE_JSON_ENCODER = os.environ.get("RESPONSE_JSON_ENCODER", "auto")
+    RESPONSE_COMPRESSION_ENABLED = (
+        os.environ.get("RESPONSE_COMPRESSION_ENABLED", "True").lower() == "true"
+    )
+    RESPONSE_COMPRESSION_MIN_BYTES = int(
+        os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024")
+    )
+
+    # Request tracing: share of /api/extract requests traced (0 disables), and
+    # where finished traces go as OTLP/JSON - a file of one document per line
+    # and/or an OTLP/HTTP collector such as http://localhost:4318/v1/traces
+    TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+    TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "")
+    TRACE_EXPORT_URL = os.environ.get("TRACE_EXPORT_URL", "")
+
+    # Request profiling: an X-Profile header (with the admin token) profiles
+    # that request; otherwise PROFILE_SAMPLE_RATE of requests are profiled and
+    # kept only if among the slowest PROFILE_SLOWEST_PERCENT of recent ones
+    REQUEST_PROFILE_DIR = os.environ.get(
+        "REQUEST_PROFILE_DIR",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "request_profiles"
+        ),
+    )
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_SLOWEST_PERCENT = float(os.environ.get("PROFILE_SLOWEST_PERCENT", "5"))
+    PROFILE_MAX_STORED = int(os.environ.get("PROFILE_MAX_STORED", "50"))
+
+    # Sanitized per-request traffic trace for capacity planning, replayable
+    # with benchmarks/replay.py (empty disables recording)
+    TRAFFIC_RECORD_PATH = os.environ.get("TRAFFIC_RECORD_PATH", "")
+    # Per-deployment secret keying the trace's input hashes (empty omits them)
+    TRAFFIC_HASH_KEY = os.environ.get("TRAFFIC_HASH_KEY", "")
+
+    # Bearer token for /api/admin endpoints (empty disables them)
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+    # Background job scheduler (SSE mode)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "32"))
+    JOB_RETRY_AFTER_SECONDS = int(os.environ.get("JOB_RETRY_AFTER_SECONDS", "10"))
+
+    # Batch extraction: articles per batch, and the worker pool shared by all
+    # batches with a cap on items waiting for it
+    BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "100"))
+    BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))
+    BATCH_MAX_PENDING_ITEMS = int(os.environ.get("BATCH_MAX_PENDING_ITEMS", "500"))
+
+    # Persistent job store (set JOB_STORE_PATH to empty to disable)
+    JOB_STORE_PATH = os.environ.get(
+        "JOB_STORE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs.sqlite3"),
+    )
+    JOB_STORE_RETENTION_SECONDS = int(
+        os.environ.get("JOB_STORE_RETENTION_SECONDS", str(7 * 24 * 3600))
+    )
+    JOB_STALE_AFTER_SECONDS = int(os.environ.get("JOB_STALE_AFTER_SECONDS", "300"))
+    # How often each worker heartbeats its jobs and resumes those of dead
+    # workers; keep well below JOB_STALE_AFTER_SECONDS (0 disables)
+    JOB_RECLAIM_INTERVAL_SECONDS = int(
+        os.environ.get("JOB_RECLAIM_INTERVAL_SECONDS", "60")
+    )
+    JOB_RESUME_ON_STARTUP = (
+        os.environ.get("JOB_RESUME_ON_STARTUP", "True").lower() == "true"
+    )
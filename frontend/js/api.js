@@ -37,6 +37,22 @@ class ApiClient {
     const data = await response.json();
     return data;
   }
+
+  // Marker clusters of all processed locations in a [west, south, east,
+  // north] box at a zoom, as GeoJSON
+  async fetchClusters(bbox, zoom) {
+    const query = bbox.map((value) => value.toFixed(5)).join(',');
+    const response = await fetch(
+      `/api/locations/clusters?bbox=${query}&zoom=${zoom}`
+    );
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.message || 'Failed to load locations');
+    }
+
+    return response.json();
+  }
 }
 
 // Export for global use
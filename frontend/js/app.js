@@ -37,6 +37,24 @@ class WaldoApp {
     document.getElementById('textToggle').addEventListener('click', () => {
       this.uiManager.toggleInputMode('text');
     });
+
+    // Browse all processed locations
+    document.getElementById('browseBtn').addEventListener('click', () => {
+      this.browseLocations();
+    });
+  }
+
+  // Map of every processed location, clustered by the server
+  browseLocations() {
+    this.uiManager.showBrowse();
+
+    // Initialize map after DOM is visible
+    setTimeout(() => {
+      this.mapManager.init();
+      this.mapManager.showAllLocations(this.apiClient, (collection) => {
+        this.uiManager.updateBrowseCount(collection.metadata.points);
+      });
+    }, 100);
   }
 
   // Main extraction workflow
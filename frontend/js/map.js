@@ -1,4 +1,23 @@
 // Map management module
+const POPUP_OPTIONS = {
+  maxWidth: 320,
+  className: 'modern-popup',
+};
+
+const HTML_ESCAPES = {
+  '&': '&amp;',
+  '<': '&lt;',
+  '>': '&gt;',
+  '"': '&quot;',
+  "'": '&#39;',
+};
+
+// Escape text for interpolation into popup HTML; names and summaries come
+// from LLM output, including other users' articles in the shared index
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"']/g, (char) => HTML_ESCAPES[char]);
+}
+
 class MapManager {
   constructor() {
     this.map = null;
@@ -104,6 +123,46 @@ class MapManager {
     });
   }
 
+  // Create popup content for a location
+  createPopup(location) {
+    const name = escapeHtml(location.name);
+    const summary = escapeHtml(
+      location.events_summary || 'Mentioned in article.'
+    );
+    return `
+                <div class="popup-container">
+                    <div class="popup-header">
+                        <svg class="popup-icon" fill="currentColor" viewBox="0 0 20 20">
+                            <path fill-rule="evenodd" d="M5.05 4.05a7 7 0 119.9 9.9L10 18.9l-4.95-4.95a7 7 0 010-9.9zM10 11a2 2 0 100-4 2 2 0 000 4z" clip-rule="evenodd"/>
+                        </svg>
+                        <span class="popup-title">${name}</span>
+                    </div>
+                    <div class="popup-summary">${summary}</div>
+                </div>
+            `;
+  }
+
+  // Create a cluster icon sized by how many locations it holds
+  createClusterIcon(count) {
+    const size = count < 10 ? 32 : count < 100 ? 40 : count < 1000 ? 48 : 56;
+    const label =
+      count < 1000 ? `${count}` : `${Math.round(count / 100) / 10}k`;
+
+    return L.divIcon({
+      html: `<div class="cluster-marker"><span>${label}</span></div>`,
+      className: 'cluster-marker-container',
+      iconSize: [size, size],
+    });
+  }
+
+  // Remove all markers from map
+  clearMarkers() {
+    this.markers.forEach((marker) => {
+      this.map.removeLayer(marker);
+    });
+    this.markers = [];
+  }
+
   // Add markers to map
   addMarkers(locations) {
     if (!locations || locations.length === 0) {
@@ -114,10 +173,7 @@ class MapManager {
     console.log(`Adding ${locations.length} markers to map`);
 
     // Clear existing markers
-    this.markers.forEach((marker) => {
-      this.map.removeLayer(marker);
-    });
-    this.markers = [];
+    this.clearMarkers();
 
     const validLocations = [];
     const customIcon = this.createCustomMarker();
@@ -146,23 +202,7 @@ class MapManager {
       const marker = L.marker([lat, lng], {
         icon: customIcon,
         title: location.name,
-      }).bindPopup(
-        `
-                <div class="popup-container">
-                    <div class="popup-header">
-                        <svg class="popup-icon" fill="currentColor" viewBox="0 0 20 20">
-                            <path fill-rule="evenodd" d="M5.05 4.05a7 7 0 119.9 9.9L10 18.9l-4.95-4.95a7 7 0 010-9.9zM10 11a2 2 0 100-4 2 2 0 000 4z" clip-rule="evenodd"/>
-                        </svg>
-                        <span class="popup-title">${location.name}</span>
-                    </div>
-                    <div class="popup-summary">${location.events_summary || 'Mentioned in article.'}</div>
-                </div>
-            `,
-        {
-          maxWidth: 320,
-          className: 'modern-popup',
-        }
-      );
+      }).bindPopup(this.createPopup(location), POPUP_OPTIONS);
 
       this.markers.push(marker);
       marker.addTo(this.map);
@@ -195,6 +235,103 @@ class MapManager {
       this.map.invalidateSize();
     }, 200);
   }
+
+  // Replace markers with server-side clusters (a GeoJSON FeatureCollection),
+  // so the map only ever holds the clusters in view
+  showClusters(collection) {
+    this.clearMarkers();
+
+    const customIcon = this.createCustomMarker();
+
+    collection.features.forEach((feature) => {
+      const [lng, lat] = feature.geometry.coordinates;
+      const properties = feature.properties;
+      let marker;
+
+      if (!properties.cluster) {
+        marker = L.marker([lat, lng], {
+          icon: customIcon,
+          title: properties.name,
+        }).bindPopup(this.createPopup(properties), POPUP_OPTIONS);
+      } else {
+        marker = L.marker([lat, lng], {
+          icon: this.createClusterIcon(properties.point_count),
+          title: `${properties.point_count} locations`,
+        });
+
+        if (properties.expansion_zoom !== null) {
+          // Zoom in to where the cluster splits up
+          marker.on('click', () => {
+            this.map.setView([lat, lng], properties.expansion_zoom);
+          });
+        } else {
+          // Too close together to ever be shown apart
+          marker.bindPopup(
+            `<div class="popup-container"><div class="popup-summary">${properties.point_count} locations at this spot</div></div>`,
+            POPUP_OPTIONS
+          );
+        }
+      }
+
+      this.markers.push(marker);
+      marker.addTo(this.map);
+    });
+  }
+
+  // Visible area as [west, south, east, north] within -180..180 and -90..90
+  viewBbox() {
+    const bounds = this.map.getBounds();
+    let west = bounds.getWest();
+    let east = bounds.getEast();
+
+    if (east - west >= 360) {
+      west = -180;
+      east = 180;
+    } else {
+      // Panning past the antimeridian shows copies of the world
+      const wrap = (lng) =>
+        lng >= -180 && lng <= 180
+          ? lng
+          : ((((lng + 180) % 360) + 360) % 360) - 180;
+      west = wrap(west);
+      east = wrap(east);
+    }
+
+    return [
+      west,
+      Math.max(bounds.getSouth(), -90),
+      east,
+      Math.min(bounds.getNorth(), 90),
+    ];
+  }
+
+  // Show all processed locations as clusters, reloaded whenever the map moves
+  async showAllLocations(apiClient, onLoad) {
+    this.clearMarkers();
+
+    let latest = 0;
+    const load = async () => {
+      const request = ++latest;
+      try {
+        const collection = await apiClient.fetchClusters(
+          this.viewBbox(),
+          this.map.getZoom()
+        );
+        // Drop responses for views the map has since moved away from
+        if (request === latest) {
+          this.showClusters(collection);
+          if (onLoad) {
+            onLoad(collection);
+          }
+        }
+      } catch (error) {
+        console.error('Error loading clusters:', error);
+      }
+    };
+
+    this.map.on('moveend', load);
+    await load();
+  }
 }
 
 // Export for global use
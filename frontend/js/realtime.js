@@ -4,6 +4,7 @@ class RealtimeClient {
     this.eventSource = null;
     this.callbacks = {};
     this.isConnected = false;
+    this.awaitingRetry = false;
   }
 
   // Connect to SSE stream for a session
@@ -32,6 +33,11 @@ class RealtimeClient {
 
         console.log('Progress update:', data);
 
+        // A job running in another server worker ends the stream with a
+        // retry hint; EventSource reconnects on its own
+        this.awaitingRetry =
+          data.status === 'queued' || data.status === 'processing';
+
         // Trigger status-specific callbacks
         if (data.status && this.callbacks[data.status]) {
           this.callbacks[data.status](data);
@@ -41,7 +47,11 @@ class RealtimeClient {
         this.triggerCallback('progress', data);
 
         // Auto-disconnect on completion or error
-        if (data.status === 'complete' || data.status === 'error') {
+        if (
+          data.status === 'complete' ||
+          data.status === 'error' ||
+          data.status === 'cancelled'
+        ) {
           setTimeout(() => this.disconnect(), 1000);
         }
       } catch (error) {
@@ -56,6 +66,8 @@ class RealtimeClient {
       // Only trigger error if we haven't completed successfully
       if (this.eventSource.readyState === EventSource.CLOSED) {
         console.log('SSE connection closed normally');
+      } else if (this.awaitingRetry) {
+        console.log('Job still in progress, reconnecting');
       } else {
         this.triggerCallback('error', { error: 'Connection lost' });
       }
@@ -194,13 +206,16 @@ class ProgressUI {
 
   getStepDescription(status) {
     const steps = {
+      queued: '⏳ Waiting in queue',
       starting: '🔄 Initializing...',
+      processing: '🔄 Processing article',
       extracting_article: '📄 Extracting article content',
       extracting_locations: '🌍 Finding locations',
       processing_locations: '📍 Processing locations',
       filtering: '🔍 Filtering results',
       complete: '✅ Complete!',
       error: '❌ Error occurred',
+      cancelled: '🛑 Cancelled',
     };
 
     return steps[status] || status;
@@ -71,8 +71,24 @@ class UIManager {
       data.article_title || 'Article';
     document.getElementById('locationsCount').textContent =
       `${data.locations.length} locations found`;
-    document.getElementById('processingTime').textContent =
-      `Processed in ${data.processing_time.toFixed(2)}s`;
+    document.getElementById('processingTime').textContent = data.cached
+      ? `Cached result (${data.processing_time.toFixed(2)}s)`
+      : `Processed in ${data.processing_time.toFixed(2)}s`;
+  }
+
+  // Show the map of all processed locations
+  showBrowse() {
+    this.showResults();
+    document.getElementById('articleTitle').textContent =
+      'All processed locations';
+    document.getElementById('locationsCount').textContent = '';
+    document.getElementById('processingTime').textContent = '';
+  }
+
+  // Update the count of locations in view
+  updateBrowseCount(count) {
+    document.getElementById('locationsCount').textContent =
+      `${count} locations in view`;
   }
 
   // Get current input value and mode
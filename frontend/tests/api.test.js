@@ -167,4 +167,35 @@ describe('ApiClient', () => {
       );
     });
   });
+
+  describe('fetchClusters', () => {
+    test('should request clusters for a bbox and zoom', async () => {
+      const collection = { type: 'FeatureCollection', features: [] };
+      fetch.mockResolvedValue({
+        ok: true,
+        json: jest.fn().mockResolvedValue(collection),
+      });
+
+      const result = await apiClient.fetchClusters([-10, 35, 5, 45], 6);
+
+      expect(fetch).toHaveBeenCalledWith(
+        '/api/locations/clusters?bbox=-10.00000,35.00000,5.00000,45.00000&zoom=6'
+      );
+      expect(result).toEqual(collection);
+    });
+
+    test('should throw the error message on failure', async () => {
+      fetch.mockResolvedValue({
+        ok: false,
+        status: 503,
+        json: jest.fn().mockResolvedValue({
+          message: 'Location search is disabled on this server',
+        }),
+      });
+
+      await expect(apiClient.fetchClusters([0, 0, 1, 1], 3)).rejects.toThrow(
+        'Location search is disabled on this server'
+      );
+    });
+  });
 });
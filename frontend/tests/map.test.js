@@ -68,6 +68,33 @@ describe('MapManager', () => {
     });
   });
 
+  describe('createPopup', () => {
+    test('should escape markup in stored names and summaries', () => {
+      const html = mapManager.createPopup({
+        name: '<img src=x onerror="alert(1)">',
+        events_summary: '<script>alert(2)</script>',
+      });
+
+      const container = document.createElement('div');
+      container.innerHTML = html;
+
+      expect(container.querySelector('img')).toBeNull();
+      expect(container.querySelector('script')).toBeNull();
+      expect(container.querySelector('.popup-title').textContent).toBe(
+        '<img src=x onerror="alert(1)">'
+      );
+      expect(container.querySelector('.popup-summary').textContent).toBe(
+        '<script>alert(2)</script>'
+      );
+    });
+
+    test('should fall back to a default summary', () => {
+      const html = mapManager.createPopup({ name: 'Paris' });
+
+      expect(html).toContain('Mentioned in article.');
+    });
+  });
+
   describe('addMarkers', () => {
     beforeEach(() => {
       mapManager.map = {
@@ -144,4 +171,84 @@ describe('MapManager', () => {
       expect(mapManager.map.fitBounds).toHaveBeenCalled();
     });
   });
+
+  describe('showClusters', () => {
+    const collection = {
+      type: 'FeatureCollection',
+      features: [
+        {
+          type: 'Feature',
+          geometry: { type: 'Point', coordinates: [-8.5, 41.3] },
+          properties: { cluster: true, point_count: 1200, expansion_zoom: 7 },
+        },
+        {
+          type: 'Feature',
+          geometry: { type: 'Point', coordinates: [-9.14, 38.72] },
+          properties: {
+            cluster: false,
+            name: 'Lisbon',
+            events_summary: 'Test event',
+          },
+        },
+      ],
+    };
+
+    beforeEach(() => {
+      mapManager.map = {
+        removeLayer: jest.fn(),
+        setView: jest.fn(),
+      };
+    });
+
+    test('should add one marker per feature', () => {
+      mapManager.showClusters(collection);
+
+      expect(L.marker).toHaveBeenCalledTimes(2);
+      expect(L.marker).toHaveBeenCalledWith(
+        [38.72, -9.14],
+        expect.objectContaining({ title: 'Lisbon' })
+      );
+      expect(mapManager.markers).toHaveLength(2);
+    });
+
+    test('should label clusters with their size', () => {
+      mapManager.showClusters(collection);
+
+      expect(L.divIcon).toHaveBeenCalledWith(
+        expect.objectContaining({
+          html: expect.stringContaining('1.2k'),
+          className: 'cluster-marker-container',
+        })
+      );
+    });
+
+    test('should replace the previous markers', () => {
+      mapManager.showClusters(collection);
+      mapManager.showClusters(collection);
+
+      expect(mapManager.map.removeLayer).toHaveBeenCalledTimes(2);
+      expect(mapManager.markers).toHaveLength(2);
+    });
+  });
+
+  describe('viewBbox', () => {
+    const bounds = (west, south, east, north) => ({
+      getWest: () => west,
+      getSouth: () => south,
+      getEast: () => east,
+      getNorth: () => north,
+    });
+
+    test('should wrap longitudes of copies of the world', () => {
+      mapManager.map = { getBounds: () => bounds(170, -10, 200, 10) };
+
+      expect(mapManager.viewBbox()).toEqual([170, -10, -160, 10]);
+    });
+
+    test('should cover the whole world when zoomed out', () => {
+      mapManager.map = { getBounds: () => bounds(-300, -95, 300, 95) };
+
+      expect(mapManager.viewBbox()).toEqual([-180, -90, 180, 90]);
+    });
+  });
 });
@@ -17,6 +17,7 @@ global.L = {
   marker: jest.fn(() => ({
     bindPopup: jest.fn().mockReturnThis(),
     addTo: jest.fn().mockReturnThis(),
+    on: jest.fn().mockReturnThis(),
   })),
   divIcon: jest.fn(() => ({})),
   featureGroup: jest.fn(() => ({
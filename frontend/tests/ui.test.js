@@ -136,6 +136,20 @@ describe('UIManager', () => {
       );
     });
 
+    test('should mark cached results', () => {
+      const data = {
+        locations: [],
+        processing_time: 0.05,
+        cached: true,
+      };
+
+      uiManager.updateResults(data);
+
+      expect(document.getElementById('processingTime').textContent).toBe(
+        'Cached result (0.05s)'
+      );
+    });
+
     test('should use default title when not provided', () => {
       const data = {
         locations: [],
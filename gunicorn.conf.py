@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the container (see Dockerfile).
+
+The app is imported once in the master and workers are forked from it, so
+the Python modules, compiled regexes and prompt templates are shared
+copy-on-write and a new worker is ready as soon as it forks. Anything that
+can't cross a fork - job threads, SQLite connections, HTTP and Nominatim
+clients, the Gemini client - is created per process on first use.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "sync"
+timeout = 120
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True").lower() == "true"
+# The master must not resume unfinished jobs: their threads would run in the
+# master and not in the workers. Each worker resumes them in post_worker_init
+wsgi_app = "app:create_app(resume_jobs=False)" if preload_app else "run:app"
+
+
+def when_ready(server):
+    """Import the lazily loaded client libraries once, before forking workers"""
+    if not preload_app:
+        return
+    from app.services.gemini_client import preload_prompts
+    from app.utils.lazy_import import preload_lazy_modules
+
+    modules = preload_lazy_modules()
+    preload_prompts()
+    server.log.info(f"Preloaded {', '.join(modules)} and prompt templates")
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        return
+    from app.api.routes import resume_unfinished_jobs, start_job_reclaimer
+    from config import Config
+
+    if Config.JOB_RESUME_ON_STARTUP:
+        resume_unfinished_jobs()
+        start_job_reclaimer()
@@ -0,0 +1,23 @@
+import pytest
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    """Keep SQLite-backed stores out of the repo's data/ directory"""
+    monkeypatch.setattr(
+        Config, "EXTRACTION_PROFILE_PATH", str(tmp_path / "profiles.sqlite3")
+    )
+    monkeypatch.setattr(Config, "RESULT_CACHE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setattr(
+        Config, "NEAR_DUPLICATE_INDEX_PATH", str(tmp_path / "near_duplicates.sqlite3")
+    )
+    monkeypatch.setattr(Config, "BULK_CACHE_PATH", str(tmp_path / "bulk_cache.sqlite3"))
+    monkeypatch.setattr(
+        Config, "LOCATION_INDEX_PATH", str(tmp_path / "locations.sqlite3")
+    )
+    monkeypatch.setattr(
+        Config, "REQUEST_PROFILE_DIR", str(tmp_path / "request_profiles")
+    )
+    # Sweeps are driven by hand; a background one would touch other tests' jobs
+    monkeypatch.setattr(Config, "JOB_RECLAIM_INTERVAL_SECONDS", 0)
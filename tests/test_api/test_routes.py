@@ -1,14 +1,28 @@
+import gzip
 import pytest
 import json
 import os
 from unittest.mock import Mock, patch
 from app import create_app
+from config import Config
 from app.services.location_extractor import RateLimitError
+from app.api.routes import _reclaim_sweep, resume_unfinished_jobs
+from app.models.data_models import ArticleResponse, LocationData
+from app.services.location_index import get_location_index
+from app.services.near_duplicates import ArticleFingerprint, get_near_duplicate_index
+from app.services.result_cache import get_result_cache
+from app.utils.job_scheduler import QueueFullError
+from app.utils.job_store import get_job_store
+from app.utils.progress_tracker import (
+    cleanup_progress_tracker,
+    get_progress_tracker,
+)
 
 
 @pytest.fixture
-def app():
+def app(tmp_path, monkeypatch):
     """Create test Flask application"""
+    monkeypatch.setattr(Config, "JOB_STORE_PATH", str(tmp_path / "jobs.sqlite3"))
     app = create_app()
     app.config["TESTING"] = True
     return app
@@ -56,6 +70,71 @@ class TestProgressEndpoint:
         assert "Cache-Control" in response.headers
         assert "Access-Control-Allow-Origin" in response.headers
 
+    def test_progress_stream_unknown_session_ends_with_error(self, client):
+        """Test unknown sessions get an error event instead of endless heartbeats"""
+        response = client.get("/api/progress/expired-session")
+
+        body = response.get_data(as_text=True)
+        assert '"status": "error"' in body
+        assert "heartbeat" not in body
+        assert "retry:" not in body
+
+    def test_progress_stream_job_running_in_another_worker(self, client):
+        """Test a live job without a local tracker is reported as still going"""
+        job_store = get_job_store()
+        job_store.create_job("remote-session", "News in Paris.")
+        job_store.mark_running("remote-session")
+
+        response = client.get("/api/progress/remote-session")
+
+        body = response.get_data(as_text=True)
+        assert '"status": "processing"' in body
+        assert '"status": "error"' not in body
+        assert f"retry: {int(Config.SSE_RETRY_SECONDS * 1000)}\n" in body
+
+    def test_progress_stream_queued_job_without_tracker(self, client):
+        """Test a stored queued job waiting to be reclaimed is not an error"""
+        get_job_store().create_job("waiting-session", "News in Paris.")
+
+        response = client.get("/api/progress/waiting-session")
+
+        body = response.get_data(as_text=True)
+        assert '"status": "queued"' in body
+        assert "retry:" in body
+
+    def test_progress_stream_replays_after_last_event_id(self, client):
+        """Test reconnects with Last-Event-ID only replay missed events"""
+        tracker = get_progress_tracker("replay-session")
+        tracker.start_processing()
+        tracker.start_location_extraction(100)
+        tracker.complete(1, 0.5)
+
+        try:
+            response = client.get(
+                "/api/progress/replay-session", headers={"Last-Event-ID": "1"}
+            )
+            body = response.get_data(as_text=True)
+
+            assert "id: 1\n" not in body
+            assert "id: 2\n" in body
+            assert "id: 3\n" in body
+        finally:
+            cleanup_progress_tracker("replay-session")
+
+    def test_progress_stream_finished_session_returns_no_content(self, client):
+        """Test fully replayed finished sessions tell EventSource to stop"""
+        tracker = get_progress_tracker("done-session")
+        tracker.complete(0, 0.1)
+
+        try:
+            response = client.get(
+                "/api/progress/done-session",
+                headers={"Last-Event-ID": str(tracker.last_event_id)},
+            )
+            assert response.status_code == 204
+        finally:
+            cleanup_progress_tracker("done-session")
+
 
 class TestExtractEndpoint:
     """Test main extraction endpoint"""
@@ -146,6 +225,127 @@ class TestExtractEndpoint:
         assert "error" in data
         assert "rate limit exceeded" in data["error"].lower()
 
+    @patch("app.api.routes.get_job_scheduler")
+    def test_extract_sse_mode_queues_job(self, mock_get_scheduler, client):
+        """Test SSE mode hands the job to the scheduler and returns a session"""
+        mock_get_scheduler.return_value.submit.return_value = 3
+
+        response = client.post(
+            "/api/extract?sse=true", json={"input": "News from Paris, France."}
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["status"] == "queued"
+        assert data["queue_position"] == 3
+        mock_get_scheduler.return_value.submit.assert_called_once()
+        cleanup_progress_tracker(data["session_id"])
+
+    @patch("app.api.routes.get_job_scheduler")
+    def test_extract_sse_mode_queue_full(self, mock_get_scheduler, client):
+        """Test admission control returns 429 with Retry-After when queue is full"""
+        mock_get_scheduler.return_value.submit.side_effect = QueueFullError(
+            "Job queue is full", retry_after=12
+        )
+
+        response = client.post(
+            "/api/extract?sse=true", json={"input": "News from Paris, France."}
+        )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "12"
+        data = json.loads(response.data)
+        assert data["error_code"] == "QUEUE_FULL"
+        assert data["retry_after"] == 12
+
+    @patch("app.api.routes._process_locations_direct")
+    def test_extract_time_budget_from_header(self, mock_direct, client):
+        """Test X-Time-Budget header becomes the request deadline"""
+        mock_direct.return_value = {"locations": []}
+
+        client.post(
+            "/api/extract",
+            json={"input": "News from Paris, France."},
+            headers={"X-Time-Budget": "5"},
+        )
+
+        deadline = mock_direct.call_args[0][2]
+        assert 0 < deadline.remaining() <= 5
+
+    @patch("app.api.routes._process_locations_direct")
+    def test_extract_time_budget_json_field_capped(self, mock_direct, client):
+        mock_direct.return_value = {"locations": []}
+
+        client.post(
+            "/api/extract",
+            json={"input": "News from Paris, France.", "time_budget": 100000},
+        )
+
+        deadline = mock_direct.call_args[0][2]
+        assert deadline.remaining() <= Config.MAX_TIME_BUDGET_SECONDS
+
+    @patch("app.api.routes._process_locations_direct")
+    def test_extract_debug_timings_query(self, mock_direct, client):
+        mock_direct.return_value = {"locations": []}
+
+        client.post(
+            "/api/extract?debug=timings",
+            json={"input": "News from Paris, France."},
+        )
+
+        assert mock_direct.call_args[0][1].debug_timings
+
+    @patch("app.api.routes._build_pipeline")
+    def test_extract_direct_response_is_compact_by_default(self, mock_build, client):
+        mock_build.return_value.run.return_value = ArticleResponse(
+            article_title="Article Text",
+            article_text="News from Paris, France.",
+            locations=[LocationData(name="Paris", latitude=48.85, longitude=2.35)],
+            processing_time=0.1,
+        )
+
+        compact = client.post("/api/extract", json={"input": "News from Paris."})
+        full = client.post("/api/extract?view=full", json={"input": "News from Paris."})
+
+        assert "article_text" not in compact.get_json()
+        assert compact.get_json()["locations"][0]["name"] == "Paris"
+        assert full.get_json()["article_text"] == "News from Paris, France."
+
+    @patch("app.api.routes._build_pipeline")
+    def test_extract_direct_response_as_geojson(self, mock_build, client):
+        mock_build.return_value.run.return_value = ArticleResponse(
+            article_text="News from Paris, France.",
+            locations=[LocationData(name="Paris", latitude=48.85, longitude=2.35)],
+            processing_time=0.1,
+        )
+
+        response = client.post(
+            "/api/extract?format=geojson", json={"input": "News from Paris."}
+        )
+
+        feature = response.get_json()["features"][0]
+        assert feature["geometry"]["coordinates"] == [2.35, 48.85]
+        assert response.get_json()["metadata"]["processing_time"] == 0.1
+
+    def test_metrics_endpoint_renders_prometheus_text(self, client):
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        body = response.get_data(as_text=True)
+        assert "# TYPE waldo_stage_seconds histogram" in body
+        assert 'waldo_jobs_in_flight{queue="batch",state="pending"}' in body
+
+    def test_extract_invalid_time_budget_header(self, client):
+        response = client.post(
+            "/api/extract",
+            json={"input": "News from Paris, France."},
+            headers={"X-Time-Budget": "soon"},
+        )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "INVALID_TIME_BUDGET"
+
     def test_input_validation_edge_cases(self, client):
         """Test Pydantic validation with various edge cases"""
         # Empty string should fail validation
@@ -203,7 +403,7 @@ class TestExtractEndpoint:
         """End-to-end test with real AI service"""
         test_input = "There was a meeting in Paris, France."
 
-        response = client.post("/api/extract", json={"input": test_input})
+        response = client.post("/api/extract?view=full", json={"input": test_input})
 
         if response.status_code == 200:
             data = json.loads(response.data)
@@ -224,5 +424,437 @@ class TestExtractEndpoint:
             assert isinstance(data["processing_time"], (int, float))
 
 
+class TestResultsEndpoint:
+    """Test results retrieval, including after a restart"""
+
+    def test_results_unknown_session(self, client):
+        response = client.get("/api/results/unknown-session")
+
+        assert response.status_code == 404
+        data = json.loads(response.data)
+        assert data["error"] == "Results not available yet"
+
+    def test_results_from_job_store(self, client):
+        """Completed jobs are served from the job store once the tracker is gone"""
+        job_store = get_job_store()
+        job_store.create_job("stored-session", "News in Paris.")
+        job_store.complete_job(
+            "stored-session",
+            {"article_text": "News in Paris.", "locations": [], "warnings": []},
+        )
+
+        response = client.get("/api/results/stored-session?view=full")
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["session_id"] == "stored-session"
+        assert data["article_text"] == "News in Paris."
+
+    def test_progress_stream_reports_stored_completion(self, client):
+        job_store = get_job_store()
+        job_store.create_job("stored-session", "News in Paris.")
+        job_store.complete_job("stored-session", {"locations": []})
+
+        response = client.get("/api/progress/stored-session")
+
+        assert '"status": "complete"' in response.get_data(as_text=True)
+
+    def _store_result(self, article_text="News in Paris."):
+        job_store = get_job_store()
+        job_store.create_job("stored-session", article_text)
+        job_store.complete_job(
+            "stored-session",
+            {
+                "article_title": "Paris news",
+                "article_text": article_text,
+                "locations": [
+                    {
+                        "name": "Paris",
+                        "latitude": 48.85,
+                        "longitude": 2.35,
+                        "events_summary": "News.",
+                        "confidence": 0.9,
+                    }
+                ],
+                "warnings": [],
+            },
+        )
+
+    def test_results_default_to_the_compact_view(self, client):
+        self._store_result()
+
+        data = client.get("/api/results/stored-session").get_json()
+
+        assert "article_text" not in data
+        assert data["article_title"] == "Paris news"
+        assert data["locations"][0]["confidence"] == 0.9
+
+    def test_results_fields_projection(self, client):
+        self._store_result()
+
+        response = client.get(
+            "/api/results/stored-session?fields=locations.name,locations.latitude"
+        )
+
+        assert response.get_json() == {
+            "locations": [{"name": "Paris", "latitude": 48.85}]
+        }
+
+    def test_results_as_geojson(self, client):
+        self._store_result()
+
+        response = client.get("/api/results/stored-session?format=geojson")
+
+        assert response.mimetype == "application/geo+json"
+        data = response.get_json()
+        assert data["features"][0]["geometry"]["coordinates"] == [2.35, 48.85]
+        assert data["features"][0]["properties"]["name"] == "Paris"
+        assert data["metadata"]["session_id"] == "stored-session"
+        assert "article_text" not in data["metadata"]
+
+    def test_results_as_columnar(self, client):
+        self._store_result()
+
+        response = client.get(
+            "/api/results/stored-session?format=columnar"
+            "&fields=locations.name,locations.latitude"
+        )
+
+        data = response.get_json()
+        assert data["columns"] == {"name": [0], "latitude": [48.85]}
+        assert data["strings"] == ["Paris"]
+
+    def test_results_reject_unknown_format(self, client):
+        response = client.get("/api/results/stored-session?format=kml")
+
+        assert response.status_code == 400
+        assert response.get_json()["error_code"] == "INVALID_FORMAT"
+
+    def test_results_reject_unknown_view(self, client):
+        response = client.get("/api/results/stored-session?view=everything")
+
+        assert response.status_code == 400
+        assert response.get_json()["error_code"] == "INVALID_FIELDS"
+
+    def test_large_results_are_gzipped_when_accepted(self, client):
+        self._store_result("News in Paris. " * 500)
+
+        response = client.get(
+            "/api/results/stored-session?view=full",
+            headers={"Accept-Encoding": "gzip"},
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        body = json.loads(gzip.decompress(response.data))
+        assert body["article_text"].startswith("News in Paris.")
+
+
+class TestCancelJobEndpoint:
+    """Test DELETE /api/jobs/<id>"""
+
+    @patch("app.api.routes.get_job_scheduler")
+    def test_cancel_queued_job(self, mock_get_scheduler, client):
+        mock_get_scheduler.return_value.cancel.return_value = "queued"
+        tracker = get_progress_tracker("queued-job")
+        get_job_store().create_job("queued-job", "News in Paris.")
+
+        try:
+            response = client.delete("/api/jobs/queued-job")
+
+            assert response.status_code == 200
+            assert json.loads(response.data)["status"] == "cancelled"
+            assert tracker.events_since(0)[-1].status.value == "cancelled"
+            assert get_job_store().get_job("queued-job").state.value == "cancelled"
+        finally:
+            cleanup_progress_tracker("queued-job")
+
+    @patch("app.api.routes.get_job_scheduler")
+    def test_cancel_running_job(self, mock_get_scheduler, client):
+        mock_get_scheduler.return_value.cancel.return_value = "running"
+
+        response = client.delete("/api/jobs/running-job")
+
+        assert response.status_code == 202
+        assert json.loads(response.data)["status"] == "cancelling"
+
+    @patch("app.api.routes.get_job_scheduler")
+    def test_cancel_finished_job(self, mock_get_scheduler, client):
+        mock_get_scheduler.return_value.cancel.return_value = None
+        get_job_store().create_job("finished-job", "News in Paris.")
+        get_job_store().complete_job("finished-job", {"locations": []})
+
+        response = client.delete("/api/jobs/finished-job")
+
+        assert response.status_code == 409
+        assert json.loads(response.data)["error_code"] == "JOB_FINISHED"
+
+    @patch("app.api.routes.get_job_scheduler")
+    def test_cancel_unknown_job(self, mock_get_scheduler, client):
+        mock_get_scheduler.return_value.cancel.return_value = None
+
+        response = client.delete("/api/jobs/unknown-job")
+
+        assert response.status_code == 404
+        assert json.loads(response.data)["error_code"] == "JOB_NOT_FOUND"
+
+
+class TestJobResume:
+    @patch("app.api.routes.get_job_scheduler")
+    def test_resume_unfinished_jobs(self, mock_get_scheduler, client):
+        job_store = get_job_store()
+        job_store.create_job("orphaned-job", "News in Paris.")
+        job_store._connect().execute(
+            "UPDATE jobs SET owner = 'gone-host:1', updated_at = 0 "
+            "WHERE job_id = 'orphaned-job'"
+        )
+
+        assert resume_unfinished_jobs() == 1
+
+        args = mock_get_scheduler.return_value.submit.call_args
+        assert args[0][0] == "orphaned-job"
+        cleanup_progress_tracker("orphaned-job")
+
+    def test_reclaim_sweep_purges_expired_results(self, client):
+        result_cache = get_result_cache()
+        result_cache.put("old", {"locations": []})
+        result_cache.put("fresh", {"locations": []})
+        near_duplicate_index = get_near_duplicate_index()
+        near_duplicate_index.add(ArticleFingerprint.of("Floods in Porto."), {})
+        for store, table, key in (
+            (result_cache, "results", "cache_key = 'old'"),
+            (near_duplicate_index, "articles", "1"),
+        ):
+            store._connect().execute(f"UPDATE {table} SET created_at = 0 WHERE {key}")
+
+        _reclaim_sweep()
+
+        keys = result_cache._connect().execute("SELECT cache_key FROM results")
+        assert [row[0] for row in keys] == ["fresh"]
+        connection = near_duplicate_index._connect()
+        assert connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 0
+        assert connection.execute("SELECT COUNT(*) FROM band_keys").fetchone()[0] == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+class TestBatchEndpoints:
+    """Test batch extraction endpoints"""
+
+    def test_batch_missing_items(self, client):
+        response = client.post("/api/extract/batch", json={"inputs": []})
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "MISSING_ITEMS"
+
+    def test_batch_too_many_items(self, client, monkeypatch):
+        monkeypatch.setattr(Config, "BATCH_MAX_ITEMS", 1)
+
+        response = client.post("/api/extract/batch", json={"items": ["a", "b"]})
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "TOO_MANY_ITEMS"
+
+    def test_unknown_batch(self, client):
+        assert client.get("/api/batches/nope").status_code == 404
+        assert client.get("/api/batches/nope/stream").status_code == 404
+        assert client.delete("/api/batches/nope").status_code == 404
+
+    @patch("app.api.routes.geocoding_service")
+    @patch("app.api.routes.get_ai_services")
+    def test_batch_streams_items_as_ndjson(
+        self, mock_ai_services, mock_geocoding, client
+    ):
+        mock_location_extractor = Mock()
+        mock_location_extractor.extract_locations.return_value = []
+        mock_ai_services.return_value = (mock_location_extractor, Mock())
+
+        response = client.post(
+            "/api/extract/batch",
+            json={"items": ["Quiet day in Porto.", {"input": "Quiet day in Braga."}]},
+        )
+
+        assert response.status_code == 202
+        data = json.loads(response.data)
+        assert data["total_items"] == 2
+
+        stream = client.get(f"/api/batches/{data['batch_id']}/stream?format=ndjson")
+        assert stream.mimetype == "application/x-ndjson"
+        messages = [
+            json.loads(line)
+            for line in stream.get_data(as_text=True).splitlines()
+            if line and "heartbeat" not in line
+        ]
+        assert sorted(m["index"] for m in messages if m["type"] == "item") == [0, 1]
+        assert messages[-1]["type"] == "batch"
+        assert messages[-1]["counts"]["complete"] == 2
+
+        status = json.loads(client.get(f"/api/batches/{data['batch_id']}").data)
+        assert status["status"] == "complete"
+        assert status["items"][1]["result"]["article_text"] == "Quiet day in Braga."
+
+
+class TestLocationSearchEndpoint:
+    """Test spatial search over previously processed locations"""
+
+    def _add_porto(self):
+        get_location_index().add_article(
+            "porto",
+            [
+                (
+                    LocationData(name="Porto", latitude=41.15, longitude=-8.61),
+                    None,
+                )
+            ],
+            title="Floods",
+        )
+
+    def test_search_by_bbox(self, client):
+        self._add_porto()
+
+        response = client.get("/api/locations/search?bbox=-9,41,-8,42&since=2020-01-01")
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["count"] == 1
+        assert data["locations"][0]["article_title"] == "Floods"
+
+    def test_search_by_radius(self, client):
+        self._add_porto()
+
+        response = client.get("/api/locations/search?lat=41.2&lon=-8.6&radius=10")
+
+        assert json.loads(response.data)["locations"][0]["name"] == "Porto"
+
+    def test_search_requires_a_query(self, client):
+        response = client.get("/api/locations/search")
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "MISSING_QUERY"
+
+    def test_search_rejects_invalid_bbox(self, client):
+        response = client.get("/api/locations/search?bbox=1,2,3")
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "INVALID_QUERY"
+
+
+class TestLocationClustersEndpoint:
+    """Test marker clusters of previously processed locations"""
+
+    def _add_portugal(self):
+        get_location_index().add_article(
+            "portugal",
+            [
+                (LocationData(name="Porto", latitude=41.15, longitude=-8.61), None),
+                (LocationData(name="Braga", latitude=41.55, longitude=-8.42), None),
+            ],
+            title="Floods",
+        )
+
+    def test_clusters_as_geojson(self, client):
+        self._add_portugal()
+
+        response = client.get("/api/locations/clusters?bbox=-180,-85,180,85&zoom=2")
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/geo+json"
+        data = json.loads(response.data)
+        assert data["type"] == "FeatureCollection"
+        [feature] = data["features"]
+        assert feature["properties"]["point_count"] == 2
+
+    def test_lone_locations_are_sent_whole(self, client):
+        self._add_portugal()
+
+        response = client.get("/api/locations/clusters?bbox=-9,41,-8,42&zoom=12")
+
+        data = json.loads(response.data)
+        assert sorted(f["properties"]["name"] for f in data["features"]) == [
+            "Braga",
+            "Porto",
+        ]
+
+    def test_clusters_require_bbox_and_zoom(self, client):
+        response = client.get("/api/locations/clusters?bbox=-9,41,-8,42")
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "MISSING_QUERY"
+
+    def test_clusters_reject_too_many_tiles(self, client):
+        response = client.get("/api/locations/clusters?bbox=-180,-85,180,85&zoom=12")
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error_code"] == "INVALID_QUERY"
+
+    def test_clusters_disabled_without_location_index(self, client, monkeypatch):
+        monkeypatch.setattr(Config, "LOCATION_INDEX_PATH", "")
+
+        response = client.get("/api/locations/clusters?bbox=-9,41,-8,42&zoom=5")
+
+        assert response.status_code == 503
+
+
+class TestProfileEndpoints:
+    """Test on-demand request profiling and the admin download endpoints"""
+
+    AUTH = {"Authorization": "Bearer secret"}
+
+    @pytest.fixture
+    def admin(self, monkeypatch):
+        monkeypatch.setattr(Config, "ADMIN_TOKEN", "secret")
+
+    @patch("app.api.routes.get_ai_services")
+    def _profiled_extract(self, client, mock_ai_services):
+        mock_extractor = Mock()
+        mock_extractor.extract_locations.return_value = []
+        mock_ai_services.return_value = (mock_extractor, Mock())
+        return client.post(
+            "/api/extract",
+            json={"input": "News from Paris, France."},
+            headers={"X-Profile": "1", **self.AUTH},
+        )
+
+    def test_profile_header_needs_admin_token(self, client, admin):
+        response = client.post(
+            "/api/extract",
+            json={"input": "News from Paris, France."},
+            headers={"X-Profile": "1"},
+        )
+
+        assert response.status_code == 401
+        assert json.loads(response.data)["error_code"] == "UNAUTHORIZED"
+
+    def test_admin_endpoints_disabled_without_token(self, client):
+        response = client.get("/api/admin/profiles", headers=self.AUTH)
+
+        assert response.status_code == 404
+        assert json.loads(response.data)["error_code"] == "ADMIN_DISABLED"
+
+    def test_profiled_request_can_be_downloaded(self, client, admin):
+        response = self._profiled_extract(client)
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = json.loads(client.get("/api/admin/profiles", headers=self.AUTH).data)
+        assert listing["profiles"][0]["profile_id"] == profile_id
+        assert listing["profiles"][0]["trigger"] == "request"
+
+        summary = client.get(f"/api/admin/profiles/{profile_id}", headers=self.AUTH)
+        assert "top_allocations" in json.loads(summary.data)
+
+        stacks = client.get(
+            f"/api/admin/profiles/{profile_id}/stacks", headers=self.AUTH
+        )
+        assert stacks.status_code == 200
+        assert stacks.headers["Content-Disposition"].startswith("attachment")
+
+    def test_unknown_profile_not_found(self, client, admin):
+        response = client.get(
+            "/api/admin/profiles/00000000-0000-0000-0000-000000000000/stacks",
+            headers=self.AUTH,
+        )
+
+        assert response.status_code == 404
+        assert json.loads(response.data)["error_code"] == "PROFILE_NOT_FOUND"
@@ -0,0 +1,24 @@
+from benchmarks.import_time import eager_lazy_modules, import_once, parse_importtime
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _json
+import time:       900 |       1020 | json
+import time:      3112 |      48326 |     grpc
+"""
+
+
+class TestImportTime:
+    def test_parse_importtime_output(self):
+        modules = parse_importtime(SAMPLE)
+
+        assert [m["module"] for m in modules] == ["_json", "json", "grpc"]
+        assert modules[1]["cumulative_ms"] == 1.02
+        assert [m["depth"] for m in modules] == [1, 0, 2]
+        assert eager_lazy_modules(modules) == ["grpc"]
+
+    def test_app_startup_leaves_heavy_clients_unloaded(self):
+        result = import_once("run")
+
+        assert result["wall_ms"] > 0
+        assert eager_lazy_modules(result["modules"]) == []
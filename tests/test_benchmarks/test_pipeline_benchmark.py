@@ -0,0 +1,75 @@
+import json
+import pytest
+import requests
+from benchmarks.fake_upstreams import (
+    FakeGemini,
+    FakeNominatim,
+    LatencyModel,
+    UpstreamProfile,
+    load_gazetteer,
+)
+from benchmarks.pipeline import compare, percentile, run
+
+
+class TestFakeUpstreams:
+    def test_latency_specs(self):
+        assert LatencyModel("fixed:0.2").sample() == 0.2
+        assert 0.1 <= LatencyModel("uniform:0.1,0.3", seed=1).sample() <= 0.3
+        with pytest.raises(ValueError):
+            LatencyModel("gamma:1,2")
+        with pytest.raises(ValueError):
+            LatencyModel("uniform:0.1")
+
+    def test_gemini_extracts_gazetteer_places_from_the_article(self):
+        gemini = FakeGemini(load_gazetteer())
+
+        kind, text = gemini.answer("Article text:\nFloods hit Porto and Lisbon.")
+
+        assert kind == "extraction"
+        names = {loc["standardized_name"] for loc in json.loads(text)}
+        assert names == {"Porto", "Lisbon"}
+
+    def test_nominatim_fails_calls_at_the_configured_rate(self):
+        nominatim = FakeNominatim(
+            load_gazetteer(), UpstreamProfile(rate_limit_rate=1.0)
+        ).start()
+        try:
+            response = requests.get(f"{nominatim.url}/search?q=Paris&format=json")
+        finally:
+            nominatim.stop()
+
+        assert response.status_code == 429
+        assert nominatim.stats() == {"search": 1, "injected_429": 1}
+
+
+class TestPipelineBenchmark:
+    def test_percentile_interpolates(self):
+        assert percentile([1, 2, 3, 4], 50) == 2.5
+        assert percentile([5], 99) == 5
+        assert percentile([], 50) is None
+
+    def test_run_drives_the_app_against_the_stand_ins(self):
+        results = run(["direct"], [2], 4, UpstreamProfile(), UpstreamProfile())
+
+        level = results["runs"][0]
+        assert level["succeeded"] == 4
+        assert level["latency_ms"]["p50"] > 0
+        assert level["upstream"]["gemini"]["extraction"] == 4
+        assert level["upstream"]["nominatim"]["search"] > 0
+
+    def test_compare_flags_regressions(self):
+        def result(p95, rps):
+            return {
+                "meta": {"commit": "abc"},
+                "runs": [
+                    {
+                        "mode": "direct",
+                        "concurrency": 4,
+                        "latency_ms": {"p95": p95},
+                        "throughput_rps": rps,
+                    }
+                ],
+            }
+
+        assert compare(result(120, 10), result(100, 10), 10) == ["direct c=4"]
+        assert compare(result(105, 10), result(100, 10), 10) == []
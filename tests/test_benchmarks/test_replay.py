@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from benchmarks.fake_upstreams import LatencyModel, UpstreamProfile
+from benchmarks.replay import (
+    WorkerSlots,
+    load_trace,
+    onsets,
+    replay_articles,
+    run,
+    upstream_profile,
+    window,
+)
+
+
+def entry(ts, mode="direct", **fields):
+    return {
+        "ts": ts,
+        "mode": mode,
+        "input_hash": f"hash{ts}",
+        "article_chars": 400,
+        "locations": 2,
+        "outcome": "ok",
+        "stages": [],
+        **fields,
+    }
+
+
+PLACES = ["Lisbon", "Paris", "Porto"]
+
+
+class TestTrace:
+    def test_load_trace_orders_requests_and_skips_batches(self, tmp_path):
+        path = tmp_path / "traffic.jsonl"
+        lines = [entry(2), entry(1, "sse"), entry(3, "batch")]
+        path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+        assert [e["ts"] for e in load_trace(str(path))] == [1, 2]
+
+    def test_window_is_relative_to_the_first_request(self):
+        entries = [entry(100), entry(105), entry(130)]
+
+        assert [e["ts"] for e in window(entries, 5, 20)] == [105]
+
+    def test_upstream_profile_comes_from_recorded_stages(self):
+        stages = [
+            {"stage": "geocode", "seconds": 0.2},
+            {"stage": "geocode", "seconds": 0.4},
+            {"stage": "geocode", "seconds": 1.0, "error": "rate_limit"},
+            {"stage": "summary", "seconds": 0.9},
+        ]
+
+        profile = upstream_profile([entry(1, stages=stages)], "nominatim")
+
+        assert profile.latency == "empirical:0.2,0.4"
+        assert profile.rate_limit_rate == 1 / 3
+        assert LatencyModel(profile.latency, seed=1).sample() in (0.2, 0.4)
+
+    def test_articles_match_recorded_shape(self):
+        texts, _ = replay_articles([entry(1, article_chars=2000)], PLACES)
+
+        assert 1900 < len(texts[0]) <= 2000
+        assert sum(place in texts[0] for place in PLACES) == 2
+
+    def test_only_recorded_cache_hits_reuse_an_article(self):
+        entries = [
+            entry(1, input_hash="a"),
+            entry(2, input_hash="a", outcome="cached"),
+            entry(3, input_hash="a"),
+            entry(4, input_hash="b", outcome="cached"),
+        ]
+
+        texts, warm_up = replay_articles(entries, PLACES)
+
+        assert texts[0] == texts[1] != texts[2]
+        assert warm_up == [texts[3]]
+
+
+class TestWorkerSlots:
+    def test_requests_beyond_capacity_wait(self):
+        release = threading.Event()
+
+        def app(environ, start_response):
+            release.wait()
+            return [b"ok"]
+
+        def serve():
+            response = slots({}, None)
+            list(response)
+            response.close()  # as the server does once the body is sent
+
+        slots = WorkerSlots(app, 1)
+        threads = [threading.Thread(target=serve) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        assert (slots.active, slots.waiting) == (1, 2)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert (slots.active, slots.waiting) == (0, 0)
+
+    def test_onsets_report_first_queueing_and_saturation(self):
+        samples = [
+            {"t": 0.0, "slots_waiting": 0, "slots_active": 1, "jobs_queued": 0,
+             "jobs_running": 0, "rss_bytes": 100},
+            {"t": 0.5, "slots_waiting": 0, "slots_active": 2, "jobs_queued": 0,
+             "jobs_running": 0, "rss_bytes": 110},
+            {"t": 1.0, "slots_waiting": 3, "slots_active": 2, "jobs_queued": 0,
+             "jobs_running": 0, "rss_bytes": 130},
+        ]  # fmt: skip
+
+        assert onsets(samples, 2, 4, 20) == {
+            "queueing": 1.0,
+            "saturation": 0.5,
+            "memory_growth": 1.0,
+        }
+
+
+class TestReplay:
+    def test_run_replays_the_trace_against_the_stand_ins(self):
+        entries = [entry(0.0), entry(0.05, "sse"), entry(0.1)]
+
+        results = run(
+            entries,
+            [10],
+            2,
+            2,
+            UpstreamProfile(),
+            UpstreamProfile(),
+            sample_interval=0.05,
+        )
+
+        level = results["runs"][0]
+        assert level["succeeded"] == 3
+        assert level["upstream"]["gemini"]["extraction"] == 3
+        assert set(level["began"]) == {"queueing", "saturation", "memory_growth"}
+        assert results["meta"]["modes"] == {"direct": 2, "sse": 1}
@@ -1,14 +1,19 @@
+import time
 import pytest
 from unittest.mock import Mock, patch
 import requests
-from app.services.article_extractor import ArticleExtractor
+from app.services.article_extractor import ArticleCache, ArticleExtractor
+from app.services.extraction_profiles import ExtractionProfileStore
+from app.services.html_parsing import ExtractionResult
+from app.utils.http_session import get_http_session
+from config import Config
 
 
 class TestArticleExtractor:
     def setup_method(self):
         self.extractor = ArticleExtractor()
 
-    @patch("app.services.article_extractor.requests.get")
+    @patch("app.services.article_extractor.requests.Session.get")
     def test_extract_from_url_success(self, mock_get):
         # Mock successful response
         mock_response = Mock()
@@ -23,6 +28,9 @@ class TestArticleExtractor:
             </body>
         </html>
         """
+        mock_response.status_code = 200
+        mock_response.headers = {"Content-Type": "text/html"}
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -33,7 +41,7 @@ class TestArticleExtractor:
         assert "The event happened in Central Park" in text
         mock_get.assert_called_once()
 
-    @patch("app.services.article_extractor.requests.get")
+    @patch("app.services.article_extractor.requests.Session.get")
     def test_extract_from_url_no_article_tag(self, mock_get):
         # Mock response without article tag
         mock_response = Mock()
@@ -46,6 +54,9 @@ class TestArticleExtractor:
             </body>
         </html>
         """
+        mock_response.status_code = 200
+        mock_response.headers = {"Content-Type": "text/html"}
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -55,7 +66,7 @@ class TestArticleExtractor:
         assert "Some content here" in text
         assert "More content in the body" in text
 
-    @patch("app.services.article_extractor.requests.get")
+    @patch("app.services.article_extractor.requests.Session.get")
     def test_extract_from_url_request_failure(self, mock_get):
         # Mock request failure
         mock_get.side_effect = requests.RequestException("Connection error")
@@ -65,7 +76,7 @@ class TestArticleExtractor:
 
         assert "Failed to extract article" in str(exc_info.value)
 
-    @patch("app.services.article_extractor.requests.get")
+    @patch("app.services.article_extractor.requests.Session.get")
     def test_extract_from_url_removes_scripts_and_styles(self, mock_get):
         # Mock response with script and style tags
         mock_response = Mock()
@@ -81,6 +92,9 @@ class TestArticleExtractor:
             </body>
         </html>
         """
+        mock_response.status_code = 200
+        mock_response.headers = {"Content-Type": "text/html"}
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -89,3 +103,213 @@ class TestArticleExtractor:
         assert "Visible content" in text
         assert "console.log" not in text
         assert "color: red" not in text
+
+    def _html_response(self, status_code=200, headers=None, body=b"", chunks=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = {"Content-Type": "text/html", **(headers or {})}
+        response.iter_content.return_value = chunks if chunks is not None else [body]
+        response.raise_for_status.return_value = None
+        return response
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_not_modified_reuses_cached_article(self, mock_get):
+        body = b"<html><head><title>Cached</title></head><body><article>Paris</article></body></html>"
+        mock_get.side_effect = [
+            self._html_response(headers={"ETag": '"v1"'}, body=body),
+            self._html_response(status_code=304),
+        ]
+
+        first = self.extractor.extract_from_url("https://example.com/article")
+        second = self.extractor.extract_from_url("https://example.com/article")
+
+        assert second == first == ("Cached", "Paris")
+        revalidation_headers = mock_get.call_args_list[1].kwargs["headers"]
+        assert revalidation_headers["If-None-Match"] == '"v1"'
+        assert self.extractor.cache.hits == 1
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_modified_article_is_reparsed(self, mock_get):
+        mock_get.side_effect = [
+            self._html_response(
+                headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+                body=b"<html><body><article>Old</article></body></html>",
+            ),
+            self._html_response(body=b"<html><body><article>New</article></body></html>"),
+        ]
+
+        self.extractor.extract_from_url("https://example.com/article")
+        _, text = self.extractor.extract_from_url("https://example.com/article")
+
+        assert text == "New"
+        revalidation_headers = mock_get.call_args_list[1].kwargs["headers"]
+        assert "If-Modified-Since" in revalidation_headers
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_response_without_validators_is_not_cached(self, mock_get):
+        mock_get.return_value = self._html_response(
+            body=b"<html><body><article>Text</article></body></html>"
+        )
+
+        self.extractor.extract_from_url("https://example.com/article")
+        self.extractor.extract_from_url("https://example.com/article")
+
+        assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_download_is_streamed(self, mock_get):
+        mock_get.return_value = self._html_response(
+            body=b"<html><body><article>Text</article></body></html>"
+        )
+
+        self.extractor.extract_from_url("https://example.com/article")
+
+        assert mock_get.call_args.kwargs["stream"] is True
+        mock_get.return_value.close.assert_called_once()
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_rejects_binary_content_type(self, mock_get):
+        response = self._html_response(headers={"Content-Type": "application/pdf"})
+        mock_get.return_value = response
+
+        with pytest.raises(Exception) as exc_info:
+            self.extractor.extract_from_url("https://example.com/report.pdf")
+
+        assert "Unsupported content type" in str(exc_info.value)
+        response.iter_content.assert_not_called()
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_rejects_oversized_content_length(self, mock_get, monkeypatch):
+        monkeypatch.setattr(Config, "MAX_DOWNLOAD_BYTES", 1000)
+        response = self._html_response(headers={"Content-Length": "30000000"})
+        mock_get.return_value = response
+
+        with pytest.raises(Exception) as exc_info:
+            self.extractor.extract_from_url("https://example.com/huge")
+
+        assert "too large" in str(exc_info.value)
+        response.iter_content.assert_not_called()
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_body_is_capped_at_max_download_bytes(self, mock_get, monkeypatch):
+        monkeypatch.setattr(Config, "MAX_DOWNLOAD_BYTES", 200)
+        paragraph = b"<p>" + b"x" * 90 + b"</p>"
+        chunks = [b"<html><body><article>"] + [paragraph] * 1000
+        mock_get.return_value = self._html_response(chunks=iter(chunks))
+
+        _, text = self.extractor.extract_from_url("https://example.com/huge")
+
+        assert 0 < len(text) < 200
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_stops_downloading_once_text_budget_is_met(self, mock_get):
+        paragraph = b"<p>" + b"word " * 100 + b"</p>"
+        chunks = iter([b"<html><body><article>"] + [paragraph] * 1000)
+        mock_get.return_value = self._html_response(chunks=chunks)
+
+        _, text = self.extractor.extract_from_url(
+            "https://example.com/long", text_budget=1000
+        )
+
+        assert 1000 <= len(text) < 5000
+        assert next(chunks, None) is not None
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_slow_download_without_deadline_is_not_cut_short(
+        self, mock_get, monkeypatch
+    ):
+        monkeypatch.setattr("app.services.article_extractor.REQUEST_TIMEOUT", 0.01)
+
+        def slow_chunks():
+            yield b"<html><body><article>"
+            time.sleep(0.05)  # each read is quick, the whole download isn't
+            yield b"Slow news</article></body></html>"
+
+        mock_get.return_value = self._html_response(chunks=slow_chunks())
+
+        _, text = self.extractor.extract_from_url("https://example.com/slow")
+
+        assert text == "Slow news"
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_header_charset_is_used_for_decoding(self, mock_get):
+        body = "<html><body><article>Zürich</article></body></html>".encode(
+            "iso-8859-1"
+        )
+        mock_get.return_value = self._html_response(
+            headers={"Content-Type": "text/html; charset=ISO-8859-1"}, body=body
+        )
+
+        _, text = self.extractor.extract_from_url("https://example.com/article")
+
+        assert text == "Zürich"
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_meta_charset_used_without_header_charset(self, mock_get):
+        body = (
+            '<html><head><meta charset="utf-8"></head>'
+            "<body><article>Zürich</article></body></html>"
+        ).encode("utf-8")
+        mock_get.return_value = self._html_response(body=body)
+
+        _, text = self.extractor.extract_from_url("https://example.com/article")
+
+        assert text == "Zürich"
+
+    @patch("app.services.article_extractor.get_parse_pool")
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_parses_in_pool_when_configured(self, mock_get, mock_get_pool):
+        body = b"<html><body><article>Text</article></body></html>"
+        mock_get.return_value = self._html_response(body=body)
+        mock_get_pool.return_value.extract.return_value = ExtractionResult(
+            "Pooled", "Text"
+        )
+
+        result = self.extractor.extract_from_url("https://example.com/article")
+
+        assert result == ("Pooled", "Text")
+        args = mock_get_pool.return_value.extract.call_args.args
+        assert args[:2] == (self.extractor.parser, body)
+        assert args[3] == Config.PARSE_POOL_TIMEOUT_SECONDS
+
+    @patch("app.services.article_extractor.requests.Session.get")
+    def test_learns_and_reuses_domain_profile(self, mock_get, tmp_path):
+        store = ExtractionProfileStore(str(tmp_path / "profiles.sqlite3"))
+        extractor = ArticleExtractor(profile_store=store)
+        paragraphs = b"".join(
+            b"<p>Paragraph %d about flooding in Porto and Braga.</p>" % i
+            for i in range(10)
+        )
+        page = b"<html><body><div class='nav'>Menu</div><div class='copy'>%s</div></body></html>"
+        mock_get.return_value = self._html_response(body=page % paragraphs)
+
+        _, text = extractor.extract_from_url("https://www.example.pt/a")
+
+        assert "Menu" not in text
+        assert store.get("example.pt").selector == "div.copy"
+
+        with patch.object(
+            extractor.parser, "extract", wraps=extractor.parser.extract
+        ) as extract_spy:
+            extractor.extract_from_url("https://example.pt/b")
+
+        assert extract_spy.call_args.args[2:] == ("div.copy", False)
+
+
+class TestArticleCache:
+    def test_evicts_least_recently_used(self):
+        cache = ArticleCache(max_size=2)
+        for url in ("a", "b"):
+            cache.put(url, Mock())
+        cache.get("a")
+        cache.put("c", Mock())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+
+def test_http_session_is_shared_and_pooled():
+    session = get_http_session()
+
+    assert get_http_session() is session
+    assert session.get_adapter("https://example.com")._pool_maxsize > 1
@@ -0,0 +1,411 @@
+import hashlib
+import json
+import pytest
+from unittest.mock import Mock
+from app.models.data_models import ArticleRequest, ExtractedLocation, LocationData
+from app.services.article_pipeline import (
+    ArticlePipeline,
+    PipelineError,
+    STAGE_ARTICLE,
+    STAGE_EXTRACTION,
+    STAGE_PROCESSING,
+)
+from app.services.geocoding import GeographicData
+from app.services.location_extractor import LocationExtractionError, RateLimitError
+from app.services.location_index import LocationIndex
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.result_cache import ResultCache
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.job_store import JobStore
+from app.utils.traffic_recorder import input_hash
+from config import Config
+
+
+def _extracted(name):
+    return ExtractedLocation(
+        original_text=name,
+        standardized_name=name,
+        context="context",
+        confidence="high",
+        location_type="city",
+    )
+
+
+class TestArticlePipeline:
+    def setup_method(self):
+        self.article_extractor = Mock()
+        self.location_processor = Mock()
+        self.location_extractor = Mock()
+        self.summarizer = Mock()
+        self.pipeline = ArticlePipeline(
+            self.article_extractor,
+            self.location_processor,
+            lambda: (self.location_extractor, self.summarizer),
+        )
+
+        self.paris = LocationData(name="Paris", latitude=48.85, longitude=2.35)
+        self.paris_geo = GeographicData(
+            name="Paris",
+            latitude=48.85,
+            longitude=2.35,
+            bounding_box=(48.8, 48.9, 2.2, 2.5),
+        )
+        self.location_extractor.extract_locations.return_value = [_extracted("Paris")]
+        self.location_processor.process_locations_pipeline.return_value = (
+            [self.paris],
+            [self.paris_geo],
+        )
+        self.location_processor.apply_spatial_filtering.side_effect = (
+            lambda locations, *args: locations
+        )
+
+    def test_run_text_input(self):
+        response = self.pipeline.run("req-1", ArticleRequest(input="News in Paris."))
+
+        assert response.article_title == "Article Text"
+        assert response.article_text == "News in Paris."
+        assert [loc.name for loc in response.locations] == ["Paris"]
+        self.article_extractor.extract_from_url.assert_not_called()
+
+    def test_run_truncates_long_text(self):
+        response = self.pipeline.run("req-1", ArticleRequest(input="x" * 60000))
+
+        assert len(response.article_text) == 50000
+        assert response.warnings[0].code == "TEXT_TRUNCATED"
+
+    def test_url_failure_raises_client_error(self):
+        self.article_extractor.extract_from_url.side_effect = Exception("Timeout")
+
+        with pytest.raises(PipelineError) as exc_info:
+            self.pipeline.run("req-1", ArticleRequest(input="https://example.com/a"))
+
+        assert exc_info.value.status_code == 400
+        assert "Timeout" in exc_info.value.message
+
+    def test_rate_limit_raises_429(self):
+        self.location_extractor.extract_locations.side_effect = RateLimitError("slow")
+
+        with pytest.raises(PipelineError) as exc_info:
+            self.pipeline.run("req-1", ArticleRequest(input="News in Paris."))
+
+        assert exc_info.value.status_code == 429
+
+    def test_run_writes_checkpoints(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.create_job("req-1", "News in Paris.")
+
+        self.pipeline.run("req-1", ArticleRequest(input="News in Paris."), None, store)
+
+        checkpoints = store.load_checkpoints("req-1")
+        assert set(checkpoints) == {STAGE_ARTICLE, STAGE_EXTRACTION, STAGE_PROCESSING}
+        assert checkpoints[STAGE_PROCESSING]["locations"][0]["name"] == "Paris"
+
+    def test_resume_skips_completed_stages(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        store.create_job("req-1", "https://example.com/a")
+        store.save_checkpoint(
+            "req-1",
+            STAGE_ARTICLE,
+            {
+                "title": "Stored title",
+                "text": "News in Paris.",
+                "warnings": [{"code": "TEXT_TRUNCATED", "message": "truncated"}],
+            },
+        )
+        store.save_checkpoint(
+            "req-1",
+            STAGE_EXTRACTION,
+            {"locations": [_extracted("Paris").model_dump()], "warnings": []},
+        )
+
+        response = self.pipeline.run(
+            "req-1", ArticleRequest(input="https://example.com/a"), None, store
+        )
+
+        assert response.article_title == "Stored title"
+        assert [loc.name for loc in response.locations] == ["Paris"]
+        self.article_extractor.extract_from_url.assert_not_called()
+        self.location_extractor.extract_locations.assert_not_called()
+        self.location_processor.process_locations_pipeline.assert_called_once()
+
+    def test_resume_restores_geographic_data(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        self.pipeline.run("req-1", ArticleRequest(input="News in Paris."), None, store)
+        self.location_processor.reset_mock()
+
+        self.pipeline.run("req-1", ArticleRequest(input="News in Paris."), None, store)
+
+        self.location_processor.process_locations_pipeline.assert_not_called()
+        geo_data_list = self.location_processor.apply_spatial_filtering.call_args[0][1]
+        assert geo_data_list[0].bounding_box == (48.8, 48.9, 2.2, 2.5)
+
+    def test_cancelled_run_stops_before_llm(self):
+        cancel_token = CancelToken()
+        self.article_extractor.extract_from_url.side_effect = (
+            lambda url, cancel_token=None, **kwargs: cancel_token.cancel()
+            or ("T", "Paris")
+        )
+
+        with pytest.raises(JobCancelledError):
+            self.pipeline.run(
+                "req-1",
+                ArticleRequest(input="https://example.com/a"),
+                cancel_token=cancel_token,
+            )
+
+        self.location_extractor.extract_locations.assert_not_called()
+
+    def test_deadline_during_extraction_returns_partial_response(self):
+        self.location_extractor.extract_locations.side_effect = DeadlineExceededError(
+            "too slow"
+        )
+
+        response = self.pipeline.run(
+            "req-1", ArticleRequest(input="News in Paris."), deadline=Deadline(5)
+        )
+
+        assert response.locations == []
+        assert response.warnings[-1].code == "DEADLINE_EXCEEDED"
+        self.location_processor.process_locations_pipeline.assert_not_called()
+
+    def test_deadline_during_fetch_is_gateway_timeout(self):
+        self.article_extractor.extract_from_url.side_effect = DeadlineExceededError(
+            "too slow"
+        )
+
+        with pytest.raises(PipelineError) as exc_info:
+            self.pipeline.run(
+                "req-1",
+                ArticleRequest(input="https://example.com/a"),
+                deadline=Deadline(5),
+            )
+
+        assert exc_info.value.status_code == 504
+
+    def test_expired_deadline_skips_processing_checkpoint(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+        self.pipeline.run(
+            "req-1", ArticleRequest(input="News in Paris."), None, store, None,
+            Deadline(0),
+        )
+
+        assert STAGE_PROCESSING not in store.load_checkpoints("req-1")
+
+    def test_result_cache_hit_skips_llm_and_geocoding(self, tmp_path):
+        self.pipeline.result_cache = ResultCache(
+            str(tmp_path / "results.sqlite3"), ttl_seconds=60
+        )
+        first = self.pipeline.run("req-1", ArticleRequest(input="News in  Paris."))
+        ai_factory = Mock()
+        self.pipeline.ai_services_factory = ai_factory
+
+        second = self.pipeline.run("req-2", ArticleRequest(input="News in Paris."))
+
+        assert not first.cached
+        assert second.cached
+        assert second.request_id == "req-2"
+        assert [loc.name for loc in second.locations] == ["Paris"]
+        ai_factory.assert_not_called()
+        assert self.location_processor.process_locations_pipeline.call_count == 1
+
+    def test_url_input_cached_on_extracted_text(self, tmp_path):
+        self.pipeline.result_cache = ResultCache(
+            str(tmp_path / "results.sqlite3"), ttl_seconds=60
+        )
+        self.article_extractor.extract_from_url.return_value = ("T", "News in Paris.")
+
+        self.pipeline.run("req-1", ArticleRequest(input="https://example.com/a?utm=x"))
+        second = self.pipeline.run(
+            "req-2", ArticleRequest(input="https://example.com/a?utm=y")
+        )
+
+        assert second.cached
+        assert self.location_extractor.extract_locations.call_count == 1
+
+    def test_partial_result_is_not_cached(self, tmp_path):
+        cache = ResultCache(str(tmp_path / "results.sqlite3"), ttl_seconds=60)
+        self.pipeline.result_cache = cache
+        self.location_extractor.extract_locations.side_effect = DeadlineExceededError(
+            "too slow"
+        )
+
+        self.pipeline.run("req-1", ArticleRequest(input="News in Paris."))
+        self.location_extractor.extract_locations.side_effect = None
+        second = self.pipeline.run("req-2", ArticleRequest(input="News in Paris."))
+
+        assert not second.cached
+
+    def test_failed_extraction_is_retried_on_next_run(self, tmp_path):
+        self.pipeline.result_cache = ResultCache(
+            str(tmp_path / "results.sqlite3"), ttl_seconds=60
+        )
+        self.pipeline.near_duplicate_index = NearDuplicateIndex(
+            str(tmp_path / "near_duplicates.sqlite3"), max_distance=3, ttl_seconds=60
+        )
+        self.location_extractor.extract_locations.side_effect = [
+            LocationExtractionError("API Error"),
+            [_extracted("Paris")],
+        ]
+
+        first = self.pipeline.run("req-1", ArticleRequest(input="News in Paris."))
+        second = self.pipeline.run("req-2", ArticleRequest(input="News in Paris."))
+
+        assert [w.code for w in first.warnings] == ["EXTRACTION_FAILED"]
+        assert not second.cached
+        assert not second.near_duplicate
+        assert [loc.name for loc in second.locations] == ["Paris"]
+        assert self.location_extractor.extract_locations.call_count == 2
+
+    def test_near_duplicate_reuses_locations_and_refreshes_changed(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(Config, "NEAR_DUPLICATE_SKIP_LLM_RATIO", 0.0)
+        self.pipeline.near_duplicate_index = NearDuplicateIndex(
+            str(tmp_path / "near_duplicates.sqlite3"), max_distance=3, ttl_seconds=60
+        )
+        lines = [
+            f"Line {i}: rescue teams worked through the night in the flooded "
+            f"districts while officials counted the damage on street {i}."
+            for i in range(20)
+        ]
+        lines[3] += " Paris was hit hardest."
+        self.pipeline.run("req-1", ArticleRequest(input="\n".join(lines)))
+        refreshed = self.paris.model_copy(update={"events_summary": "New summary"})
+        self.location_processor.refresh_summaries.return_value = [refreshed]
+
+        lines[3] = lines[3].replace("hardest", "worst")
+        second = self.pipeline.run("req-2", ArticleRequest(input="\n".join(lines)))
+
+        assert second.near_duplicate
+        assert [loc.events_summary for loc in second.locations] == ["New summary"]
+        # Only the changed paragraph is searched, and Paris is already known
+        changed_text = self.location_extractor.extract_locations.call_args[0][0]
+        assert changed_text == lines[3]
+        assert self.location_processor.process_locations_pipeline.call_count == 1
+        refreshed_locations = self.location_processor.refresh_summaries.call_args[0][0]
+        assert [loc.name for loc in refreshed_locations] == ["Paris"]
+
+    def test_near_duplicate_picks_up_places_in_changed_paragraphs(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(Config, "NEAR_DUPLICATE_SKIP_LLM_RATIO", 0.0)
+        self.pipeline.near_duplicate_index = NearDuplicateIndex(
+            str(tmp_path / "near_duplicates.sqlite3"), max_distance=3, ttl_seconds=60
+        )
+        lines = [
+            f"Line {i}: rescue teams worked through the night in the flooded "
+            f"districts while officials counted the damage on street {i}."
+            for i in range(20)
+        ]
+        lines[3] += " Paris was hit hardest."
+        self.pipeline.run("req-1", ArticleRequest(input="\n".join(lines)))
+        lyon = LocationData(name="Lyon", latitude=45.76, longitude=4.83)
+        lyon_geo = GeographicData(name="Lyon", latitude=45.76, longitude=4.83)
+        self.location_extractor.extract_locations.return_value = [_extracted("Lyon")]
+        self.location_processor.process_locations_pipeline.return_value = (
+            [lyon],
+            [lyon_geo],
+        )
+
+        lines[3] = lines[3].replace("Paris", "Lyon")
+        second = self.pipeline.run("req-2", ArticleRequest(input="\n".join(lines)))
+
+        assert second.near_duplicate
+        # Paris is no longer mentioned; Lyon is new
+        assert [loc.name for loc in second.locations] == ["Lyon"]
+        new_places = self.location_processor.process_locations_pipeline.call_args[0][0]
+        assert [place.standardized_name for place in new_places] == ["Lyon"]
+        self.location_processor.refresh_summaries.assert_not_called()
+
+    def test_heavily_edited_copy_is_processed_from_scratch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "NEAR_DUPLICATE_MAX_CHANGED_RATIO", 0.0)
+        self.pipeline.near_duplicate_index = NearDuplicateIndex(
+            str(tmp_path / "near_duplicates.sqlite3"), max_distance=3, ttl_seconds=60
+        )
+        lines = [
+            f"Line {i}: rescue teams worked through the night in Paris while "
+            f"officials counted the damage on street {i}."
+            for i in range(20)
+        ]
+        self.pipeline.run("req-1", ArticleRequest(input="\n".join(lines)))
+
+        lines.append("Copyright 2026 Example Wire Service.")
+        second = self.pipeline.run("req-2", ArticleRequest(input="\n".join(lines)))
+
+        assert not second.near_duplicate
+        assert self.location_processor.process_locations_pipeline.call_count == 2
+
+    def test_near_duplicate_with_unrelated_edit_skips_llm(self, tmp_path):
+        self.pipeline.near_duplicate_index = NearDuplicateIndex(
+            str(tmp_path / "near_duplicates.sqlite3"), max_distance=3, ttl_seconds=60
+        )
+        lines = [
+            f"Line {i}: rescue teams worked through the night in Paris while "
+            f"officials counted the damage on street {i}."
+            for i in range(20)
+        ]
+        self.pipeline.run("req-1", ArticleRequest(input="\n".join(lines)))
+        ai_factory = Mock()
+        self.pipeline.ai_services_factory = ai_factory
+
+        lines.append("Copyright 2026 Example Wire Service.")
+        second = self.pipeline.run("req-2", ArticleRequest(input="\n".join(lines)))
+
+        assert second.near_duplicate
+        assert [loc.name for loc in second.locations] == ["Paris"]
+        ai_factory.assert_not_called()
+
+    def test_complete_result_is_added_to_location_index(self, tmp_path):
+        index = LocationIndex(str(tmp_path / "locations.sqlite3"))
+        self.pipeline.location_index = index
+        self.article_extractor.extract_from_url.return_value = ("T", "News in Paris.")
+
+        self.pipeline.run("req-1", ArticleRequest(input="https://example.com/a"))
+
+        results = index.search_bbox((48.0, 49.0, 2.0, 3.0))
+        assert [r["name"] for r in results] == ["Paris"]
+        assert results[0]["source"] == "https://example.com/a"
+        assert results[0]["bounding_box"] == [48.8, 48.9, 2.2, 2.5]
+
+    def test_debug_timings_are_attached_on_request(self):
+        response = self.pipeline.run(
+            "req-1", ArticleRequest(input="News in Paris.", debug_timings=True)
+        )
+
+        assert "filter" in response.timings["stages"]
+        assert response.timings["total_seconds"] >= 0
+
+    def test_timings_are_omitted_by_default(self):
+        response = self.pipeline.run("req-1", ArticleRequest(input="News in Paris."))
+
+        assert response.timings is None
+
+    def test_recorded_traffic_is_sanitized(self, tmp_path, monkeypatch):
+        trace = tmp_path / "traffic.jsonl"
+        monkeypatch.setattr(Config, "TRAFFIC_RECORD_PATH", str(trace))
+        monkeypatch.setattr(Config, "TRAFFIC_HASH_KEY", "deployment-secret")
+        self.article_extractor.extract_from_url.side_effect = Exception("Timeout")
+
+        self.pipeline.run(
+            "req-1", ArticleRequest(input="News in Paris."), record_as="direct"
+        )
+        with pytest.raises(PipelineError):
+            self.pipeline.run(
+                "req-2", ArticleRequest(input="https://example.com/a"), record_as="sse"
+            )
+        self.pipeline.run("req-3", ArticleRequest(input="News in Paris."))
+
+        ok, failed = [json.loads(line) for line in trace.read_text().splitlines()]
+        assert ok["article_chars"] == len("News in Paris.")
+        assert ok["locations"] == 1
+        assert (ok["outcome"], ok["status"]) == ("ok", 200)
+        assert {stage["stage"] for stage in ok["stages"]} == {"filter"}
+        assert (failed["mode"], failed["status"]) == ("sse", 400)
+        assert failed["article_chars"] is None
+        # Keyed, so a guessed URL can't be confirmed with a plain hash
+        plain = hashlib.sha256(b"https://example.com/a").hexdigest()[:16]
+        assert failed["input_hash"] == input_hash("https://example.com/a") != plain
+        assert "Paris" not in trace.read_text()
+        assert "example.com" not in trace.read_text()
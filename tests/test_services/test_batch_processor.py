@@ -0,0 +1,195 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from app.models.data_models import ArticleRequest, ExtractedLocation
+from app.services import batch_processor
+from app.services.batch_processor import (
+    Batch,
+    BatchGeocoder,
+    SingleFlight,
+    find_batch,
+    start_batch,
+)
+from app.services.geocoding import GeographicData
+from app.utils.cancellation import JobCancelledError
+from app.utils.job_scheduler import QueueFullError
+from config import Config
+
+
+def _extracted(name):
+    return ExtractedLocation(
+        original_text=name,
+        standardized_name=name,
+        context="context",
+        confidence="high",
+        location_type="city",
+    )
+
+
+def _wait_until_finished(batch, timeout=5):
+    deadline = time.time() + timeout
+    while not batch.is_finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert batch.is_finished
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        memo = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_lookup():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return "Paris"
+
+        results = []
+        owner = threading.Thread(
+            target=lambda: results.append(memo.call("paris", slow_lookup))
+        )
+        owner.start()
+        started.wait(1)
+        waiter = threading.Thread(
+            target=lambda: results.append(memo.call("paris", slow_lookup))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        owner.join(1)
+        waiter.join(1)
+
+        assert results == ["Paris", "Paris"]
+        assert len(calls) == 1
+        assert (memo.misses, memo.hits) == (1, 1)
+
+    def test_waiter_retries_when_owner_is_cancelled(self):
+        memo = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def cancelled_lookup():
+            started.set()
+            release.wait(1)
+            raise JobCancelledError("Client disconnected")
+
+        errors, results = [], []
+
+        def owner_call():
+            try:
+                memo.call("paris", cancelled_lookup)
+            except JobCancelledError as e:
+                errors.append(e)
+
+        owner = threading.Thread(target=owner_call)
+        owner.start()
+        started.wait(1)
+        waiter = threading.Thread(
+            target=lambda: results.append(memo.call("paris", lambda: "Paris"))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        owner.join(1)
+        waiter.join(1)
+
+        assert len(errors) == 1
+        assert results == ["Paris"]
+
+    def test_failed_call_is_retried(self):
+        memo = SingleFlight()
+        lookup = Mock(side_effect=[RuntimeError("down"), "Paris"])
+
+        with pytest.raises(RuntimeError):
+            memo.call("paris", lookup)
+
+        assert memo.call("paris", lookup) == "Paris"
+
+    def test_geocoder_delegates_other_methods(self):
+        service = Mock()
+        service.is_contained_within.return_value = True
+
+        assert BatchGeocoder(service).is_contained_within("a", "b")
+
+
+class TestBatch:
+    def test_identical_items_share_one_run(self):
+        batch = Batch(
+            "b1",
+            [
+                ArticleRequest(input="Floods in  Porto."),
+                ArticleRequest(input="Fires in Athens."),
+                ArticleRequest(input="Floods in Porto."),
+            ],
+        )
+
+        assert [item.index for item in batch.unique_items] == [0, 1]
+        assert batch.items[2].duplicate_of == 0
+
+        batch.finish_item(0, "complete", result={"locations": []})
+
+        assert [item.index for item in batch.finished_since(0)] == [0, 2]
+        assert batch.items[2].result == {"locations": []}
+        assert not batch.is_finished
+
+
+class TestStartBatch:
+    def setup_method(self):
+        self.geocoding_service = Mock()
+        self.geocoding_service.geocode_with_boundaries.side_effect = (
+            lambda name, **kwargs: GeographicData(
+                name=name, latitude=48.85, longitude=2.35
+            )
+        )
+        self.location_extractor = Mock()
+        self.location_extractor.extract_locations.return_value = [_extracted("Paris")]
+        self.summarizer = Mock()
+        self.summarizer.summarize_events_at_location.return_value = "Events"
+        self.ai_factory = Mock(return_value=(self.location_extractor, self.summarizer))
+
+    def test_places_are_geocoded_once_per_batch(self):
+        batch = Batch(
+            "b-geo",
+            [
+                ArticleRequest(input="Protests in Paris."),
+                ArticleRequest(input="Concert in Paris."),
+                ArticleRequest(input="Protests in Paris."),
+            ],
+        )
+
+        start_batch(batch, Mock(), self.geocoding_service, self.ai_factory)
+        _wait_until_finished(batch)
+
+        assert [item.status for item in batch.items] == ["complete"] * 3
+        assert self.geocoding_service.geocode_with_boundaries.call_count == 1
+        assert self.location_extractor.extract_locations.call_count == 2
+        assert self.ai_factory.call_count == 1
+        assert batch.summary()["shared_calls"]["geocoding_reused"] == 1
+        assert find_batch("b-geo") is batch
+
+    def test_cancelled_batch_skips_queued_items(self):
+        batch = Batch("b-cancel", [ArticleRequest(input="Protests in Paris.")])
+        batch.cancel_token.cancel("Cancelled by client")
+
+        start_batch(batch, Mock(), self.geocoding_service, self.ai_factory)
+        _wait_until_finished(batch)
+
+        assert batch.items[0].status == "cancelled"
+        assert batch.status == "cancelled"
+        self.ai_factory.assert_not_called()
+
+    def test_rejects_batch_when_pool_backlog_is_full(self, monkeypatch):
+        monkeypatch.setattr(Config, "BATCH_MAX_PENDING_ITEMS", 1)
+        batch = Batch(
+            "b-full",
+            [ArticleRequest(input="One."), ArticleRequest(input="Two.")],
+        )
+
+        with pytest.raises(QueueFullError):
+            start_batch(batch, Mock(), self.geocoding_service, self.ai_factory)
+
+        assert batch_processor._pending_items == 0
+        assert find_batch("b-full") is None
@@ -0,0 +1,222 @@
+import gzip
+import json
+import pytest
+from unittest.mock import Mock
+from app.models.data_models import ExtractedLocation
+from app.services import bulk_processor
+from app.services.bulk_processor import (
+    SharedCallCache,
+    SharedGeocoder,
+    read_jsonl,
+    read_warc,
+    run_bulk,
+)
+from app.services.geocoding import GeographicData
+from app.services.location_extractor import LocationExtractionError
+from config import Config
+
+
+def _warc_record(warc_type, uri, block):
+    header = (
+        f"WARC/1.0\r\nWARC-Type: {warc_type}\r\nWARC-Target-URI: {uri}\r\n"
+        f"WARC-Record-ID: <urn:uuid:{warc_type}-{uri}>\r\n"
+        f"Content-Length: {len(block)}\r\n\r\n"
+    ).encode()
+    return header + block + b"\r\n\r\n"
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+class TestReaders:
+    def test_read_jsonl(self, tmp_path):
+        path = tmp_path / "articles.jsonl"
+        path.write_text(
+            '{"id": "a", "url": "https://example.com/a"}\n'
+            "not json\n"
+            '{"text": "Floods in Porto."}\n'
+            '{"id": "empty"}\n'
+        )
+
+        records = list(read_jsonl(str(path)))
+
+        assert [(r.record_id, r.input, r.url) for r in records] == [
+            ("a", "https://example.com/a", "https://example.com/a"),
+            ("3", "Floods in Porto.", None),
+        ]
+
+    def test_read_warc_yields_html_responses(self, tmp_path):
+        html = gzip.compress(b"<html><body><p>Floods in Porto.</p></body></html>")
+        chunked = b"%x\r\n" % len(html) + html + b"\r\n0\r\n\r\n"
+        response = (
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+            b"Content-Encoding: gzip\r\nTransfer-Encoding: chunked\r\n\r\n" + chunked
+        )
+        image = b"HTTP/1.1 200 OK\r\nContent-Type: image/png\r\n\r\nPNG"
+        path = tmp_path / "crawl.warc.gz"
+        path.write_bytes(
+            gzip.compress(
+                _warc_record("request", "https://news.example/a", b"GET /a")
+                + _warc_record("response", "https://news.example/a", response)
+                + _warc_record("response", "https://news.example/a.png", image)
+            )
+        )
+
+        records = list(read_warc(str(path)))
+
+        assert len(records) == 1
+        assert records[0].url == "https://news.example/a"
+        assert records[0].charset == "utf-8"
+        assert b"Floods in Porto." in records[0].html
+
+
+class TestSharedCallCache:
+    def test_geocodes_are_shared_between_cache_instances(self, tmp_path):
+        path = str(tmp_path / "bulk_cache.sqlite3")
+        service = Mock()
+        service.geocode_with_boundaries.return_value = GeographicData(
+            name="Porto", latitude=41.15, longitude=-8.61, bounding_box=(41, 42, -9, -8)
+        )
+
+        SharedGeocoder(service, SharedCallCache(path)).geocode_with_boundaries("Porto")
+        geo_data = SharedGeocoder(
+            service, SharedCallCache(path)
+        ).geocode_with_boundaries("Porto")
+
+        assert geo_data.bounding_box == (41, 42, -9, -8)
+        assert service.geocode_with_boundaries.call_count == 1
+
+    def test_failed_geocodes_are_not_cached(self, tmp_path):
+        service = Mock()
+        service.geocode_with_boundaries.return_value = None
+        geocoder = SharedGeocoder(
+            service, SharedCallCache(str(tmp_path / "bulk_cache.sqlite3"))
+        )
+
+        geocoder.geocode_with_boundaries("Nowhere")
+        geocoder.geocode_with_boundaries("Nowhere")
+
+        assert service.geocode_with_boundaries.call_count == 2
+
+
+class TestRunBulk:
+    @pytest.fixture(autouse=True)
+    def fake_services(self, monkeypatch):
+        self.location_extractor = Mock()
+        self.location_extractor.extract_locations.return_value = [
+            ExtractedLocation(
+                original_text="Porto",
+                standardized_name="Porto",
+                context="context",
+                confidence="high",
+                location_type="city",
+            )
+        ]
+        self.summarizer = Mock()
+        self.summarizer.summarize_events_at_location.return_value = "Floods"
+        self.geocoding_service = Mock()
+        self.geocoding_service.geocode_with_boundaries.return_value = GeographicData(
+            name="Porto", latitude=41.15, longitude=-8.61
+        )
+        monkeypatch.setattr(Config, "GEMINI_API_KEY", "test-key")
+        monkeypatch.setattr(
+            bulk_processor, "LocationExtractor", lambda key: self.location_extractor
+        )
+        monkeypatch.setattr(
+            bulk_processor, "EventSummarizer", lambda key: self.summarizer
+        )
+        monkeypatch.setattr(
+            bulk_processor, "GeocodingService", lambda: self.geocoding_service
+        )
+
+    def test_processes_and_resumes(self, tmp_path):
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(
+            source,
+            [
+                {"id": "1", "text": "Floods in Porto."},
+                {"id": "2", "text": "More floods in Porto."},
+                {"id": "3", "text": "Floods in Porto."},
+            ],
+        )
+        output = tmp_path / "results.jsonl"
+
+        first = run_bulk(str(source), str(output), workers=0, limit=2, flush_every=1)
+        second = run_bulk(str(source), str(output), workers=0)
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [row["id"] for row in rows] == ["1", "2", "3"]
+        assert all(row["status"] == "ok" for row in rows)
+        assert rows[0]["locations"][0]["name"] == "Porto"
+        assert (first["processed"], second["processed"], second["skipped"]) == (2, 1, 2)
+        # Same text again, and the same place in every article
+        assert self.location_extractor.extract_locations.call_count == 2
+        assert self.geocoding_service.geocode_with_boundaries.call_count == 1
+
+    def test_torn_last_line_is_reprocessed(self, tmp_path):
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(source, [{"id": "1", "text": "Floods in Porto."}])
+        output = tmp_path / "results.jsonl"
+        output.write_text('{"id": "1", "status": "o')
+
+        stats = run_bulk(str(source), str(output), workers=0)
+
+        assert stats["processed"] == 1
+        assert json.loads(output.read_text())["status"] == "ok"
+
+    def test_retry_errors_reprocesses_failures(self, tmp_path):
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(source, [{"id": "1", "text": "Floods in Porto."}])
+        output = tmp_path / "results.jsonl"
+        output.write_text('{"id": "1", "status": "error", "error": "down"}\n')
+
+        assert run_bulk(str(source), str(output), workers=0)["processed"] == 0
+        assert (
+            run_bulk(str(source), str(output), workers=0, retry_errors=True)[
+                "processed"
+            ]
+            == 1
+        )
+
+    def test_failed_extraction_is_an_error_and_not_shared(self, tmp_path):
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(source, [{"id": "1", "text": "Floods in Porto."}])
+        output = tmp_path / "results.jsonl"
+        porto = self.location_extractor.extract_locations.return_value
+        self.location_extractor.extract_locations.side_effect = [
+            LocationExtractionError("No JSON array found in LLM response"),
+            porto,
+        ]
+
+        run_bulk(str(source), str(output), workers=0)
+        assert json.loads(output.read_text())["status"] == "error"
+
+        run_bulk(str(source), str(output), workers=0, retry_errors=True)
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert rows[-1]["status"] == "ok"
+        assert rows[-1]["locations"][0]["name"] == "Porto"
+        assert self.location_extractor.extract_locations.call_count == 2
+
+    def test_existing_output_without_resume_is_an_error(self, tmp_path):
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(source, [{"id": "1", "text": "Floods in Porto."}])
+        output = tmp_path / "results.jsonl"
+        output.write_text("")
+
+        with pytest.raises(FileExistsError):
+            run_bulk(str(source), str(output), workers=0, resume=False)
+
+    def test_parquet_output(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        source = tmp_path / "articles.jsonl"
+        _write_jsonl(source, [{"id": "1", "text": "Floods in Porto."}])
+        output = tmp_path / "results.parquet"
+
+        run_bulk(str(source), str(output), workers=0)
+
+        table = pq.read_table(str(output))
+        assert table["id"].to_pylist() == ["1"]
+        assert table["locations"].to_pylist()[0][0]["name"] == "Porto"
@@ -0,0 +1,85 @@
+import json
+import pytest
+from app.services.extraction_profiles import (
+    MAX_PROFILE_MISSES,
+    ExtractionProfileStore,
+    get_extraction_profile_store,
+    profile_domain,
+)
+from config import Config
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExtractionProfileStore(str(tmp_path / "profiles.sqlite3"))
+
+
+class TestExtractionProfileStore:
+    def test_learn_persists_across_instances(self, store):
+        store.learn("example.com", "div.story", 420.0)
+
+        reopened = ExtractionProfileStore(store.path)
+        profile = reopened.get("example.com")
+
+        assert profile.selector == "div.story"
+        assert profile.score == 420.0
+        assert not profile.manual
+
+    def test_unknown_domain(self, store):
+        assert store.get("example.com") is None
+
+    def test_repeated_misses_drop_learned_profile(self, store):
+        store.learn("example.com", "div.story", 420.0)
+
+        for _ in range(MAX_PROFILE_MISSES):
+            store.record_miss("example.com")
+
+        assert store.get("example.com") is None
+        assert ExtractionProfileStore(store.path).get("example.com") is None
+
+    def test_hit_resets_misses(self, store):
+        store.learn("example.com", "div.story", 420.0)
+        store.record_miss("example.com")
+        store.record_hit("example.com")
+
+        assert store.get("example.com").misses == 0
+
+    def test_manual_override_is_never_relearned_or_dropped(self, store):
+        store.set_override("example.com", "#main-text")
+
+        store.learn("example.com", "div.story", 900.0)
+        for _ in range(MAX_PROFILE_MISSES):
+            store.record_miss("example.com")
+
+        profile = store.get("example.com")
+        assert profile.selector == "#main-text"
+        assert profile.manual
+
+    def test_load_overrides_from_json(self, store, tmp_path):
+        overrides = tmp_path / "overrides.json"
+        overrides.write_text(json.dumps({"News.Example.com": "div.body-copy"}))
+
+        assert store.load_overrides(str(overrides)) == 1
+        assert store.get("news.example.com").selector == "div.body-copy"
+
+
+def test_profile_domain_normalization():
+    assert profile_domain("https://WWW.Example.com:8443/a/b?c=1") == "example.com"
+    assert profile_domain("http://news.example.co.uk/x") == "news.example.co.uk"
+
+
+def test_profile_store_disabled_with_empty_path(monkeypatch):
+    monkeypatch.setattr(Config, "EXTRACTION_PROFILE_PATH", "")
+
+    assert get_extraction_profile_store() is None
+
+
+def test_profile_store_loads_configured_overrides(monkeypatch, tmp_path):
+    overrides = tmp_path / "overrides.json"
+    overrides.write_text(json.dumps({"example.com": "#story"}))
+    monkeypatch.setattr(
+        Config, "EXTRACTION_PROFILE_PATH", str(tmp_path / "other.sqlite3")
+    )
+    monkeypatch.setattr(Config, "EXTRACTION_PROFILE_OVERRIDES", str(overrides))
+
+    assert get_extraction_profile_store().get("example.com").selector == "#story"
@@ -0,0 +1,86 @@
+from unittest.mock import Mock
+import pytest
+from app.services import gemini_client
+from app.services.gemini_client import (
+    estimate_tokens,
+    record_usage,
+    token_cost,
+    usage_from_response,
+)
+from app.utils import tracing
+from app.utils.stage_timing import collect_timings
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def unmeasured_models():
+    gemini_client.chars_per_token.clear()
+    yield
+    gemini_client.chars_per_token.clear()
+
+
+class TestTokenUsage:
+    def test_usage_needs_a_reported_prompt_count(self):
+        assert usage_from_response(Mock(spec=["text"])) is None
+        assert usage_from_response(Mock()) is None  # attributes that aren't counts
+
+    def test_cost_uses_list_prices_unless_overridden(self, monkeypatch):
+        assert token_cost("gemini-2.0-flash", 1_000_000, 1_000_000) == pytest.approx(
+            0.5
+        )
+        assert token_cost("unknown-model", 1000, 1000) == 0
+
+        monkeypatch.setattr(Config, "GEMINI_PRICES", '{"unknown-model": [1, 2]}')
+        assert token_cost("unknown-model", 1_000_000, 500_000) == pytest.approx(2.0)
+
+    def test_malformed_price_entries_are_ignored(self, monkeypatch):
+        monkeypatch.setattr(
+            Config,
+            "GEMINI_PRICES",
+            '{"gemini-2.0-flash": 0.1, "gemini-2.5-flash": ["a", 1], "m": [1, 2]}',
+        )
+
+        assert token_cost("gemini-2.0-flash", 1_000_000, 0) == pytest.approx(0.1)
+        assert token_cost("gemini-2.5-flash", 1_000_000, 0) == pytest.approx(0.3)
+        assert token_cost("m", 1_000_000, 0) == pytest.approx(1.0)
+
+        monkeypatch.setattr(Config, "GEMINI_PRICES", "[1, 2]")
+        assert token_cost("gemini-2.0-flash", 1_000_000, 0) == pytest.approx(0.1)
+
+    def test_accounting_failure_does_not_fail_the_call(self, monkeypatch):
+        def broken_cost(*args):
+            raise TypeError("bad price")
+
+        monkeypatch.setattr(gemini_client, "token_cost", broken_cost)
+        response = Mock(
+            usage_metadata=Mock(prompt_token_count=100, candidates_token_count=5)
+        )
+
+        record_usage(response, "gemini-2.0-flash", "extraction", "prompt")
+
+    def test_token_estimates_follow_measured_usage(self):
+        model = "gemini-2.0-flash"
+        response = Mock(
+            usage_metadata=Mock(prompt_token_count=100, candidates_token_count=5)
+        )
+        assert estimate_tokens("x" * 400, model) == 100
+
+        with collect_timings() as timings:
+            record_usage(response, model, "extraction", "x" * 250)
+
+        assert estimate_tokens("x" * 400, model) == 160
+        assert timings.to_dict()["tokens"]["by_stage"][0]["calls"] == 1
+
+    def test_usage_is_summed_on_the_current_span(self):
+        response = Mock(
+            usage_metadata=Mock(prompt_token_count=100, candidates_token_count=5)
+        )
+        trace = tracing.Trace("0" * 32)
+        span = tracing.Span(trace, "extract_locations")
+
+        with tracing.use_span(span, end_on_exit=False):
+            record_usage(response, "gemini-2.0-flash", "extraction", "prompt")
+            record_usage(response, "gemini-2.0-flash", "extraction_correction", "p")
+
+        assert span.attributes["gen_ai.usage.input_tokens"] == 200
+        assert span.attributes["gen_ai.usage.output_tokens"] == 10
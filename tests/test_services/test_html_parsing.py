@@ -0,0 +1,119 @@
+import os
+import pytest
+from app.services.html_parsing import (
+    BeautifulSoupParser,
+    LxmlParser,
+    get_html_parser,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "fixtures", "html")
+FIXTURES = sorted(name for name in os.listdir(FIXTURES_DIR) if name.endswith(".html"))
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as handle:
+        return handle.read()
+
+
+class TestLxmlParser:
+    def setup_method(self):
+        pytest.importorskip("lxml")
+        self.parser = LxmlParser()
+
+    @pytest.mark.parametrize("fixture", FIXTURES)
+    def test_matches_html_parser_output(self, fixture):
+        content = _load(fixture)
+
+        assert self.parser.parse(content) == BeautifulSoupParser().parse(content)
+
+    def test_picks_highest_priority_container(self):
+        title, text = self.parser.parse(_load("wordpress_entry_content.html"))
+
+        assert title.startswith("Wildfire near Kelowna")
+        assert "McDougall Creek" in text
+        assert "should not be chosen" not in text
+
+    def test_header_charset_overrides_sniffing(self):
+        content = "<html><body><article>Zürich</article></body></html>".encode(
+            "iso-8859-1"
+        )
+
+        assert self.parser.parse(content, "iso-8859-1") == (None, "Zürich")
+
+    def test_empty_document(self):
+        assert self.parser.parse(b"") == (None, "")
+        assert self.parser.parse(b"   ") == (None, "")
+
+
+CUSTOM_CONTAINER_PAGE = (
+    b"<html><head><title>Custom</title></head><body>"
+    b"<div class='nav'><p>Home</p><p>World</p></div>"
+    b"<div class='story-text'>"
+    b"<p>Residents of Valencia were told to stay indoors as the storm arrived.</p>"
+    b"<p>Rail services between Valencia and Madrid were suspended overnight.</p>"
+    b"</div><div class='footer'><p>Copyright</p></div></body></html>"
+)
+
+
+@pytest.fixture(params=["html.parser", "lxml"])
+def parser(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return get_html_parser(request.param)
+
+
+class TestExtract:
+    def test_learns_densest_container(self, parser):
+        result = parser.extract(CUSTOM_CONTAINER_PAGE, learn=True)
+
+        assert result.learned_selector == "div.story-text"
+        assert result.selector == "div.story-text"
+        assert "Copyright" not in result.text
+        assert result.text.startswith("Residents of Valencia")
+
+    def test_without_learning_falls_back_to_body(self, parser):
+        result = parser.extract(CUSTOM_CONTAINER_PAGE)
+
+        assert result.selector == "body"
+        assert result.learned_selector is None
+        assert "Copyright" in result.text
+
+    def test_profile_selector_tried_first(self, parser):
+        content = _load("wordpress_entry_content.html").replace(
+            b"This should not be chosen", b"Chosen by profile. " * 20
+        )
+
+        result = parser.extract(content, selector="div.post-content")
+
+        assert result.selector == "div.post-content"
+        assert result.text.startswith("Chosen by profile.")
+
+    def test_profile_selector_with_too_little_text_is_ignored(self, parser):
+        result = parser.extract(
+            _load("wordpress_entry_content.html"), selector="div.post-content"
+        )
+
+        assert result.selector == ".entry-content"
+
+    @pytest.mark.parametrize("fixture", FIXTURES)
+    def test_backends_agree_when_learning(self, fixture):
+        pytest.importorskip("lxml")
+        content = _load(fixture)
+
+        assert LxmlParser().extract(
+            content, learn=True
+        ) == BeautifulSoupParser().extract(content, learn=True)
+
+
+class TestGetHtmlParser:
+    def test_named_parser(self):
+        assert isinstance(get_html_parser("html.parser"), BeautifulSoupParser)
+
+    def test_unknown_parser(self):
+        with pytest.raises(ValueError):
+            get_html_parser("regex")
+
+    def test_auto_prefers_lxml(self):
+        pytest.importorskip("lxml")
+
+        assert isinstance(get_html_parser("auto"), LxmlParser)
@@ -0,0 +1,157 @@
+from app.models.data_models import LocationData
+from app.services.location_clusters import (
+    MAX_TILES_PER_REQUEST,
+    ClusterIndex,
+    build_levels,
+    cell_bounds,
+    cell_of,
+    deinterleave,
+    interleave,
+    tiles_covering,
+)
+from app.services.location_index import LocationIndex
+
+import pytest
+
+WORLD = (-85.0, 85.0, -180.0, 180.0)
+
+
+def _location(name, lat, lon):
+    return LocationData(name=name, latitude=lat, longitude=lon, events_summary="News")
+
+
+def _clusters(tmp_path, max_zoom=16, refresh_seconds=0):
+    index = LocationIndex(str(tmp_path / "locations.sqlite3"))
+    index.add_article(
+        "portugal",
+        [
+            (_location("Porto", 41.15, -8.61), None),
+            (_location("Braga", 41.55, -8.42), None),
+            (_location("Lisbon", 38.72, -9.14), None),
+        ],
+        title="Floods in Portugal",
+    )
+    index.add_article("fiji", [(_location("Suva", -18.14, 178.44), None)])
+    return ClusterIndex(
+        index, max_zoom=max_zoom, cache_size=64, refresh_seconds=refresh_seconds
+    )
+
+
+def _names(collection):
+    return sorted(
+        feature["properties"]["name"]
+        for feature in collection["features"]
+        if not feature["properties"]["cluster"]
+    )
+
+
+def _counts(collection):
+    return sorted(
+        feature["properties"]["point_count"]
+        for feature in collection["features"]
+        if feature["properties"]["cluster"]
+    )
+
+
+class TestGrid:
+    def test_morton_keys_round_trip(self):
+        assert deinterleave(interleave(12345, 678)) == (12345, 678)
+        assert interleave(5, 3) >> 2 == interleave(2, 1)
+
+    def test_cell_contains_its_point(self):
+        south, north, west, east = cell_bounds(10, cell_of(41.15, -8.61, 10))
+
+        assert south <= 41.15 <= north
+        assert west <= -8.61 <= east
+
+    def test_levels_merge_child_cells(self):
+        points = [(1, 41.15, -8.61), (2, 41.55, -8.42), (3, -18.14, 178.44)]
+
+        levels = build_levels(points, 8)
+
+        assert len(levels) == 9
+        assert sorted(levels[0].counts) == [1, 2]
+        assert list(levels[8].counts) == [1, 1, 1]
+
+    def test_tiles_covering_wrap_across_antimeridian(self):
+        tiles = tiles_covering((-20.0, -10.0, 170.0, -170.0), 3)
+
+        assert sorted({x for x, _ in tiles}) == [0, 7]
+
+    def test_tiles_covering_wrap_never_repeats_tiles(self):
+        assert tiles_covering((-60.0, 60.0, 170.0, -170.0), 0) == [(0, 0)]
+
+        tiles = tiles_covering((-60.0, 60.0, 110.0, 50.0), 1)
+
+        assert sorted(tiles) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    def test_tiles_covering_is_bounded(self):
+        with pytest.raises(ValueError, match="tiles"):
+            tiles_covering(WORLD, 10)
+        assert len(tiles_covering(WORLD, 4)) <= MAX_TILES_PER_REQUEST
+
+
+class TestClusterIndex:
+    def test_nearby_locations_cluster_at_low_zoom(self, tmp_path):
+        collection = _clusters(tmp_path).clusters(WORLD, 0)
+
+        assert _counts(collection) == [3]
+        assert _names(collection) == ["Suva"]
+        assert collection["metadata"]["points"] == 4
+
+    def test_locations_split_when_zoomed_in(self, tmp_path):
+        collection = _clusters(tmp_path).clusters((37.0, 42.0, -10.0, -8.0), 9)
+
+        assert _names(collection) == ["Braga", "Lisbon", "Porto"]
+        porto = next(
+            f for f in collection["features"] if f["properties"]["name"] == "Porto"
+        )
+        assert porto["geometry"]["coordinates"] == [-8.61, 41.15]
+        assert porto["properties"]["article_title"] == "Floods in Portugal"
+
+    def test_cluster_properties(self, tmp_path):
+        collection = _clusters(tmp_path).clusters(WORLD, 0)
+
+        cluster = next(f for f in collection["features"] if f["properties"]["cluster"])
+        west, south, east, north = cluster["bbox"]
+        lon, lat = cluster["geometry"]["coordinates"]
+        assert west <= lon <= east and south <= lat <= north
+        assert lat == pytest.approx((41.15 + 41.55 + 38.72) / 3)
+        # Lisbon is on its own a zoom level in, Porto and Braga only later
+        assert cluster["properties"]["expansion_zoom"] == 1
+
+    def test_stacked_locations_never_expand(self, tmp_path):
+        clusters = _clusters(tmp_path, max_zoom=12)
+        clusters.location_index.add_article(
+            "paris",
+            [(_location("Paris", 48.85, 2.35), None)] * 2,
+        )
+
+        collection = clusters.clusters((48.0, 49.0, 2.0, 3.0), 18)
+
+        assert collection["metadata"]["cluster_zoom"] == 12
+        assert _counts(collection) == [2]
+        assert collection["features"][0]["properties"]["expansion_zoom"] is None
+
+    def test_tiles_are_cached_until_the_index_changes(self, tmp_path):
+        clusters = _clusters(tmp_path)
+        clusters.clusters(WORLD, 0)
+        cached = len(clusters.tiles)
+
+        clusters.clusters(WORLD, 0)
+        assert len(clusters.tiles) == cached
+
+        clusters.location_index.add_article(
+            "madeira", [(_location("Funchal", 32.65, -16.91), None)]
+        )
+        assert _counts(clusters.clusters(WORLD, 0)) == [4]
+
+    def test_index_is_only_rechecked_after_refresh_interval(self, tmp_path):
+        clusters = _clusters(tmp_path, refresh_seconds=3600)
+        clusters.clusters(WORLD, 0)
+
+        clusters.location_index.add_article(
+            "madeira", [(_location("Funchal", 32.65, -16.91), None)]
+        )
+
+        assert _counts(clusters.clusters(WORLD, 0)) == [3]
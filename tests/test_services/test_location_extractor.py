@@ -1,6 +1,9 @@
 from unittest.mock import Mock, patch
-from app.services.location_extractor import LocationExtractor
+import pytest
+from app.services.location_extractor import LocationExtractionError, LocationExtractor
 from app.models.data_models import ExtractedLocation
+from app.utils import metrics
+from app.utils.stage_timing import collect_timings
 
 
 class TestLocationExtractor:
@@ -127,10 +130,23 @@ class TestLocationExtractor:
         mock_model.generate_content.return_value = mock_response
         mock_model_class.return_value = mock_model
 
+        extractor = LocationExtractor("fake-api-key")
+        with pytest.raises(LocationExtractionError):
+            extractor.extract_locations("Article text")
+
+    @patch("app.services.location_extractor.genai.GenerativeModel")
+    def test_extract_locations_empty_array(self, mock_model_class):
+        mock_model = Mock()
+        mock_response = Mock()
+        mock_response.text = "[]"
+        mock_model.generate_content.return_value = mock_response
+        mock_model_class.return_value = mock_model
+
         extractor = LocationExtractor("fake-api-key")
         locations = extractor.extract_locations("Article text")
 
         assert locations == []
+        assert mock_model.generate_content.call_count == 1
 
     @patch("app.services.location_extractor.genai.GenerativeModel")
     def test_extract_locations_api_error(self, mock_model_class):
@@ -140,9 +156,8 @@ class TestLocationExtractor:
         mock_model_class.return_value = mock_model
 
         extractor = LocationExtractor("fake-api-key")
-        locations = extractor.extract_locations("Article text")
-
-        assert locations == []
+        with pytest.raises(LocationExtractionError):
+            extractor.extract_locations("Article text")
 
     @patch("app.services.location_extractor.genai.GenerativeModel")
     def test_extract_locations_malformed_objects(self, mock_model_class):
@@ -172,3 +187,51 @@ class TestLocationExtractor:
         # Should get only valid object, skip malformed object and string
         assert len(locations) == 1
         assert locations[0].original_text == "Valid Location"
+
+    @patch("app.services.location_extractor.genai.GenerativeModel")
+    def test_self_correction_tokens_are_counted_separately(self, mock_model_class):
+        mock_model = Mock()
+        mock_initial_response = Mock()
+        mock_initial_response.text = '["Lisbon"]'
+        mock_initial_response.usage_metadata = Mock(
+            prompt_token_count=900, candidates_token_count=10
+        )
+        mock_corrected_response = Mock()
+        mock_corrected_response.text = """[
+            {
+                "original_text": "Lisbon",
+                "standardized_name": "Lisbon",
+                "context": "corrected",
+                "confidence": "high",
+                "location_type": "city",
+                "disambiguation_hints": []
+            }
+        ]"""
+        mock_corrected_response.usage_metadata = Mock(
+            prompt_token_count=120, candidates_token_count=40
+        )
+        mock_model.generate_content.side_effect = [
+            mock_initial_response,
+            mock_corrected_response,
+        ]
+        mock_model_class.return_value = mock_model
+
+        extractor = LocationExtractor("fake-api-key")
+        with collect_timings() as timings:
+            extractor.extract_locations("Article about Lisbon")
+
+        usage = {u["stage"]: u for u in timings.token_usage()["by_stage"]}
+        assert usage["extraction"]["prompt_tokens"] == 900
+        assert usage["extraction_correction"]["output_tokens"] == 40
+        assert usage["extraction"]["model"] == LocationExtractor.MODEL_NAME
+
+    @patch("app.services.location_extractor.genai.list_models")
+    def test_model_lookup_failure_is_counted_as_upstream_error(self, mock_list):
+        mock_list.side_effect = RuntimeError("503 service unavailable")
+        before = metrics.UPSTREAM_ERRORS.value(upstream="gemini", kind="error")
+
+        assert self.extractor._fetch_model_max_tokens() is None
+        assert (
+            metrics.UPSTREAM_ERRORS.value(upstream="gemini", kind="error")
+            == before + 1
+        )
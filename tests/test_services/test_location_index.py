@@ -0,0 +1,97 @@
+import time
+from app.models.data_models import LocationData
+from app.services.location_index import (
+    LocationIndex,
+    article_id,
+    haversine_km,
+    radius_bounding_box,
+)
+
+
+def _location(name, lat, lon):
+    return LocationData(name=name, latitude=lat, longitude=lon, events_summary="News")
+
+
+def _index(tmp_path):
+    index = LocationIndex(str(tmp_path / "locations.sqlite3"))
+    index.add_article(
+        "porto",
+        [
+            (_location("Porto", 41.15, -8.61), (41.1, 41.2, -8.7, -8.5)),
+            (_location("Braga", 41.55, -8.42), None),
+        ],
+        request_id="req-1",
+        title="Floods in northern Portugal",
+        source="https://news.example/floods",
+    )
+    index.add_article("fiji", [(_location("Suva", -18.14, 178.44), None)])
+    index.add_article("samoa", [(_location("Apia", -13.83, -171.76), None)])
+    return index
+
+
+class TestLocationIndex:
+    def test_bbox_search(self, tmp_path):
+        results = _index(tmp_path).search_bbox((41.0, 41.3, -9.0, -8.0))
+
+        assert [r["name"] for r in results] == ["Porto"]
+        assert results[0]["article_title"] == "Floods in northern Portugal"
+        assert results[0]["source"] == "https://news.example/floods"
+        assert results[0]["bounding_box"] == [41.1, 41.2, -8.7, -8.5]
+
+    def test_bbox_crossing_antimeridian(self, tmp_path):
+        results = _index(tmp_path).search_bbox((-20.0, -10.0, 170.0, -170.0))
+
+        assert sorted(r["name"] for r in results) == ["Apia", "Suva"]
+
+    def test_radius_search_is_sorted_by_distance(self, tmp_path):
+        results = _index(tmp_path).search_radius(41.15, -8.61, 60)
+
+        assert [r["name"] for r in results] == ["Porto", "Braga"]
+        assert results[0]["distance_km"] == 0
+        assert 40 < results[1]["distance_km"] < 60
+
+    def test_since_filters_older_locations(self, tmp_path):
+        index = _index(tmp_path)
+
+        assert index.search_bbox((-90, 90, -180, 180), since=time.time() + 60) == []
+
+    def test_reprocessing_replaces_article_locations(self, tmp_path):
+        index = _index(tmp_path)
+        index.add_article("porto", [(_location("Porto", 41.15, -8.61), None)])
+
+        results = index.search_bbox((41.0, 42.0, -9.0, -8.0))
+
+        assert [r["name"] for r in results] == ["Porto"]
+        assert results[0]["bounding_box"] is None
+
+    def test_article_id_ignores_cosmetic_differences(self):
+        assert article_id("Floods in  Porto.\n") == article_id("Floods in Porto.")
+
+    def test_radius_bounding_box_contains_circle(self):
+        south, north, west, east = radius_bounding_box(60.0, 10.0, 100)
+
+        assert haversine_km(60.0, 10.0, north, 10.0) >= 99
+        assert haversine_km(60.0, 10.0, 60.0, east) >= 99
+        assert west < 10.0 < east
+
+    def test_generation_changes_with_every_article(self, tmp_path):
+        index = _index(tmp_path)
+        before = index.generation()
+
+        index.add_article("porto", [])
+
+        assert index.generation() == before + 1
+
+    def test_get_locations_by_id(self, tmp_path):
+        index = _index(tmp_path)
+        ids = {location_id for location_id, _, _ in index.points()}
+
+        locations = index.get_locations(ids | {999})
+
+        assert sorted(ids) == sorted(locations)
+        assert {location["name"] for location in locations.values()} == {
+            "Porto",
+            "Braga",
+            "Suva",
+            "Apia",
+        }
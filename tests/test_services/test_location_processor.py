@@ -2,7 +2,11 @@ from unittest.mock import Mock, patch
 from app.services.location_processor import LocationProcessor
 from app.models.data_models import ArticleResponse, LocationData, ExtractedLocation
 from app.services.geocoding import GeographicData
-from app.services.summarizer import EventSummarizer
+from app.services.summarizer import EventSummarizer, SummaryError
+from app.services.geocoding import GeocodingError, GeocodingService
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.deadline import Deadline, DeadlineExceededError
+import pytest
 
 
 class TestLocationProcessor:
@@ -270,3 +274,165 @@ class TestLocationProcessor:
         )
 
         assert locations2[0].confidence == 0.6
+
+    def test_process_locations_pipeline_cancelled_skips_upstream_calls(self):
+        extracted_location = ExtractedLocation(
+            original_text="Paris",
+            standardized_name="Paris",
+            context="Context",
+            confidence="high",
+            location_type="city",
+            disambiguation_hints=[],
+        )
+        geocoding_service = GeocodingService()
+        geocoding_service.geocoder = Mock()
+        processor = LocationProcessor(geocoding_service)
+        mock_summarizer = Mock(spec=EventSummarizer)
+        response = ArticleResponse(
+            article_text="Sample article text", locations=[], processing_time=0.0
+        )
+
+        cancel_token = CancelToken()
+        cancel_token.cancel("Client disconnected")
+
+        with pytest.raises(JobCancelledError):
+            processor.process_locations_pipeline(
+                [extracted_location] * 3,
+                "article text",
+                mock_summarizer,
+                response,
+                "test",
+                cancel_token=cancel_token,
+            )
+
+        geocoding_service.geocoder.geocode.assert_not_called()
+        mock_summarizer.summarize_events_at_location.assert_not_called()
+
+    def test_process_locations_pipeline_deadline_keeps_finished_locations(self):
+        names = ["Paris", "Lyon", "Nice"]
+        extracted = [
+            ExtractedLocation(
+                original_text=name,
+                standardized_name=name,
+                context="Context",
+                confidence="medium",
+                location_type="city",
+                disambiguation_hints=[],
+            )
+            for name in names
+        ]
+
+        def geocode(name, cancel_token=None, deadline=None):
+            if name != "Paris":
+                raise DeadlineExceededError("too slow")
+            return GeographicData(name=name, latitude=48.8, longitude=2.3)
+
+        self.mock_geocoding_service.geocode_with_boundaries.side_effect = geocode
+        mock_summarizer = Mock(spec=EventSummarizer)
+        mock_summarizer.summarize_events_at_location.return_value = "Summary"
+        response = ArticleResponse(
+            article_text="Sample article text", locations=[], processing_time=0.0
+        )
+
+        locations, _ = self.processor.process_locations_pipeline(
+            extracted,
+            "article text",
+            mock_summarizer,
+            response,
+            "test",
+            deadline=Deadline(5),
+        )
+
+        assert [loc.name for loc in locations] == ["Paris"]
+        deadline_warnings = [
+            w for w in response.warnings if w.code == "DEADLINE_EXCEEDED"
+        ]
+        assert len(deadline_warnings) == 2
+
+    def test_process_locations_pipeline_service_errors_are_flagged(self):
+        extracted = [
+            ExtractedLocation(
+                original_text=name,
+                standardized_name=name,
+                context="Context",
+                confidence="medium",
+                location_type="city",
+                disambiguation_hints=[],
+            )
+            for name in ["Paris", "Lyon"]
+        ]
+
+        def geocode(name, **kwargs):
+            if name == "Lyon":
+                raise GeocodingError("Nominatim is down")
+            return GeographicData(name=name, latitude=48.8, longitude=2.3)
+
+        self.mock_geocoding_service.geocode_with_boundaries.side_effect = geocode
+        mock_summarizer = Mock(spec=EventSummarizer)
+        mock_summarizer.summarize_events_at_location.side_effect = SummaryError(
+            "API Error"
+        )
+        response = ArticleResponse(
+            article_text="Sample article text", locations=[], processing_time=0.0
+        )
+
+        locations, _ = self.processor.process_locations_pipeline(
+            extracted, "article text", mock_summarizer, response, "test"
+        )
+
+        assert [loc.name for loc in locations] == ["Paris"]
+        assert locations[0].events_summary == "Mentioned in article."
+        assert sorted(w.code for w in response.warnings) == [
+            "GEOCODING_UNAVAILABLE",
+            "SUMMARY_FAILED",
+        ]
+
+    def test_process_locations_pipeline_summary_timeout_keeps_location(self):
+        extracted_location = ExtractedLocation(
+            original_text="Paris",
+            standardized_name="Paris",
+            context="Context",
+            confidence="medium",
+            location_type="city",
+            disambiguation_hints=[],
+        )
+        self.mock_geocoding_service.geocode_with_boundaries.return_value = (
+            GeographicData(name="Paris", latitude=48.8, longitude=2.3)
+        )
+        mock_summarizer = Mock(spec=EventSummarizer)
+        mock_summarizer.summarize_events_at_location.side_effect = (
+            DeadlineExceededError("too slow")
+        )
+        response = ArticleResponse(
+            article_text="Sample article text", locations=[], processing_time=0.0
+        )
+
+        locations, _ = self.processor.process_locations_pipeline(
+            [extracted_location], "article text", mock_summarizer, response, "test"
+        )
+
+        assert locations[0].events_summary == "Mentioned in article."
+        assert response.warnings[0].code == "SUMMARY_SKIPPED"
+
+    def test_refresh_summaries_keeps_old_summary_on_failure(self):
+        paris = LocationData(
+            name="Paris", latitude=48.85, longitude=2.35, events_summary="Old Paris"
+        )
+        lyon = LocationData(
+            name="Lyon", latitude=45.76, longitude=4.83, events_summary="Old Lyon"
+        )
+        mock_summarizer = Mock(spec=EventSummarizer)
+        mock_summarizer.summarize_events_at_location.side_effect = (
+            lambda text, name, **kwargs: (
+                "New Paris" if name == "Paris" else "Rate limit exceeded"
+            )
+        )
+        response = ArticleResponse(
+            article_text="Sample article text", locations=[], processing_time=0.0
+        )
+
+        locations = self.processor.refresh_summaries(
+            [paris, lyon], "article text", mock_summarizer, response, "test"
+        )
+
+        assert [loc.events_summary for loc in locations] == ["New Paris", "Old Lyon"]
@@ -0,0 +1,154 @@
+import random
+import time
+import pytest
+from app.services import near_duplicates
+from app.services.near_duplicates import (
+    MAX_DISTANCE,
+    ArticleFingerprint,
+    NearDuplicateIndex,
+    hamming_distance,
+    simhash,
+)
+
+ARTICLE = "\n".join(
+    f"Paragraph {i}: heavy rain flooded streets in Porto and Braga on day {i}, "
+    f"and emergency crews evacuated residents from riverside homes near bridge {i}."
+    for i in range(20)
+)
+
+
+def _index(tmp_path, max_distance=3):
+    return NearDuplicateIndex(
+        str(tmp_path / "near_duplicates.sqlite3"),
+        max_distance=max_distance,
+        ttl_seconds=60,
+    )
+
+
+class TestSimHash:
+    def test_small_edit_keeps_fingerprint_close(self):
+        edited = ARTICLE.replace("day 7,", "day seven,")
+
+        assert hamming_distance(simhash(ARTICLE), simhash(edited)) <= 3
+
+    def test_different_articles_are_far_apart(self):
+        other = "Wildfires spread across the hills above Athens overnight."
+
+        assert hamming_distance(simhash(ARTICLE), simhash(other)) > 10
+
+
+class TestNearDuplicateIndex:
+    def test_finds_lightly_edited_copy(self, tmp_path):
+        index = _index(tmp_path)
+        index.add(ArticleFingerprint.of(ARTICLE), {"locations": ["Porto"]})
+        edited = ARTICLE.replace("day 7,", "day seven,")
+
+        match = index.find(ArticleFingerprint.of(edited))
+
+        assert match is not None
+        assert match.payload == {"locations": ["Porto"]}
+        assert match.changed_paragraphs == [7]
+        assert match.changed_ratio == 1 / 20
+
+    def test_exact_copy_has_no_changed_paragraphs(self, tmp_path):
+        index = _index(tmp_path)
+        index.add(ArticleFingerprint.of(ARTICLE), {})
+
+        match = index.find(ArticleFingerprint.of(ARTICLE))
+
+        assert match.distance == 0
+        assert match.changed_paragraphs == []
+
+    def test_unrelated_article_is_not_found(self, tmp_path):
+        index = _index(tmp_path)
+        index.add(ArticleFingerprint.of(ARTICLE), {})
+
+        assert index.find(ArticleFingerprint.of("Wildfires near Athens.")) is None
+
+    def test_expired_and_old_version_entries_are_ignored(self, tmp_path, monkeypatch):
+        index = _index(tmp_path)
+        index.add(ArticleFingerprint.of(ARTICLE), {})
+        monkeypatch.setattr(near_duplicates, "pipeline_version", lambda: "other")
+
+        assert index.find(ArticleFingerprint.of(ARTICLE)) is None
+
+        monkeypatch.undo()
+        monkeypatch.setattr(time, "time", lambda: 10**12)
+        assert index.find(ArticleFingerprint.of(ARTICLE)) is None
+        assert index.purge_expired() == 1
+        assert (
+            index._connect().execute("SELECT COUNT(*) FROM band_keys").fetchone()[0]
+            == 0
+        )
+
+    def test_rejects_distance_beyond_banding_guarantee(self, tmp_path):
+        with pytest.raises(ValueError):
+            _index(tmp_path, max_distance=MAX_DISTANCE + 1)
+
+    def test_fingerprints_within_max_distance_share_a_band(self):
+        rng = random.Random(7)
+        for _ in range(1000):
+            fingerprint = rng.getrandbits(64)
+            other = fingerprint
+            for bit in rng.sample(range(64), MAX_DISTANCE):
+                other ^= 1 << bit
+
+            bands = NearDuplicateIndex._bands(fingerprint)
+            assert any(a == b for a, b in zip(bands, NearDuplicateIndex._bands(other)))
+
+    def test_match_is_found_behind_many_colliding_articles(self, tmp_path):
+        rng = random.Random(3)
+        target = rng.getrandbits(64)
+        index = _index(tmp_path)
+        index.add(ArticleFingerprint(target ^ 0b101, []), {"match": True})
+        # Far away, but sharing the low half and so a band with the target
+        for _ in range(100):
+            decoy = target
+            for bit in rng.sample(range(32, 64), 8):
+                decoy ^= 1 << bit
+            index.add(ArticleFingerprint(decoy, []), {"match": False})
+
+        match = index.find(ArticleFingerprint(target, []))
+
+        assert match.payload == {"match": True}
+        assert match.distance == 2
+
+    def test_band_buckets_stay_small_in_a_large_index(self, tmp_path):
+        rng = random.Random(11)
+        index = _index(tmp_path)
+        fingerprints = [rng.getrandbits(64) for _ in range(20000)]
+        connection = index._connect()
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO articles "
+            "(article_id, simhash, version, paragraphs, payload, created_at) "
+            "VALUES (?, ?, ?, '[]', '{}', ?)",
+            [
+                (
+                    article_id,
+                    near_duplicates._to_signed(fingerprint),
+                    near_duplicates.pipeline_version(),
+                    time.time(),
+                )
+                for article_id, fingerprint in enumerate(fingerprints, 1)
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO band_keys (band, value, article_id) VALUES (?, ?, ?)",
+            [
+                (band, value, article_id)
+                for article_id, fingerprint in enumerate(fingerprints, 1)
+                for band, value in enumerate(index._bands(fingerprint))
+            ],
+        )
+        connection.execute("COMMIT")
+
+        largest = connection.execute(
+            "SELECT MAX(n) FROM (SELECT COUNT(*) AS n FROM band_keys "
+            "GROUP BY band, value)"
+        ).fetchone()[0]
+        assert largest <= 2
+
+        probe = fingerprints[1234] ^ (1 << 5) ^ (1 << 40)
+        assert len(index._candidates(probe)) <= 2
+        assert index.find(ArticleFingerprint(probe, [])).distance == 2
@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import Mock, patch
+from app.services.html_parsing import BeautifulSoupParser
+from app.services.parse_pool import ParsePool, ParseTimeoutError, get_parse_pool
+from config import Config
+
+PAGE = (
+    b"<html><head><title>Pool</title></head><body><article>Lyon</article></body></html>"
+)
+
+
+@pytest.fixture
+def pool():
+    parse_pool = ParsePool(max_workers=1, max_queue_size=1, shm_threshold=1024)
+    yield parse_pool
+    parse_pool.shutdown()
+
+
+class TestParsePool:
+    def test_parses_in_worker_process(self, pool):
+        result = pool.extract(BeautifulSoupParser(), PAGE, timeout=30)
+
+        assert (result.title, result.text, result.selector) == (
+            "Pool",
+            "Lyon",
+            "article",
+        )
+
+    def test_large_payload_goes_through_shared_memory(self, pool):
+        big_page = PAGE.replace(b"Lyon", b"Lyon " * 2000)
+
+        with patch(
+            "app.services.parse_pool.shared_memory.SharedMemory",
+            wraps=__import__("multiprocessing").shared_memory.SharedMemory,
+        ) as shared_memory_spy:
+            result = pool.extract(BeautifulSoupParser(), big_page, timeout=30)
+
+        assert result.title == "Pool"
+        assert result.text.startswith("Lyon Lyon")
+        assert shared_memory_spy.call_args.kwargs["create"] is True
+
+    def test_saturated_pool_parses_inline(self, pool):
+        parser = Mock(name="parser")
+        pool._slots.acquire()
+        pool._slots.acquire()
+
+        result = pool.extract(parser, PAGE, timeout=30, selector="#main")
+
+        assert result is parser.extract.return_value
+        parser.extract.assert_called_once_with(PAGE, None, "#main", False)
+
+    def test_timeout_raises_and_resets_pool(self, pool):
+        pool.extract(BeautifulSoupParser(), PAGE, timeout=30)
+        huge_page = PAGE.replace(b"Lyon", b"<p>Lyon</p>" * 200000)
+
+        with pytest.raises(ParseTimeoutError):
+            pool.extract(BeautifulSoupParser(), huge_page, timeout=0.01)
+
+        assert pool._executor is None
+        assert pool.extract(BeautifulSoupParser(), PAGE, timeout=30).text == "Lyon"
+
+    def test_caller_retries_when_pool_is_torn_down_under_it(self, pool):
+        pool.extract(BeautifulSoupParser(), PAGE, timeout=30)
+        broken = pool._executor
+        # What another caller's timeout does to every worker in the pool
+        for process in broken._processes.values():
+            process.terminate()
+            process.join()
+
+        result = pool.extract(BeautifulSoupParser(), PAGE, timeout=30)
+
+        assert result.text == "Lyon"
+        assert pool._executor is not broken
+
+
+def test_parse_pool_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(Config, "PARSE_POOL_WORKERS", 0)
+
+    assert get_parse_pool() is None
@@ -0,0 +1,49 @@
+import time
+from app.services import result_cache
+from app.services.result_cache import (
+    ResultCache,
+    is_cacheable,
+    normalize_article_text,
+    result_cache_key,
+)
+
+
+class TestResultCacheKey:
+    def test_cosmetic_differences_share_a_key(self):
+        assert result_cache_key("Floods in  Porto.\n\nMore rain") == result_cache_key(
+            "  Floods in Porto. More rain "
+        )
+
+    def test_different_text_differs(self):
+        assert result_cache_key("Floods in Porto") != result_cache_key(
+            "Floods in Braga"
+        )
+
+    def test_pipeline_version_is_part_of_key(self, monkeypatch):
+        key = result_cache_key("Floods in Porto")
+        monkeypatch.setattr(result_cache, "pipeline_version", lambda: "other")
+
+        assert result_cache_key("Floods in Porto") != key
+
+    def test_normalize_article_text(self):
+        assert normalize_article_text(" a\t b\n\nc ") == "a b c"
+
+
+class TestResultCache:
+    def test_round_trip(self, tmp_path):
+        cache = ResultCache(str(tmp_path / "results.sqlite3"), ttl_seconds=60)
+        cache.put("key", {"locations": [{"name": "Porto"}]})
+
+        assert cache.get("key") == {"locations": [{"name": "Porto"}]}
+        assert cache.get("missing") is None
+
+    def test_expired_entries_are_dropped(self, tmp_path, monkeypatch):
+        cache = ResultCache(str(tmp_path / "results.sqlite3"), ttl_seconds=60)
+        cache.put("key", {"locations": []})
+        monkeypatch.setattr(time, "time", lambda: 10**12)
+
+        assert cache.get("key") is None
+
+    def test_partial_results_are_not_cacheable(self):
+        assert is_cacheable({"warnings": [{"code": "GEOCODING_FAILED"}]})
+        assert not is_cacheable({"warnings": [{"code": "DEADLINE_EXCEEDED"}]})
@@ -1,5 +1,9 @@
 from unittest.mock import Mock, patch
-from app.services.summarizer import EventSummarizer
+import pytest
+from app.services.summarizer import EventSummarizer, SummaryError
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils import metrics
+from app.utils.stage_timing import collect_timings
 
 
 class TestEventSummarizer:
@@ -61,9 +65,8 @@ class TestEventSummarizer:
         mock_model_class.return_value = mock_model
 
         summarizer = EventSummarizer("fake-api-key")
-        summary = summarizer.summarize_events_at_location("Article", "Location")
-
-        assert summary == "Mentioned in article."
+        with pytest.raises(SummaryError):
+            summarizer.summarize_events_at_location("Article", "Location")
 
     @patch("app.services.summarizer.genai.GenerativeModel")
     def test_summarize_events_whitespace_handling(self, mock_model_class):
@@ -78,3 +81,46 @@ class TestEventSummarizer:
         summary = summarizer.summarize_events_at_location("Article", "Location")
 
         assert summary == "Events happened here."
+
+    @patch("app.services.summarizer.genai.GenerativeModel")
+    def test_summarize_events_cancelled_skips_llm_call(self, mock_model_class):
+        mock_model = Mock()
+        mock_model_class.return_value = mock_model
+        cancel_token = CancelToken()
+        cancel_token.cancel()
+
+        summarizer = EventSummarizer("fake-api-key")
+        with pytest.raises(JobCancelledError):
+            summarizer.summarize_events_at_location(
+                "Article", "Location", cancel_token=cancel_token
+            )
+
+        mock_model.generate_content.assert_not_called()
+
+    @patch("app.services.summarizer.genai.GenerativeModel")
+    def test_summarize_events_records_token_usage(self, mock_model_class):
+        mock_model = Mock()
+        mock_response = Mock()
+        mock_response.text = "Events happened here."
+        mock_response.usage_metadata = Mock(
+            prompt_token_count=300, candidates_token_count=12, thoughts_token_count=50
+        )
+        mock_model.generate_content.return_value = mock_response
+        mock_model_class.return_value = mock_model
+        before = metrics.LLM_TOKENS.value(
+            model=EventSummarizer.MODEL_NAME, stage="summary", kind="output"
+        )
+
+        summarizer = EventSummarizer("fake-api-key")
+        with collect_timings() as timings:
+            summarizer.summarize_events_at_location("Article", "Location")
+
+        usage = timings.token_usage()
+        assert (usage["prompt_tokens"], usage["output_tokens"]) == (300, 62)
+        assert usage["cost_usd"] > 0
+        assert (
+            metrics.LLM_TOKENS.value(
+                model=EventSummarizer.MODEL_NAME, stage="summary", kind="output"
+            )
+            == before + 62
+        )
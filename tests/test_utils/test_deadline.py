@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from app.utils.deadline import (
+    MIN_CALL_TIMEOUT,
+    Deadline,
+    DeadlineExceededError,
+    call_with_timeout,
+)
+
+
+class TestDeadline:
+    def test_timeout_is_capped_by_remaining_time(self):
+        deadline = Deadline(2)
+
+        assert deadline.timeout(10) <= 2
+        assert deadline.timeout(1) == 1
+
+    def test_timeout_has_a_floor(self):
+        deadline = Deadline(0.05)
+
+        assert deadline.timeout(10) == MIN_CALL_TIMEOUT
+
+    def test_expired_deadline_raises(self):
+        deadline = Deadline(0)
+
+        assert deadline.expired
+        with pytest.raises(DeadlineExceededError):
+            deadline.timeout(10)
+
+    def test_stage_never_outlives_parent(self):
+        deadline = Deadline(1)
+
+        stage = deadline.stage(0.25)
+        last_stage = deadline.stage(5)
+
+        assert stage.remaining() <= 0.25
+        assert last_stage.expires_at == deadline.expires_at
+
+
+class TestCallWithTimeout:
+    def test_returns_result(self):
+        assert call_with_timeout(lambda x: x * 2, 1, 21) == 42
+
+    def test_no_timeout_runs_inline(self):
+        assert call_with_timeout(threading.current_thread, None) is (
+            threading.current_thread()
+        )
+
+    def test_propagates_errors(self):
+        def failing():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            call_with_timeout(failing, 1)
+
+    def test_gives_up_after_timeout(self):
+        start = time.monotonic()
+
+        with pytest.raises(DeadlineExceededError):
+            call_with_timeout(time.sleep, 0.05, 1)
+
+        assert time.monotonic() - start < 0.5
@@ -0,0 +1,129 @@
+import threading
+import pytest
+from app.utils.cancellation import CancelToken
+from app.utils.job_scheduler import JobScheduler, QueueFullError
+
+
+class TestJobScheduler:
+    def test_runs_submitted_jobs(self):
+        scheduler = JobScheduler(max_workers=2, max_queue_size=4)
+        done = threading.Event()
+
+        position = scheduler.submit("job-1", done.set)
+
+        assert position == 0
+        assert done.wait(timeout=2)
+
+    def test_rejects_when_queue_full(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking_job():
+            started.set()
+            release.wait(timeout=2)
+
+        scheduler.submit("running", blocking_job)
+        assert started.wait(timeout=2)
+        scheduler.submit("waiting", lambda: None)
+
+        with pytest.raises(QueueFullError) as exc_info:
+            scheduler.submit("rejected", lambda: None)
+
+        assert exc_info.value.retry_after >= 1
+        release.set()
+
+    def test_reports_queue_positions(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+        release = threading.Event()
+        started = threading.Event()
+        positions = []
+        second_done = threading.Event()
+
+        def blocking_job():
+            started.set()
+            release.wait(timeout=2)
+
+        scheduler.submit("running", blocking_job)
+        assert started.wait(timeout=2)
+
+        queued_at = scheduler.submit(
+            "second", second_done.set, on_position=positions.append
+        )
+        scheduler.submit("third", lambda: None)
+
+        assert queued_at == 1
+        assert scheduler.queue_position("third") == 2
+        assert scheduler.stats()["queued"] == 2
+
+        release.set()
+        assert second_done.wait(timeout=2)
+        assert positions == [1]
+
+    def test_failing_job_does_not_kill_worker(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+        done = threading.Event()
+
+        def failing_job():
+            raise RuntimeError("boom")
+
+        scheduler.submit("failing", failing_job)
+        scheduler.submit("next", done.set)
+
+        assert done.wait(timeout=2)
+
+    def test_cancel_queued_job_never_runs(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+        release = threading.Event()
+        started = threading.Event()
+        ran = []
+
+        def blocking_job():
+            started.set()
+            release.wait(timeout=2)
+
+        scheduler.submit("running", blocking_job)
+        assert started.wait(timeout=2)
+        token = CancelToken()
+        cancelled = []
+        scheduler.submit(
+            "queued",
+            lambda: ran.append(True),
+            cancel_token=token,
+            on_cancel=cancelled.append,
+        )
+
+        assert scheduler.cancel("queued", "Client disconnected") == "queued"
+        assert token.cancelled
+        assert cancelled == ["Client disconnected"]
+        assert scheduler.queue_position("queued") is None
+
+        done = threading.Event()
+        scheduler.submit("after", done.set)
+        release.set()
+        assert done.wait(timeout=2)
+        assert ran == []
+
+    def test_cancel_running_job_signals_token(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+        token = CancelToken()
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def cooperative_job():
+            started.set()
+            while not token.cancelled:
+                token._event.wait(0.01)
+            stopped.set()
+
+        scheduler.submit("running", cooperative_job, cancel_token=token)
+        assert started.wait(timeout=2)
+
+        assert scheduler.cancel("running", "Client disconnected") == "running"
+        assert stopped.wait(timeout=2)
+        assert token.reason == "Client disconnected"
+
+    def test_cancel_unknown_job(self):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+
+        assert scheduler.cancel("missing") is None
@@ -0,0 +1,113 @@
+import time
+import pytest
+from app.utils import job_store
+from app.utils.job_store import JobState, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+class TestJobStore:
+    def test_create_and_complete_job(self, store):
+        store.create_job("job-1", "Some article text")
+        store.mark_running("job-1")
+        assert store.get_job("job-1").state == JobState.RUNNING
+
+        store.complete_job("job-1", {"locations": [], "request_id": "job-1"})
+
+        job = store.get_job("job-1")
+        assert job.state == JobState.COMPLETE
+        assert job.result["request_id"] == "job-1"
+
+    def test_checkpoints_round_trip(self, store):
+        store.create_job("job-1", "text")
+        store.save_checkpoint("job-1", "article", {"title": "T", "text": "body"})
+        store.save_checkpoint("job-1", "extraction", {"locations": []})
+
+        checkpoints = store.load_checkpoints("job-1")
+
+        assert checkpoints["article"] == {"title": "T", "text": "body"}
+        assert checkpoints["extraction"] == {"locations": []}
+
+    def test_complete_job_drops_checkpoints(self, store):
+        store.create_job("job-1", "text")
+        store.save_checkpoint("job-1", "article", {"title": "T", "text": "body"})
+
+        store.complete_job("job-1", {"locations": []})
+
+        assert store.load_checkpoints("job-1") == {}
+
+    def test_fail_job_records_error(self, store):
+        store.create_job("job-1", "text")
+        store.fail_job("job-1", "Processing failed: boom")
+
+        job = store.get_job("job-1")
+        assert job.state == JobState.FAILED
+        assert job.error == "Processing failed: boom"
+
+    def test_claims_jobs_from_dead_owner_only_once(self, store):
+        store.create_job("orphaned", "text")
+        store.create_job("mine", "text")
+        store._connect().execute(
+            "UPDATE jobs SET owner = 'gone-host:1', updated_at = ? WHERE job_id = 'orphaned'",
+            (time.time() - 3600,),
+        )
+
+        claimed = store.claim_resumable_jobs()
+
+        assert [job.job_id for job in claimed] == ["orphaned"]
+        assert store.claim_resumable_jobs() == []
+
+    def test_does_not_claim_recent_jobs_on_other_hosts(self, store):
+        store.create_job("busy", "text")
+        store._connect().execute(
+            "UPDATE jobs SET owner = 'other-host:1' WHERE job_id = 'busy'"
+        )
+
+        assert store.claim_resumable_jobs() == []
+
+    def test_claims_jobs_of_previous_process_with_same_pid(self, store, monkeypatch):
+        store.create_job("before-restart", "text")
+        store._connect().execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = 'before-restart'",
+            (time.time() - 3600,),
+        )
+        # A restarted worker gets the same pid but a new owner id
+        monkeypatch.setattr(job_store, "_owner", None)
+
+        claimed = store.claim_resumable_jobs()
+
+        assert [job.job_id for job in claimed] == ["before-restart"]
+
+    def test_heartbeat_keeps_live_jobs_from_being_claimed(self, store, monkeypatch):
+        store.create_job("busy", "text")
+        store._connect().execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = 'busy'",
+            (time.time() - 3600,),
+        )
+
+        assert store.heartbeat() == 1
+        monkeypatch.setattr(job_store, "_owner", None)  # seen from another worker
+
+        assert store.claim_resumable_jobs() == []
+
+    def test_released_job_can_be_claimed(self, store):
+        store.create_job("deferred", "text")
+        store.release_job("deferred")
+
+        assert store.get_job("deferred").owner is None
+        assert [job.job_id for job in store.claim_resumable_jobs()] == ["deferred"]
+
+    def test_purge_expired_keeps_unfinished_jobs(self, store):
+        store.create_job("done", "text")
+        store.complete_job("done", {"locations": []})
+        store.create_job("pending", "text")
+
+        time.sleep(0.01)
+        removed = store.purge_expired(0)
+
+        assert removed == 1
+        assert store.get_job("done") is None
+        assert store.get_job("pending") is not None
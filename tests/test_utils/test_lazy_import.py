@@ -0,0 +1,29 @@
+import sys
+from unittest.mock import patch
+from app.utils import lazy_import as lazy_import_module
+from app.utils.lazy_import import LazyModule, lazy_import, preload_lazy_modules
+
+
+class TestLazyImport:
+    def test_module_is_imported_on_first_attribute_access(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+        colorsys = LazyModule("colorsys")
+
+        assert "colorsys" not in sys.modules
+        assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert "colorsys" in sys.modules
+
+    def test_patching_an_attribute_shadows_the_module(self):
+        json = LazyModule("json")
+
+        with patch.object(json, "dumps", return_value="patched"):
+            assert json.dumps({}) == "patched"
+        assert json.dumps({}) == "{}"
+
+    def test_same_name_shares_one_stand_in_and_preloads(self, monkeypatch):
+        monkeypatch.setattr(lazy_import_module, "_lazy_modules", {})
+        monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+
+        assert lazy_import("colorsys") is lazy_import("colorsys")
+        assert preload_lazy_modules() == ["colorsys"]
+        assert "colorsys" in sys.modules
@@ -0,0 +1,56 @@
+import pytest
+from app.models.data_models import LocationData
+from app.utils.location_formats import (
+    location_fields,
+    parse_format,
+    to_columnar,
+    to_geojson,
+)
+from app.utils.response_encoding import parse_projection
+
+LOCATIONS = [
+    LocationData(
+        name="Porto", latitude=41.15, longitude=-8.61, events_summary="Floods."
+    ),
+    LocationData(
+        name="Braga", latitude=41.55, longitude=-8.42, events_summary="Floods."
+    ),
+    LocationData(name="Porto", latitude=41.16, longitude=-8.62),
+]
+
+
+class TestLocationFormats:
+    def test_geojson_points_are_longitude_first(self):
+        collection = to_geojson(
+            LOCATIONS, ["name", "latitude", "longitude"], {"article_title": "Rain"}
+        )
+
+        assert collection["type"] == "FeatureCollection"
+        feature = collection["features"][0]
+        assert feature["geometry"] == {"type": "Point", "coordinates": [-8.61, 41.15]}
+        assert feature["properties"] == {"name": "Porto"}
+        assert collection["metadata"] == {"article_title": "Rain"}
+
+    def test_columnar_deduplicates_strings(self):
+        fields = ["name", "latitude", "longitude", "events_summary"]
+
+        result = to_columnar(LOCATIONS, fields, {})
+
+        assert result["count"] == 3
+        assert result["strings"] == ["Porto", "Braga", "Floods."]
+        assert result["columns"] == {
+            "name": [0, 1, 0],
+            "latitude": [41.15, 41.55, 41.16],
+            "longitude": [-8.61, -8.42, -8.62],
+            "events_summary": [2, 2, None],
+        }
+
+    def test_projection_picks_the_location_fields(self):
+        assert location_fields(parse_projection(None, "locations.name")) == ["name"]
+        assert "confidence" in location_fields(parse_projection(None, None))
+
+    def test_unknown_format_is_rejected(self):
+        assert parse_format(None) == "json"
+        assert parse_format("GeoJSON") == "geojson"
+        with pytest.raises(ValueError):
+            parse_format("csv")
@@ -0,0 +1,60 @@
+import pytest
+from app.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics:
+    def test_counter_renders_labelled_samples(self):
+        counter = Counter("jobs_total", "Jobs run", ["state"])
+        counter.inc(state="done")
+        counter.inc(2, state="done")
+
+        lines = counter.render()
+
+        assert lines[:2] == ["# HELP jobs_total Jobs run", "# TYPE jobs_total counter"]
+        assert 'jobs_total{state="done"} 3' in lines
+
+    def test_wrong_labels_are_rejected(self):
+        counter = Counter("jobs_total", "Jobs run", ["state"])
+
+        with pytest.raises(ValueError):
+            counter.inc(kind="done")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ["stage"], buckets=(1, 5))
+        for value in (0.5, 2, 2, 10):
+            histogram.observe(value, stage="geocode")
+
+        lines = histogram.render()
+
+        assert 'latency_seconds_bucket{stage="geocode",le="1"} 1' in lines
+        assert 'latency_seconds_bucket{stage="geocode",le="5"} 3' in lines
+        assert 'latency_seconds_bucket{stage="geocode",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{stage="geocode"} 14.5' in lines
+        assert 'latency_seconds_count{stage="geocode"} 4' in lines
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("errors_total", "Errors", ["message"])
+        counter.inc(message='bad "quote"\n')
+
+        assert 'errors_total{message="bad \\"quote\\"\\n"} 1' in counter.render()
+
+    def test_callback_gauge_is_read_at_render_time(self):
+        depth = {"value": 1}
+        gauge = Gauge(
+            "queue_depth",
+            "Depth",
+            ["queue"],
+            callback=lambda: {("sse",): depth["value"]},
+        )
+        depth["value"] = 7
+
+        assert 'queue_depth{queue="sse"} 7' in gauge.render()
+
+    def test_registry_keeps_first_registration(self):
+        registry = Registry()
+        first = registry.register(Counter("jobs_total", "Jobs run"))
+        second = registry.register(Counter("jobs_total", "Jobs run"))
+        first.inc()
+
+        assert second is first
+        assert registry.render().endswith("jobs_total 1\n")
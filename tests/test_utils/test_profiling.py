@@ -0,0 +1,125 @@
+import concurrent.futures
+import time
+import tracemalloc
+import uuid
+import pytest
+from app.utils import profiling
+from app.utils.profiling import ProfileStore, get_profile_store, profile_request
+from app.utils.stage_timing import submit_in_context
+from config import Config
+
+
+def parse_article():
+    time.sleep(0.05)
+
+
+def geocode_in_worker():
+    time.sleep(0.05)
+
+
+@pytest.fixture(autouse=True)
+def fresh_durations():
+    profiling.recent_durations.clear()
+    yield
+    profiling.recent_durations.clear()
+
+
+class TestRequestProfiling:
+    def test_unprofiled_runs_only_record_duration(self):
+        request_id = str(uuid.uuid4())
+
+        with profile_request(request_id) as profile:
+            parse_article()
+
+        assert profile is None
+        assert get_profile_store().get(request_id) is None
+        assert not tracemalloc.is_tracing()
+
+    def test_forced_profile_covers_pool_workers(self):
+        request_id = str(uuid.uuid4())
+
+        with profile_request(request_id, forced=True) as profile:
+            parse_article()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                submit_in_context(executor, geocode_in_worker).result()
+
+        assert profile.trigger == "request"
+        store = get_profile_store()
+        functions = [row["function"] for row in store.get(request_id)["top_functions"]]
+        assert any("parse_article" in name for name in functions)
+        assert any("geocode_in_worker" in name for name in functions)
+        with open(store.artifact_path(request_id, "stacks")) as f:
+            stack, samples = f.readline().rsplit(" ", 1)
+        assert int(samples) > 0
+        assert "test_forced_profile_covers_pool_workers" in stack
+        snapshot = tracemalloc.Snapshot.load(store.artifact_path(request_id, "memory"))
+        assert snapshot.traceback_limit == profiling.TRACEMALLOC_FRAMES
+        assert not tracemalloc.is_tracing()
+
+    def test_failed_run_is_stored_with_error_outcome(self):
+        request_id = str(uuid.uuid4())
+
+        with pytest.raises(RuntimeError):
+            with profile_request(request_id, forced=True):
+                raise RuntimeError("Nominatim down")
+
+        assert get_profile_store().get(request_id)["outcome"] == "error"
+
+    def test_sampled_profile_kept_only_for_slowest_runs(self, monkeypatch):
+        monkeypatch.setattr(Config, "PROFILE_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(Config, "PROFILE_SLOWEST_PERCENT", 10)
+        for _ in range(profiling.MIN_DURATIONS):
+            profiling.recent_durations.record(0.05)
+        fast, slow = str(uuid.uuid4()), str(uuid.uuid4())
+
+        with profile_request(fast) as profile:
+            pass
+        with profile_request(slow):
+            time.sleep(0.06)
+
+        assert profile.trigger == "sampled"
+        assert get_profile_store().get(fast) is None
+        assert get_profile_store().get(slow)["trigger"] == "sampled"
+
+    def test_sampled_profile_needs_enough_history(self, monkeypatch):
+        monkeypatch.setattr(Config, "PROFILE_SAMPLE_RATE", 1.0)
+        request_id = str(uuid.uuid4())
+
+        with profile_request(request_id):
+            parse_article()
+
+        assert get_profile_store().get(request_id) is None
+
+    def test_threshold_is_slowest_percent_of_recent_runs(self):
+        for seconds in range(100):
+            profiling.recent_durations.record(seconds)
+
+        assert profiling.recent_durations.threshold(5) == 95
+        assert profiling.recent_durations.threshold(100) == 0
+
+
+class TestProfileStore:
+    def _save(self, store, request_id):
+        profile = profiling.RequestProfile(request_id, "request")
+        profile.start()
+        snapshot = profile.stop()
+        store.save(profile, snapshot, 0.1, "ok")
+
+    def test_keeps_only_newest_profiles(self, tmp_path):
+        store = ProfileStore(str(tmp_path / "profiles"), max_stored=2)
+        ids = [str(uuid.uuid4()) for _ in range(3)]
+        for request_id in ids:
+            self._save(store, request_id)
+
+        listed = [p["profile_id"] for p in store.list()]
+        assert len(listed) == 2
+        assert ids[0] not in listed
+        assert store.artifact_path(ids[0], "stacks") is None
+        assert "top_functions" not in store.list()[0]
+
+    def test_rejects_ids_that_are_not_request_ids(self, tmp_path):
+        store = ProfileStore(str(tmp_path / "profiles"), max_stored=2)
+
+        assert store.get("../../config") is None
+        assert store.artifact_path("../../config", "stacks") is None
+        assert store.artifact_path(str(uuid.uuid4()), "flamegraph") is None
@@ -0,0 +1,85 @@
+import time
+from app.utils import progress_tracker as tracker_module
+from app.utils.progress_tracker import (
+    ProgressStatus,
+    ProgressTracker,
+    cleanup_progress_tracker,
+    find_progress_tracker,
+    get_progress_tracker,
+)
+
+
+class TestProgressTracker:
+    def test_events_get_monotonic_ids(self):
+        tracker = ProgressTracker("session")
+        tracker.start_processing()
+        tracker.start_article_extraction("Some text")
+        tracker.start_location_extraction(100)
+
+        ids = [event.event_id for event in tracker.events_since(0)]
+        assert ids == [1, 2, 3]
+        assert tracker.last_event_id == 3
+
+    def test_events_since_replays_only_missed_events(self):
+        tracker = ProgressTracker("session")
+        tracker.start_processing()
+        tracker.start_location_extraction(100)
+        tracker.locations_found(2)
+
+        missed = tracker.events_since(1)
+
+        assert [event.event_id for event in missed] == [2, 3]
+        # Same status emitted twice is still replayed in full
+        assert all(
+            event.status == ProgressStatus.EXTRACTING_LOCATIONS for event in missed
+        )
+
+    def test_history_is_bounded(self):
+        tracker = ProgressTracker("session", buffer_size=3)
+        for _ in range(5):
+            tracker.start_processing()
+
+        assert [event.event_id for event in tracker.events_since(0)] == [3, 4, 5]
+
+    def test_terminal_event_marks_finished(self):
+        tracker = ProgressTracker("session")
+        assert not tracker.is_finished
+
+        tracker.complete(2, 1.5)
+
+        assert tracker.is_finished
+
+    def test_wait_for_events_times_out(self):
+        tracker = ProgressTracker("session")
+        tracker.start_processing()
+
+        assert tracker.wait_for_events(1, timeout=0.01) == []
+
+    def test_sse_data_includes_event_id(self):
+        tracker = ProgressTracker("session")
+        tracker.start_processing()
+
+        data = tracker.get_sse_data(tracker.events_since(0)[0])
+
+        assert data.startswith("id: 1\n")
+        assert '"session_id": "session"' in data
+
+
+class TestProgressTrackerRegistry:
+    def test_find_does_not_create_tracker(self):
+        assert find_progress_tracker("missing-session") is None
+        assert find_progress_tracker("missing-session") is None
+
+    def test_finished_trackers_are_swept_after_retention(self, monkeypatch):
+        monkeypatch.setattr(
+            tracker_module.Config, "PROGRESS_TRACKER_RETENTION_SECONDS", 10
+        )
+        old = get_progress_tracker("old-session")
+        old.complete(0, 0.1)
+        old.finished_at = time.time() - 60
+
+        get_progress_tracker("new-session")
+
+        assert find_progress_tracker("old-session") is None
+        assert find_progress_tracker("new-session") is not None
+        cleanup_progress_tracker("new-session")
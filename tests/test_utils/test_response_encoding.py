@@ -0,0 +1,84 @@
+import gzip
+import json
+import pytest
+from flask import Response
+from app.utils import response_encoding
+from app.utils.response_encoding import (
+    choose_encoding,
+    compress_response,
+    encode_json,
+    parse_projection,
+    project,
+)
+from config import Config
+
+RESULT = {
+    "article_title": "Floods",
+    "article_text": "Rain in Porto.",
+    "locations": [{"name": "Porto", "latitude": 41.15, "longitude": -8.61}],
+}
+
+
+class TestProjection:
+    def test_compact_view_drops_article_text(self):
+        assert "article_text" not in project(RESULT, parse_projection(None, None))
+        assert project(RESULT, parse_projection("full", None)) == RESULT
+
+    def test_fields_select_response_and_location_fields(self):
+        projection = parse_projection("full", "article_title, locations.name")
+
+        assert project(RESULT, projection) == {
+            "article_title": "Floods",
+            "locations": [{"name": "Porto"}],
+        }
+
+    def test_whole_field_wins_over_its_subfields(self):
+        projection = parse_projection(None, "locations.name,locations")
+
+        assert project(RESULT, projection)["locations"] == RESULT["locations"]
+
+    @pytest.mark.parametrize(
+        "view, fields",
+        [("everything", None), (None, "body"), (None, "locations.body"), (None, ",")],
+    )
+    def test_unknown_names_are_rejected(self, view, fields):
+        with pytest.raises(ValueError):
+            parse_projection(view, fields)
+
+
+class TestEncoding:
+    def test_stdlib_encoder_matches_orjson(self, monkeypatch):
+        fast = encode_json(RESULT)
+        monkeypatch.setattr(Config, "RESPONSE_JSON_ENCODER", "json")
+
+        assert json.loads(encode_json(RESULT)) == json.loads(fast) == RESULT
+
+    def test_encoding_follows_client_preference(self, monkeypatch):
+        monkeypatch.setattr(response_encoding, "brotli", None)
+
+        assert choose_encoding("gzip, deflate, br") == "gzip"
+        assert choose_encoding("gzip;q=0, identity") is None
+        assert choose_encoding("*") == "gzip"
+        assert choose_encoding("") is None
+
+    def test_brotli_preferred_when_installed(self):
+        pytest.importorskip("brotli")
+
+        assert choose_encoding("gzip, br") == "br"
+        assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+    def test_small_and_streamed_bodies_are_not_compressed(self):
+        small = compress_response(Response("{}"), "gzip")
+        streamed = compress_response(Response(iter(["x" * 4096])), "gzip")
+
+        assert "Content-Encoding" not in small.headers
+        assert "Content-Encoding" not in streamed.headers
+
+    def test_large_body_is_gzipped(self):
+        body = json.dumps(RESULT) * 100
+
+        response = compress_response(Response(body), "gzip")
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()).decode() == body
+        assert response.content_length == len(response.get_data())
@@ -0,0 +1,89 @@
+import concurrent.futures
+import pytest
+from app.utils import metrics
+from app.utils.cancellation import JobCancelledError
+from app.utils.stage_timing import (
+    collect_timings,
+    record_tokens,
+    submit_in_context,
+    timed,
+)
+
+
+class TestStageTiming:
+    def test_timed_blocks_are_collected_per_run(self):
+        with collect_timings() as timings:
+            with timed("geocode", detail="Paris"):
+                pass
+            with timed("geocode", detail="Lyon"):
+                pass
+
+        result = timings.to_dict()
+        assert result["stages"]["geocode"]["count"] == 2
+        assert [event["detail"] for event in result["events"]] == ["Paris", "Lyon"]
+
+    def test_timed_outside_a_run_only_feeds_histograms(self):
+        before = metrics.STAGE_SECONDS.count(stage="parse")
+
+        with timed("parse"):
+            pass
+
+        assert metrics.STAGE_SECONDS.count(stage="parse") == before + 1
+
+    def test_upstream_failure_is_counted_and_reraised(self):
+        before = metrics.UPSTREAM_ERRORS.value(upstream="gemini", kind="rate_limit")
+
+        with collect_timings() as timings:
+            with pytest.raises(RuntimeError):
+                with timed("summary", upstream="gemini"):
+                    raise RuntimeError("429 quota exceeded")
+
+        assert timings.to_dict()["events"][0]["error"] == "rate_limit"
+        assert (
+            metrics.UPSTREAM_ERRORS.value(upstream="gemini", kind="rate_limit")
+            == before + 1
+        )
+
+    def test_cancellation_is_not_an_upstream_error(self):
+        with collect_timings() as timings:
+            with pytest.raises(JobCancelledError):
+                with timed("geocode", upstream="nominatim"):
+                    raise JobCancelledError("Client disconnected")
+
+        assert "error" not in timings.to_dict()["events"][0]
+
+    def test_submit_in_context_reaches_worker_threads(self):
+        def work():
+            with timed("summary", detail="Paris"):
+                pass
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            with collect_timings() as timings:
+                submit_in_context(executor, work).result()
+                executor.submit(work).result()
+        finally:
+            executor.shutdown()
+
+        assert timings.to_dict()["stages"]["summary"]["count"] == 1
+
+    def test_tokens_are_collected_per_run_and_counted(self):
+        before = metrics.LLM_TOKENS.value(
+            model="gemini-2.5-flash", stage="summary", kind="prompt"
+        )
+
+        with collect_timings() as timings:
+            record_tokens("summary", "gemini-2.5-flash", 100, 10, 0.001)
+            record_tokens("summary", "gemini-2.5-flash", 50, 5, 0.0005)
+            record_tokens("extraction", "gemini-2.0-flash", 800, 40)
+
+        tokens = timings.to_dict()["tokens"]
+        assert (tokens["prompt_tokens"], tokens["output_tokens"]) == (950, 55)
+        assert tokens["cost_usd"] == 0.0015
+        assert tokens["by_stage"][0]["calls"] == 2
+        assert (
+            metrics.LLM_TOKENS.value(
+                model="gemini-2.5-flash", stage="summary", kind="prompt"
+            )
+            == before + 150
+        )
@@ -0,0 +1,135 @@
+import concurrent.futures
+import json
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from app.api import routes
+from app.models.data_models import ArticleRequest
+from app.utils import tracing
+from app.utils.job_scheduler import JobScheduler
+from app.utils.stage_timing import submit_in_context
+from config import Config
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(Config, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(Config, "TRACE_EXPORT_PATH", str(path))
+    monkeypatch.setattr(Config, "TRACE_EXPORT_URL", "")
+    return path
+
+
+def _exported_spans(path):
+    assert tracing.get_exporter().flush()
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource in json.loads(line)["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return {span["name"]: span for span in spans}
+
+
+class TestTracing:
+    def test_unsampled_requests_create_no_spans(self, monkeypatch):
+        monkeypatch.setattr(Config, "TRACE_SAMPLE_RATE", 0.0)
+
+        root = tracing.start_trace("POST /api/extract", "req-1")
+
+        assert root is None
+        with tracing.use_span(root):
+            assert tracing.start_span("geocode") is None
+
+    def test_request_id_becomes_trace_id(self, trace_file):
+        request_id = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+        root = tracing.start_trace("POST /api/extract", request_id)
+
+        assert root.trace.trace_id == request_id.replace("-", "")
+        assert root.attributes["request.id"] == request_id
+
+    def test_spans_nest_and_export_as_otlp_json(self, trace_file):
+        @tracing.traced("geocode_with_boundaries")
+        def geocode(name):
+            tracing.set_attribute("location.name", name)
+
+        with tracing.use_span(tracing.start_trace("POST /api/extract", "req-1")):
+            geocode("Paris")
+
+        spans = _exported_spans(trace_file)
+        root, child = spans["POST /api/extract"], spans["geocode_with_boundaries"]
+        assert child["traceId"] == root["traceId"]
+        assert child["parentSpanId"] == root["spanId"]
+        assert "parentSpanId" not in root
+        assert child["attributes"] == [
+            {"key": "location.name", "value": {"stringValue": "Paris"}}
+        ]
+
+    def test_errors_mark_the_span(self, trace_file):
+        with pytest.raises(ValueError):
+            with tracing.use_span(tracing.start_trace("POST /api/extract", "req-1")):
+                with tracing.span("summarize_events_at_location"):
+                    raise ValueError("boom")
+
+        span = _exported_spans(trace_file)["summarize_events_at_location"]
+        assert span["status"] == {"code": 2, "message": "ValueError: boom"}
+
+    def test_spans_propagate_into_executor_workers(self, trace_file):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        try:
+            with tracing.use_span(tracing.start_trace("POST /api/extract", "req-1")):
+                submit_in_context(
+                    executor, tracing.traced("geocode_with_boundaries")(lambda: None)
+                ).result()
+        finally:
+            executor.shutdown()
+
+        spans = _exported_spans(trace_file)
+        assert (
+            spans["geocode_with_boundaries"]["parentSpanId"]
+            == spans["POST /api/extract"]["spanId"]
+        )
+
+    def test_trace_waits_for_background_job(self, trace_file):
+        done = threading.Event()
+
+        def job():
+            with tracing.span("apply_spatial_filtering"):
+                pass
+            done.set()
+
+        with tracing.use_span(tracing.start_trace("POST /api/extract", "req-1")):
+            job_span = tracing.start_span("process_job")
+            thread = threading.Thread(target=tracing.bind(job_span, job))
+
+        # The root has ended, but the job's spans still belong to the trace
+        thread.start()
+        thread.join()
+
+        spans = _exported_spans(trace_file)
+        assert set(spans) == {
+            "POST /api/extract",
+            "process_job",
+            "apply_spatial_filtering",
+        }
+        assert (
+            spans["apply_spatial_filtering"]["parentSpanId"]
+            == spans["process_job"]["spanId"]
+        )
+
+    def test_cancelled_queued_job_ends_its_span(self, trace_file):
+        scheduler = JobScheduler(max_workers=1, max_queue_size=4)
+        started, release = threading.Event(), threading.Event()
+        scheduler.submit("busy", lambda: (started.set(), release.wait(timeout=2)))
+        assert started.wait(timeout=2)
+
+        with patch.object(routes, "get_job_scheduler", return_value=scheduler):
+            with tracing.use_span(tracing.start_trace("GET /api/extract", "req-1")):
+                routes._submit_job("req-1", ArticleRequest(input="Paris"), Mock())
+            scheduler.cancel("req-1", "Client disconnected")
+        release.set()
+
+        spans = _exported_spans(trace_file)
+        assert set(spans) == {"GET /api/extract", "process_job"}
+        assert spans["process_job"]["status"]["code"] == tracing.STATUS_ERROR
+        assert "Client disconnected" in spans["process_job"]["status"]["message"]